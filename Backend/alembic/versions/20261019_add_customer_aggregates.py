@@ -0,0 +1,50 @@
+"""add write-time customer_aggregates
+
+Revision ID: 20261019_customer_aggregates
+Revises: 20261019_vehicle_wash_stats
+Create Date: 2026-10-19
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = "20261019_customer_aggregates"
+down_revision = "20261019_vehicle_wash_stats"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "orders",
+        sa.Column("customer_counted", sa.Boolean(), nullable=False, server_default=sa.false()),
+    )
+    op.create_table(
+        "customer_aggregates",
+        sa.Column("tenant_id", sa.String(), sa.ForeignKey("tenants.id"), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), primary_key=True),
+        sa.Column("order_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("total_spent_cents", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("last_order_date", sa.DateTime(), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+    )
+
+    # Backfill from paid / completed orders (same rule as the flush hook)
+    op.execute(
+        """
+        INSERT INTO customer_aggregates (tenant_id, user_id, order_count, total_spent_cents, last_order_date, updated_at)
+        SELECT tenant_id, user_id, count(*), coalesce(sum(amount), 0), max(created_at), now()
+        FROM orders
+        WHERE status IN ('paid', 'completed') AND user_id IS NOT NULL AND tenant_id IS NOT NULL
+        GROUP BY tenant_id, user_id
+        """
+    )
+    op.execute("UPDATE orders SET customer_counted = true WHERE status IN ('paid', 'completed')")
+
+
+def downgrade() -> None:
+    op.drop_table("customer_aggregates")
+    op.drop_column("orders", "customer_counted")
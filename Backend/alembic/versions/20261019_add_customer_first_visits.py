@@ -0,0 +1,47 @@
+"""add customer_first_visits index
+
+Revision ID: 20261019_customer_first_visits
+Revises: 20261019_visit_counts_unique
+Create Date: 2026-10-19
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = "20261019_customer_first_visits"
+down_revision = "20261019_visit_counts_unique"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "customer_first_visits",
+        sa.Column("tenant_id", sa.String(), sa.ForeignKey("tenants.id"), primary_key=True),
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id"), primary_key=True),
+        sa.Column("first_visit_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_customer_first_visits_tenant_at", "customer_first_visits", ["tenant_id", "first_visit_at"])
+    op.create_index("ix_customer_first_visits_at", "customer_first_visits", ["first_visit_at"])
+
+    # One-off backfill (same rule as app.core.first_visits.rebuild_first_visits).
+    # Untenanted legacy orders go to the default tenant ('default' unless
+    # DEFAULT_TENANT is overridden; run first_visits_rebuild in that case).
+    op.execute(
+        """
+        INSERT INTO customer_first_visits (tenant_id, user_id, first_visit_at)
+        SELECT coalesce(tenant_id, 'default'), user_id, min(started_at)
+        FROM orders
+        WHERE started_at IS NOT NULL AND user_id IS NOT NULL
+        GROUP BY coalesce(tenant_id, 'default'), user_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_customer_first_visits_at", table_name="customer_first_visits")
+    op.drop_index("ix_customer_first_visits_tenant_at", table_name="customer_first_visits")
+    op.drop_table("customer_first_visits")
@@ -0,0 +1,41 @@
+"""add customer_segment_summaries for stored customer segments
+
+Revision ID: 20261019_customer_segment_summaries
+Revises: 20261019_module_usage_daily
+Create Date: 2026-10-19
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = "20261019_customer_segment_summaries"
+down_revision = "20261019_module_usage_daily"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "customer_segment_summaries",
+        sa.Column("tenant_id", sa.String(), sa.ForeignKey("tenants.id"), primary_key=True),
+        sa.Column("window_days", sa.Integer(), primary_key=True),
+        sa.Column("segment", sa.String(), primary_key=True),
+        sa.Column("customer_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("total_spent_cents", sa.BigInteger(), nullable=False, server_default="0"),
+        sa.Column("total_orders", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("computed_at", sa.DateTime(), nullable=False),
+    )
+    # Scores used to be computed across all tenants; tag rows with the customer's tenant
+    op.execute(
+        """
+        UPDATE aggregated_customer_metrics m SET tenant_id = u.tenant_id
+        FROM users u WHERE u.id = m.user_id AND m.tenant_id IS NULL
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("customer_segment_summaries")
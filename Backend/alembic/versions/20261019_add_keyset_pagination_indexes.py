@@ -0,0 +1,33 @@
+"""add composite indexes backing keyset pagination
+
+Revision ID: 20261019_keyset_indexes
+Revises: 20251006_add_tenant_logo_theme
+Create Date: 2026-10-19
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+
+revision = "20261019_keyset_indexes"
+down_revision = "20251006_add_tenant_logo_theme"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # (sort key, id) pairs used by cursor pagination on list endpoints
+    op.create_index("ix_users_tenant_created_id", "users", ["tenant_id", "created_at", "id"])
+    op.create_index("ix_orders_started_id", "orders", ["started_at", "id"])
+    op.create_index("ix_payments_created_id", "payments", ["created_at", "id"])
+    op.create_index("ix_audit_logs_created_id", "audit_logs", ["created_at", "id"])
+    op.create_index("ix_notifications_tenant_created_id", "notifications", ["tenant_id", "created_at", "id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_notifications_tenant_created_id", table_name="notifications")
+    op.drop_index("ix_audit_logs_created_id", table_name="audit_logs")
+    op.drop_index("ix_payments_created_id", table_name="payments")
+    op.drop_index("ix_orders_started_id", table_name="orders")
+    op.drop_index("ix_users_tenant_created_id", table_name="users")
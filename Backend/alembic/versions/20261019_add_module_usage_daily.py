@@ -0,0 +1,57 @@
+"""add module_usage_daily counters for subscription quotas
+
+Revision ID: 20261019_module_usage_daily
+Revises: 20261019_redemption_expiry_index
+Create Date: 2026-10-19
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = "20261019_module_usage_daily"
+down_revision = "20261019_redemption_expiry_index"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "module_usage_daily",
+        sa.Column("tenant_id", sa.String(), sa.ForeignKey("tenants.id"), primary_key=True),
+        sa.Column("module", sa.String(), primary_key=True),
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("count", sa.BigInteger(), nullable=False, server_default="0"),
+    )
+    # Backfill the last 30 days; older history is outside every quota window.
+    op.execute(
+        """
+        INSERT INTO module_usage_daily (tenant_id, module, day, count)
+        SELECT tenant_id, 'core', created_at::date, count(*) FROM orders
+        WHERE tenant_id IS NOT NULL AND created_at >= now() - interval '30 days'
+        GROUP BY tenant_id, created_at::date
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO module_usage_daily (tenant_id, module, day, count)
+        SELECT tenant_id, 'loyalty', created_at::date, count(*) FROM redemptions
+        WHERE created_at >= now() - interval '30 days'
+        GROUP BY tenant_id, created_at::date
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO module_usage_daily (tenant_id, module, day, count)
+        SELECT o.tenant_id, 'billing', p.created_at::date, count(*)
+        FROM payments p JOIN orders o ON o.id = p.order_id
+        WHERE p.status = 'success' AND o.tenant_id IS NOT NULL AND p.created_at >= now() - interval '30 days'
+        GROUP BY o.tenant_id, p.created_at::date
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("module_usage_daily")
@@ -0,0 +1,29 @@
+"""add orders.client_key for idempotent batch ingestion
+
+Revision ID: 20261019_order_client_keys
+Revises: 20261019_resource_versions
+Create Date: 2026-10-19
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = "20261019_order_client_keys"
+down_revision = "20261019_resource_versions"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Nullable: orders from /api/orders/create have no key, and NULLs never
+    # collide under the unique constraint.
+    op.add_column("orders", sa.Column("client_key", sa.String(length=64), nullable=True))
+    op.create_unique_constraint("uq_orders_tenant_client_key", "orders", ["tenant_id", "client_key"])
+
+
+def downgrade() -> None:
+    op.drop_constraint("uq_orders_tenant_client_key", "orders", type_="unique")
+    op.drop_column("orders", "client_key")
@@ -0,0 +1,24 @@
+"""index redemptions (status, created_at) for the expiry sweep
+
+Revision ID: 20261019_redemption_expiry_index
+Revises: 20261019_order_client_keys
+Create Date: 2026-10-19
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+
+revision = "20261019_redemption_expiry_index"
+down_revision = "20261019_order_client_keys"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_redemptions_status_created", "redemptions", ["status", "created_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_redemptions_status_created", table_name="redemptions")
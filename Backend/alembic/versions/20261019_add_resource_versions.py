@@ -0,0 +1,32 @@
+"""add resource_versions for conditional GETs
+
+Revision ID: 20261019_resource_versions
+Revises: 20261019_wash_duration_buckets
+Create Date: 2026-10-19
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = "20261019_resource_versions"
+down_revision = "20261019_wash_duration_buckets"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # No backfill: a missing row reads as version 0 (see app.core.resource_versions).
+    op.create_table(
+        "resource_versions",
+        sa.Column("tenant_id", sa.String(), primary_key=True),
+        sa.Column("scope", sa.String(), primary_key=True),
+        sa.Column("resource", sa.String(), primary_key=True),
+        sa.Column("version", sa.BigInteger(), nullable=False, server_default="0"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("resource_versions")
@@ -0,0 +1,72 @@
+"""add search_documents with trigram index
+
+Revision ID: 20261019_search_documents
+Revises: 20261019_keyset_indexes
+Create Date: 2026-10-19
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = "20261019_search_documents"
+down_revision = "20261019_keyset_indexes"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "search_documents",
+        sa.Column("id", sa.Integer(), primary_key=True, autoincrement=True),
+        sa.Column("entity_type", sa.String(length=16), nullable=False),
+        sa.Column("entity_id", sa.Integer(), nullable=False),
+        sa.Column("owner_user_id", sa.Integer(), nullable=True),
+        sa.Column("tenant_id", sa.String(), nullable=True),
+        sa.Column("content", sa.Text(), nullable=False, server_default=""),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+        sa.UniqueConstraint("entity_type", "entity_id", name="uq_search_documents_entity"),
+    )
+    op.create_index("ix_search_documents_owner_user_id", "search_documents", ["owner_user_id"])
+    op.create_index("ix_search_documents_tenant_type", "search_documents", ["tenant_id", "entity_type"])
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute(
+        "CREATE INDEX ix_search_documents_content_trgm ON search_documents USING gin (content gin_trgm_ops)"
+    )
+
+    # Backfill; mirrors app.core.search.user_content / vehicle_content. Run the
+    # search_reindex job afterwards for exact parity with the Python normaliser.
+    op.execute(
+        r"""
+        INSERT INTO search_documents (entity_type, entity_id, owner_user_id, tenant_id, content, updated_at)
+        SELECT 'user', u.id, u.id, u.tenant_id,
+               lower(concat_ws(' ', u.first_name, u.last_name, u.email, u.phone,
+                     nullif(regexp_replace(coalesce(u.phone, ''), '\D', '', 'g'), ''),
+                     CASE
+                       WHEN regexp_replace(coalesce(u.phone, ''), '\D', '', 'g') ~ '^0\d{9}$'
+                         THEN '27' || substr(regexp_replace(u.phone, '\D', '', 'g'), 2)
+                       WHEN regexp_replace(coalesce(u.phone, ''), '\D', '', 'g') ~ '^27\d{9}$'
+                         THEN '0' || substr(regexp_replace(u.phone, '\D', '', 'g'), 3)
+                     END)),
+               now()
+        FROM users u
+        """
+    )
+    op.execute(
+        r"""
+        INSERT INTO search_documents (entity_type, entity_id, owner_user_id, tenant_id, content, updated_at)
+        SELECT 'vehicle', v.id, v.user_id, u.tenant_id,
+               lower(concat_ws(' ', v.plate, regexp_replace(v.plate, '[^0-9A-Za-z]', '', 'g'), v.make, v.model)),
+               now()
+        FROM vehicles v LEFT JOIN users u ON u.id = v.user_id
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP INDEX IF EXISTS ix_search_documents_content_trgm")
+    op.drop_index("ix_search_documents_tenant_type", table_name="search_documents")
+    op.drop_index("ix_search_documents_owner_user_id", table_name="search_documents")
+    op.drop_table("search_documents")
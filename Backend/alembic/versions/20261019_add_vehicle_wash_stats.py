@@ -0,0 +1,66 @@
+"""add vehicle_wash_stats counters
+
+Revision ID: 20261019_vehicle_wash_stats
+Revises: 20261019_search_documents
+Create Date: 2026-10-19
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = "20261019_vehicle_wash_stats"
+down_revision = "20261019_search_documents"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "order_vehicles",
+        sa.Column("wash_counted", sa.Boolean(), nullable=False, server_default=sa.false()),
+    )
+    op.create_table(
+        "vehicle_wash_stats",
+        sa.Column("vehicle_id", sa.Integer(), sa.ForeignKey("vehicles.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("total_washes", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("last_wash_at", sa.DateTime(), nullable=True),
+        sa.Column("last_order_id", sa.Integer(), nullable=True),
+        sa.Column("last_service_id", sa.Integer(), sa.ForeignKey("services.id"), nullable=True),
+        sa.Column("updated_at", sa.DateTime(), nullable=True),
+    )
+
+    # Backfill from paid / completed orders (same rule as record_order_washes)
+    op.execute(
+        """
+        UPDATE order_vehicles ov SET wash_counted = true
+        FROM orders o
+        WHERE o.id = ov.order_id AND o.status IN ('paid', 'completed')
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO vehicle_wash_stats (vehicle_id, total_washes, last_wash_at, last_order_id, last_service_id, updated_at)
+        SELECT agg.vehicle_id, agg.total_washes, latest.created_at, latest.order_id, latest.service_id, now()
+        FROM (
+            SELECT ov.vehicle_id, count(*) AS total_washes
+            FROM order_vehicles ov JOIN orders o ON o.id = ov.order_id
+            WHERE o.status IN ('paid', 'completed')
+            GROUP BY ov.vehicle_id
+        ) agg
+        JOIN LATERAL (
+            SELECT o.id AS order_id, o.created_at, o.service_id
+            FROM order_vehicles ov JOIN orders o ON o.id = ov.order_id
+            WHERE ov.vehicle_id = agg.vehicle_id AND o.status IN ('paid', 'completed')
+            ORDER BY o.created_at DESC NULLS LAST, o.id DESC
+            LIMIT 1
+        ) latest ON true
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("vehicle_wash_stats")
+    op.drop_column("order_vehicles", "wash_counted")
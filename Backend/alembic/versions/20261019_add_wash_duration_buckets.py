@@ -0,0 +1,53 @@
+"""add wash_duration_buckets sketches
+
+Revision ID: 20261019_wash_duration_buckets
+Revises: 20261019_customer_first_visits
+Create Date: 2026-10-19
+"""
+
+from __future__ import annotations
+
+import sqlalchemy as sa
+from alembic import op
+
+
+revision = "20261019_wash_duration_buckets"
+down_revision = "20261019_customer_first_visits"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "wash_duration_buckets",
+        sa.Column("tenant_id", sa.String(), sa.ForeignKey("tenants.id"), primary_key=True),
+        sa.Column("day", sa.Date(), primary_key=True),
+        sa.Column("bucket", sa.Integer(), primary_key=True),
+        sa.Column("count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("total_seconds", sa.BigInteger(), nullable=False, server_default="0"),
+    )
+    op.create_index("ix_wash_duration_buckets_day", "wash_duration_buckets", ["day"])
+
+    # Backfill; bucket = ceil(ln(seconds) / ln(gamma)), gamma = 1.01 / 0.99,
+    # -1 for sub-second washes (mirrors app.core.duration_sketch.bucket_for).
+    op.execute(
+        """
+        INSERT INTO wash_duration_buckets (tenant_id, day, bucket, count, total_seconds)
+        SELECT tenant_id, day,
+               CASE WHEN seconds < 1 THEN -1 ELSE ceil(ln(seconds) / ln(1.01 / 0.99))::int END AS bucket,
+               count(*), sum(seconds)
+        FROM (
+            SELECT coalesce(tenant_id, 'default') AS tenant_id,
+                   ended_at::date AS day,
+                   greatest(0, floor(extract(epoch FROM ended_at - started_at)))::bigint AS seconds
+            FROM orders
+            WHERE started_at IS NOT NULL AND ended_at IS NOT NULL
+        ) d
+        GROUP BY tenant_id, day, 3
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_wash_duration_buckets_day", table_name="wash_duration_buckets")
+    op.drop_table("wash_duration_buckets")
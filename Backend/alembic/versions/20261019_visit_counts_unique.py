@@ -0,0 +1,43 @@
+"""unique (tenant_id, user_id) on visit_counts for atomic upserts
+
+Revision ID: 20261019_visit_counts_unique
+Revises: 20261019_customer_aggregates
+Create Date: 2026-10-19
+"""
+
+from __future__ import annotations
+
+from alembic import op
+
+
+revision = "20261019_visit_counts_unique"
+down_revision = "20261019_customer_aggregates"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Fold duplicate rows (left by the old read-modify-write path) into the
+    # lowest id before enforcing uniqueness.
+    op.execute(
+        """
+        UPDATE visit_counts vc SET count = dup.total, updated_at = dup.last_seen
+        FROM (
+            SELECT min(id) AS keep_id, sum(count) AS total, max(updated_at) AS last_seen
+            FROM visit_counts GROUP BY tenant_id, user_id HAVING count(*) > 1
+        ) dup
+        WHERE vc.id = dup.keep_id
+        """
+    )
+    op.execute(
+        """
+        DELETE FROM visit_counts vc
+        USING visit_counts keep
+        WHERE vc.tenant_id = keep.tenant_id AND vc.user_id = keep.user_id AND vc.id > keep.id
+        """
+    )
+    op.create_unique_constraint("uq_visit_counts_tenant_user", "visit_counts", ["tenant_id", "user_id"])
+
+
+def downgrade() -> None:
+    op.drop_constraint("uq_visit_counts_tenant_user", "visit_counts", type_="unique")
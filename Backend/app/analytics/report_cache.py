@@ -0,0 +1,253 @@
+"""Pre-warmed dashboard reports for the standard ``days`` windows.
+
+Admins mostly open the same windows (7/30/90/365 days) of the business
+summary, revenue chart, top services and loyalty stats, and each one runs
+several aggregate queries over raw orders. Report builders register here and
+endpoints call ``get_or_build``. Results are cached in-process, keyed by
+(tenant, report, window, params, as-of hour), so an entry never outlives the
+UTC hour it was computed in.
+
+- Only ``STANDARD_WINDOWS`` are cached; any other window is built live.
+- ORM writes to the columns the reports read (orders, redemptions, customers,
+  tenants, service names) publish the ``reports`` invalidation namespace on
+  commit. That drops the tenant's entries in every worker; bulk writes and
+  service renames drop everything.
+- A build that overlaps an invalidation is returned but not stored.
+- Entries are always built on the primary: a miss on a replica-bound session
+  (``get_read_db``) opens a primary session, so a lagging replica cannot seed
+  the cache with rows older than the invalidations it has seen. Uncached
+  windows are built on the caller's session, replica included.
+- The ``report_cache_warm`` job builds the missing entries for tenants with
+  orders in the last ``ACTIVE_TENANT_DAYS``. It runs every
+  ``REPORT_CACHE_WARM_INTERVAL_SECONDS`` and after each customer segments
+  refresh.
+
+Cached values are shared between requests; callers must not mutate them.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Iterable, Optional
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.core import invalidation, jobs
+from app.core.database import SessionLocal, on_replica
+from app.models import Order, Redemption, Service, Tenant, User
+from config import settings
+
+logger = logging.getLogger("api")
+
+NAMESPACE = "reports"
+JOB_NAME = "report_cache_warm"
+STANDARD_WINDOWS = (7, 30, 90, 365)
+ACTIVE_TENANT_DAYS = 30
+ALL_TENANTS = "*"
+
+# model -> columns the reports read; other column changes keep the cache
+SOURCE_COLUMNS = {
+    Order: ("tenant_id", "status", "amount", "created_at", "service_id", "user_id"),
+    Redemption: ("tenant_id", "status", "milestone", "redeemed_at"),
+    User: ("tenant_id", "role"),
+    Tenant: ("loyalty_type",),
+    Service: ("name",),
+}
+
+# builder(db, tenant_id, days, **params) -> JSON-ready value
+Builder = Callable[..., Any]
+
+_lock = threading.Lock()
+_builders: dict[str, Builder] = {}
+_defaults: dict[str, dict] = {}
+_entries: dict[tuple, Any] = {}
+_hour = ""
+_generation = 0
+_tenant_generations: dict[str, int] = {}
+METRICS = {"hits": 0, "misses": 0, "live": 0, "warmed": 0, "stale_builds": 0, "invalidations": 0}
+
+
+def register(report: str, **defaults) -> Callable[[Builder], Builder]:
+    """Decorator registering ``report``'s builder; the warm job builds it with
+    ``defaults``, which must match the endpoint's query defaults."""
+    def decorator(builder: Builder) -> Builder:
+        _builders[report] = builder
+        _defaults[report] = defaults
+        return builder
+    return decorator
+
+
+def as_of_hour(now: Optional[datetime] = None) -> str:
+    return (now or datetime.utcnow()).strftime("%Y-%m-%dT%H")
+
+
+def _token(tenant_id: str) -> tuple[int, int]:
+    return _generation, _tenant_generations.get(tenant_id, 0)
+
+
+def _store(key: tuple, value: Any, token: tuple[int, int]) -> bool:
+    global _hour
+    tenant_id, hour = key[0], key[-1]
+    with _lock:
+        if token != _token(tenant_id):
+            METRICS["stale_builds"] += 1
+            return False
+        if hour > _hour:
+            for old in [k for k in _entries if k[-1] != hour]:
+                del _entries[old]
+            _hour = hour
+        if hour < _hour or len(_entries) >= settings.report_cache_max_entries:
+            return False
+        _entries[key] = value
+        return True
+
+
+def _fetch(db: Session, tenant_id: str, report: str, days: int, params: dict) -> tuple[Any, bool]:
+    """``(value, built)`` for one standard-window report."""
+    params = {**_defaults[report], **params}
+    key = (tenant_id, report, days, tuple(sorted(params.items())), as_of_hour())
+    with _lock:
+        if key in _entries:
+            return _entries[key], False
+        token = _token(tenant_id)
+    if on_replica(db):
+        with SessionLocal() as primary:
+            value = _builders[report](primary, tenant_id, days, **params)
+    else:
+        value = _builders[report](db, tenant_id, days, **params)
+    _store(key, value, token)
+    return value, True
+
+
+def get_or_build(db: Session, tenant_id: str, report: str, days: int, **params) -> Any:
+    """``report`` for ``tenant_id`` over the last ``days``, cached for standard windows."""
+    if days not in STANDARD_WINDOWS:
+        with _lock:
+            METRICS["live"] += 1
+        return _builders[report](db, tenant_id, days, **params)
+    value, built = _fetch(db, tenant_id, report, days, params)
+    with _lock:
+        METRICS["misses" if built else "hits"] += 1
+    return value
+
+
+def invalidate(tenant_id: Optional[str] = None) -> None:
+    """Drop cached reports (all of them when ``tenant_id`` is None)."""
+    global _generation
+    with _lock:
+        if tenant_id is None or tenant_id == ALL_TENANTS:
+            _generation += 1
+            _entries.clear()
+        else:
+            _tenant_generations[tenant_id] = _tenant_generations.get(tenant_id, 0) + 1
+            for key in [k for k in _entries if k[0] == tenant_id]:
+                del _entries[key]
+        METRICS["invalidations"] += 1
+
+
+invalidation.subscribe(NAMESPACE, lambda tenant_id, data: invalidate(tenant_id))
+
+
+def stats() -> dict:
+    with _lock:
+        return {**METRICS, "entries": len(_entries), "hour": _hour}
+
+
+def active_tenants(db: Session, now: Optional[datetime] = None) -> list[str]:
+    since = (now or datetime.utcnow()) - timedelta(days=ACTIVE_TENANT_DAYS)
+    rows = db.query(Order.tenant_id).filter(Order.created_at >= since, Order.tenant_id.isnot(None)).distinct()
+    return sorted(t for (t,) in rows)
+
+
+def warm(db: Session, tenant_ids: Optional[Iterable[str]] = None) -> dict:
+    """Build every registered report for the standard windows of ``tenant_ids``
+    (recently active tenants by default); entries already cached are skipped."""
+    started = time.perf_counter()
+    tenant_ids = active_tenants(db) if tenant_ids is None else list(tenant_ids)
+    built = failed = 0
+    for tenant_id in tenant_ids:
+        for report in list(_builders):
+            for days in STANDARD_WINDOWS:
+                try:
+                    built += _fetch(db, tenant_id, report, days, {})[1]
+                except Exception:
+                    failed += 1
+                    db.rollback()
+                    logger.warning("report warm failed", extra={"tenant_id": tenant_id, "report": report,
+                                                                "days": days}, exc_info=True)
+    with _lock:
+        METRICS["warmed"] += built
+    result = {
+        "tenants": len(tenant_ids),
+        "built": built,
+        "failed": failed,
+        "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+    logger.info("report cache warmed", extra=result)
+    return result
+
+
+def _changed_tenant(obj, deleted: bool = False) -> Optional[str]:
+    columns = SOURCE_COLUMNS.get(type(obj))
+    if columns is None:
+        return None
+    if not deleted and inspect(obj).persistent:
+        attrs = inspect(obj).attrs
+        if not any(attrs[c].history.has_changes() for c in columns):
+            return None
+    if isinstance(obj, Service):
+        return ALL_TENANTS  # the catalog is global
+    if isinstance(obj, Tenant):
+        return obj.id
+    return obj.tenant_id or settings.default_tenant
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_report_writes(session: Session, flush_context, instances) -> None:
+    tenants = {_changed_tenant(o) for o in (*session.new, *session.dirty)}
+    tenants |= {_changed_tenant(o, deleted=True) for o in session.deleted}
+    tenants.discard(None)
+    if tenants:
+        session.info.setdefault("report_tenants", set()).update(tenants)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_report_bulk_writes(state) -> None:
+    if (state.is_update or state.is_delete) and state.bind_mapper is not None \
+            and state.bind_mapper.class_ in SOURCE_COLUMNS:
+        state.session.info.setdefault("report_tenants", set()).add(ALL_TENANTS)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session: Session) -> None:
+    tenants = session.info.pop("report_tenants", None)
+    if not tenants:
+        return
+    if ALL_TENANTS in tenants:
+        invalidation.publish(NAMESPACE)
+        return
+    for tenant_id in sorted(tenants):
+        invalidation.publish(NAMESPACE, tenant_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back(session: Session) -> None:
+    session.info.pop("report_tenants", None)
+
+
+def _job_warm_report_cache(payload):
+    payload = payload or {}
+    tenant_ids = [payload["tenant_id"]] if payload.get("tenant_id") else None
+    with SessionLocal() as db:
+        return warm(db, tenant_ids)
+
+
+def schedule(interval_seconds: float):
+    """Enqueue the recurring warm-up (first run on the next worker tick)."""
+    return jobs.enqueue(JOB_NAME, {}, interval=interval_seconds)
+
+
+jobs.register_job_once(JOB_NAME, _job_warm_report_cache)
@@ -0,0 +1,332 @@
+"""Vectorised, tenant-partitioned customer segmentation.
+
+``refresh_segments`` computes, per tenant:
+
+1. RFM scores for ``aggregated_customer_metrics``: one grouped query loads
+   every customer's lifetime / 30d / 90d aggregates into columnar NumPy
+   arrays; quintile boundaries are taken per tenant (a single lexsort by
+   tenant then value) and all scores and segments come from one vectorised
+   pass. Rows are written back with chunked dialect upserts.
+2. The ``/reports/customer-segments`` buckets (VIP / Regular / Occasional /
+   New over the default ``VALUE_SEGMENT_WINDOW_DAYS``) stored in
+   ``customer_segment_summaries``; the endpoint serves them while fresh and
+   only runs its live query for other windows.
+
+Scores: recency scores 5 for the most recent fifth of a tenant's customers;
+frequency (90d washes) and monetary (lifetime revenue) score 5 for the top
+fifth. Quantile boundaries are the values at ``int(n * q)`` of the sorted
+tenant column, so ties always share a score.
+
+Runs as the ``customer_segments_refresh`` job; when ``ENABLE_JOB_QUEUE`` is
+on, startup schedules it every ``CUSTOMER_SEGMENTS_REFRESH_INTERVAL_SECONDS``.
+Each job run then queues a dashboard report warm-up (``report_cache``).
+"""
+from __future__ import annotations
+
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Optional
+
+import numpy as np
+from sqlalchemy import and_, case, func
+from sqlalchemy.orm import Session
+
+from app.analytics import report_cache
+from app.core import jobs
+from app.core.database import SessionLocal, dialect_insert
+from app.models import (
+    AggregatedCustomerMetrics,
+    CustomerSegmentSummary,
+    Order,
+    PointBalance,
+    Redemption,
+    Reward,
+    User,
+)
+from config import settings
+
+logger = logging.getLogger("api")
+
+JOB_NAME = "customer_segments_refresh"
+WASH_STATUSES = ("started", "ended")  # same order filter as the analytics plugin
+QUANTILES = np.array([0.2, 0.4, 0.6, 0.8])
+NO_VISIT_DAYS = 9999
+RFM_SEGMENTS = ("power_user", "at_risk_high_value", "frequent_low_spend", "high_spend_infrequent")
+VALUE_SEGMENTS = ("VIP", "Regular", "Occasional", "New")  # response order of /customer-segments
+VALUE_SEGMENT_WINDOW_DAYS = 180
+WRITE_CHUNK = 1000
+
+
+@dataclass
+class CustomerFrame:
+    """Columnar per-customer aggregates; ``codes`` index into ``tenants``."""
+
+    tenants: np.ndarray
+    codes: np.ndarray
+    user_ids: np.ndarray
+    columns: dict[str, np.ndarray]
+    first_visit_at: list
+    last_visit_at: list
+
+    def __len__(self) -> int:
+        return len(self.user_ids)
+
+
+def _encode_tenants(tenant_ids: list) -> tuple[np.ndarray, np.ndarray]:
+    return np.unique(np.array([t or "" for t in tenant_ids], dtype=object), return_inverse=True)
+
+
+def _lookup(user_ids: np.ndarray, pairs: list) -> np.ndarray:
+    """Vectorised ``{user_id: value}.get(uid, 0)`` for each of ``user_ids``."""
+    out = np.zeros(len(user_ids), dtype=np.int64)
+    if not pairs or not len(user_ids):
+        return out
+    keys = np.array([k for k, _ in pairs], dtype=np.int64)
+    values = np.array([v or 0 for _, v in pairs], dtype=np.int64)
+    order = np.argsort(keys)
+    keys, values = keys[order], values[order]
+    idx = np.clip(np.searchsorted(keys, user_ids), 0, len(keys) - 1)
+    found = keys[idx] == user_ids
+    out[found] = values[idx[found]]
+    return out
+
+
+def load_frame(db: Session, now: datetime, days_30: int = 30, days_90: int = 90,
+               tenant_id: Optional[str] = None) -> CustomerFrame:
+    """One grouped query for every customer's aggregates (+ two point totals)."""
+    start_30 = now - timedelta(days=days_30)
+    start_90 = now - timedelta(days=days_90)
+    in_30 = Order.started_at >= start_30
+    in_90 = Order.started_at >= start_90
+    loyalty = Order.type == "loyalty"
+    q = (
+        db.query(
+            User.tenant_id,
+            Order.user_id,
+            func.count(Order.id),
+            func.coalesce(func.sum(Order.amount), 0),
+            func.min(Order.started_at),
+            func.max(Order.started_at),
+            func.sum(case((loyalty, 1), else_=0)),
+            func.sum(case((in_30, 1), else_=0)),
+            func.sum(case((in_30, Order.amount), else_=0)),
+            func.sum(case((and_(in_30, loyalty), 1), else_=0)),
+            func.sum(case((in_90, 1), else_=0)),
+            func.sum(case((in_90, Order.amount), else_=0)),
+        )
+        .join(User, User.id == Order.user_id)
+        .filter(Order.status.in_(WASH_STATUSES), Order.user_id.isnot(None), User.role == "user")
+    )
+    if tenant_id is not None:
+        q = q.filter(User.tenant_id == tenant_id)
+    rows = q.group_by(User.tenant_id, Order.user_id).all()
+
+    tenants, codes = _encode_tenants([r[0] for r in rows])
+    user_ids = np.array([r[1] for r in rows], dtype=np.int64)
+    names = ("lifetime_washes", "lifetime_revenue", None, None, "loyalty_washes_total", "washes_30d",
+             "revenue_30d", "loyalty_washes_30d", "washes_90d", "revenue_90d")
+    columns = {
+        name: np.array([r[i + 2] or 0 for r in rows], dtype=np.int64)
+        for i, name in enumerate(names) if name
+    }
+
+    redeemed = (
+        db.query(Redemption.user_id, func.sum(Reward.cost))
+        .join(Reward, Reward.id == Redemption.reward_id)
+        .filter(Redemption.status == "redeemed")
+        .group_by(Redemption.user_id)
+        .all()
+    )
+    outstanding = db.query(PointBalance.user_id, func.sum(PointBalance.points)).group_by(PointBalance.user_id).all()
+    columns["points_redeemed_total"] = _lookup(user_ids, redeemed)
+    columns["points_outstanding"] = _lookup(user_ids, outstanding)
+
+    last_visit = [r[5] for r in rows]
+    last64 = np.array(last_visit, dtype="datetime64[us]") if rows else np.array([], dtype="datetime64[us]")
+    recency = (np.datetime64(now, "us") - last64) // np.timedelta64(1, "D")
+    columns["recency_days"] = np.where(np.isnat(last64), NO_VISIT_DAYS, recency).astype(np.int64)
+    return CustomerFrame(tenants, codes, user_ids, columns, [r[4] for r in rows], last_visit)
+
+
+def tenant_quantile_bounds(values: np.ndarray, codes: np.ndarray, n_groups: int) -> np.ndarray:
+    """``(n_groups, 4)`` quintile boundaries of ``values`` within each group."""
+    order = np.lexsort((values, codes))
+    sorted_values = values[order]
+    counts = np.bincount(codes, minlength=n_groups)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    idx = starts[:, None] + np.floor(counts[:, None] * QUANTILES).astype(np.int64)
+    return sorted_values[np.minimum(idx, max(len(values) - 1, 0))]
+
+
+def score_columns(frame: CustomerFrame) -> dict[str, np.ndarray]:
+    """R/F/M scores (1..5) and RFM segment for every row of ``frame``."""
+    n_groups = len(frame.tenants)
+
+    def above(values):
+        bounds = tenant_quantile_bounds(values, frame.codes, n_groups)[frame.codes]
+        return (values[:, None] > bounds).sum(axis=1)
+
+    r = 5 - above(frame.columns["recency_days"])  # fewer days since last visit is better
+    f = 1 + above(frame.columns["washes_90d"])
+    m = 1 + above(frame.columns["lifetime_revenue"])
+    segment = np.select(
+        [
+            (r >= 4) & (f >= 4) & (m >= 4),
+            (r <= 2) & (f >= 4) & (m >= 4),
+            (f >= 4) & (m <= 2),
+            (m >= 4) & (f <= 2),
+        ],
+        RFM_SEGMENTS,
+        default="",
+    )
+    return {"r_score": r, "f_score": f, "m_score": m, "segment": segment}
+
+
+def _upsert(db: Session, model, rows: list[dict], index_elements: list) -> None:
+    insert = dialect_insert(db.get_bind())
+    for i in range(0, len(rows), WRITE_CHUNK):
+        stmt = insert(model).values(rows[i:i + WRITE_CHUNK])
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=index_elements,
+            set_={c: stmt.excluded[c] for c in rows[0] if c not in {e.key for e in index_elements}},
+        ))
+
+
+def write_metrics(db: Session, frame: CustomerFrame, scores: dict[str, np.ndarray], now: datetime) -> int:
+    if not len(frame):
+        return 0
+    cols = {name: values.tolist() for name, values in frame.columns.items() if name != "recency_days"}
+    cols.update({name: scores[name].tolist() for name in ("r_score", "f_score", "m_score")})
+    segments = [s or None for s in scores["segment"].tolist()]
+    tenants = [t or None for t in frame.tenants[frame.codes].tolist()]
+    rows = [
+        {
+            "user_id": uid,
+            "tenant_id": tenants[i],
+            "first_visit_at": frame.first_visit_at[i],
+            "last_visit_at": frame.last_visit_at[i],
+            **{name: values[i] for name, values in cols.items()},
+            "points_redeemed_30d": 0,
+            "segment": segments[i],
+            "snapshot_at": now,
+        }
+        for i, uid in enumerate(frame.user_ids.tolist())
+    ]
+    _upsert(db, AggregatedCustomerMetrics, rows, [AggregatedCustomerMetrics.user_id])
+    return len(rows)
+
+
+def value_segment_window(days: int, now: Optional[datetime] = None) -> tuple[datetime, datetime]:
+    """Same window as ``resolve_date_range(days=...)`` in the reports routes."""
+    today = (now or datetime.utcnow()).date()
+    days = max(1, min(days, 365))
+    return (datetime.combine(today - timedelta(days=days - 1), datetime.min.time()),
+            datetime.combine(today, datetime.max.time()))
+
+
+def compute_value_segments(db: Session, now: datetime, days: int = VALUE_SEGMENT_WINDOW_DAYS,
+                           tenant_id: Optional[str] = None) -> list[dict]:
+    """Per-tenant VIP / Regular / Occasional / New buckets (all tenant customers)."""
+    start, end = value_segment_window(days, now)
+    completed = and_(Order.user_id == User.id, Order.status == "completed", Order.created_at.between(start, end))
+    q = (
+        db.query(User.tenant_id, func.count(Order.id), func.coalesce(func.sum(Order.amount), 0))
+        .outerjoin(Order, completed)
+        .filter(User.role == "user", User.tenant_id.isnot(None))
+    )
+    if tenant_id is not None:
+        q = q.filter(User.tenant_id == tenant_id)
+    rows = q.group_by(User.tenant_id, User.id).all()
+    if not rows:
+        return []
+    tenants, codes = _encode_tenants([r[0] for r in rows])
+    orders = np.array([r[1] for r in rows], dtype=np.int64)
+    spent = np.array([r[2] or 0 for r in rows], dtype=np.int64)
+    priority = np.select(
+        [(orders >= 10) & (spent >= 50000), (orders >= 5) & (spent >= 20000), orders >= 2],
+        [0, 1, 2],
+        default=3,
+    )
+    key = codes * len(VALUE_SEGMENTS) + priority
+    size = len(tenants) * len(VALUE_SEGMENTS)
+    counts = np.bincount(key, minlength=size)
+    spent_sums = np.bincount(key, weights=spent, minlength=size).astype(np.int64)
+    order_sums = np.bincount(key, weights=orders, minlength=size).astype(np.int64)
+    return [
+        {
+            "tenant_id": tenants[k // len(VALUE_SEGMENTS)],
+            "window_days": days,
+            "segment": VALUE_SEGMENTS[k % len(VALUE_SEGMENTS)],
+            "customer_count": int(counts[k]),
+            "total_spent_cents": int(spent_sums[k]),
+            "total_orders": int(order_sums[k]),
+            "computed_at": now,
+        }
+        for k in np.flatnonzero(counts).tolist()
+    ]
+
+
+def write_value_segments(db: Session, rows: list[dict], days: int, tenant_id: Optional[str] = None) -> None:
+    q = db.query(CustomerSegmentSummary).filter(CustomerSegmentSummary.window_days == days)
+    if tenant_id is not None:
+        q = q.filter(CustomerSegmentSummary.tenant_id == tenant_id)
+    q.delete(synchronize_session=False)
+    if rows:
+        db.execute(CustomerSegmentSummary.__table__.insert(), rows)
+
+
+def stored_value_segments(db: Session, tenant_id: str, days: int, max_age_seconds: Optional[float] = None):
+    """``(segment, count, spent, orders, priority)`` rows as the live query returns them,
+    or None when nothing fresh is stored for this window."""
+    if max_age_seconds is None:
+        max_age_seconds = 2 * settings.customer_segments_refresh_interval_seconds or 7200
+    rows = (
+        db.query(CustomerSegmentSummary)
+        .filter(CustomerSegmentSummary.tenant_id == tenant_id, CustomerSegmentSummary.window_days == days)
+        .all()
+    )
+    if not rows or min(r.computed_at for r in rows) < datetime.utcnow() - timedelta(seconds=max_age_seconds):
+        return None
+    rows.sort(key=lambda r: VALUE_SEGMENTS.index(r.segment))
+    return [
+        (r.segment, r.customer_count, r.total_spent_cents, r.total_orders, VALUE_SEGMENTS.index(r.segment) + 1)
+        for r in rows
+    ]
+
+
+def refresh_segments(db: Session, days_30: int = 30, days_90: int = 90, tenant_id: Optional[str] = None) -> dict:
+    """Recompute RFM metrics and stored segment buckets; commits once."""
+    started = time.perf_counter()
+    now = datetime.utcnow()
+    frame = load_frame(db, now, days_30, days_90, tenant_id)
+    scores = score_columns(frame)
+    refreshed = write_metrics(db, frame, scores, now)
+    buckets = compute_value_segments(db, now, VALUE_SEGMENT_WINDOW_DAYS, tenant_id)
+    write_value_segments(db, buckets, VALUE_SEGMENT_WINDOW_DAYS, tenant_id)
+    db.commit()
+    stats = {
+        "refreshed": refreshed,
+        "tenants": len(frame.tenants),
+        "segment_rows": len(buckets),
+        "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+    logger.info("customer segments refreshed", extra=stats)
+    return stats
+
+
+def _job_refresh_segments(payload):
+    payload = payload or {}
+    with SessionLocal() as db:
+        stats = refresh_segments(db, tenant_id=payload.get("tenant_id"))
+    jobs.enqueue(report_cache.JOB_NAME, {"tenant_id": payload.get("tenant_id")})
+    return stats
+
+
+def schedule(interval_seconds: float):
+    """Enqueue the recurring refresh (first run on the next worker tick)."""
+    return jobs.enqueue(JOB_NAME, {}, interval=interval_seconds)
+
+
+jobs.register_job_once(JOB_NAME, _job_refresh_segments)
@@ -14,6 +14,7 @@ from config import settings
 from app.models import User
 from sqlalchemy.orm import Session
 from app.core.database import get_db
+from app.core.module_usage import check_quota
 
 
 class UserRole(str, Enum):
@@ -74,6 +75,26 @@ def require_min_role(min_role: UserRole):
     return _dep
 
 
+def require_quota(module: str):
+    """Dependency rejecting the request (402) once the tenant's ``module`` quota is used up.
+
+    Example:
+        @router.post("/create", dependencies=[Depends(require_quota("core"))])
+    """
+
+    def _dep(user: User = Depends(get_current_user), db: Session = Depends(get_db)) -> User:
+        tenant_id = user.tenant_id or settings.default_tenant
+        quota = check_quota(db, tenant_id, module)
+        if not quota.allowed:
+            raise HTTPException(
+                status_code=status.HTTP_402_PAYMENT_REQUIRED,
+                detail={"error": "quota_exceeded", "module": module, "used": quota.used, "limit": quota.limit},
+            )
+        return user
+
+    return _dep
+
+
 def developer_only(
     request: Request,
     authorization: str | None = Header(default=None, alias="Authorization"),
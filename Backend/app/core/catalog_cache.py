@@ -0,0 +1,172 @@
+"""In-process catalog snapshot (services and extras).
+
+The catalog changes a few times a year but is read on every order: the public
+``/api/catalog`` listings, extras validation in ``create_order`` and the extra
+names / prices shown by order and loyalty endpoints. ``get_catalog`` returns
+an immutable snapshot built with two queries, so per-extra lookups become
+dictionary reads.
+
+Snapshots are versioned by the ``("*", "*", "catalog")`` counter in
+``resource_versions`` (bumped in the writer's transaction by any ORM write to
+``Service`` / ``Extra``). A snapshot re-reads that counter at most every
+``CATALOG_CACHE_CHECK_SECONDS`` and rebuilds when it moved, which picks up
+writes from ``update_prices.py`` and from other workers when no invalidation
+bus is configured. ORM writes publish the ``catalog`` invalidation namespace on
+commit (``after_commit``), dropping the snapshot in every worker, and the
+inventory CRUD endpoints call ``invalidate`` explicitly.
+
+Snapshots are keyed by catalog scope so callers pass their tenant; ``Service``
+and ``Extra`` carry no ``tenant_id`` today, so every tenant shares the global
+snapshot.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass, field, replace
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.core import invalidation
+from app.core.resource_versions import GLOBAL
+from app.models import Extra, ResourceVersion, Service
+from config import settings
+
+CATALOG_RESOURCE = "catalog"
+
+_lock = threading.Lock()
+_snapshots: dict[str, "CatalogSnapshot"] = {}
+METRICS = {"hits": 0, "builds": 0, "version_checks": 0, "invalidations": 0}
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """Read-only view of the catalog; callers must not mutate the dicts."""
+
+    version: int
+    services: dict[int, dict]
+    extras: dict[int, dict]
+    services_by_category: dict[str, list[dict]]
+    checked_at: float = field(default=0.0, compare=False)
+
+    def service(self, service_id) -> Optional[dict]:
+        return self.services.get(_as_id(service_id))
+
+    def extra(self, extra_id) -> Optional[dict]:
+        return self.extras.get(_as_id(extra_id))
+
+    def extra_name(self, extra_id) -> Optional[str]:
+        extra = self.extra(extra_id)
+        return extra["name"] if extra else None
+
+    def extra_price(self, extra_id, category) -> int:
+        """Price of one extra for ``category`` (0 when unknown)."""
+        extra = self.extra(extra_id)
+        if extra is None:
+            return 0
+        return (extra["price_map"] or {}).get(category, 0)
+
+
+def _as_id(value) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _scope_for(tenant_id: Optional[str]) -> str:
+    # Catalog rows are global; see module docstring
+    return GLOBAL
+
+
+def catalog_version(db: Session) -> int:
+    version = (
+        db.query(ResourceVersion.version)
+        .filter_by(tenant_id=GLOBAL, scope=GLOBAL, resource=CATALOG_RESOURCE)
+        .scalar()
+    )
+    return version or 0
+
+
+def build_snapshot(db: Session) -> CatalogSnapshot:
+    # Version first: a write landing mid-build then only causes one extra rebuild
+    version = catalog_version(db)
+    services: dict[int, dict] = {}
+    by_category: dict[str, list[dict]] = {}
+    for s in db.query(Service).order_by(Service.id).all():
+        services[s.id] = {
+            "id": s.id,
+            "category": s.category,
+            "name": s.name,
+            "base_price": s.base_price,
+            "loyalty_eligible": bool(s.loyalty_eligible),
+        }
+        by_category.setdefault(s.category, []).append({"id": s.id, "name": s.name, "base_price": s.base_price})
+    extras = {
+        e.id: {"id": e.id, "name": e.name, "price_map": dict(e.price_map or {})}
+        for e in db.query(Extra).order_by(Extra.id).all()
+    }
+    return CatalogSnapshot(version, services, extras, by_category, checked_at=time.monotonic())
+
+
+def get_catalog(db: Session, tenant_id: Optional[str] = None) -> CatalogSnapshot:
+    """Current catalog snapshot for ``tenant_id``, built on first use."""
+    key = _scope_for(tenant_id)
+    with _lock:
+        snapshot = _snapshots.get(key)
+    if snapshot is not None:
+        if time.monotonic() - snapshot.checked_at < settings.catalog_cache_check_seconds:
+            with _lock:
+                METRICS["hits"] += 1
+            return snapshot
+        with _lock:
+            METRICS["version_checks"] += 1
+        if catalog_version(db) == snapshot.version:
+            snapshot = replace(snapshot, checked_at=time.monotonic())
+            with _lock:
+                _snapshots[key] = snapshot
+            return snapshot
+    snapshot = build_snapshot(db)
+    with _lock:
+        _snapshots[key] = snapshot
+        METRICS["builds"] += 1
+    return snapshot
+
+
+def invalidate(tenant_id: Optional[str] = None) -> None:
+    """Drop cached snapshots (all of them when ``tenant_id`` is None)."""
+    with _lock:
+        if tenant_id is None:
+            _snapshots.clear()
+        else:
+            _snapshots.pop(_scope_for(tenant_id), None)
+        METRICS["invalidations"] += 1
+
+
+invalidation.subscribe("catalog", lambda tenant_id, data: invalidate(tenant_id))
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_catalog_writes(session: Session, flush_context, instances) -> None:
+    if any(isinstance(o, (Service, Extra)) for o in (*session.new, *session.dirty, *session.deleted)):
+        session.info["catalog_changed"] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _collect_catalog_bulk_writes(state) -> None:
+    if (state.is_update or state.is_delete) and state.bind_mapper is not None \
+            and state.bind_mapper.class_ in (Service, Extra):
+        state.session.info["catalog_changed"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session: Session) -> None:
+    if session.info.pop("catalog_changed", False):
+        invalidation.publish("catalog")
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back(session: Session) -> None:
+    session.info.pop("catalog_changed", None)
@@ -0,0 +1,90 @@
+"""Conditional GETs for polled read endpoints.
+
+Endpoints declare which resources (``app.core.resource_versions``) their
+body depends on::
+
+    @router.get("/unread-count", dependencies=[Depends(conditional_get("notifications"))])
+
+The dependency reads the caller's counters (one indexed query) and derives a
+weak ETag from them, the route, tenant and user. When ``If-None-Match``
+matches it raises ``NotModified`` (a 304 ``HTTPException``) before the
+endpoint body runs; otherwise the ETag is set on the response.
+
+ETags also roll over every ``CONDITIONAL_GET_MAX_AGE_SECONDS`` so writes that
+bypass the counters (raw SQL, one-off scripts) are picked up eventually.
+"""
+from __future__ import annotations
+
+import hashlib
+import time
+from typing import Optional
+
+from fastapi import Depends, HTTPException, Request, Response
+from sqlalchemy.orm import Session
+
+from app.core.database import get_db
+from app.core.resource_versions import GLOBAL, current_versions
+from app.models import User
+from app.plugins.auth.routes import get_current_user
+from config import settings
+
+
+class NotModified(HTTPException):
+    def __init__(self, headers: dict):
+        super().__init__(status_code=304, headers=headers)
+
+
+def compute_etag(route: str, tenant_id: str, user_id, versions: tuple, bucket_seconds: Optional[int]) -> str:
+    max_age = settings.conditional_get_max_age_seconds
+    now = time.time()
+    parts = [route, tenant_id or "", str(user_id), repr(versions)]
+    if max_age:
+        parts.append(f"m{int(now // max_age)}")
+    if bucket_seconds:
+        parts.append(f"b{int(now // bucket_seconds)}")
+    return 'W/"' + hashlib.sha256("|".join(parts).encode()).hexdigest()[:32] + '"'
+
+
+def _matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tag = etag[2:] if etag.startswith("W/") else etag
+    return any(
+        (c.strip()[2:] if c.strip().startswith("W/") else c.strip()) == tag
+        for c in if_none_match.split(",")
+    )
+
+
+def _check(request: Request, response: Response, db: Session, tenant_id: str, user_id, resources, bucket_seconds) -> None:
+    versions = current_versions(db, tenant_id, user_id, resources)
+    etag = compute_etag(request.url.path, tenant_id, user_id, versions, bucket_seconds)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Authorization"}
+    if _matches(request.headers.get("if-none-match"), etag):
+        raise NotModified(headers)
+    response.headers.update(headers)
+
+
+def conditional_get(*resources: str, bucket_seconds: Optional[int] = None, per_user: bool = True):
+    """Dependency factory: 304 when none of ``resources`` changed for the caller.
+
+    ``bucket_seconds`` additionally rolls the ETag over on a clock boundary,
+    for bodies that depend on "now" (rolling windows, short-lived tokens).
+    ``per_user=False`` is for public, non-tenant data (the catalog) and does
+    not require authentication.
+    """
+    if not per_user:
+        def _public(request: Request, response: Response, db: Session = Depends(get_db)) -> None:
+            _check(request, response, db, GLOBAL, None, resources, bucket_seconds)
+
+        return _public
+
+    def _dependency(
+        request: Request,
+        response: Response,
+        current_user: User = Depends(get_current_user),
+        db: Session = Depends(get_db),
+    ) -> None:
+        tenant_id = current_user.tenant_id or settings.default_tenant
+        _check(request, response, db, tenant_id, current_user.id, resources, bucket_seconds)
+
+    return _dependency
@@ -0,0 +1,127 @@
+"""Write-time customer aggregates.
+
+``customer_aggregates`` keeps a running order count, total spent and last
+order date per (tenant, user) so the customers list and detail endpoints do
+not group the tenant's entire order history on every request.
+
+An order is added once, in the same flush that first makes it ``paid`` or
+``completed`` (a ``before_flush`` hook, so every code path that writes orders
+through the ORM is covered). ``Order.customer_counted`` prevents a second
+increment when an order moves paid -> in_progress -> completed.
+
+Bulk updates, deletes and amount edits after payment are not tracked; the
+``customer_aggregates_reconcile`` job recomputes from orders and repairs
+any drift.
+"""
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import case, event, func, or_
+from sqlalchemy.orm import Session
+
+from app.core import jobs
+from app.core.database import SessionLocal, dialect_insert
+from app.models import CustomerAggregate, Order
+
+COUNTED_ORDER_STATUSES = ("paid", "completed")
+
+def _apply(conn, tenant_id: str, user_id: int, amount: int, ordered_at: datetime) -> None:
+    # Single upsert: a customer's concurrent first orders cannot both insert
+    insert = dialect_insert(conn)
+    stmt = insert(CustomerAggregate).values(
+        tenant_id=tenant_id,
+        user_id=user_id,
+        order_count=1,
+        total_spent_cents=amount,
+        last_order_date=ordered_at,
+        updated_at=datetime.utcnow(),
+    )
+    newer = or_(CustomerAggregate.last_order_date.is_(None), CustomerAggregate.last_order_date < stmt.excluded.last_order_date)
+    conn.execute(stmt.on_conflict_do_update(
+        index_elements=[CustomerAggregate.tenant_id, CustomerAggregate.user_id],
+        set_={
+            "order_count": CustomerAggregate.order_count + 1,
+            "total_spent_cents": CustomerAggregate.total_spent_cents + stmt.excluded.total_spent_cents,
+            "last_order_date": case((newer, stmt.excluded.last_order_date), else_=CustomerAggregate.last_order_date),
+            "updated_at": stmt.excluded.updated_at,
+        },
+    ))
+
+
+@event.listens_for(Session, "before_flush")
+def _count_paid_orders(session: Session, flush_context, instances) -> None:
+    pending = [
+        o for o in list(session.new) + list(session.dirty)
+        if isinstance(o, Order)
+        and not o.customer_counted
+        and o.status in COUNTED_ORDER_STATUSES
+        and o.user_id is not None
+        and o.tenant_id
+    ]
+    if not pending:
+        return
+    conn = session.connection()
+    for order in pending:
+        if order.created_at is None:
+            order.created_at = datetime.utcnow()
+        _apply(conn, order.tenant_id, order.user_id, int(order.amount or 0), order.created_at)
+        order.customer_counted = True
+
+
+def reconcile_customer_aggregates(db: Session, tenant_id: Optional[str] = None) -> dict:
+    """Recompute aggregates from orders and repair rows that drifted.
+
+    Returns ``{"checked": n, "repaired": n, "removed": n}``.
+    """
+    q = (
+        db.query(
+            Order.tenant_id,
+            Order.user_id,
+            func.count(Order.id),
+            func.coalesce(func.sum(Order.amount), 0),
+            func.max(Order.created_at),
+        )
+        .filter(Order.status.in_(COUNTED_ORDER_STATUSES), Order.user_id.isnot(None), Order.tenant_id.isnot(None))
+        .group_by(Order.tenant_id, Order.user_id)
+    )
+    existing_q = db.query(CustomerAggregate)
+    if tenant_id:
+        q = q.filter(Order.tenant_id == tenant_id)
+        existing_q = existing_q.filter(CustomerAggregate.tenant_id == tenant_id)
+    existing = {(a.tenant_id, a.user_id): a for a in existing_q.all()}
+
+    checked = repaired = 0
+    now = datetime.utcnow()
+    for tid, uid, count, total, last in q.all():
+        checked += 1
+        agg = existing.pop((tid, uid), None)
+        if agg is None:
+            db.add(CustomerAggregate(tenant_id=tid, user_id=uid, order_count=count,
+                                     total_spent_cents=int(total), last_order_date=last, updated_at=now))
+            repaired += 1
+        elif (agg.order_count, agg.total_spent_cents, agg.last_order_date) != (count, int(total), last):
+            agg.order_count, agg.total_spent_cents, agg.last_order_date, agg.updated_at = count, int(total), last, now
+            repaired += 1
+    # Aggregates with no remaining counted orders
+    for agg in existing.values():
+        db.delete(agg)
+
+    flag_q = db.query(Order).filter(Order.status.in_(COUNTED_ORDER_STATUSES), Order.customer_counted.is_(False))
+    if tenant_id:
+        flag_q = flag_q.filter(Order.tenant_id == tenant_id)
+    flag_q.update({Order.customer_counted: True}, synchronize_session=False)
+    db.commit()
+    return {"checked": checked, "repaired": repaired, "removed": len(existing)}
+
+
+def _job_reconcile_customer_aggregates(payload):
+    db = SessionLocal()
+    try:
+        return reconcile_customer_aggregates(db, (payload or {}).get("tenant_id"))
+    finally:
+        db.close()
+
+
+jobs.register_job_once("customer_aggregates_reconcile", _job_reconcile_customer_aggregates)
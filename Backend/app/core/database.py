@@ -1,12 +1,21 @@
+import hashlib
 import os
+import threading
+import time
+from collections import OrderedDict
 
 from config import settings
+from app.core.db_telemetry import InstrumentedQueuePool, forget_engine, instrument_engine
+from app.core import slow_queries  # noqa: F401  (registers cursor timing events)
 
 from sqlalchemy import create_engine, event, text
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.orm import Mapper, sessionmaker, Session
 from sqlalchemy.pool import StaticPool
-from typing import Generator
+from typing import Generator, Optional
+
+from fastapi import Request
 
 # 1) Ensure DATABASE_URL is set
 DATABASE_URL = settings.database_url
@@ -24,28 +33,36 @@ connect_args to ensure all sessions share the same transient database.
 """
 
 # 2) Create the SQLAlchemy engine with tuned pool settings
-engine_kwargs: dict = {
-    "echo": os.environ.get("SQLALCHEMY_ECHO", "true").lower() in {"1", "true", "yes", "on"},
-    "future": True,
-    "pool_pre_ping": True,  # checks connections before using to avoid stale ones
-}
-
-if DATABASE_URL.startswith("sqlite"):
-    # Always disable same-thread check for FastAPI + tests
-    engine_kwargs["connect_args"] = {"check_same_thread": False}
-    # Special handling for pure in-memory DB so all sessions share the same
-    # database (otherwise each new connection is a fresh empty database)
-    if ":memory:" in DATABASE_URL:
-        engine_kwargs["poolclass"] = StaticPool
-else:
-    # Production / Postgres style settings
-    engine_kwargs.update({
-        "pool_size": 20,
-        "max_overflow": 10,
-        "pool_timeout": 30,
-    })
+def _engine_kwargs(url: str) -> dict:
+    kwargs: dict = {
+        # Off by default: per-statement timings come from app.core.slow_queries
+        "echo": os.environ.get("SQLALCHEMY_ECHO", "false").lower() in {"1", "true", "yes", "on"},
+        "future": True,
+        "pool_pre_ping": True,  # checks connections before using to avoid stale ones
+    }
+    if url.startswith("sqlite"):
+        # Always disable same-thread check for FastAPI + tests
+        kwargs["connect_args"] = {"check_same_thread": False}
+        # Special handling for pure in-memory DB so all sessions share the same
+        # database (otherwise each new connection is a fresh empty database)
+        if ":memory:" in url:
+            kwargs["poolclass"] = StaticPool
+        else:
+            kwargs["poolclass"] = InstrumentedQueuePool
+    else:
+        # Production / Postgres style settings
+        kwargs.update({
+            "poolclass": InstrumentedQueuePool,
+            "pool_size": settings.db_pool_size,
+            "max_overflow": settings.db_max_overflow,
+            "pool_timeout": settings.db_pool_timeout,
+        })
+    return kwargs
+
 
+engine_kwargs: dict = _engine_kwargs(DATABASE_URL)
 engine = create_engine(DATABASE_URL, **engine_kwargs)
+instrument_engine(engine, "primary")
 
 # --- Removed legacy self-heal logic ---
 # All schema evolution is now managed exclusively via Alembic migrations.
@@ -60,24 +77,85 @@ SessionLocal = sessionmaker(
     future=True,
 )
 
+
+# Set the tenant GUC for RLS at the start of every transaction (Postgres only).
+# Attached to each session factory, so replica reads are scoped like primary ones.
+def _configure_tenant(session, transaction, connection):
+    if not connection.dialect.name.startswith("postgres"):
+        return
+    from app.core.tenant_context import current_tenant_id  # local import to avoid circular at module import
+
+    tid = current_tenant_id.get(None)
+    if tid:
+        try:
+            connection.execute(text("SELECT set_config('app.tenant_id', :tid, false)"), {"tid": tid})
+        except Exception:
+            pass
+
+
+event.listen(SessionLocal, "after_begin", _configure_tenant)
+
+# Optional read replica (DATABASE_REPLICA_URL); see get_read_db below
+read_engine = None
+ReadSessionLocal = None
+_LAG_PROBE_TTL = 2.0  # seconds between replica lag probes
+_lag_cache: dict = {"value": None, "at": 0.0}
+
+
+def configure_replica(url: Optional[str]) -> None:
+    """(Re)bind the read-replica engine; ``None`` disables replica routing."""
+    global read_engine, ReadSessionLocal
+    if read_engine is not None:
+        read_engine.dispose()
+        forget_engine("replica")
+    if not url:
+        read_engine = ReadSessionLocal = None
+        return
+    read_engine = create_engine(url, **_engine_kwargs(url))
+    instrument_engine(read_engine, "replica")
+    ReadSessionLocal = sessionmaker(
+        autocommit=False,
+        autoflush=False,
+        expire_on_commit=False,
+        bind=read_engine,
+        future=True,
+    )
+    event.listen(ReadSessionLocal, "after_begin", _configure_tenant)
+    _lag_cache.update(value=None, at=0.0)
+
+
+configure_replica(settings.database_replica_url)
+
 # 4) Base class for models
 Base = declarative_base()
 
-# Optional: Set tenant GUC for RLS automatically on connection checkout (Postgres only)
-try:
-    if engine.url.get_backend_name().startswith("postgres"):
-        from app.core.tenant_context import current_tenant_id  # local import to avoid circular at module import
-
-        @event.listens_for(SessionLocal, "after_begin")
-        def _configure_tenant(session, transaction, connection):  # pragma: no cover
-            tid = current_tenant_id.get(None)
-            if tid:
-                try:
-                    connection.execute(text("SELECT set_config('app.tenant_id', :tid, false)"), {"tid": tid})
-                except Exception:
-                    pass
-except Exception:  # pragma: no cover
-    pass
+
+@event.listens_for(Mapper, "after_configured", once=True)
+def _register_write_hooks() -> None:
+    """Load the Session write hooks once the models are mapped.
+
+    Mapper configuration runs before the first mapped object is created or
+    queried, so no flush can happen without the hooks. Imported here rather
+    than at module level because the hook modules import ``app.models``.
+    """
+    from app.core import hooks  # noqa: F401
+
+
+
+_DIALECT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def dialect_insert(bind):
+    """Return the ``insert`` construct with ``on_conflict_do_update`` for ``bind``'s dialect.
+
+    ``bind`` is an engine or connection (``db.get_bind()``, or the connection a
+    flush hook receives).
+    """
+    dialect = bind.dialect.name
+    try:
+        return _DIALECT_INSERTS[dialect]
+    except KeyError:  # pragma: no cover - only postgres / sqlite are deployed
+        raise RuntimeError(f"upserts are not supported on dialect {dialect!r}")
 
 # 5) Dependency for FastAPI routes
 def get_db() -> Generator[Session, None, None]:
@@ -93,3 +171,91 @@ def get_db() -> Generator[Session, None, None]:
         yield db
     finally:
         db.close()
+
+
+# 6) Read-replica routing
+#
+# Read-heavy routers (analytics, reports) depend on get_read_db. It yields a
+# replica session unless the replica is lagging more than
+# REPLICA_MAX_LAG_SECONDS or the same client wrote within
+# REPLICA_STICKY_SECONDS (read-your-writes); both cases fall back to the
+# primary. Writes are recorded per client by the middleware in main.py via
+# note_write().
+_RECENT_WRITERS_MAX = 10_000
+_recent_writers: "OrderedDict[str, float]" = OrderedDict()
+_writers_lock = threading.Lock()
+REPLICA_METRICS = {"replica": 0, "primary_lag": 0, "primary_recent_write": 0}
+
+
+def client_key(request: Request) -> str:
+    """Stable per-client key: the auth credential if present, else the client IP."""
+    cred = request.headers.get("authorization") or request.cookies.get("access_token")
+    if cred:
+        return "a:" + hashlib.sha256(cred.encode()).hexdigest()[:32]
+    ip = getattr(request.state, "client_ip", None) or (request.client.host if request.client else "unknown")
+    return "ip:" + ip
+
+
+def note_write(key: str) -> None:
+    with _writers_lock:
+        _recent_writers[key] = time.monotonic()
+        _recent_writers.move_to_end(key)
+        while len(_recent_writers) > _RECENT_WRITERS_MAX:
+            _recent_writers.popitem(last=False)
+
+
+def _wrote_recently(key: str) -> bool:
+    with _writers_lock:
+        at = _recent_writers.get(key)
+    return at is not None and time.monotonic() - at < settings.replica_sticky_seconds
+
+
+def _probe_replica_lag() -> float:
+    """Seconds the replica is behind the primary (0 for non-Postgres replicas)."""
+    with read_engine.connect() as conn:
+        if read_engine.dialect.name != "postgresql":
+            return 0.0
+        lag = conn.execute(text(
+            "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+            "ELSE coalesce(extract(epoch FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+        )).scalar()
+        return float(lag or 0)
+
+
+def replica_lag_seconds() -> float:
+    """Cached replica lag; unreachable replicas report infinite lag."""
+    now = time.monotonic()
+    if _lag_cache["value"] is None or now - _lag_cache["at"] > _LAG_PROBE_TTL:
+        try:
+            _lag_cache["value"] = _probe_replica_lag()
+        except Exception:
+            _lag_cache["value"] = float("inf")
+        _lag_cache["at"] = now
+    return _lag_cache["value"]
+
+
+def on_replica(db: Session) -> bool:
+    """True when ``db`` is bound to the read replica."""
+    return read_engine is not None and db.get_bind() is read_engine
+
+
+def get_read_db(request: Request) -> Generator[Session, None, None]:
+    """Like get_db, but served from the read replica when it is safe to do so.
+
+    Sessions from the replica are read-only by convention; never write through
+    this dependency.
+    """
+    factory = SessionLocal
+    if ReadSessionLocal is not None:
+        if _wrote_recently(client_key(request)):
+            REPLICA_METRICS["primary_recent_write"] += 1
+        elif replica_lag_seconds() > settings.replica_max_lag_seconds:
+            REPLICA_METRICS["primary_lag"] += 1
+        else:
+            REPLICA_METRICS["replica"] += 1
+            factory = ReadSessionLocal
+    db = factory()
+    try:
+        yield db
+    finally:
+        db.close()
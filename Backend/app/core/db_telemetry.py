@@ -0,0 +1,193 @@
+"""Connection-pool telemetry and statement timeouts.
+
+Pool telemetry
+  ``instrument_engine`` hooks SQLAlchemy pool events to keep, per engine:
+  a checkout-wait histogram (how long requests queued for a connection),
+  in-use / overflow gauges, checkout timeouts, and connections held longer
+  than ``DB_LONG_HELD_SECONDS`` (a ring buffer plus the currently held ones).
+  Wait time is measured in ``InstrumentedQueuePool._do_get`` since the pool
+  has no "checkout requested" event. ``pool_snapshot()`` feeds
+  ``/api/obs/db-pool`` and the metrics text endpoint.
+
+Statement timeouts
+  ``statement_timeout(ms)`` is a router/endpoint dependency that sets the
+  timeout for the request; every transaction begun while it is active runs
+  ``SET LOCAL statement_timeout`` on Postgres, so a runaway report is
+  cancelled by the server instead of pinning a pooled connection. No-op on
+  other dialects.
+"""
+from __future__ import annotations
+
+import contextvars
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+from sqlalchemy import event, exc
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import QueuePool
+
+from config import settings
+
+WAIT_BUCKETS_MS = (1, 5, 10, 50, 100, 250, 500, 1000, 5000, 10000, 30000)
+
+_lock = threading.Lock()
+_stats: dict[str, dict] = {}
+_pools: dict[str, object] = {}
+
+
+def _new_stats() -> dict:
+    return {
+        "checkouts": 0,
+        "in_use": 0,
+        "max_in_use": 0,
+        "timeouts": 0,
+        "wait_ms_sum": 0.0,
+        "wait_ms_max": 0.0,
+        "wait_histogram": [0] * (len(WAIT_BUCKETS_MS) + 1),
+        "long_held_count": 0,
+        "long_held_recent": deque(maxlen=20),
+        "held_since": {},  # id(connection record) -> checkout time
+    }
+
+
+def _record_wait(name: str, wait_ms: float, timed_out: bool) -> None:
+    with _lock:
+        s = _stats.setdefault(name, _new_stats())
+        s["wait_ms_sum"] += wait_ms
+        s["wait_ms_max"] = max(s["wait_ms_max"], wait_ms)
+        idx = next((i for i, b in enumerate(WAIT_BUCKETS_MS) if wait_ms <= b), len(WAIT_BUCKETS_MS))
+        s["wait_histogram"][idx] += 1
+        if timed_out:
+            s["timeouts"] += 1
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that times how long each checkout waited for a connection."""
+
+    telemetry_name = "primary"
+
+    def _do_get(self):
+        t0 = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            _record_wait(self.telemetry_name, (time.perf_counter() - t0) * 1000, timed_out)
+
+
+def instrument_engine(engine, name: str) -> None:
+    """Attach checkout/checkin telemetry to ``engine``'s pool."""
+    pool = engine.pool
+    if isinstance(pool, InstrumentedQueuePool):
+        pool.telemetry_name = name
+    with _lock:
+        _stats[name] = _new_stats()
+        _pools[name] = pool
+
+    @event.listens_for(pool, "checkout")
+    def _checkout(dbapi_conn, record, proxy):
+        now = time.monotonic()
+        record.info["checked_out_at"] = now
+        with _lock:
+            s = _stats[name]
+            s["held_since"][id(record)] = now
+            s["checkouts"] += 1
+            s["in_use"] += 1
+            s["max_in_use"] = max(s["max_in_use"], s["in_use"])
+
+    @event.listens_for(pool, "checkin")
+    def _checkin(dbapi_conn, record):
+        started = record.info.pop("checked_out_at", None)
+        with _lock:
+            s = _stats[name]
+            s["in_use"] = max(0, s["in_use"] - 1)
+            s["held_since"].pop(id(record), None)
+            if started is not None:
+                held = time.monotonic() - started
+                if held > settings.db_long_held_seconds:
+                    s["long_held_count"] += 1
+                    s["long_held_recent"].append({"held_ms": round(held * 1000, 1), "released_at": time.time()})
+
+
+def forget_engine(name: str) -> None:
+    with _lock:
+        _stats.pop(name, None)
+        _pools.pop(name, None)
+
+
+def _pool_gauge(pool, attr: str) -> Optional[int]:
+    fn = getattr(pool, attr, None)
+    try:
+        return int(fn()) if callable(fn) else None
+    except Exception:
+        return None
+
+
+def pool_snapshot() -> dict:
+    """Per-engine pool telemetry (JSON-safe)."""
+    out = {}
+    now = time.monotonic()
+    with _lock:
+        for name, s in _stats.items():
+            pool = _pools.get(name)
+            waits = sum(s["wait_histogram"])
+            held_now = sorted(
+                (now - t for t in s["held_since"].values() if now - t > settings.db_long_held_seconds),
+                reverse=True,
+            )
+            out[name] = {
+                "pool_class": type(pool).__name__,
+                "size": _pool_gauge(pool, "size"),
+                "checked_out": _pool_gauge(pool, "checkedout"),
+                "overflow": _pool_gauge(pool, "overflow"),
+                "in_use": s["in_use"],
+                "max_in_use": s["max_in_use"],
+                "checkouts": s["checkouts"],
+                "timeouts": s["timeouts"],
+                "wait_ms": {
+                    "count": waits,
+                    "avg": round(s["wait_ms_sum"] / waits, 3) if waits else 0.0,
+                    "max": round(s["wait_ms_max"], 3),
+                    "buckets": {
+                        **{f"le_{b}": c for b, c in zip(WAIT_BUCKETS_MS, s["wait_histogram"])},
+                        "le_inf": s["wait_histogram"][-1],
+                    },
+                },
+                "long_held_seconds": settings.db_long_held_seconds,
+                "long_held_count": s["long_held_count"],
+                "long_held_recent": list(s["long_held_recent"]),
+                "long_held_now_ms": [round(h * 1000, 1) for h in held_now],
+            }
+    return out
+
+
+# --- Statement timeouts ---
+current_statement_timeout_ms: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar(
+    "current_statement_timeout_ms", default=None
+)
+
+
+def statement_timeout(ms: int):
+    """Dependency factory: cap SQL statements in this request at ``ms`` (Postgres).
+
+    Usage: ``APIRouter(..., dependencies=[Depends(statement_timeout(15000))])``.
+    Async so the context variable is set in the request task and seen by the
+    (threadpool) endpoint and its sessions.
+    """
+    async def _dependency() -> None:
+        # Each request runs in its own copied context, so no reset is needed
+        current_statement_timeout_ms.set(ms)
+
+    return _dependency
+
+
+@event.listens_for(Session, "after_begin")
+def _apply_statement_timeout(session, transaction, connection):
+    ms = current_statement_timeout_ms.get()
+    if ms and connection.dialect.name == "postgresql":
+        connection.exec_driver_sql(f"SET LOCAL statement_timeout = {int(ms)}")
@@ -0,0 +1,212 @@
+"""Wash-duration percentile sketches.
+
+Durations are kept as a DDSketch per (tenant, day): each completed wash
+increments one logarithmic bucket (``wash_duration_buckets``) with an atomic
+upsert, so ``end_wash`` stays a single-row write and concurrent completions
+cannot lose counts. Buckets are ``RELATIVE_ACCURACY`` wide (1%), so any
+quantile read back is within 1% of the true value.
+
+Sketches merge by adding bucket counts, which means a date range is one
+``SUM(count) ... GROUP BY bucket`` over its days (a few hundred rows at most)
+instead of loading every ``(started_at, ended_at)`` pair. Averages are exact
+(``total_seconds`` is stored alongside the counts).
+
+The day is the UTC date of ``ended_at``. When a range has no sketch data
+(e.g. history before the backfill ran) Postgres answers from orders with
+``percentile_cont``. Orders completed outside ``end_wash`` are picked up by
+the ``wash_duration_sketch_rebuild`` job.
+"""
+from __future__ import annotations
+
+import math
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import Date, cast, func
+from sqlalchemy.orm import Session
+
+from app.core import jobs
+from app.core.database import SessionLocal, dialect_insert
+from app.models import Order, WashDurationBucket
+from config import settings
+
+RELATIVE_ACCURACY = 0.01
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+_LOG_GAMMA = math.log(GAMMA)
+ZERO_BUCKET = -1  # durations under one second
+
+
+def bucket_for(seconds: float) -> int:
+    if seconds < 1:
+        return ZERO_BUCKET
+    return int(math.ceil(math.log(seconds) / _LOG_GAMMA))
+
+
+def bucket_value(bucket: int) -> float:
+    """Representative value of a bucket (within RELATIVE_ACCURACY of any member)."""
+    if bucket == ZERO_BUCKET:
+        return 0.0
+    return 2 * GAMMA ** bucket / (GAMMA + 1)
+
+
+class DurationSketch:
+    """In-memory view of merged buckets."""
+
+    def __init__(self, buckets: Optional[dict[int, int]] = None, total_seconds: int = 0):
+        self.buckets: dict[int, int] = dict(buckets or {})
+        self.total_seconds = total_seconds
+
+    @property
+    def count(self) -> int:
+        return sum(self.buckets.values())
+
+    def add(self, seconds: int) -> None:
+        seconds = max(0, int(seconds))
+        k = bucket_for(seconds)
+        self.buckets[k] = self.buckets.get(k, 0) + 1
+        self.total_seconds += seconds
+
+    def merge(self, other: "DurationSketch") -> "DurationSketch":
+        for k, c in other.buckets.items():
+            self.buckets[k] = self.buckets.get(k, 0) + c
+        self.total_seconds += other.total_seconds
+        return self
+
+    def quantile(self, q: float) -> Optional[float]:
+        n = self.count
+        if not n:
+            return None
+        rank = q * (n - 1)
+        seen = 0
+        for k in sorted(self.buckets):
+            seen += self.buckets[k]
+            if seen > rank:
+                return bucket_value(k)
+        return bucket_value(max(self.buckets))
+
+    def count_above(self, seconds: float) -> int:
+        """Washes longer than ``seconds`` (bucket granularity)."""
+        return sum(c for k, c in self.buckets.items() if bucket_value(k) > seconds)
+
+
+def record_wash_duration(db: Session, order: Order) -> None:
+    """Add a completed order's duration to its tenant/day sketch. Does not commit."""
+    if not (order.started_at and order.ended_at):
+        return
+    seconds = max(0, int((order.ended_at - order.started_at).total_seconds()))
+    insert = dialect_insert(db.get_bind())
+    stmt = insert(WashDurationBucket).values(
+        tenant_id=order.tenant_id or settings.default_tenant,
+        day=order.ended_at.date(),
+        bucket=bucket_for(seconds),
+        count=1,
+        total_seconds=seconds,
+    )
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[WashDurationBucket.tenant_id, WashDurationBucket.day, WashDurationBucket.bucket],
+        set_={
+            "count": WashDurationBucket.count + stmt.excluded.count,
+            "total_seconds": WashDurationBucket.total_seconds + stmt.excluded.total_seconds,
+        },
+    ))
+
+
+def load_sketch(db: Session, start: date, end: date, tenant_id: Optional[str] = None) -> DurationSketch:
+    """Merge the daily sketches for ``start..end`` (inclusive)."""
+    q = (
+        db.query(
+            WashDurationBucket.bucket,
+            func.sum(WashDurationBucket.count),
+            func.sum(WashDurationBucket.total_seconds),
+        )
+        .filter(WashDurationBucket.day >= start, WashDurationBucket.day <= end)
+        .group_by(WashDurationBucket.bucket)
+    )
+    if tenant_id is not None:
+        q = q.filter(WashDurationBucket.tenant_id == tenant_id)
+    sketch = DurationSketch()
+    for bucket, count, total in q.all():
+        sketch.buckets[bucket] = int(count)
+        sketch.total_seconds += int(total or 0)
+    return sketch
+
+
+def _postgres_summary(db: Session, start: date, end: date, tenant_id: Optional[str], slow_threshold: Optional[int]) -> dict:
+    seconds = func.extract("epoch", Order.ended_at - Order.started_at)
+    ended_day = cast(Order.ended_at, Date)
+    q = db.query(
+        func.count(Order.id),
+        func.avg(seconds),
+        func.percentile_cont(0.5).within_group(seconds),
+        func.percentile_cont(0.95).within_group(seconds),
+        func.count(Order.id).filter(seconds > (slow_threshold or 0)),
+    ).filter(Order.started_at.isnot(None), Order.ended_at.isnot(None), ended_day >= start, ended_day <= end)
+    if tenant_id is not None:
+        q = q.filter(Order.tenant_id == tenant_id)
+    n, avg, median, p95, slow = q.one()
+    return {
+        "average": float(avg) if n else None,
+        "median": round(median) if n else None,
+        "p95": round(p95) if n else None,
+        "sample_size": int(n or 0),
+        "slow_count": int(slow or 0) if slow_threshold is not None and n else None,
+    }
+
+
+def duration_summary(
+    db: Session,
+    start: date,
+    end: date,
+    tenant_id: Optional[str] = None,
+    slow_threshold: Optional[int] = None,
+) -> dict:
+    """Average / median / p95 wash duration (seconds) for washes ended in ``start..end``.
+
+    Returns ``{"average", "median", "p95", "sample_size", "slow_count"}``;
+    values are ``None`` when there are no washes (``slow_count`` also when no
+    ``slow_threshold`` is given).
+    """
+    sketch = load_sketch(db, start, end, tenant_id)
+    n = sketch.count
+    if not n and db.get_bind().dialect.name == "postgresql":
+        return _postgres_summary(db, start, end, tenant_id, slow_threshold)
+    return {
+        "average": sketch.total_seconds / n if n else None,
+        "median": round(sketch.quantile(0.5)) if n else None,
+        "p95": round(sketch.quantile(0.95)) if n else None,
+        "sample_size": n,
+        "slow_count": sketch.count_above(slow_threshold) if slow_threshold is not None and n else None,
+    }
+
+
+def rebuild_duration_sketches(db: Session) -> int:
+    """Recompute every daily sketch from orders (backfill / reconciliation)."""
+    db.query(WashDurationBucket).delete(synchronize_session=False)
+    rows = (
+        db.query(Order.tenant_id, Order.started_at, Order.ended_at)
+        .filter(Order.started_at.isnot(None), Order.ended_at.isnot(None))
+        .yield_per(1000)
+    )
+    acc: dict[tuple[str, date, int], list[int]] = {}
+    for tenant_id, started_at, ended_at in rows:
+        seconds = max(0, int((ended_at - started_at).total_seconds()))
+        entry = acc.setdefault((tenant_id or settings.default_tenant, ended_at.date(), bucket_for(seconds)), [0, 0])
+        entry[0] += 1
+        entry[1] += seconds
+    db.add_all(
+        WashDurationBucket(tenant_id=tid, day=day, bucket=bucket, count=count, total_seconds=total)
+        for (tid, day, bucket), (count, total) in acc.items()
+    )
+    db.commit()
+    return len(acc)
+
+
+def _job_rebuild_duration_sketches(payload):
+    db = SessionLocal()
+    try:
+        return {"buckets": rebuild_duration_sketches(db)}
+    finally:
+        db.close()
+
+
+jobs.register_job_once("wash_duration_sketch_rebuild", _job_rebuild_duration_sketches)
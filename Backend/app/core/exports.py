@@ -0,0 +1,164 @@
+"""Streaming CSV / NDJSON export helpers.
+
+Exports read through server-side cursors (``Query.yield_per`` which also sets
+``stream_results``) and serialize rows incrementally, so memory stays flat
+regardless of how many rows a tenant has. The same record iterator can feed
+either an HTTP ``StreamingResponse`` or a file written by a background job.
+
+Sessions: streaming bodies are consumed after the request-scoped session from
+``get_db`` has been released, so exports open their own short-lived session
+via ``session_factory`` for the duration of the iteration.
+"""
+from __future__ import annotations
+
+import csv
+import io
+import json
+import os
+import zlib
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Callable, Iterable, Iterator, Sequence
+
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Query, Session
+
+from app.core.database import SessionLocal
+
+EXPORT_FORMATS = ("csv", "ndjson")
+_MEDIA_TYPES = {"csv": "text/csv; charset=utf-8", "ndjson": "application/x-ndjson"}
+_FLUSH_BYTES = 64 * 1024
+DEFAULT_BATCH_SIZE = 1000
+
+
+def validate_format(fmt: str) -> str:
+    fmt = (fmt or "csv").lower()
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unsupported export format '{fmt}' (use csv or ndjson)")
+    return fmt
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def iter_query(
+    build_query: Callable[[Session], Query],
+    *,
+    session_factory: Callable[[], Session] = SessionLocal,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Iterator[Any]:
+    """Yield rows from ``build_query(session)`` using a server-side cursor."""
+    with session_factory() as session:
+        for row in build_query(session).yield_per(batch_size):
+            yield row
+
+
+def encode_csv(records: Iterable[dict], columns: Sequence[str]) -> Iterator[bytes]:
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=list(columns), extrasaction="ignore")
+    writer.writeheader()
+    for rec in records:
+        writer.writerow({k: _plain(v) for k, v in rec.items()})
+        if buf.tell() >= _FLUSH_BYTES:
+            yield buf.getvalue().encode()
+            buf.seek(0)
+            buf.truncate()
+    if buf.tell():
+        yield buf.getvalue().encode()
+
+
+def encode_ndjson(records: Iterable[dict]) -> Iterator[bytes]:
+    parts: list[str] = []
+    size = 0
+    for rec in records:
+        line = json.dumps(rec, default=_plain, separators=(",", ":")) + "\n"
+        parts.append(line)
+        size += len(line)
+        if size >= _FLUSH_BYTES:
+            yield "".join(parts).encode()
+            parts, size = [], 0
+    if parts:
+        yield "".join(parts).encode()
+
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = 6) -> Iterator[bytes]:
+    """Incrementally gzip a byte stream (wbits=31 -> gzip container)."""
+    comp = zlib.compressobj(level, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        out = comp.compress(chunk)
+        if out:
+            yield out
+    tail = comp.flush()
+    if tail:
+        yield tail
+
+
+def export_chunks(records: Iterable[dict], columns: Sequence[str], fmt: str, compress: bool) -> Iterator[bytes]:
+    chunks = encode_csv(records, columns) if fmt == "csv" else encode_ndjson(records)
+    return gzip_chunks(chunks) if compress else chunks
+
+
+def export_filename(base: str, fmt: str, compress: bool = False) -> str:
+    stamp = datetime.utcnow().strftime("%Y%m%d-%H%M%S")
+    return f"{base}-{stamp}.{fmt}" + (".gz" if compress else "")
+
+
+def streaming_export_response(
+    records: Iterable[dict],
+    columns: Sequence[str],
+    fmt: str,
+    compress: bool,
+    base_name: str,
+) -> StreamingResponse:
+    """Build a StreamingResponse for an export.
+
+    Compression is applied as HTTP ``Content-Encoding: gzip`` so the generic
+    GZip middleware leaves the already-compressed stream alone.
+    """
+    resp = StreamingResponse(export_chunks(records, columns, fmt, compress), media_type=_MEDIA_TYPES[fmt])
+    resp.headers["Content-Disposition"] = f'attachment; filename="{export_filename(base_name, fmt)}"'
+    resp.headers["Cache-Control"] = "no-store"
+    if compress:
+        resp.headers["Content-Encoding"] = "gzip"
+    return resp
+
+
+def write_export_file(
+    records: Iterable[dict],
+    columns: Sequence[str],
+    fmt: str,
+    compress: bool,
+    directory: str,
+    base_name: str,
+) -> dict:
+    """Write an export to ``directory`` and return file metadata."""
+    os.makedirs(directory, exist_ok=True)
+    filename = export_filename(base_name, fmt, compress)
+    path = os.path.join(directory, filename)
+    rows = 0
+
+    def _counted(it: Iterable[dict]) -> Iterator[dict]:
+        nonlocal rows
+        for rec in it:
+            rows += 1
+            yield rec
+
+    size = 0
+    with open(path, "wb") as fh:
+        for chunk in export_chunks(_counted(records), columns, fmt, compress):
+            fh.write(chunk)
+            size += len(chunk)
+    return {
+        "path": path,
+        "filename": filename,
+        "rows": rows,
+        "bytes": size,
+        "media_type": "application/gzip" if compress else _MEDIA_TYPES[fmt],
+    }
+
@@ -0,0 +1,92 @@
+"""Materialised first-visit index.
+
+``customer_first_visits`` stores the earliest ``started_at`` per (tenant,
+user) so new-vs-returning, cohort and new-customer metrics are an indexed
+range query (``first_visit_at >= :start``) instead of a ``min(started_at)``
+GROUP BY over the whole orders table.
+
+Rows are written in the same flush that first sets ``Order.started_at``
+(a ``before_flush`` hook, covering ``start_wash``, manual starts and any
+other ORM path). The upsert keeps the earlier timestamp, so out-of-order
+writes cannot move a first visit forward. Orders without a tenant are
+filed under the default tenant.
+
+Bulk updates and deletes are not tracked; the ``first_visits_rebuild`` job
+recomputes the table from orders.
+"""
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import case, event, func, inspect
+from sqlalchemy.orm import Session
+
+from app.core import jobs
+from app.core.database import SessionLocal, dialect_insert
+from app.models import CustomerFirstVisit, Order
+from config import settings
+
+
+def record_first_visit(conn, tenant_id: str, user_id: int, started_at: datetime) -> None:
+    """Insert the (tenant, user) first visit, or move it earlier."""
+    insert = dialect_insert(conn)
+    stmt = insert(CustomerFirstVisit).values(tenant_id=tenant_id, user_id=user_id, first_visit_at=started_at)
+    earlier = stmt.excluded.first_visit_at < CustomerFirstVisit.first_visit_at
+    conn.execute(stmt.on_conflict_do_update(
+        index_elements=[CustomerFirstVisit.tenant_id, CustomerFirstVisit.user_id],
+        set_={"first_visit_at": case((earlier, stmt.excluded.first_visit_at), else_=CustomerFirstVisit.first_visit_at)},
+    ))
+
+
+def _started_in_flush(order: Order, is_new: bool) -> bool:
+    if order.started_at is None or order.user_id is None:
+        return False
+    return is_new or inspect(order).attrs.started_at.history.has_changes()
+
+
+@event.listens_for(Session, "before_flush")
+def _index_started_orders(session: Session, flush_context, instances) -> None:
+    started = [o for o in session.new if isinstance(o, Order) and _started_in_flush(o, True)]
+    started += [o for o in session.dirty if isinstance(o, Order) and _started_in_flush(o, False)]
+    if not started:
+        return
+    conn = session.connection()
+    for order in started:
+        record_first_visit(conn, order.tenant_id or settings.default_tenant, order.user_id, order.started_at)
+
+
+def first_visit_since(db: Session, start: datetime, end: Optional[datetime] = None, tenant_id: Optional[str] = None):
+    """Select user ids whose first visit falls in ``[start, end)``."""
+    q = db.query(CustomerFirstVisit.user_id).filter(CustomerFirstVisit.first_visit_at >= start)
+    if end is not None:
+        q = q.filter(CustomerFirstVisit.first_visit_at < end)
+    if tenant_id is not None:
+        q = q.filter(CustomerFirstVisit.tenant_id == tenant_id)
+    return q
+
+
+def rebuild_first_visits(db: Session) -> int:
+    """Recompute the index from orders (backfill / reconciliation)."""
+    db.query(CustomerFirstVisit).delete(synchronize_session=False)
+    tenant = func.coalesce(Order.tenant_id, settings.default_tenant)
+    rows = (
+        db.query(tenant, Order.user_id, func.min(Order.started_at))
+        .filter(Order.started_at.isnot(None), Order.user_id.isnot(None))
+        .group_by(tenant, Order.user_id)
+        .all()
+    )
+    db.add_all(CustomerFirstVisit(tenant_id=tid, user_id=uid, first_visit_at=first) for tid, uid, first in rows)
+    db.commit()
+    return len(rows)
+
+
+def _job_rebuild_first_visits(payload):
+    db = SessionLocal()
+    try:
+        return {"customers": rebuild_first_visits(db)}
+    finally:
+        db.close()
+
+
+jobs.register_job_once("first_visits_rebuild", _job_rebuild_first_visits)
@@ -0,0 +1,23 @@
+"""Session write hooks.
+
+Every module that maintains derived state from ORM writes (aggregates,
+counters, version stamps, search rows, cache invalidation) registers its
+``Session`` listeners at import time. They are all imported here, and this
+module is loaded by ``app.core.database`` the first time mappers are
+configured, i.e. before any session can flush a mapped object. Routes, jobs
+and scripts therefore get every hook without importing anything for its side
+effects.
+
+Add new write-hook modules to this list.
+"""
+
+from app.analytics import report_cache  # noqa: F401
+from app.core import (  # noqa: F401
+    catalog_cache,
+    customer_aggregates,
+    first_visits,
+    module_usage,
+    resource_versions,
+    search,
+    tenant_documents,
+)
@@ -0,0 +1,252 @@
+"""Cross-worker cache invalidation bus.
+
+In-process caches (tenant host resolution, tenant documents, the catalog
+snapshot, dashboard analytics, rate-limit overrides, Key Vault secrets)
+``subscribe`` to a namespace. Writers ``publish`` a targeted invalidation
+(``key`` = tenant id, scope, secret name, or None for the whole namespace);
+the handler runs at once in the publishing process and, once
+``INVALIDATION_BUS_URL`` is configured, in every other worker:
+
+- ``redis://`` / ``rediss://``: Redis pub/sub on ``INVALIDATION_CHANNEL``;
+- ``postgresql://``: ``LISTEN`` / ``NOTIFY`` on the same channel name.
+
+Without a URL the bus is process-local (tests, single worker). Each process
+ignores its own messages. Delivery is best effort: after the listener
+reconnects, every subscriber receives ``key=None, data=None`` ("resync")
+because messages may have been missed while it was down. Handlers run on
+the listener thread and must be cheap and thread-safe.
+"""
+from __future__ import annotations
+
+import abc
+import json
+import logging
+import select
+import threading
+import uuid
+from collections import defaultdict
+from typing import Any, Callable, Optional
+
+from config import settings
+
+logger = logging.getLogger("api")
+
+Handler = Callable[[Optional[str], Optional[dict]], None]
+
+_RECONNECT_DELAY_SECONDS = (0.5, 1, 2, 5, 10)
+
+
+class MemoryTransport:
+    """In-process broker; several ``Bus`` instances can share one (tests)."""
+
+    def __init__(self) -> None:
+        self._listeners: list[Callable[[str], None]] = []
+
+    def start(self, on_message: Callable[[str], None], on_reconnect: Callable[[], None]) -> None:
+        self._listeners.append(on_message)
+
+    def send(self, payload: str) -> None:
+        for listener in list(self._listeners):
+            listener(payload)
+
+    def stop(self) -> None:
+        self._listeners.clear()
+
+
+class _ThreadedTransport(abc.ABC):
+    """Listener thread with reconnect/backoff around ``_listen``."""
+
+    name = "transport"
+
+    def __init__(self, url: str, channel: str) -> None:
+        self._url = url
+        self._channel = channel
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, on_message: Callable[[str], None], on_reconnect: Callable[[], None]) -> None:
+        def _run():
+            attempt = 0
+            while not self._stop.is_set():
+                try:
+                    self._listen(on_message, first=attempt == 0, on_reconnect=on_reconnect)
+                    attempt = 0
+                except Exception:
+                    logger.warning("invalidation bus listener failed", extra={"transport": self.name}, exc_info=True)
+                attempt += 1
+                self._stop.wait(_RECONNECT_DELAY_SECONDS[min(attempt, len(_RECONNECT_DELAY_SECONDS)) - 1])
+
+        self._thread = threading.Thread(target=_run, name=f"invalidation-{self.name}", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    @abc.abstractmethod
+    def _listen(self, on_message, *, first: bool, on_reconnect) -> None:
+        """Subscribe and deliver messages until stopped; call ``on_reconnect`` when not ``first``."""
+
+
+class RedisTransport(_ThreadedTransport):
+    name = "redis"
+
+    def __init__(self, url: str, channel: str) -> None:
+        import redis  # optional dependency, only needed when configured
+
+        super().__init__(url, channel)
+        self._client = redis.from_url(url)
+
+    def _listen(self, on_message, *, first: bool, on_reconnect) -> None:  # pragma: no cover - needs redis
+        pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(self._channel)
+        if not first:
+            on_reconnect()
+        try:
+            while not self._stop.is_set():
+                msg = pubsub.get_message(timeout=1.0)
+                if msg and msg.get("type") == "message":
+                    data = msg["data"]
+                    on_message(data.decode() if isinstance(data, bytes) else data)
+        finally:
+            pubsub.close()
+
+    def send(self, payload: str) -> None:  # pragma: no cover - needs redis
+        self._client.publish(self._channel, payload)
+
+
+class PostgresTransport(_ThreadedTransport):
+    name = "postgres"
+
+    def __init__(self, url: str, channel: str) -> None:
+        super().__init__(url, channel)
+        self._send_lock = threading.Lock()
+        self._send_conn = None
+
+    def _connect(self):  # pragma: no cover - needs postgres
+        import psycopg2
+
+        conn = psycopg2.connect(self._url.replace("postgresql+psycopg2://", "postgresql://"))
+        conn.autocommit = True
+        return conn
+
+    def _listen(self, on_message, *, first: bool, on_reconnect) -> None:  # pragma: no cover - needs postgres
+        conn = self._connect()
+        try:
+            with conn.cursor() as cur:
+                cur.execute(f'LISTEN "{self._channel}"')
+            if not first:
+                on_reconnect()
+            while not self._stop.is_set():
+                if select.select([conn], [], [], 1.0) == ([], [], []):
+                    continue
+                conn.poll()
+                while conn.notifies:
+                    on_message(conn.notifies.pop(0).payload)
+        finally:
+            conn.close()
+
+    def send(self, payload: str) -> None:  # pragma: no cover - needs postgres
+        with self._send_lock:
+            for attempt in range(2):
+                try:
+                    if self._send_conn is None or self._send_conn.closed:
+                        self._send_conn = self._connect()
+                    with self._send_conn.cursor() as cur:
+                        cur.execute("SELECT pg_notify(%s, %s)", (self._channel, payload))
+                    return
+                except Exception:
+                    self._send_conn = None
+                    if attempt:
+                        raise
+
+
+class Bus:
+    """Namespace -> handlers registry plus an optional cross-process transport."""
+
+    def __init__(self) -> None:
+        self.origin = uuid.uuid4().hex
+        self._handlers: dict[str, list[Handler]] = defaultdict(list)
+        self._transport: Any = None
+        self.metrics = {"published": 0, "received": 0, "handler_errors": 0, "send_errors": 0, "resyncs": 0}
+
+    @property
+    def connected(self) -> bool:
+        """True when messages also reach other processes."""
+        return self._transport is not None
+
+    def subscribe(self, namespace: str, handler: Handler) -> None:
+        self._handlers[namespace].append(handler)
+
+    def publish(self, namespace: str, key: Optional[str] = None, data: Optional[dict] = None) -> None:
+        """Invalidate ``namespace``/``key`` here and in every other worker."""
+        self.metrics["published"] += 1
+        self._deliver(namespace, key, data)
+        if self._transport is None:
+            return
+        payload = json.dumps({"o": self.origin, "ns": namespace, "key": key, "data": data}, separators=(",", ":"))
+        try:
+            self._transport.send(payload)
+        except Exception:
+            # Other workers fall back to their TTLs / version checks
+            self.metrics["send_errors"] += 1
+            logger.warning("invalidation publish failed", extra={"namespace": namespace}, exc_info=True)
+
+    def start(self, transport) -> None:
+        self.stop()
+        self._transport = transport
+        transport.start(self._on_message, self._resync)
+
+    def stop(self) -> None:
+        if self._transport is not None:
+            self._transport.stop()
+            self._transport = None
+
+    def _on_message(self, payload: str) -> None:
+        try:
+            msg = json.loads(payload)
+        except ValueError:
+            return
+        if msg.get("o") == self.origin:
+            return
+        self.metrics["received"] += 1
+        self._deliver(msg.get("ns"), msg.get("key"), msg.get("data"))
+
+    def _resync(self) -> None:
+        self.metrics["resyncs"] += 1
+        for namespace in list(self._handlers):
+            self._deliver(namespace, None, None)
+
+    def _deliver(self, namespace: Optional[str], key: Optional[str], data: Optional[dict]) -> None:
+        for handler in list(self._handlers.get(namespace, ())):
+            try:
+                handler(key, data)
+            except Exception:
+                self.metrics["handler_errors"] += 1
+                logger.warning("invalidation handler failed", extra={"namespace": namespace}, exc_info=True)
+
+
+def transport_for(url: str, channel: Optional[str] = None):
+    channel = channel or settings.invalidation_channel
+    if url.startswith(("redis://", "rediss://")):
+        return RedisTransport(url, channel)
+    if url.startswith(("postgresql://", "postgres://", "postgresql+psycopg2://")):
+        return PostgresTransport(url, channel)
+    if url == "memory://":
+        return MemoryTransport()
+    raise ValueError(f"Unsupported INVALIDATION_BUS_URL scheme: {url.split(':', 1)[0]}")
+
+
+bus = Bus()
+subscribe = bus.subscribe
+publish = bus.publish
+
+
+def start(url: Optional[str] = None) -> None:
+    """Connect the process bus to ``url`` (default ``INVALIDATION_BUS_URL``)."""
+    url = url or settings.invalidation_bus_url
+    if url:
+        bus.start(transport_for(url))
+
+
+def stop() -> None:
+    bus.stop()
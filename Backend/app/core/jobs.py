@@ -58,6 +58,11 @@ def register_job(name: str, func: Callable[[Optional[dict]], Any]):
             raise JobAlreadyRegistered(name)
         _registry[name] = func
 
+def register_job_once(name: str, func: Callable[[Optional[dict]], Any]):
+    """Register ``func`` unless ``name`` is already taken (module re-import / reload)."""
+    with _lock:
+        _registry.setdefault(name, func)
+
 # Built-in sample jobs -------------------------------------------------------
 
 def _job_ping(payload: Optional[dict]):
@@ -157,6 +162,11 @@ def run_job_id(job_id: str) -> Optional[JobRecord]:
 
 # Introspection --------------------------------------------------------------
 
+def get_job(job_id: str) -> Optional[JobRecord]:
+    with _lock:
+        return _jobs.get(job_id)
+
+
 def job_snapshot(limit: int = 50) -> List[dict]:
     with _lock:
         # History has executed job ids (may contain duplicates for retries / intervals)
@@ -0,0 +1,26 @@
+"""Deferred imports for heavy optional dependencies.
+
+``lazy_import("requests")`` returns a module object that is only executed on
+first attribute access (stdlib ``importlib.util.LazyLoader``), so modules can
+keep a module-level name (and tests can still monkeypatch
+``module.requests.post``) without paying the import cost at startup.
+"""
+from __future__ import annotations
+
+import importlib.util
+import sys
+from types import ModuleType
+
+
+def lazy_import(name: str) -> ModuleType:
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
@@ -0,0 +1,204 @@
+"""Incrementally maintained module usage for subscription quotas.
+
+``module_usage_daily`` holds one counter per (tenant, module, day). Counters
+are bumped in the writer's flush (``before_flush``, one upsert per flush):
+
+- ``core``: orders created;
+- ``loyalty``: redemptions created;
+- ``billing``: payments that become ``success`` (their tenant comes from the
+  order).
+
+``usage_window`` sums at most ``days`` rows per module instead of counting
+orders, redemptions and payments over the window. ``analytics`` (distinct
+active customers) is not additive across days; it is read from
+``customer_aggregates.last_order_date`` (customers with a paid order in the
+window).
+
+``check_quota`` compares usage with the tenant's ``module_limits`` and backs
+the ``require_quota`` dependency in ``app.core.authz``. Writes that bypass
+the ORM unit of work (Core inserts, bulk updates) are not counted; the
+``module_usage_rebuild`` job recomputes a tenant's recent days from the
+source tables.
+"""
+from __future__ import annotations
+
+from collections import Counter
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import event, func, inspect
+from sqlalchemy.orm import Session
+
+from app.core import jobs
+from app.core.database import SessionLocal, dialect_insert
+from app.models import CustomerAggregate, ModuleUsageDaily, Order, Payment, Redemption, Tenant
+
+COUNTED_MODULES = ("core", "loyalty", "billing")
+MAX_WINDOW_DAYS = 30
+
+
+@dataclass(frozen=True)
+class QuotaStatus:
+    module: str
+    used: int
+    limit: Optional[int]
+
+    @property
+    def allowed(self) -> bool:
+        return self.limit is None or self.used < self.limit
+
+
+def record(conn, counts: Counter) -> None:
+    """Add ``counts`` ((tenant_id, module, day) -> n) on ``conn``."""
+    if not counts:
+        return
+    insert = dialect_insert(conn)
+    stmt = insert(ModuleUsageDaily).values(
+        [{"tenant_id": t, "module": m, "day": d, "count": n} for (t, m, d), n in sorted(counts.items())]
+    )
+    conn.execute(stmt.on_conflict_do_update(
+        index_elements=[ModuleUsageDaily.tenant_id, ModuleUsageDaily.module, ModuleUsageDaily.day],
+        set_={"count": ModuleUsageDaily.count + stmt.excluded.count},
+    ))
+
+
+def _day(value: Optional[datetime]) -> date:
+    return (value or datetime.utcnow()).date()
+
+
+def _became_successful(payment: Payment) -> bool:
+    if payment.status != "success":
+        return False
+    history = inspect(payment).attrs.status.history
+    # Persistent rows count only on an observed transition (an unloaded old
+    # value could already have been "success")
+    return bool(history.added) and bool(history.deleted) and history.deleted[0] != "success"
+
+
+@event.listens_for(Session, "before_flush")
+def _count_module_usage(session: Session, flush_context, instances) -> None:
+    counts: Counter = Counter()
+    for obj in session.new:
+        if isinstance(obj, Order) and obj.tenant_id:
+            counts[(obj.tenant_id, "core", _day(obj.created_at))] += 1
+        elif isinstance(obj, Redemption) and obj.tenant_id:
+            counts[(obj.tenant_id, "loyalty", _day(obj.created_at))] += 1
+    payments = [p for p in session.new if isinstance(p, Payment) and p.status == "success"]
+    payments += [p for p in session.dirty if isinstance(p, Payment) and _became_successful(p)]
+    if payments:
+        with session.no_autoflush:
+            for p in payments:
+                order = p.order if p.order is not None else session.get(Order, p.order_id)
+                if order is not None and order.tenant_id:
+                    counts[(order.tenant_id, "billing", _day(p.created_at))] += 1
+    if counts:
+        record(session.connection(), counts)
+
+
+def _window_start(days: int) -> date:
+    days = max(1, min(days, MAX_WINDOW_DAYS))
+    return datetime.utcnow().date() - timedelta(days=days - 1)
+
+
+def usage_window(db: Session, tenant_id: str, days: int = MAX_WINDOW_DAYS, modules=None) -> dict[str, int]:
+    """Usage per module over the last ``days`` days (today included)."""
+    start = _window_start(days)
+    q = (
+        db.query(ModuleUsageDaily.module, func.sum(ModuleUsageDaily.count))
+        .filter(ModuleUsageDaily.tenant_id == tenant_id, ModuleUsageDaily.day >= start)
+    )
+    if modules is not None:
+        q = q.filter(ModuleUsageDaily.module.in_(list(modules)))
+    out = {m: 0 for m in (modules if modules is not None else COUNTED_MODULES)}
+    out.update({m: int(n or 0) for m, n in q.group_by(ModuleUsageDaily.module).all()})
+    if modules is None or "analytics" in modules:
+        out["analytics"] = active_customers(db, tenant_id, days)
+    return out
+
+
+def active_customers(db: Session, tenant_id: str, days: int = MAX_WINDOW_DAYS) -> int:
+    start = datetime.combine(_window_start(days), datetime.min.time())
+    return (
+        db.query(func.count())
+        .select_from(CustomerAggregate)
+        .filter(CustomerAggregate.tenant_id == tenant_id, CustomerAggregate.last_order_date >= start)
+        .scalar()
+        or 0
+    )
+
+
+def tenant_limits(tenant: Optional[Tenant]) -> dict:
+    """Per-module limits from the tenant's subscription (None = unlimited)."""
+    # Plan catalog lives with the subscriptions plugin
+    from app.plugins.subscriptions.routes import DEFAULT_PLANS
+
+    sub = ((tenant.config if tenant is not None else None) or {}).get("subscription") or {}
+    plan = DEFAULT_PLANS.get(sub.get("plan_id") or 1) or DEFAULT_PLANS[1]
+    return sub.get("module_limits") or plan.get("limits") or {}
+
+
+def check_quota(db: Session, tenant_id: str, module: str, days: int = MAX_WINDOW_DAYS) -> QuotaStatus:
+    """Current usage of ``module`` against the tenant's limit."""
+    limit = tenant_limits(db.get(Tenant, tenant_id)).get(module)
+    if limit is None:
+        return QuotaStatus(module, 0, None)  # unlimited: skip the usage read
+    if module == "analytics":
+        used = active_customers(db, tenant_id, days)
+    else:
+        used = usage_window(db, tenant_id, days, modules=[module])[module]
+    return QuotaStatus(module, used, limit)
+
+
+def rebuild_usage(db: Session, tenant_id: str, days: int = MAX_WINDOW_DAYS) -> dict:
+    """Recompute ``tenant_id``'s counters for the last ``days`` days from source rows."""
+    start = _window_start(days)
+    start_dt = datetime.combine(start, datetime.min.time())
+    counts: Counter = Counter()
+    order_day = func.date(Order.created_at)
+    for d, n in (
+        db.query(order_day, func.count()).filter(Order.tenant_id == tenant_id, Order.created_at >= start_dt)
+        .group_by(order_day).all()
+    ):
+        counts[(tenant_id, "core", _as_date(d))] += n
+    red_day = func.date(Redemption.created_at)
+    for d, n in (
+        db.query(red_day, func.count()).filter(Redemption.tenant_id == tenant_id, Redemption.created_at >= start_dt)
+        .group_by(red_day).all()
+    ):
+        counts[(tenant_id, "loyalty", _as_date(d))] += n
+    pay_day = func.date(Payment.created_at)
+    for d, n in (
+        db.query(pay_day, func.count()).join(Order, Order.id == Payment.order_id)
+        .filter(Order.tenant_id == tenant_id, Payment.status == "success", Payment.created_at >= start_dt)
+        .group_by(pay_day).all()
+    ):
+        counts[(tenant_id, "billing", _as_date(d))] += n
+
+    db.query(ModuleUsageDaily).filter(
+        ModuleUsageDaily.tenant_id == tenant_id,
+        ModuleUsageDaily.module.in_(COUNTED_MODULES),
+        ModuleUsageDaily.day >= start,
+    ).delete(synchronize_session=False)
+    record(db.connection(), counts)
+    db.commit()
+    return {"tenant_id": tenant_id, "days": days, "rows": len(counts)}
+
+
+def _as_date(value) -> date:
+    # func.date() returns a date on Postgres and an ISO string on SQLite
+    return value if isinstance(value, date) else date.fromisoformat(str(value))
+
+
+def _job_rebuild_module_usage(payload):
+    payload = payload or {}
+    db = SessionLocal()
+    try:
+        tenant_ids = [payload["tenant_id"]] if payload.get("tenant_id") else [t for (t,) in db.query(Tenant.id)]
+        days = int(payload.get("days") or MAX_WINDOW_DAYS)
+        return [rebuild_usage(db, tid, days) for tid in tenant_ids]
+    finally:
+        db.close()
+
+
+jobs.register_job_once("module_usage_rebuild", _job_rebuild_module_usage)
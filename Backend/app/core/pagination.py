@@ -0,0 +1,142 @@
+"""Keyset (cursor) pagination helpers shared by list endpoints.
+
+Offset pagination forces the database to scan and discard every row before
+the requested page, and list endpoints recompute ``count()`` on each call.
+These helpers let routes page over a stable ``(sort key, id)`` ordering
+instead, handing clients an opaque cursor that encodes the last row seen.
+
+Ordering convention (must match between ``keyset_order`` and ``keyset_after``):
+    descending -> sort DESC NULLS LAST, id DESC
+    ascending  -> sort ASC NULLS FIRST, id ASC
+
+Cursors also record the sort field and direction so a cursor minted for one
+ordering is rejected (400) when replayed against another.
+
+Totals: cursor requests may reuse a short-lived cached total via
+``cached_total`` so deep pages do not re-run the count query.
+"""
+from __future__ import annotations
+
+import base64
+import json
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import and_, or_
+
+from app.core import clock
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "d" in value:
+            return date.fromisoformat(value["d"])
+        raise ValueError("unknown cursor value type")
+    return value
+
+
+def encode_cursor(sort: str, descending: bool, value: Any, row_id: Any) -> str:
+    """Return an opaque URL-safe cursor for the row ``(value, row_id)``."""
+    payload = {"s": sort, "o": "desc" if descending else "asc", "v": _encode_value(value), "i": row_id}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str, descending: bool) -> Tuple[Any, Any]:
+    """Decode a cursor into ``(last_sort_value, last_id)``.
+
+    Raises HTTPException(400) when the cursor is malformed or was issued for a
+    different sort field / direction than the current request.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        value = _decode_value(payload["v"])
+        row_id = payload["i"]
+        cur_sort = payload["s"]
+        cur_order = payload["o"]
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if cur_sort != sort or cur_order != ("desc" if descending else "asc"):
+        raise HTTPException(status_code=400, detail="Cursor does not match sort parameters")
+    return value, row_id
+
+
+def keyset_order(sort_col, id_col, descending: bool) -> tuple:
+    """Return ORDER BY clauses implementing the module ordering convention."""
+    if descending:
+        return (sort_col.desc().nullslast(), id_col.desc())
+    return (sort_col.asc().nullsfirst(), id_col.asc())
+
+
+def keyset_after(sort_col, id_col, last_value: Any, last_id: Any, descending: bool):
+    """Return a predicate selecting rows strictly after ``(last_value, last_id)``."""
+    if descending:
+        if last_value is None:
+            return and_(sort_col.is_(None), id_col < last_id)
+        return or_(
+            sort_col < last_value,
+            and_(sort_col == last_value, id_col < last_id),
+            sort_col.is_(None),
+        )
+    if last_value is None:
+        return or_(and_(sort_col.is_(None), id_col > last_id), sort_col.isnot(None))
+    return or_(sort_col > last_value, and_(sort_col == last_value, id_col > last_id))
+
+
+def next_cursor_for(rows: list, limit: int, sort: str, descending: bool,
+                    key: Callable[[Any], Tuple[Any, Any]]) -> Optional[str]:
+    """Mint the cursor for the page after ``rows`` (None when exhausted).
+
+    ``key(row)`` must return the ``(sort_value, id)`` pair for a row.
+    """
+    if not rows or len(rows) < limit:
+        return None
+    value, row_id = key(rows[-1])
+    return encode_cursor(sort, descending, value, row_id)
+
+
+# --- Cached totals ---------------------------------------------------------
+_TOTALS_CACHE: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+_TOTALS_CACHE_MAX = 256
+_TOTALS_TTL_SECONDS = 30
+_TOTALS_LOCK = threading.Lock()
+
+
+def cached_total(key: Hashable, compute: Callable[[], Any], ttl: float = _TOTALS_TTL_SECONDS) -> Any:
+    """Return ``compute()`` memoised for ``ttl`` seconds under ``key``.
+
+    Used by cursor requests so follow-up pages reuse the total computed for
+    the first page instead of re-counting the filtered set every time.
+    """
+    now = clock.now()
+    with _TOTALS_LOCK:
+        entry = _TOTALS_CACHE.get(key)
+        if entry and now - entry[0] < ttl:
+            _TOTALS_CACHE.move_to_end(key)
+            return entry[1]
+    value = compute()
+    with _TOTALS_LOCK:
+        _TOTALS_CACHE[key] = (now, value)
+        _TOTALS_CACHE.move_to_end(key)
+        while len(_TOTALS_CACHE) > _TOTALS_CACHE_MAX:
+            _TOTALS_CACHE.popitem(last=False)
+    return value
+
+
+def clear_totals_cache() -> None:
+    with _TOTALS_LOCK:
+        _TOTALS_CACHE.clear()
@@ -18,7 +18,7 @@ run with multiple workers a distributed backend should replace it.
 """
 from __future__ import annotations
 import time
-from app.core import clock
+from app.core import clock, invalidation
 from typing import Dict, Tuple, Optional, Callable, List
 import os
 import json
@@ -47,7 +47,8 @@ def _init_redis():
 _init_redis()
 _MAX_BUCKETS = 10_000  # safety cap
 
-# Dynamic config overrides: scope -> (capacity, per_seconds)
+# Dynamic config overrides: scope -> (capacity, per_seconds). Changes are broadcast on the
+# "rate_limit" invalidation namespace; a worker started later does not see earlier overrides.
 _CONFIG: Dict[str, Tuple[int, float]] = {}
 
 # Penalty tracking: ip -> strikes, and last event timestamp
@@ -59,10 +60,22 @@ _BANS: Dict[str, float] = {}
 _BAN_SECONDS = 300  # 5 min temporary ban when max strikes reached
 
 def set_limit(scope: str, capacity: int, per_seconds: float):
-    _CONFIG[scope] = (capacity, per_seconds)
+    invalidation.publish("rate_limit", scope, {"capacity": capacity, "per": per_seconds})
 
 def delete_limit(scope: str) -> bool:
-    return _CONFIG.pop(scope, None) is not None
+    existed = scope in _CONFIG
+    invalidation.publish("rate_limit", scope, {"deleted": True})
+    return existed
+
+def _apply_override(scope: Optional[str], data: Optional[dict]):
+    if scope is None or not data:  # resync: overrides are not persisted, keep ours
+        return
+    if data.get("deleted"):
+        _CONFIG.pop(scope, None)
+    else:
+        _CONFIG[scope] = (int(data["capacity"]), float(data["per"]))
+
+invalidation.subscribe("rate_limit", _apply_override)
 
 def list_overrides():
     return {k: {"capacity": v[0], "per": v[1]} for k, v in _CONFIG.items()}
@@ -0,0 +1,128 @@
+"""Set-based expiry of pending reward redemptions.
+
+Vouchers left ``pending`` for ``EXPIRY_DAYS`` become ``expired``. The sweep
+runs per tenant in chunks of ``batch_size`` rows::
+
+    UPDATE redemptions SET status = 'expired'
+    WHERE id IN (SELECT id FROM redemptions
+                 WHERE tenant_id = :t AND status = 'pending' AND created_at < :cutoff
+                 ORDER BY id LIMIT :batch)
+
+committing after each chunk, so no ORM objects are loaded and row locks are
+held briefly. ``ix_redemptions_status_created`` serves both the tenant scan
+and the chunk selection.
+
+``uq_redemption_user_milestone_status`` allows one ``expired`` row per (user,
+milestone); a voucher re-issued for a milestone that already has one cannot
+expire and is counted as ``conflicts`` instead of failing the chunk.
+
+Runs as the ``redemptions_expire`` job; when ``ENABLE_JOB_QUEUE`` is on,
+startup schedules it every ``REDEMPTION_EXPIRY_INTERVAL_SECONDS``.
+"""
+from __future__ import annotations
+
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import exists, func, select, update
+from sqlalchemy.orm import Session, aliased
+
+from app.core import jobs
+from app.core.database import SessionLocal
+from app.models import Redemption
+
+logger = logging.getLogger("api")
+
+EXPIRY_DAYS = 10  # days until voucher expiry
+JOB_NAME = "redemptions_expire"
+DEFAULT_BATCH_SIZE = 1000
+
+
+def _expirable(cutoff: datetime):
+    expired = aliased(Redemption)
+    already_expired = exists().where(
+        expired.user_id == Redemption.user_id,
+        expired.milestone == Redemption.milestone,
+        expired.status == "expired",
+    )
+    return (Redemption.status == "pending", Redemption.created_at < cutoff, ~already_expired)
+
+
+def expire_redemptions(
+    db: Session,
+    tenant_id: Optional[str] = None,
+    *,
+    now: Optional[datetime] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> dict:
+    """Expire overdue pending redemptions (one tenant or all); returns counts."""
+    started = time.perf_counter()
+    cutoff = (now or datetime.utcnow()) - timedelta(days=EXPIRY_DAYS)
+    overdue = (Redemption.status == "pending", Redemption.created_at < cutoff)
+    if tenant_id is not None:
+        tenant_ids = [tenant_id]
+    else:
+        tenant_ids = [t for (t,) in db.execute(select(Redemption.tenant_id).where(*overdue).distinct())]
+
+    per_tenant: dict[str, int] = {}
+    batches = 0
+    for tid in tenant_ids:
+        expired = 0
+        while True:
+            chunk = (
+                select(Redemption.id)
+                .where(Redemption.tenant_id == tid, *_expirable(cutoff))
+                .order_by(Redemption.id)
+                .limit(batch_size)
+                .correlate(None)  # own FROM, not the UPDATE target
+                .scalar_subquery()
+            )
+            result = db.execute(
+                update(Redemption).where(Redemption.id.in_(chunk)).values(status="expired"),
+                execution_options={"synchronize_session": False},
+            )
+            db.commit()
+            batches += 1
+            expired += result.rowcount
+            if result.rowcount < batch_size:
+                break
+        if expired:
+            per_tenant[tid] = expired
+
+    conflicts_q = select(func.count()).select_from(Redemption).where(*overdue)
+    if tenant_id is not None:
+        conflicts_q = conflicts_q.where(Redemption.tenant_id == tenant_id)
+    conflicts = db.execute(conflicts_q).scalar() or 0
+    stats = {
+        "expired": sum(per_tenant.values()),
+        "tenants": per_tenant,
+        "batches": batches,
+        "conflicts": conflicts,
+        "cutoff": cutoff.isoformat(),
+        "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+    logger.info("redemption expiry finished", extra={k: v for k, v in stats.items() if k != "tenants"})
+    return stats
+
+
+def _job_expire_redemptions(payload):
+    payload = payload or {}
+    db = SessionLocal()
+    try:
+        return expire_redemptions(
+            db,
+            payload.get("tenant_id"),
+            batch_size=int(payload.get("batch_size") or DEFAULT_BATCH_SIZE),
+        )
+    finally:
+        db.close()
+
+
+def schedule(interval_seconds: float):
+    """Enqueue the recurring sweep (first run on the next worker tick)."""
+    return jobs.enqueue(JOB_NAME, {}, interval=interval_seconds)
+
+
+jobs.register_job_once(JOB_NAME, _job_expire_redemptions)
@@ -0,0 +1,125 @@
+"""Per-resource change counters (``resource_versions``).
+
+Each row counts writes to one resource for one (tenant, scope): scope is
+``*`` for the whole tenant or ``u:<user id>``, and tenant ``*`` holds global
+bumps. ``app.core.conditional`` turns the counters into ETags for polled
+read endpoints.
+
+Writes bump the counters in the writer's transaction:
+
+- ORM flushes: ``before_flush`` maps new / modified / deleted rows of the
+  models in ``RESOURCE_MODELS`` (and ``User`` -> ``profile``) to their
+  (tenant, user) and upserts ``version + 1``;
+- ORM bulk ``update()`` / ``delete()`` on those models (``do_orm_execute``)
+  bump the global ``("*", "*", resource)`` row, since the affected users are
+  unknown;
+- Core upserts outside the unit of work call ``bump`` directly (see
+  ``increment_visits``).
+"""
+from __future__ import annotations
+
+from typing import Iterable, Optional
+
+from sqlalchemy import and_, event, or_
+from sqlalchemy.orm import Session
+
+from app.core.database import dialect_insert
+from app.models import (
+    Extra,
+    Notification,
+    Order,
+    PointBalance,
+    Redemption,
+    ResourceVersion,
+    Reward,
+    Service,
+    User,
+    VisitCount,
+)
+from config import settings
+
+GLOBAL = "*"
+
+# model -> (resource, scoped to the row's user?)
+RESOURCE_MODELS = {
+    Order: ("orders", True),
+    VisitCount: ("visits", True),
+    Redemption: ("redemptions", True),
+    PointBalance: ("points", True),
+    Notification: ("notifications", True),
+    Reward: ("rewards", False),
+    Service: ("catalog", False),
+    Extra: ("catalog", False),
+}
+# User rows are their own scope (name / phone shown by loyalty endpoints)
+PROFILE_RESOURCE = "profile"
+
+
+def user_scope(user_id) -> str:
+    return f"u:{user_id}"
+
+
+def bump(conn, keys: Iterable[tuple[str, str, str]]) -> None:
+    """Increment the (tenant_id, scope, resource) counters on ``conn``."""
+    keys = sorted(set(keys))
+    if not keys:
+        return
+    insert = dialect_insert(conn)
+    stmt = insert(ResourceVersion).values(
+        [{"tenant_id": t, "scope": s, "resource": r, "version": 1} for t, s, r in keys]
+    )
+    conn.execute(stmt.on_conflict_do_update(
+        index_elements=[ResourceVersion.tenant_id, ResourceVersion.scope, ResourceVersion.resource],
+        set_={"version": ResourceVersion.version + 1},
+    ))
+
+
+def _keys_for(obj) -> Optional[tuple[str, str, str]]:
+    if isinstance(obj, User):
+        if obj.id is None:
+            return None
+        return (obj.tenant_id or settings.default_tenant, user_scope(obj.id), PROFILE_RESOURCE)
+    spec = RESOURCE_MODELS.get(type(obj))
+    if spec is None:
+        return None
+    resource, per_user = spec
+    # Catalog models are not tenant-scoped
+    tenant_id = (obj.tenant_id or settings.default_tenant) if hasattr(type(obj), "tenant_id") else GLOBAL
+    user_id = getattr(obj, "user_id", None) if per_user else None
+    return (tenant_id, user_scope(user_id) if user_id is not None else GLOBAL, resource)
+
+
+@event.listens_for(Session, "before_flush")
+def _bump_changed_resources(session: Session, flush_context, instances) -> None:
+    changed = [*session.new, *session.deleted]
+    changed += [o for o in session.dirty if session.is_modified(o, include_collections=False)]
+    keys = {k for k in map(_keys_for, changed) if k is not None}
+    if keys:
+        bump(session.connection(), keys)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _bump_bulk_writes(state) -> None:
+    if not (state.is_update or state.is_delete):
+        return
+    mapper = state.bind_mapper
+    spec = RESOURCE_MODELS.get(mapper.class_) if mapper is not None else None
+    if spec is not None:
+        bump(state.session.connection(), [(GLOBAL, GLOBAL, spec[0])])
+
+
+def current_versions(db: Session, tenant_id: str, user_id, resources: Iterable[str]) -> tuple:
+    """Sorted (tenant, scope, resource, version) rows relevant to one caller."""
+    scopes = [GLOBAL] + ([user_scope(user_id)] if user_id is not None else [])
+    rows = (
+        db.query(ResourceVersion.tenant_id, ResourceVersion.scope, ResourceVersion.resource, ResourceVersion.version)
+        .filter(
+            ResourceVersion.resource.in_(list(resources)),
+            or_(
+                and_(ResourceVersion.tenant_id == tenant_id, ResourceVersion.scope.in_(scopes)),
+                and_(ResourceVersion.tenant_id == GLOBAL, ResourceVersion.scope == GLOBAL),
+            ),
+        )
+        .all()
+    )
+    return tuple(sorted(tuple(r) for r in rows))
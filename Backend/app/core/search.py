@@ -0,0 +1,303 @@
+"""Indexed substring search over users and vehicles.
+
+Each user / vehicle has one ``search_documents`` row whose ``content`` is a
+lower-cased bag of searchable tokens (names, email, plate, make, model) plus
+normalised forms of phone numbers and licence plates, so ``0821234567``,
+``+27 82 123 4567`` and ``27821234567`` all hit the same customer and
+``CA 123-456`` matches ``ca123456``.
+
+Backends:
+    postgres -> ``content LIKE '%term%'`` served by a GIN ``gin_trgm_ops``
+                index, ranked by ``word_similarity``.
+    sqlite   -> FTS5 trigram shadow table (``search_documents_fts``) queried
+                with MATCH and ranked by ``bm25``.
+    Terms shorter than three characters cannot use trigrams on either
+    backend and fall back to a LIKE scan of ``search_documents``.
+
+Documents are maintained by an ``after_flush`` session hook whenever an ORM
+flush inserts, deletes or changes the searchable fields of a User / Vehicle.
+Bulk ``Query.update/delete`` bypass the ORM, so the ``search_reindex`` job
+rebuilds the whole index; stale documents are harmless because every caller
+joins back to the live rows.
+"""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterable, List, Optional, Sequence
+
+from sqlalchemy import and_, case, delete, event, func, insert, literal_column, or_, select, table, column, update
+from sqlalchemy import inspect as sa_inspect
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Select
+
+from app.core import jobs
+from app.core.database import SessionLocal, engine
+from app.models import SearchDocument, User, Vehicle
+
+ENTITY_TYPES = ("user", "vehicle")
+FTS_TABLE = "search_documents_fts"
+MIN_TRIGRAM_LEN = 3
+
+_USER_FIELDS = ("first_name", "last_name", "email", "phone", "tenant_id")
+_VEHICLE_FIELDS = ("plate", "make", "model", "user_id")
+_PHONEISH = re.compile(r"[\d\s+\-()]+")
+_fts = table(FTS_TABLE, column("rowid"))
+
+
+# --- Normalisation ---------------------------------------------------------
+
+def normalize_phone(raw: Optional[str]) -> List[str]:
+    """Return digit-only forms of a phone number (local and +27 variants)."""
+    digits = re.sub(r"\D", "", raw or "")
+    if not digits:
+        return []
+    forms = [digits]
+    if digits.startswith("0") and len(digits) == 10:
+        forms.append("27" + digits[1:])
+    elif digits.startswith("27") and len(digits) == 11:
+        forms.append("0" + digits[2:])
+    return forms
+
+
+def normalize_plate(raw: Optional[str]) -> str:
+    """Collapse a licence plate to lower-case alphanumerics (``CA 123-456`` -> ``ca123456``)."""
+    return re.sub(r"[^0-9a-z]", "", (raw or "").lower())
+
+
+def _join_tokens(parts: Iterable[Optional[str]]) -> str:
+    seen: List[str] = []
+    for part in parts:
+        token = (part or "").strip().lower()
+        if token and token not in seen:
+            seen.append(token)
+    return " ".join(seen)
+
+
+def user_content(first_name, last_name, email, phone) -> str:
+    return _join_tokens([first_name, last_name, email, phone, *normalize_phone(phone)])
+
+
+def vehicle_content(plate, make, model) -> str:
+    return _join_tokens([plate, normalize_plate(plate), make, model])
+
+
+def query_terms(q: Optional[str]) -> List[List[str]]:
+    """Parse a search string into alternatives of required terms.
+
+    The result is in disjunctive normal form: a document matches when it
+    contains every term of at least one inner list.
+    """
+    q = (q or "").strip().lower()
+    if not q:
+        return []
+    if _PHONEISH.fullmatch(q) and re.search(r"\d", q):
+        return [[form] for form in normalize_phone(q)]
+    tokens = q.split()
+    alternatives = [tokens]
+    compact = normalize_plate(q)
+    if len(tokens) > 1 and compact:
+        alternatives.append([compact])
+    return alternatives
+
+
+# --- Query building --------------------------------------------------------
+
+@dataclass
+class SearchHit:
+    entity_type: str
+    entity_id: int
+    owner_user_id: Optional[int]
+    score: float
+
+
+def _like_escape(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _like_clause(alternatives: List[List[str]]):
+    return or_(*[
+        and_(*[SearchDocument.content.like(f"%{_like_escape(t)}%", escape="\\") for t in terms])
+        for terms in alternatives
+    ])
+
+
+def _fts_expression(alternatives: List[List[str]]) -> str:
+    def quote(term: str) -> str:
+        return '"' + term.replace('"', '""') + '"'
+    return " OR ".join("(" + " AND ".join(quote(t) for t in terms) + ")" for terms in alternatives)
+
+
+def _uses_fts(alternatives: List[List[str]]) -> bool:
+    return engine.dialect.name == "sqlite" and all(
+        len(t) >= MIN_TRIGRAM_LEN for terms in alternatives for t in terms
+    )
+
+
+def _matching(alternatives: List[List[str]], entity_types: Sequence[str], tenant_id: Optional[str]):
+    """Return ``(from_clause_fn, where_clauses, score_expr)`` for the active backend."""
+    where = [SearchDocument.entity_type.in_(list(entity_types))]
+    if tenant_id is not None:
+        where.append(SearchDocument.tenant_id == tenant_id)
+    if _uses_fts(alternatives):
+        where.append(literal_column(FTS_TABLE).op("MATCH")(_fts_expression(alternatives)))
+        score = -func.bm25(literal_column(FTS_TABLE))
+        return (lambda stmt: stmt.join(_fts, _fts.c.rowid == SearchDocument.id)), where, score
+    where.append(_like_clause(alternatives))
+    if engine.dialect.name == "postgresql":
+        score = func.word_similarity(" ".join(alternatives[0]), SearchDocument.content)
+    else:
+        prefix = f"{_like_escape(alternatives[0][0])}%"
+        score = case((SearchDocument.content.like(prefix, escape="\\"), 1.0), else_=0.5) - func.length(SearchDocument.content) / 10000.0
+    return (lambda stmt: stmt), where, score
+
+
+def match_ids(q: str, entity_type: str = "user", tenant_id: Optional[str] = None) -> Select:
+    """Return a SELECT of entity ids matching ``q``, for use in ``col.in_(...)`` filters."""
+    alternatives = query_terms(q)
+    if not alternatives:
+        return select(SearchDocument.entity_id).where(SearchDocument.id.is_(None))
+    join, where, _ = _matching(alternatives, (entity_type,), tenant_id)
+    return join(select(SearchDocument.entity_id)).where(*where)
+
+
+def search(
+    db: Session,
+    q: str,
+    *,
+    entity_types: Sequence[str] = ENTITY_TYPES,
+    tenant_id: Optional[str] = None,
+    limit: int = 20,
+) -> List[SearchHit]:
+    """Return ranked search hits (best first)."""
+    alternatives = query_terms(q)
+    if not alternatives:
+        return []
+    join, where, score = _matching(alternatives, entity_types, tenant_id)
+    stmt = join(
+        select(
+            SearchDocument.entity_type,
+            SearchDocument.entity_id,
+            SearchDocument.owner_user_id,
+            score.label("score"),
+        )
+    ).where(*where).order_by(literal_column("score").desc(), SearchDocument.id.asc()).limit(limit)
+    return [SearchHit(r.entity_type, r.entity_id, r.owner_user_id, float(r.score or 0)) for r in db.execute(stmt)]
+
+
+# --- Index maintenance -----------------------------------------------------
+
+def _user_doc(u) -> dict:
+    return {
+        "entity_type": "user",
+        "entity_id": u.id,
+        "owner_user_id": u.id,
+        "tenant_id": u.tenant_id,
+        "content": user_content(u.first_name, u.last_name, u.email, u.phone),
+        "updated_at": datetime.utcnow(),
+    }
+
+
+def _vehicle_doc(v, tenant_id: Optional[str]) -> dict:
+    return {
+        "entity_type": "vehicle",
+        "entity_id": v.id,
+        "owner_user_id": v.user_id,
+        "tenant_id": tenant_id,
+        "content": vehicle_content(v.plate, v.make, v.model),
+        "updated_at": datetime.utcnow(),
+    }
+
+
+def _replace_docs(conn, entity_type: str, docs: List[dict]) -> None:
+    if not docs:
+        return
+    conn.execute(delete(SearchDocument).where(
+        SearchDocument.entity_type == entity_type,
+        SearchDocument.entity_id.in_([d["entity_id"] for d in docs]),
+    ))
+    conn.execute(insert(SearchDocument), docs)
+
+
+def _changed(obj, fields: Sequence[str]) -> bool:
+    state = sa_inspect(obj)
+    return any(state.attrs[f].history.has_changes() for f in fields)
+
+
+@event.listens_for(Session, "after_flush")
+def _sync_search_documents(session: Session, flush_context) -> None:
+    users, vehicles, retenanted = [], [], []
+    for obj in session.new:
+        if isinstance(obj, User):
+            users.append(obj)
+        elif isinstance(obj, Vehicle):
+            vehicles.append(obj)
+    for obj in session.dirty:
+        if isinstance(obj, User) and _changed(obj, _USER_FIELDS):
+            users.append(obj)
+            if obj not in session.new and _changed(obj, ("tenant_id",)):
+                retenanted.append(obj)
+        elif isinstance(obj, Vehicle) and _changed(obj, _VEHICLE_FIELDS):
+            vehicles.append(obj)
+    removed = [
+        (("user" if isinstance(obj, User) else "vehicle"), obj.id)
+        for obj in session.deleted
+        if isinstance(obj, (User, Vehicle))
+    ]
+    if not (users or vehicles or removed):
+        return
+
+    conn = session.connection()
+    for entity_type, entity_id in removed:
+        conn.execute(delete(SearchDocument).where(
+            SearchDocument.entity_type == entity_type, SearchDocument.entity_id == entity_id,
+        ))
+    _replace_docs(conn, "user", [_user_doc(u) for u in users])
+    for u in retenanted:
+        conn.execute(update(SearchDocument).where(
+            SearchDocument.entity_type == "vehicle", SearchDocument.owner_user_id == u.id,
+        ).values(tenant_id=u.tenant_id))
+    if vehicles:
+        owner_ids = {v.user_id for v in vehicles if v.user_id is not None}
+        tenants = dict(conn.execute(select(User.id, User.tenant_id).where(User.id.in_(owner_ids))).all()) if owner_ids else {}
+        _replace_docs(conn, "vehicle", [_vehicle_doc(v, tenants.get(v.user_id)) for v in vehicles])
+
+
+def rebuild_search_index(db: Session, batch_size: int = 1000) -> dict:
+    """Rebuild every search document from users / vehicles."""
+    db.execute(delete(SearchDocument))
+    counts = {"user": 0, "vehicle": 0}
+    batch: List[dict] = []
+
+    def flush_batch():
+        if batch:
+            db.execute(insert(SearchDocument), batch)
+            batch.clear()
+
+    for u in db.query(User).yield_per(batch_size):
+        batch.append(_user_doc(u))
+        counts["user"] += 1
+        if len(batch) >= batch_size:
+            flush_batch()
+    flush_batch()
+    rows = db.query(Vehicle, User.tenant_id).outerjoin(User, User.id == Vehicle.user_id).yield_per(batch_size)
+    for v, tenant_id in rows:
+        batch.append(_vehicle_doc(v, tenant_id))
+        counts["vehicle"] += 1
+        if len(batch) >= batch_size:
+            flush_batch()
+    flush_batch()
+    db.commit()
+    return counts
+
+
+def _job_search_reindex(payload):
+    db = SessionLocal()
+    try:
+        return rebuild_search_index(db)
+    finally:
+        db.close()
+
+
+jobs.register_job_once("search_reindex", _job_search_reindex)
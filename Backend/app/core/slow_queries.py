@@ -0,0 +1,165 @@
+"""Sampled slow-query recorder.
+
+Times every cursor execution via ``before_cursor_execute`` /
+``after_cursor_execute`` on all engines and aggregates by statement
+fingerprint (literals, numbers and IN-lists normalised away), keeping count,
+total, max and p95 (over the most recent ``_RECENT_PER_FINGERPRINT``
+executions). The table is bounded to ``SLOW_QUERY_MAX_FINGERPRINTS`` entries,
+evicting the least recently seen.
+
+Parameters are only captured for executions slower than
+``SLOW_QUERY_THRESHOLD_MS`` (a few samples per fingerprint, truncated), so
+the normal path never formats bound values. Samples record parameter types,
+never values: the table is process-wide and bound values carry customer data. ``/api/obs/slow-queries``
+reports the table; this replaces running with ``SQLALCHEMY_ECHO=true`` to
+find regressions.
+"""
+from __future__ import annotations
+
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from config import settings
+
+_RECENT_PER_FINGERPRINT = 256
+_SAMPLES_PER_FINGERPRINT = 3
+_PARAM_REPR_MAX = 500
+_FINGERPRINT_CACHE_MAX = 2048
+
+_lock = threading.Lock()
+_table: "OrderedDict[str, dict]" = OrderedDict()
+_fingerprint_cache: "OrderedDict[str, str]" = OrderedDict()
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*(?:\?|%s|%\(\w+\)s|:\w+)(?:\s*,\s*(?:\?|%s|%\(\w+\)s|:\w+))+\s*\)")
+_WS = re.compile(r"\s+")
+
+
+def fingerprint(statement: str) -> str:
+    """Normalise a SQL statement so executions differing only in values group together."""
+    with _lock:
+        cached = _fingerprint_cache.get(statement)
+    if cached is not None:
+        return cached
+    fp = _STRING.sub("?", statement)
+    fp = _NUMBER.sub("?", fp)
+    fp = _PLACEHOLDER_LIST.sub("(...)", fp)
+    fp = _WS.sub(" ", fp).strip()
+    with _lock:
+        _fingerprint_cache[statement] = fp
+        if len(_fingerprint_cache) > _FINGERPRINT_CACHE_MAX:
+            _fingerprint_cache.popitem(last=False)
+    return fp
+
+
+def _redact(parameters):
+    """Replace bound values with their type names, keeping the shape."""
+    if isinstance(parameters, dict):
+        return {k: type(v).__name__ for k, v in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [_redact(p) if isinstance(p, (dict, list, tuple)) else type(p).__name__ for p in parameters]
+    return None if parameters is None else type(parameters).__name__
+
+
+def record(statement: str, elapsed_ms: float, parameters=None) -> None:
+    fp = fingerprint(statement)
+    slow = elapsed_ms >= settings.slow_query_threshold_ms
+    sample = None
+    if slow:
+        sample = {
+            "ms": round(elapsed_ms, 3),
+            "at": datetime.utcnow().isoformat(),
+            "parameters": repr(_redact(parameters))[:_PARAM_REPR_MAX],
+        }
+    with _lock:
+        entry = _table.get(fp)
+        if entry is None:
+            entry = _table[fp] = {
+                "count": 0,
+                "total_ms": 0.0,
+                "max_ms": 0.0,
+                "slow_count": 0,
+                "recent": deque(maxlen=_RECENT_PER_FINGERPRINT),
+                "samples": deque(maxlen=_SAMPLES_PER_FINGERPRINT),
+            }
+            while len(_table) > settings.slow_query_max_fingerprints:
+                _table.popitem(last=False)
+        else:
+            _table.move_to_end(fp)
+        entry["count"] += 1
+        entry["total_ms"] += elapsed_ms
+        entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+        entry["recent"].append(elapsed_ms)
+        if sample is not None:
+            entry["slow_count"] += 1
+            entry["samples"].append(sample)
+
+
+def _p95(values) -> float:
+    ordered = sorted(values)
+    return ordered[max(0, int(round(0.95 * len(ordered))) - 1)] if ordered else 0.0
+
+
+_SORT_KEYS = {"total": "total_ms", "max": "max_ms", "p95": "p95_ms", "count": "count", "slow": "slow_count"}
+
+
+def report(limit: int = 50, sort: str = "total", only_slow: bool = False) -> dict:
+    """Fingerprints ordered by ``sort`` (total|max|p95|count|slow), heaviest first."""
+    with _lock:
+        rows = [
+            {
+                "fingerprint": fp,
+                "count": e["count"],
+                "total_ms": round(e["total_ms"], 3),
+                "avg_ms": round(e["total_ms"] / e["count"], 3),
+                "p95_ms": round(_p95(e["recent"]), 3),
+                "max_ms": round(e["max_ms"], 3),
+                "slow_count": e["slow_count"],
+                "samples": list(e["samples"]),
+            }
+            for fp, e in _table.items()
+            if not only_slow or e["slow_count"]
+        ]
+    rows.sort(key=lambda r: r[_SORT_KEYS.get(sort, "total_ms")], reverse=True)
+    return {
+        "threshold_ms": settings.slow_query_threshold_ms,
+        "fingerprints": len(_table),
+        "max_fingerprints": settings.slow_query_max_fingerprints,
+        "items": rows[:limit],
+    }
+
+
+def reset() -> None:
+    with _lock:
+        _table.clear()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before(conn, cursor, statement, parameters, context, executemany):
+    if not settings.slow_query_log:
+        return
+    conn.info.setdefault("_query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after(conn, cursor, statement, parameters, context, executemany):
+    starts: Optional[list] = conn.info.get("_query_start")
+    if not starts:
+        return
+    record(statement, (time.perf_counter() - starts.pop()) * 1000, parameters)
+
+
+@event.listens_for(Engine, "handle_error")
+def _on_error(exception_context):
+    conn = exception_context.connection
+    starts = conn.info.get("_query_start") if conn is not None else None
+    if starts:
+        starts.pop()
@@ -0,0 +1,226 @@
+"""Static asset serving with precompressed siblings and immutable caching.
+
+``PrecompressedStaticFiles`` serves ``foo.js.br`` / ``foo.js.gz`` (built by
+``scripts/precompress_static.py`` or the branding asset job) in place of
+``foo.js`` when the client's ``Accept-Encoding`` allows it, so bundles are
+compressed once at build time instead of on every request. Responses are
+``FileResponse`` objects, which use the ASGI ``http.response.pathsend``
+extension (zero-copy) when the server offers it.
+
+Caching: content-hashed bundle files under ``assets/`` (Vite's
+``index-DgHJooKT.js``) and branding files named by content hash on upload
+(``logo_light-<digest>-256.webp``) get a one-year ``immutable`` policy; other
+files (``index.html``, the rewritten ``branding/<tenant>/assets.json``) must
+revalidate.
+
+``SelectiveGZipMiddleware`` is ``GZipMiddleware`` that leaves already
+compressed media types (images, fonts, archives) alone, as well as responses
+that already carry ``Content-Encoding`` (the precompressed siblings).
+"""
+from __future__ import annotations
+
+import gzip
+import io
+import mimetypes
+import os
+import re
+import stat
+from typing import Optional
+
+import anyio
+
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "public, max-age=0, must-revalidate"
+# Encodings tried in order of preference, with the sibling suffix that holds them
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+# Vite output dir; files there are named name-<hash>.ext (8+ char base64url/hex
+# hash containing a digit or capital, so "-component.js" does not qualify)
+HASHED_ASSET_DIRS = ("assets/",)
+_HASHED_NAME = re.compile(r"[-.](?=[A-Za-z0-9_-]*[0-9A-Z])[A-Za-z0-9_-]{8,}\.[A-Za-z0-9]+$")
+# Branding uploads and their variants: {field}-{16 hex digest}[-size].ext
+_HASHED_BRANDING_NAME = re.compile(r"^[a-z_]+-[0-9a-f]{16}[-.]")
+
+_COMPRESSED_PREFIXES = ("image/", "video/", "audio/", "font/woff")
+_COMPRESSED_TYPES = {
+    "application/zip",
+    "application/gzip",
+    "application/x-gzip",
+    "application/x-brotli",
+    "application/x-7z-compressed",
+    "application/pdf",
+}
+
+
+def is_precompressed_type(content_type: str) -> bool:
+    """True for media types that gain nothing from gzip (SVG stays compressible)."""
+    ctype = content_type.split(";", 1)[0].strip().lower()
+    if ctype == "image/svg+xml":
+        return False
+    return ctype in _COMPRESSED_TYPES or ctype.startswith(_COMPRESSED_PREFIXES)
+
+
+def accepted_encodings(header: str) -> set[str]:
+    """Codings from ``Accept-Encoding`` with a non-zero q-value."""
+    accepted = set()
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        if coding:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def cache_control_for(path: str) -> str:
+    name = path.rsplit("/", 1)[-1]
+    if path.startswith("branding/") and _HASHED_BRANDING_NAME.match(name):
+        return IMMUTABLE
+    if path.startswith(HASHED_ASSET_DIRS) and _HASHED_NAME.search(name):
+        return IMMUTABLE
+    return REVALIDATE
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        response = await self._precompressed_response(path, scope)
+        if response is None:
+            response = await super().get_response(path, scope)
+        if response.status_code in (200, 304):
+            response.headers.setdefault("Cache-Control", cache_control_for(path))
+        return response
+
+    async def _precompressed_response(self, path: str, scope: Scope) -> Optional[Response]:
+        if scope["method"] not in ("GET", "HEAD") or path.endswith((".br", ".gz")):
+            return None
+        accepted = accepted_encodings(Headers(scope=scope).get("accept-encoding", ""))
+        if not accepted.intersection(coding for coding, _ in ENCODINGS):
+            return None
+        found = await anyio.to_thread.run_sync(self._find_sibling, path, accepted)
+        if found is None:
+            return None
+        coding, original_path, sibling_path, sibling_stat = found
+        response = self.file_response(sibling_path, sibling_stat, scope)
+        if response.status_code == 200:
+            response.headers["content-type"] = _media_type(original_path)
+            response.headers["content-encoding"] = coding
+        response.headers["vary"] = "Accept-Encoding"
+        return response
+
+    def _find_sibling(self, path: str, accepted: set[str]):
+        original_path, original_stat = self.lookup_path(path)
+        if original_stat is None or not stat.S_ISREG(original_stat.st_mode):
+            return None
+        for coding, suffix in ENCODINGS:
+            if coding not in accepted:
+                continue
+            sibling_path, sibling_stat = self.lookup_path(path + suffix)
+            if sibling_stat is not None and stat.S_ISREG(sibling_stat.st_mode):
+                return coding, original_path, sibling_path, sibling_stat
+        return None
+
+
+def _media_type(path: str) -> str:
+    media_type = mimetypes.guess_type(os.path.basename(path))[0] or "application/octet-stream"
+    if media_type.startswith("text/"):
+        media_type += "; charset=utf-8"  # as FileResponse does
+    return media_type
+
+
+class _SelectiveGZipResponder:
+    """Gzip one response unless it is already compressed.
+
+    The decision is made on ``http.response.start`` from the response headers:
+    an existing ``Content-Encoding``, a compressed media type or an event
+    stream pass through unchanged, as do single-chunk bodies under
+    ``minimum_size``.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int, compresslevel: int = 9) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.compresslevel = compresslevel
+        self.send: Send
+        self.start: Message = {}
+        self.started = False
+        self.passthrough = False
+        self.buffer = io.BytesIO()
+        self.gzip_file: Optional[gzip.GzipFile] = None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        try:
+            await self.app(scope, receive, self.send_with_compression)
+        finally:
+            if self.gzip_file is not None:
+                self.gzip_file.close()
+
+    def _compress(self, body: bytes, more_body: bool) -> bytes:
+        if self.gzip_file is None:
+            self.gzip_file = gzip.GzipFile(mode="wb", fileobj=self.buffer, compresslevel=self.compresslevel)
+        self.gzip_file.write(body)
+        if not more_body:
+            self.gzip_file.close()
+        body = self.buffer.getvalue()
+        self.buffer.seek(0)
+        self.buffer.truncate()
+        return body
+
+    async def send_with_compression(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            ctype = headers.get("content-type", "")
+            self.passthrough = (
+                "content-encoding" in headers
+                or ctype.startswith("text/event-stream")
+                or is_precompressed_type(ctype)
+            )
+            self.start = message
+            return
+        if self.passthrough or message["type"] != "http.response.body":
+            # pathsend (zero-copy file) and skipped responses go out as they are
+            if not self.started:
+                self.started = True
+                await self.send(self.start)
+            await self.send(message)
+            return
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.started:
+            message["body"] = self._compress(body, more_body)
+            await self.send(message)
+            return
+        self.started = True
+        headers = MutableHeaders(raw=self.start["headers"])
+        headers.add_vary_header("Accept-Encoding")
+        if len(body) >= self.minimum_size or more_body:
+            message["body"] = self._compress(body, more_body)
+            headers["Content-Encoding"] = "gzip"
+            if more_body:
+                del headers["Content-Length"]
+            else:
+                headers["Content-Length"] = str(len(message["body"]))
+        await self.send(self.start)
+        await self.send(message)
+
+
+class SelectiveGZipMiddleware(GZipMiddleware):
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":  # pragma: no cover
+            await self.app(scope, receive, send)
+            return
+        if "gzip" not in Headers(scope=scope).get("Accept-Encoding", ""):
+            await self.app(scope, receive, send)
+            return
+        responder = _SelectiveGZipResponder(self.app, self.minimum_size, compresslevel=self.compresslevel)
+        await responder(scope, receive, send)
@@ -16,6 +16,7 @@ from urllib.parse import urlparse
 
 from functools import cached_property
 
+from app.core import invalidation
 from app.core.database import get_db
 from app.models import Tenant, VerticalType
 from app.plugins.verticals.vertical_dispatch import dispatch
@@ -25,7 +26,7 @@ from config import settings
 current_tenant_id: contextvars.ContextVar[str | None] = contextvars.ContextVar("current_tenant_id", default=None)
 
 # Simple in-process LRU-ish cache for domain-> tenant id resolution to cut DB lookups.
-# (key is normalized host). Not multi-process safe; fine for single worker dev / small scale.
+# (key is normalized host). Other workers drop entries via the "tenant" invalidation namespace.
 _TENANT_CACHE: Dict[str, Tuple[str, float]] = {}
 _TENANT_CACHE_TTL = 60  # seconds
 _TENANT_CACHE_MAX = 512
@@ -51,6 +52,17 @@ def _cache_set(key: str, tenant_id: str):
         _TENANT_CACHE.pop(oldest, None)
     _TENANT_CACHE[key] = (tenant_id, time.time())
 
+def _invalidate_tenant_hosts(tenant_id: Optional[str], data: Optional[dict] = None):
+    """Drop cached hosts resolving to ``tenant_id`` (all when None)."""
+    if tenant_id is None:
+        _TENANT_CACHE.clear()
+        return
+    for key, (tid, _) in list(_TENANT_CACHE.items()):
+        if tid == tenant_id:
+            _TENANT_CACHE.pop(key, None)
+
+invalidation.subscribe("tenant", _invalidate_tenant_hosts)
+
 def tenant_cache_metrics() -> dict:
     """Return a shallow copy of cache metrics (for diagnostics / tests)."""
     return dict(_TENANT_CACHE_METRICS)
@@ -0,0 +1,191 @@
+"""Precomputed public tenant documents (meta, theme, manifest).
+
+``/api/public/tenant-meta``, ``/tenant-theme`` and ``/tenant-manifest`` are
+the first calls every white-label PWA makes. Instead of re-querying
+``TenantBranding`` / ``Tenant`` and reading the branding asset manifest per call,
+each tenant's three documents are built once, serialised to bytes and given a
+strong ETag (sha256 of the body).
+
+Documents are rebuilt explicitly by ``update_branding`` /
+``upload_branding_asset`` and invalidated on commit of any ORM change to a
+``Tenant`` or ``TenantBranding`` row (``before_flush`` collects the ids,
+``after_commit`` publishes them on the ``tenant`` invalidation namespace, which
+drops them in every worker). Entries older than
+``PUBLIC_TENANT_DOC_TTL_SECONDS`` are still served while a background thread
+rebuilds them (server-side stale-while-revalidate), which bounds staleness
+when no invalidation bus is configured.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.exc import DatabaseError, OperationalError, ProgrammingError
+from sqlalchemy.orm import Session
+
+from app.core import invalidation
+from app.core.database import SessionLocal
+from app.core.tenant_context import TenantContext, tenant_meta_dict
+from app.models import Tenant, TenantBranding
+from app.services import branding_assets
+from config import settings
+
+logger = logging.getLogger("api")
+
+DOCUMENT_KINDS = ("meta", "theme", "manifest")
+
+_lock = threading.Lock()
+_docs: dict[str, dict] = {}  # tenant_id -> {"built_at": float, "meta": (body, etag), ...}
+_refreshing: set[str] = set()
+METRICS = {"hits": 0, "builds": 0, "stale_served": 0, "invalidations": 0}
+
+
+def _encode(data: dict) -> tuple[bytes, str]:
+    # Same separators as JSONResponse so clients see identical bodies
+    body = json.dumps(data, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+    return body, '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def build_documents(tenant: Tenant, branding: Optional[TenantBranding]) -> dict:
+    """Serialise the three public documents for ``tenant``."""
+    b = branding
+    theme = {
+        "tenant_id": tenant.id,
+        "public_name": (b.public_name if b else None) or tenant.name,
+        "short_name": b.short_name if b else None,
+        "primary_color": (b.primary_color if b else None) or tenant.theme_color,
+        "secondary_color": b.secondary_color if b else None,
+        "accent_color": b.accent_color if b else None,
+        "logo_light_url": b.logo_light_url if b else None,
+        "logo_dark_url": b.logo_dark_url if b else None,
+        "favicon_url": b.favicon_url if b else None,
+    }
+    manifest = {
+        "name": (b.public_name if b else tenant.id) or tenant.id,
+        "short_name": (b.short_name if b else tenant.id) or tenant.id,
+        "theme_color": (b.primary_color if b else None) or "#3366ff",
+        "background_color": "#ffffff",
+        "display": "standalone",
+        "icons": branding_assets.manifest_icons(tenant.id, b),
+        "id": tenant.id,
+        "start_url": "/",
+    }
+    return {
+        "built_at": time.monotonic(),
+        "meta": _encode(tenant_meta_dict(TenantContext(tenant))),
+        "theme": _encode(theme),
+        "manifest": _encode(manifest),
+    }
+
+
+def rebuild(db: Session, tenant_id: str) -> Optional[dict]:
+    """Rebuild and store ``tenant_id``'s documents (None if the tenant is gone)."""
+    tenant = db.query(Tenant).filter_by(id=tenant_id).first()
+    if tenant is None:
+        invalidate(tenant_id)
+        return None
+    try:
+        branding = db.query(TenantBranding).filter_by(tenant_id=tenant_id).first()
+    except (ProgrammingError, OperationalError, DatabaseError) as exc:
+        logger.warning("tenant branding lookup failed", extra={"tenant_id": tenant_id}, exc_info=exc)
+        db.rollback()
+        branding = None
+    docs = build_documents(tenant, branding)
+    with _lock:
+        _docs[tenant_id] = docs
+        METRICS["builds"] += 1
+    return docs
+
+
+def _refresh_in_background(tenant_id: str) -> None:
+    with _lock:
+        if tenant_id in _refreshing:
+            return
+        _refreshing.add(tenant_id)
+
+    def _run():
+        try:
+            with SessionLocal() as db:
+                rebuild(db, tenant_id)
+        except Exception:
+            logger.warning("background tenant document rebuild failed", extra={"tenant_id": tenant_id}, exc_info=True)
+        finally:
+            with _lock:
+                _refreshing.discard(tenant_id)
+
+    threading.Thread(target=_run, name=f"tenant-docs-{tenant_id}", daemon=True).start()
+
+
+def get_document(db: Session, tenant_id: str, kind: str) -> Optional[tuple[bytes, str]]:
+    """Return ``(body, etag)`` for one document, building it on first use."""
+    with _lock:
+        docs = _docs.get(tenant_id)
+    if docs is None:
+        docs = rebuild(db, tenant_id)
+        if docs is None:
+            return None
+    elif time.monotonic() - docs["built_at"] > settings.public_tenant_doc_ttl_seconds:
+        with _lock:
+            METRICS["stale_served"] += 1
+        _refresh_in_background(tenant_id)
+    else:
+        with _lock:
+            METRICS["hits"] += 1
+    return docs[kind]
+
+
+def invalidate(tenant_id: Optional[str] = None) -> None:
+    """Drop cached documents for one tenant (or all when ``tenant_id`` is None)."""
+    with _lock:
+        if tenant_id is None:
+            _docs.clear()
+        else:
+            _docs.pop(tenant_id, None)
+        METRICS["invalidations"] += 1
+
+
+invalidation.subscribe("tenant", lambda tenant_id, data: invalidate(tenant_id))
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """RFC 9110 If-None-Match comparison (weak comparison, ``*`` and lists)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    bare = etag.strip('"')
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate.strip('"') == bare:
+            return True
+    return False
+
+
+@event.listens_for(Session, "before_flush")
+def _collect_changed_tenants(session: Session, flush_context, instances) -> None:
+    changed = session.info.setdefault("tenant_documents_changed", set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, Tenant):
+            changed.add(obj.id)
+        elif isinstance(obj, TenantBranding):
+            changed.add(obj.tenant_id)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session: Session) -> None:
+    changed = session.info.pop("tenant_documents_changed", None)
+    for tenant_id in changed or ():
+        if tenant_id:
+            invalidation.publish("tenant", tenant_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rolled_back(session: Session) -> None:
+    session.info.pop("tenant_documents_changed", None)
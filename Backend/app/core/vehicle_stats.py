@@ -0,0 +1,135 @@
+"""Per-vehicle wash counters.
+
+``vehicle_wash_stats`` holds total washes, last wash time and last service
+per vehicle so staff screens (vehicle search, order-user lookup, payment
+verification) can show history with a single outer join instead of loading
+every order of every vehicle.
+
+An order counts as a wash for each linked vehicle once it is paid or
+completed. ``OrderVehicle.wash_counted`` makes recording idempotent, so
+callers may invoke ``record_order_washes`` from every success path (payment
+charge / webhook / POS verify, end of wash, vehicle linked to an already
+paid order) without double counting.
+
+``last_wash_at`` uses the order's ``created_at`` to match the previous
+derived ``last_wash`` value.
+"""
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import case, func, or_
+from sqlalchemy.orm import Query, Session
+
+from app.core import jobs
+from app.core.database import SessionLocal, dialect_insert
+from app.models import Order, OrderVehicle, Service, VehicleWashStats
+
+COUNTED_ORDER_STATUSES = ("paid", "completed")
+
+def record_order_washes(db: Session, order: Order) -> int:
+    """Count ``order`` against each linked vehicle not yet counted.
+
+    Call once the order is paid or completed. Returns the number of vehicles
+    whose counters were incremented. Does not commit.
+    """
+    links = db.query(OrderVehicle).filter_by(order_id=order.id, wash_counted=False).all()
+    if not links:
+        return 0
+    insert = dialect_insert(db.get_bind())
+    washed_at = order.created_at or datetime.utcnow()
+    now = datetime.utcnow()
+    for link in links:
+        # Single upsert: concurrent first washes of a vehicle cannot both insert
+        stmt = insert(VehicleWashStats).values(
+            vehicle_id=link.vehicle_id,
+            total_washes=1,
+            last_wash_at=washed_at,
+            last_order_id=order.id,
+            last_service_id=order.service_id,
+            updated_at=now,
+        )
+        newer = or_(VehicleWashStats.last_wash_at.is_(None), VehicleWashStats.last_wash_at <= stmt.excluded.last_wash_at)
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[VehicleWashStats.vehicle_id],
+            set_={
+                "total_washes": VehicleWashStats.total_washes + 1,
+                "last_wash_at": case((newer, stmt.excluded.last_wash_at), else_=VehicleWashStats.last_wash_at),
+                "last_order_id": case((newer, stmt.excluded.last_order_id), else_=VehicleWashStats.last_order_id),
+                "last_service_id": case((newer, stmt.excluded.last_service_id), else_=VehicleWashStats.last_service_id),
+                "updated_at": stmt.excluded.updated_at,
+            },
+        ))
+        link.wash_counted = True
+    return len(links)
+
+
+def with_wash_stats(query: Query, vehicle_id_col) -> Query:
+    """Outer-join wash counters (and last service name) onto a vehicle query.
+
+    Adds ``total_washes``, ``last_wash_at`` and ``last_service`` columns.
+    """
+    return (
+        query.outerjoin(VehicleWashStats, VehicleWashStats.vehicle_id == vehicle_id_col)
+        .outerjoin(Service, Service.id == VehicleWashStats.last_service_id)
+        .add_columns(
+            func.coalesce(VehicleWashStats.total_washes, 0).label("total_washes"),
+            VehicleWashStats.last_wash_at.label("last_wash_at"),
+            Service.name.label("last_service"),
+        )
+    )
+
+
+def wash_stats_fields(total_washes: Optional[int], last_wash_at: Optional[datetime], last_service: Optional[str]) -> dict:
+    return {
+        "total_washes": int(total_washes or 0),
+        "last_wash": last_wash_at.isoformat() if last_wash_at else None,
+        "last_service": last_service,
+    }
+
+
+def rebuild_vehicle_wash_stats(db: Session) -> int:
+    """Recompute every counter from orders (reconciliation / backfill)."""
+    db.query(VehicleWashStats).delete(synchronize_session=False)
+    db.query(OrderVehicle).update({OrderVehicle.wash_counted: False}, synchronize_session=False)
+    counted = (
+        db.query(OrderVehicle.id)
+        .join(Order, Order.id == OrderVehicle.order_id)
+        .filter(Order.status.in_(COUNTED_ORDER_STATUSES))
+    )
+    db.query(OrderVehicle).filter(OrderVehicle.id.in_(counted.scalar_subquery())).update(
+        {OrderVehicle.wash_counted: True}, synchronize_session=False
+    )
+    rows = (
+        db.query(
+            OrderVehicle.vehicle_id,
+            Order.id,
+            Order.created_at,
+            Order.service_id,
+        )
+        .join(Order, Order.id == OrderVehicle.order_id)
+        .filter(Order.status.in_(COUNTED_ORDER_STATUSES))
+        .order_by(OrderVehicle.vehicle_id, Order.created_at, Order.id)
+    )
+    stats: dict[int, VehicleWashStats] = {}
+    for vehicle_id, order_id, created_at, service_id in rows.yield_per(1000):
+        s = stats.get(vehicle_id)
+        if s is None:
+            s = stats[vehicle_id] = VehicleWashStats(vehicle_id=vehicle_id, total_washes=0, updated_at=datetime.utcnow())
+        s.total_washes += 1
+        s.last_wash_at, s.last_order_id, s.last_service_id = created_at, order_id, service_id
+    db.add_all(stats.values())
+    db.commit()
+    return len(stats)
+
+
+def _job_rebuild_vehicle_wash_stats(payload):
+    db = SessionLocal()
+    try:
+        return {"vehicles": rebuild_vehicle_wash_stats(db)}
+    finally:
+        db.close()
+
+
+jobs.register_job_once("vehicle_wash_stats_rebuild", _job_rebuild_vehicle_wash_stats)
@@ -0,0 +1,255 @@
+"""Live wash board for the staff dashboard (server-sent events).
+
+Instead of every bay device polling ``/active-washes`` and
+``/recent-verifications``, a device opens ``/api/payments/wash-board/stream``
+once. It receives a ``snapshot`` event (today's washes and the latest
+verifications for its tenant), then one event per change:
+
+- ``wash_started`` / ``wash_ended``: ``wash_lifecycle.start_wash`` / ``end_wash``;
+- ``payment_verified``: ``verify_payment`` / ``verify-pos``;
+- ``payment_succeeded``: card charge or webhook success.
+
+Each event carries the order's board row (``wash``) and, once verified, its
+sidebar row (``verification``), so clients upsert by ``order_id``. Writers
+call ``publish_order`` after committing; the row is built once and sent on the
+``wash_board`` invalidation namespace, which fans it out to this process's
+streams and, when ``INVALIDATION_BUS_URL`` is set, to other workers. With no
+listeners anywhere publishing is skipped.
+
+A stream that falls ``QUEUE_SIZE`` events behind gets a ``reset`` event and is
+closed; ``EventSource`` reconnects and starts from a fresh snapshot. Idle
+streams get a comment every ``WASH_BOARD_HEARTBEAT_SECONDS``.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Optional
+
+from sqlalchemy.orm import Session, joinedload, selectinload
+
+from app.core import invalidation
+from app.models import Order, OrderVehicle, Payment
+from config import settings
+
+logger = logging.getLogger("api")
+
+NAMESPACE = "wash_board"
+EVENT_TYPES = ("wash_started", "wash_ended", "payment_verified", "payment_succeeded")
+QUEUE_SIZE = 256
+RECENT_LIMIT = 10
+
+_lock = threading.Lock()
+_streams: dict[str, set["_Stream"]] = {}
+METRICS = {"published": 0, "delivered": 0, "dropped_streams": 0}
+
+
+def _iso(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+
+def _vehicle(order: Order):
+    return order.vehicles[0].vehicle if order.vehicles else None
+
+
+def active_wash_row(order: Order) -> dict:
+    """Board row for a started wash (shape of ``/active-washes``)."""
+    vehicle = _vehicle(order)
+    return {
+        "order_id": order.id,
+        "user": {
+            "first_name": order.user.first_name,
+            "last_name": order.user.last_name,
+            "phone": order.user.phone,
+        } if order.user else None,
+        "vehicle": {"make": vehicle.make, "model": vehicle.model, "reg": vehicle.plate} if vehicle else None,
+        "payment_pin": order.payment_pin,
+        "started_at": _iso(order.started_at),
+        "ended_at": _iso(order.ended_at),
+        "status": "ended" if order.ended_at else "started",
+        "tenant_id": order.tenant_id,
+        "duration_seconds": int((order.ended_at - order.started_at).total_seconds())
+        if order.started_at and order.ended_at else None,
+    }
+
+
+def verification_row(order: Order, payment: Optional[Payment]) -> dict:
+    """Sidebar row for a verified order (shape of ``/recent-verifications``)."""
+    vehicle = _vehicle(order)
+    amount_cents = (payment.amount if payment and payment.amount is not None else order.amount) or 0
+    redeemed_at = order.order_redeemed_at or order.created_at
+    return {
+        "order_id": order.id,
+        "timestamp": _iso(redeemed_at),
+        "status": "success",
+        "tenant_id": order.tenant_id,
+        "user": {
+            "first_name": order.user.first_name,
+            "last_name": order.user.last_name,
+            "phone": order.user.phone,
+        } if order.user else None,
+        "vehicle": {"id": vehicle.id, "make": vehicle.make, "model": vehicle.model, "reg": vehicle.plate}
+        if vehicle else None,
+        "payment_method": (payment.method or payment.source) if payment else None,
+        "payment_reference": (payment.reference or payment.transaction_id) if payment else None,
+        "amount_cents": amount_cents,
+        "amount": amount_cents / 100,
+        "started": bool(order.started_at),
+        "completed": bool(order.ended_at),
+    }
+
+
+def _orders(db: Session):
+    return db.query(Order).options(
+        joinedload(Order.user), selectinload(Order.vehicles).joinedload(OrderVehicle.vehicle)
+    )
+
+
+def latest_payments(db: Session, order_ids) -> dict[int, Payment]:
+    """Latest successful payment per order, in one query."""
+    latest: dict[int, Payment] = {}
+    if not order_ids:
+        return latest
+    rows = (
+        db.query(Payment)
+        .filter(Payment.order_id.in_(list(order_ids)), Payment.status == "success")
+        .order_by(Payment.order_id, Payment.created_at)
+        .all()
+    )
+    for payment in rows:
+        latest[payment.order_id] = payment  # ascending: last one wins
+    return latest
+
+
+def active_washes(db: Session, tenant_id: Optional[str] = None) -> list[dict]:
+    today = datetime.utcnow().date()
+    q = _orders(db).filter(
+        Order.started_at.isnot(None),
+        Order.started_at >= today,
+        Order.started_at < today + timedelta(days=1),
+    )
+    if tenant_id is not None:
+        q = q.filter(Order.tenant_id == tenant_id)
+    return [active_wash_row(o) for o in q.all()]
+
+
+def recent_verifications(db: Session, limit: int = RECENT_LIMIT, tenant_id: Optional[str] = None) -> list[dict]:
+    q = _orders(db).filter(Order.order_redeemed_at.isnot(None))
+    if tenant_id is not None:
+        q = q.filter(Order.tenant_id == tenant_id)
+    orders = q.order_by(Order.order_redeemed_at.desc()).limit(limit).all()
+    payments = latest_payments(db, [o.id for o in orders])
+    return [verification_row(o, payments.get(o.id)) for o in orders]
+
+
+def snapshot(db: Session, tenant_id: str) -> dict:
+    return {
+        "active": active_washes(db, tenant_id),
+        "recent": recent_verifications(db, RECENT_LIMIT, tenant_id),
+        "at": datetime.utcnow().isoformat(),
+    }
+
+
+def has_listeners() -> bool:
+    with _lock:
+        local = any(_streams.values())
+    return local or invalidation.bus.connected
+
+
+def publish_order(db: Session, order_id: int, event: str) -> None:
+    """Send ``order_id``'s current rows to its tenant's streams (call after commit).
+
+    Never raises: a failed publish only delays the board until reconnect.
+    """
+    if not has_listeners():
+        return
+    try:
+        order = _orders(db).filter(Order.id == order_id).first()
+        if order is None or not order.tenant_id:
+            return
+        data = {
+            "type": event,
+            "order_id": order.id,
+            "wash": active_wash_row(order) if order.started_at else None,
+            "verification": verification_row(order, latest_payments(db, [order.id]).get(order.id))
+            if order.order_redeemed_at else None,
+        }
+        METRICS["published"] += 1
+        invalidation.publish(NAMESPACE, order.tenant_id, data)
+    except Exception:
+        logger.warning("wash board publish failed", extra={"order_id": order_id}, exc_info=True)
+
+
+class _Stream:
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+
+    def push(self, data: Optional[dict]) -> None:
+        # Runs on the stream's event loop
+        try:
+            self.queue.put_nowait(data)
+        except asyncio.QueueFull:
+            METRICS["dropped_streams"] += 1
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(None)  # reset marker
+
+
+def _fan_out(tenant_id: Optional[str], data: Optional[dict]) -> None:
+    with _lock:
+        targets = list(_streams.get(tenant_id, ())) if tenant_id else [s for ss in _streams.values() for s in ss]
+    # data None = bus resync: streams reset and re-snapshot
+    for stream in targets:
+        try:
+            stream.loop.call_soon_threadsafe(stream.push, data)
+            METRICS["delivered"] += 1
+        except RuntimeError:  # loop closed; the stream is going away
+            pass
+
+
+invalidation.subscribe(NAMESPACE, _fan_out)
+
+
+def open_stream(tenant_id: str) -> _Stream:
+    """Register a stream before its snapshot is read, so no event is missed."""
+    stream = _Stream(asyncio.get_running_loop())
+    with _lock:
+        _streams.setdefault(tenant_id, set()).add(stream)
+    return stream
+
+
+def close_stream(tenant_id: str, stream: _Stream) -> None:
+    with _lock:
+        streams = _streams.get(tenant_id)
+        if streams is not None:
+            streams.discard(stream)
+            if not streams:
+                _streams.pop(tenant_id, None)
+
+
+def format_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+async def event_stream(tenant_id: str, stream: _Stream, initial: dict, is_disconnected) -> AsyncIterator[str]:
+    """SSE body: ``initial`` snapshot, then deltas until the client goes away."""
+    try:
+        yield "retry: 3000\n" + format_event("snapshot", initial)
+        while True:
+            try:
+                data = await asyncio.wait_for(stream.queue.get(), timeout=settings.wash_board_heartbeat_seconds)
+            except asyncio.TimeoutError:
+                if await is_disconnected():
+                    return
+                yield ": keep-alive\n\n"
+                continue
+            if data is None:
+                yield format_event("reset", {})
+                return
+            yield format_event(data.get("type") or "update", data)
+    finally:
+        close_stream(tenant_id, stream)
@@ -2,7 +2,8 @@
 
 Centralizes start/end wash behavior so multiple plugins (payments, orders)
 can stay consistent. Logic is side‑effect free except for DB state
-mutations and optional analytics cache invalidation callback.
+mutations, live wash board events and optional analytics cache invalidation
+callback.
 
 Functions raise HTTPException on validation errors.
 """
@@ -12,6 +13,9 @@ from datetime import datetime
 from fastapi import HTTPException  # type: ignore
 from sqlalchemy.orm import Session  # type: ignore
 
+from app.core import wash_board
+from app.core.duration_sketch import record_wash_duration
+from app.core.vehicle_stats import COUNTED_ORDER_STATUSES, record_order_washes
 from app.models import Order, OrderVehicle
 
 
@@ -49,6 +53,10 @@ def start_wash(db: Session, order_id: str, *, vehicle_id: str | None) -> dict:
     if order.ended_at:
         raise HTTPException(400, "Wash already completed")
 
+    # Vehicle linked after payment: count the wash now (idempotent)
+    if order.status in COUNTED_ORDER_STATUSES:
+        record_order_washes(db, order)
+
     newly_started = False
     if not order.started_at:
         order.started_at = datetime.utcnow()
@@ -57,6 +65,8 @@ def start_wash(db: Session, order_id: str, *, vehicle_id: str | None) -> dict:
     if order.status not in ("in_progress", "completed"):
         order.status = "in_progress"
     db.commit()
+    if newly_started:
+        wash_board.publish_order(db, oid, "wash_started")
     return {
         "status": "started" if newly_started else "already_started",
         "order_status": order.status,
@@ -95,7 +105,10 @@ def end_wash(db: Session, order_id: str, *, invalidate_analytics_cb=None) -> dic
 
     order.ended_at = datetime.utcnow()
     order.status = "completed"
+    record_order_washes(db, order)
+    record_wash_duration(db, order)
     db.commit()
+    wash_board.publish_order(db, oid, "wash_ended")
 
     if invalidate_analytics_cb:
         try:
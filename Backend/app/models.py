@@ -4,12 +4,16 @@ from sqlalchemy import (
     String,
     Text,
     DateTime,
+    Date,
+    BigInteger,
     ForeignKey,
     UniqueConstraint,
     Boolean,
     Table,
     JSON,
     Index,
+    DDL,
+    event,
 )
 from sqlalchemy.orm import relationship
 from datetime import datetime, timedelta
@@ -110,6 +114,11 @@ class User(Base):
         back_populates="admins",
     )
 
+    __table_args__ = (
+        # Keyset pagination for customer listings: (tenant, created_at, id)
+        Index("ix_users_tenant_created_id", "tenant_id", "created_at", "id"),
+    )
+
 
 Tenant.users = relationship("User", back_populates="tenant")
 
@@ -149,6 +158,10 @@ class Order(Base):
     type       = Column(String, default="paid")
     amount     = Column(Integer, default=0)
     order_redeemed_at = Column(DateTime, nullable=True)
+    # Set once the order has been added to customer_aggregates
+    customer_counted = Column(Boolean, nullable=False, default=False)
+    # Device-supplied idempotency key for batch ingestion (POST /api/orders/batch)
+    client_key = Column(String(64), nullable=True)
 
     service = relationship("Service")
     user    = relationship("User")
@@ -156,6 +169,12 @@ class Order(Base):
     # Vehicles assigned to this order
     vehicles = relationship("OrderVehicle", back_populates="order", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # Keyset pagination for wash history: (started_at, id)
+        Index("ix_orders_started_id", "started_at", "id"),
+        UniqueConstraint("tenant_id", "client_key", name="uq_orders_tenant_client_key"),
+    )
+
 
 class VisitCount(Base):
     __tablename__ = "visit_counts"
@@ -165,6 +184,9 @@ class VisitCount(Base):
     count      = Column(Integer, nullable=False)
     updated_at = Column(DateTime)
 
+    # Target of the atomic upsert in app/services/visit_counter.py
+    __table_args__ = (UniqueConstraint("tenant_id", "user_id", name="uq_visit_counts_tenant_user"),)
+
     tenant = relationship("Tenant")
     user   = relationship("User")
 
@@ -201,6 +223,8 @@ class Redemption(Base):
     order_id     = Column(Integer, ForeignKey("orders.id"), nullable=True)
     __table_args__ = (
         UniqueConstraint("user_id", "milestone", "status", name="uq_redemption_user_milestone_status"),
+        # Expiry sweep: pending rows older than the cutoff (app.core.redemption_expiry)
+        Index("ix_redemptions_status_created", "status", "created_at"),
     )
 
     tenant = relationship("Tenant")
@@ -307,11 +331,26 @@ class OrderVehicle(Base):
     id           = Column(Integer, primary_key=True)
     order_id     = Column(Integer, ForeignKey("orders.id"),   nullable=False)
     vehicle_id   = Column(Integer, ForeignKey("vehicles.id"),nullable=False)
+    # Set once this order has been counted in vehicle_wash_stats
+    wash_counted = Column(Boolean, nullable=False, default=False)
 
     order   = relationship("Order", back_populates="vehicles")
     vehicle = relationship("Vehicle")
 
 
+# Per-vehicle wash counters maintained by app/core/vehicle_stats.py
+class VehicleWashStats(Base):
+    __tablename__ = "vehicle_wash_stats"
+    vehicle_id      = Column(Integer, ForeignKey("vehicles.id", ondelete="CASCADE"), primary_key=True)
+    total_washes    = Column(Integer, nullable=False, default=0)
+    last_wash_at    = Column(DateTime, nullable=True)
+    last_order_id   = Column(Integer, nullable=True)
+    last_service_id = Column(Integer, ForeignKey("services.id"), nullable=True)
+    updated_at      = Column(DateTime, default=datetime.utcnow)
+
+    last_service = relationship("Service")
+
+
 class Payment(Base):
     __tablename__ = "payments"
     id            = Column(Integer, primary_key=True)
@@ -331,6 +370,11 @@ class Payment(Base):
 
     order = relationship("Order")
 
+    __table_args__ = (
+        # Keyset pagination for admin transactions: (created_at, id)
+        Index("ix_payments_created_id", "created_at", "id"),
+    )
+
 
 # --- Audit logs ---
 class AuditLog(Base):
@@ -342,6 +386,10 @@ class AuditLog(Base):
     created_at = Column(DateTime, default=datetime.utcnow, index=True)
     details    = Column(JSON, nullable=True)
 
+    __table_args__ = (
+        Index("ix_audit_logs_created_id", "created_at", "id"),
+    )
+
 
 # --- Notifications ---
 class Notification(Base):
@@ -359,6 +407,10 @@ class Notification(Base):
     tenant = relationship("Tenant")
     user = relationship("User")
 
+    __table_args__ = (
+        Index("ix_notifications_tenant_created_id", "tenant_id", "created_at", "id"),
+    )
+
 
 # --- Business Analytics ---
 class BusinessMetrics(Base):
@@ -419,6 +471,118 @@ class AggregatedCustomerMetrics(Base):
 
     user = relationship("User")
 
+
+# Stored /reports/customer-segments buckets per tenant and window, written by
+# the segmentation engine (app/analytics/segmentation.py)
+class CustomerSegmentSummary(Base):
+    __tablename__ = "customer_segment_summaries"
+    tenant_id         = Column(String, ForeignKey("tenants.id"), primary_key=True)
+    window_days       = Column(Integer, primary_key=True)
+    segment           = Column(String, primary_key=True)
+    customer_count    = Column(Integer, nullable=False, default=0)
+    total_spent_cents = Column(BigInteger, nullable=False, default=0)
+    total_orders      = Column(Integer, nullable=False, default=0)
+    computed_at       = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+# Running per-(tenant, user) order aggregates maintained at write time
+# (see app/core/customer_aggregates.py)
+class CustomerAggregate(Base):
+    __tablename__ = "customer_aggregates"
+    tenant_id         = Column(String, ForeignKey("tenants.id"), primary_key=True)
+    user_id           = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    order_count       = Column(Integer, nullable=False, default=0)
+    total_spent_cents = Column(Integer, nullable=False, default=0)
+    last_order_date   = Column(DateTime, nullable=True)
+    updated_at        = Column(DateTime, default=datetime.utcnow)
+
+
+
+# First started wash per customer, for new-vs-returning and cohort metrics
+# (see app/core/first_visits.py). Range queries hit ix_customer_first_visits_tenant_at.
+class CustomerFirstVisit(Base):
+    __tablename__ = "customer_first_visits"
+    tenant_id      = Column(String, ForeignKey("tenants.id"), primary_key=True)
+    user_id        = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    first_visit_at = Column(DateTime, nullable=False)
+
+    __table_args__ = (
+        Index("ix_customer_first_visits_tenant_at", "tenant_id", "first_visit_at"),
+        Index("ix_customer_first_visits_at", "first_visit_at"),
+    )
+
+
+# Mergeable wash-duration sketch (DDSketch buckets) per tenant and day, see
+# app/core/duration_sketch.py. One row per non-empty bucket; a range is the
+# SUM over its days grouped by bucket.
+class WashDurationBucket(Base):
+    __tablename__ = "wash_duration_buckets"
+    tenant_id     = Column(String, ForeignKey("tenants.id"), primary_key=True)
+    day           = Column(Date, primary_key=True)
+    bucket        = Column(Integer, primary_key=True)
+    count         = Column(Integer, nullable=False, default=0)
+    total_seconds = Column(BigInteger, nullable=False, default=0)
+
+    __table_args__ = (Index("ix_wash_duration_buckets_day", "day"),)
+
+# Per-(tenant, scope, resource) change counters behind conditional GETs
+# (app/core/conditional.py). scope is "*" (whole tenant) or "u:<user id>";
+# tenant_id "*" holds global bumps (catalog, bulk updates).
+class ResourceVersion(Base):
+    __tablename__ = "resource_versions"
+    tenant_id = Column(String, primary_key=True)
+    scope     = Column(String, primary_key=True)
+    resource  = Column(String, primary_key=True)
+    version   = Column(BigInteger, nullable=False, default=0)
+
+# Per-tenant, per-module, per-day usage counts for subscription quotas
+# (app/core/module_usage.py). A rolling window is the SUM over <= 30 days.
+class ModuleUsageDaily(Base):
+    __tablename__ = "module_usage_daily"
+    tenant_id = Column(String, ForeignKey("tenants.id"), primary_key=True)
+    module    = Column(String, primary_key=True)
+    day       = Column(Date, primary_key=True)
+    count     = Column(BigInteger, nullable=False, default=0)
+
+# Denormalised search tokens for users / vehicles (see app/core/search.py).
+# Postgres: GIN trigram index on content (migration). SQLite: FTS5 trigram
+# shadow table created on table create.
+class SearchDocument(Base):
+    __tablename__ = "search_documents"
+    id            = Column(Integer, primary_key=True, autoincrement=True)
+    entity_type   = Column(String(16), nullable=False)  # "user" | "vehicle"
+    entity_id     = Column(Integer, nullable=False)
+    owner_user_id = Column(Integer, nullable=True, index=True)  # user id for users, owner for vehicles
+    tenant_id     = Column(String, nullable=True)
+    content       = Column(Text, nullable=False, default="")
+    updated_at    = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint("entity_type", "entity_id", name="uq_search_documents_entity"),
+        Index("ix_search_documents_tenant_type", "tenant_id", "entity_type"),
+    )
+
+
+# External-content FTS5 table kept in sync by triggers; the trigram tokenizer
+# supports substring MATCH for terms of 3+ characters.
+for _stmt in (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS search_documents_fts USING fts5("
+    "content, content='search_documents', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS search_documents_ai AFTER INSERT ON search_documents BEGIN "
+    "INSERT INTO search_documents_fts(rowid, content) VALUES (new.id, new.content); END",
+    "CREATE TRIGGER IF NOT EXISTS search_documents_ad AFTER DELETE ON search_documents BEGIN "
+    "INSERT INTO search_documents_fts(search_documents_fts, rowid, content) VALUES ('delete', old.id, old.content); END",
+    "CREATE TRIGGER IF NOT EXISTS search_documents_au AFTER UPDATE ON search_documents BEGIN "
+    "INSERT INTO search_documents_fts(search_documents_fts, rowid, content) VALUES ('delete', old.id, old.content); "
+    "INSERT INTO search_documents_fts(rowid, content) VALUES (new.id, new.content); END",
+):
+    event.listen(SearchDocument.__table__, "after_create", DDL(_stmt).execute_if(dialect="sqlite"))
+event.listen(
+    SearchDocument.__table__,
+    "before_drop",
+    DDL("DROP TABLE IF EXISTS search_documents_fts").execute_if(dialect="sqlite"),
+)
+
 # --- Optional persistence models (flag gated) ---
 from config import settings  # placed at end to avoid circular import during settings init
 from sqlalchemy.sql import func
@@ -8,7 +8,9 @@ from app.core.rate_limit import bucket_snapshot, list_overrides, set_limit, dele
 from app.models import User, Order, Payment, Service
 from sqlalchemy import func, or_, cast, String
 from app.core import jobs
+from app.core import search as search_index
 from app.core.audit import log_audit
+from app.core.pagination import cached_total, decode_cursor, keyset_after, keyset_order, next_cursor_for
 from app.models import AuditLog
 from typing import Optional, Dict, Any
 import math
@@ -100,36 +102,24 @@ def _parse_iso_date(value: Optional[str], field: str) -> Optional[datetime]:
         raise HTTPException(status_code=400, detail=f"Invalid {field} format. Use ISO 8601.")
 
 
-@router.get("/transactions")
-def list_transactions(
-    page: int = Query(1, ge=1),
-    page_size: int = Query(25, ge=1, le=100),
-    status: Optional[str] = Query(None, description="Filter by payment status (comma separated)"),
-    method: Optional[str] = Query(None, description="Filter by payment method"),
-    source: Optional[str] = Query(None, description="Filter by payment source"),
-    search: Optional[str] = Query(None, description="Search reference, transaction id, email, phone, or order id"),
-    start_date: Optional[str] = Query(None, description="Filter payments created on/after this ISO date"),
-    end_date: Optional[str] = Query(None, description="Filter payments created on/before this ISO date"),
-    min_amount: Optional[int] = Query(None, description="Minimum payment amount in cents"),
-    max_amount: Optional[int] = Query(None, description="Maximum payment amount in cents"),
-    order_id: Optional[int] = Query(None, description="Filter by numeric order id"),
-    sort_by: str = Query("created_at", description="Sort field: created_at, amount, status, order_created_at"),
-    sort_order: str = Query("desc", description="Sort order: asc or desc"),
-    tenant_id: Optional[str] = Query(None, description="Tenant scope override (superadmin only)"),
-    current_user: User = Depends(require_capability("payments.view")),
-    db: Session = Depends(get_db),
+def transaction_filters(
+    tenant_scope: Optional[str],
+    *,
+    status: Optional[str] = None,
+    method: Optional[str] = None,
+    source: Optional[str] = None,
+    search: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    min_amount: Optional[int] = None,
+    max_amount: Optional[int] = None,
+    order_id: Optional[int] = None,
 ):
-    sort_by = sort_by.lower()
-    sort_order = sort_order.lower()
-    if sort_by not in {"created_at", "amount", "status", "order_created_at"}:
-        raise HTTPException(status_code=400, detail="Unsupported sort_by value")
-    if sort_order not in {"asc", "desc"}:
-        raise HTTPException(status_code=400, detail="Unsupported sort_order value")
-
-    tenant_scope = current_user.tenant_id
-    if tenant_id and current_user.role in ("superadmin", "developer"):
-        tenant_scope = tenant_id
+    """Return ``(scope_filters, filters)`` for the transactions listing.
 
+    Shared with the transactions export so both honour identical filters.
+    Filters reference Payment, Order and User; see ``transaction_rows_query``.
+    """
     scope_filters = []
     if tenant_scope:
         scope_filters.append(Order.tenant_id == tenant_scope)
@@ -174,12 +164,69 @@ def list_transactions(
         search_clauses = [
             func.lower(Payment.transaction_id).like(term),
             func.lower(Payment.reference).like(term),
-            func.lower(User.email).like(term),
-            func.lower(User.phone).like(term),
+            User.id.in_(search_index.match_ids(search, "user", tenant_scope)),
             cast(Order.id, String).like(f"%{search}%"),
         ]
         filters.append(or_(*search_clauses))
 
+    return scope_filters, filters
+
+
+def transaction_rows_query(db: Session, filters: list):
+    """Base (Payment, Order, User, Service) query with transaction filters applied."""
+    query = (
+        db.query(Payment, Order, User, Service)
+        .outerjoin(Order, Payment.order_id == Order.id)
+        .outerjoin(User, Order.user_id == User.id)
+        .outerjoin(Service, Order.service_id == Service.id)
+    )
+    return query.filter(*filters) if filters else query
+
+
+@router.get("/transactions")
+def list_transactions(
+    page: int = Query(1, ge=1),
+    page_size: int = Query(25, ge=1, le=100),
+    status: Optional[str] = Query(None, description="Filter by payment status (comma separated)"),
+    method: Optional[str] = Query(None, description="Filter by payment method"),
+    source: Optional[str] = Query(None, description="Filter by payment source"),
+    search: Optional[str] = Query(None, description="Search reference, transaction id, email, phone, or order id"),
+    start_date: Optional[str] = Query(None, description="Filter payments created on/after this ISO date"),
+    end_date: Optional[str] = Query(None, description="Filter payments created on/before this ISO date"),
+    min_amount: Optional[int] = Query(None, description="Minimum payment amount in cents"),
+    max_amount: Optional[int] = Query(None, description="Maximum payment amount in cents"),
+    order_id: Optional[int] = Query(None, description="Filter by numeric order id"),
+    sort_by: str = Query("created_at", description="Sort field: created_at, amount, status, order_created_at"),
+    sort_order: str = Query("desc", description="Sort order: asc or desc"),
+    tenant_id: Optional[str] = Query(None, description="Tenant scope override (superadmin only)"),
+    cursor: Optional[str] = Query(None, description="Opaque keyset cursor from a previous response (overrides page)"),
+    current_user: User = Depends(require_capability("payments.view")),
+    db: Session = Depends(get_db),
+):
+    sort_by = sort_by.lower()
+    sort_order = sort_order.lower()
+    if sort_by not in {"created_at", "amount", "status", "order_created_at"}:
+        raise HTTPException(status_code=400, detail="Unsupported sort_by value")
+    if sort_order not in {"asc", "desc"}:
+        raise HTTPException(status_code=400, detail="Unsupported sort_order value")
+
+    tenant_scope = current_user.tenant_id
+    if tenant_id and current_user.role in ("superadmin", "developer"):
+        tenant_scope = tenant_id
+
+    scope_filters, filters = transaction_filters(
+        tenant_scope,
+        status=status,
+        method=method,
+        source=source,
+        search=search,
+        start_date=start_date,
+        end_date=end_date,
+        min_amount=min_amount,
+        max_amount=max_amount,
+        order_id=order_id,
+    )
+
     sort_column = {
         "created_at": Payment.created_at,
         "amount": Payment.amount,
@@ -187,72 +234,93 @@ def list_transactions(
         "order_created_at": Order.created_at,
     }[sort_by]
 
-    order_clause = sort_column.desc() if sort_order == "desc" else sort_column.asc()
-    secondary_clause = Payment.id.desc() if sort_order == "desc" else Payment.id.asc()
+    descending = sort_order == "desc"
 
     def _apply_filters(query):
         return query.filter(*filters) if filters else query
 
-    total = _apply_filters(
-        db.query(func.count(Payment.id))
-        .outerjoin(Order, Payment.order_id == Order.id)
-        .outerjoin(User, Order.user_id == User.id)
-    ).scalar() or 0
+    def _summary() -> Dict[str, Any]:
+        total = _apply_filters(
+            db.query(func.count(Payment.id))
+            .outerjoin(Order, Payment.order_id == Order.id)
+            .outerjoin(User, Order.user_id == User.id)
+        ).scalar() or 0
 
-    offset = (page - 1) * page_size
+        total_amount = _apply_filters(
+            db.query(func.coalesce(func.sum(Payment.amount), 0))
+            .outerjoin(Order, Payment.order_id == Order.id)
+            .outerjoin(User, Order.user_id == User.id)
+        ).scalar() or 0
 
-    rows = (
-        _apply_filters(
-            db.query(Payment, Order, User, Service)
+        status_counts_rows = _apply_filters(
+            db.query(Payment.status, func.count(Payment.id))
             .outerjoin(Order, Payment.order_id == Order.id)
             .outerjoin(User, Order.user_id == User.id)
-            .outerjoin(Service, Order.service_id == Service.id)
+            .group_by(Payment.status)
+        ).all()
+        status_counts: Dict[str, int] = {
+            (row[0] or "unknown"): row[1] for row in status_counts_rows
+        }
+
+        method_counts_rows = _apply_filters(
+            db.query(Payment.method, func.count(Payment.id))
+            .outerjoin(Order, Payment.order_id == Order.id)
+            .outerjoin(User, Order.user_id == User.id)
+            .group_by(Payment.method)
+        ).all()
+        method_counts: Dict[str, int] = {
+            (row[0] or "unknown"): row[1] for row in method_counts_rows
+        }
+
+        scope_statuses = db.query(Payment.status).outerjoin(Order, Payment.order_id == Order.id)
+        scope_methods = db.query(Payment.method).outerjoin(Order, Payment.order_id == Order.id)
+        scope_sources = db.query(Payment.source).outerjoin(Order, Payment.order_id == Order.id)
+        if scope_filters:
+            scope_statuses = scope_statuses.filter(*scope_filters)
+            scope_methods = scope_methods.filter(*scope_filters)
+            scope_sources = scope_sources.filter(*scope_filters)
+
+        return {
+            "total": total,
+            "total_amount": total_amount,
+            "status_counts": status_counts,
+            "method_counts": method_counts,
+            "available_filters": {
+                "statuses": sorted({row[0] for row in scope_statuses.distinct() if row[0]}),
+                "methods": sorted({row[0] for row in scope_methods.distinct() if row[0]}),
+                "sources": sorted({row[0] for row in scope_sources.distinct() if row[0]}),
+            },
+        }
+
+    rows_query = transaction_rows_query(db, filters).order_by(*keyset_order(sort_column, Payment.id, descending))
+
+    if cursor:
+        last_value, last_id = decode_cursor(cursor, sort_by, descending)
+        rows_query = rows_query.filter(keyset_after(sort_column, Payment.id, last_value, last_id, descending))
+        # Follow-up pages reuse the summary computed for the first page
+        summary = cached_total(
+            ("admin.transactions", tenant_scope, status, method, source, search, start_date,
+             end_date, min_amount, max_amount, order_id),
+            _summary,
         )
-        .order_by(order_clause, secondary_clause)
-        .offset(offset)
-        .limit(page_size)
-        .all()
-    )
+    else:
+        summary = _summary()
+        rows_query = rows_query.offset((page - 1) * page_size)
 
-    total_amount = _apply_filters(
-        db.query(func.coalesce(func.sum(Payment.amount), 0))
-        .outerjoin(Order, Payment.order_id == Order.id)
-        .outerjoin(User, Order.user_id == User.id)
-    ).scalar() or 0
+    rows = rows_query.limit(page_size).all()
 
-    status_counts_rows = _apply_filters(
-        db.query(Payment.status, func.count(Payment.id))
-        .outerjoin(Order, Payment.order_id == Order.id)
-        .outerjoin(User, Order.user_id == User.id)
-        .group_by(Payment.status)
-    ).all()
-    status_counts: Dict[str, int] = {
-        (row[0] or "unknown"): row[1] for row in status_counts_rows
-    }
+    def _cursor_key(row):
+        payment, order, _user, _service = row
+        value = order.created_at if sort_by == "order_created_at" and order else getattr(payment, sort_by, None)
+        return value, payment.id
 
-    method_counts_rows = _apply_filters(
-        db.query(Payment.method, func.count(Payment.id))
-        .outerjoin(Order, Payment.order_id == Order.id)
-        .outerjoin(User, Order.user_id == User.id)
-        .group_by(Payment.method)
-    ).all()
-    method_counts: Dict[str, int] = {
-        (row[0] or "unknown"): row[1] for row in method_counts_rows
-    }
+    next_cursor = next_cursor_for(rows, page_size, sort_by, descending, _cursor_key)
 
-    scope_statuses = db.query(Payment.status).outerjoin(Order, Payment.order_id == Order.id)
-    scope_methods = db.query(Payment.method).outerjoin(Order, Payment.order_id == Order.id)
-    scope_sources = db.query(Payment.source).outerjoin(Order, Payment.order_id == Order.id)
-    if scope_filters:
-        scope_statuses = scope_statuses.filter(*scope_filters)
-        scope_methods = scope_methods.filter(*scope_filters)
-        scope_sources = scope_sources.filter(*scope_filters)
-
-    available_filters = {
-        "statuses": sorted({row[0] for row in scope_statuses.distinct() if row[0]}),
-        "methods": sorted({row[0] for row in scope_methods.distinct() if row[0]}),
-        "sources": sorted({row[0] for row in scope_sources.distinct() if row[0]}),
-    }
+    total = summary["total"]
+    total_amount = summary["total_amount"]
+    status_counts = summary["status_counts"]
+    method_counts = summary["method_counts"]
+    available_filters = summary["available_filters"]
 
     items: list[Dict[str, Any]] = []
     for payment, order, user, service in rows:
@@ -303,6 +371,7 @@ def list_transactions(
             "page_size": page_size,
             "total": total,
             "total_pages": total_pages,
+            "next_cursor": next_cursor,
         },
         "summary": {
             "count": total,
@@ -2,10 +2,12 @@ from fastapi import APIRouter, Depends, Query, HTTPException
 from typing import Optional, List
 from sqlalchemy.orm import Session
 from sqlalchemy import func, cast, Date
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
+from app.core.db_telemetry import statement_timeout
 from app.models import User, Payment, PointBalance, Redemption, Reward, VisitCount, Order
 from datetime import datetime, timedelta, date
 from app.plugins.auth.routes import require_admin, require_staff
+from config import settings
 
 from .schemas import (
     AnalyticsSummaryResponse,
@@ -24,7 +26,11 @@ from app.analytics.refresh_customers import refresh_customer_metrics
 All read-only analytics endpoints should be accessible to staff (and admins).
 The snapshot refresh endpoint remains admin-only.
 """
-router = APIRouter(prefix="/analytics", tags=["analytics"], dependencies=[Depends(require_staff)])
+router = APIRouter(
+    prefix="/analytics",
+    tags=["analytics"],
+    dependencies=[Depends(require_staff), Depends(statement_timeout(settings.reporting_statement_timeout_ms))],
+)
 
 @router.get(
     "/summary",
@@ -38,7 +44,7 @@ def get_summary(
     campaign: Optional[str] = Query(None, description="Payment source filter"),
     device: Optional[str] = Query(None, description="Device type filter (not implemented)"),
     current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     # date range for time series (default: last 7 days)
     today = datetime.utcnow().date()
@@ -163,7 +169,7 @@ def get_top_customers(
     limit: int = Query(20, ge=1, le=100),
     offset: int = Query(0, ge=0),
     sort: str = Query("revenue", pattern="^(revenue|washes|loyalty_share)$"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     today = datetime.utcnow().date()
     if not start_date or not end_date:
@@ -246,7 +252,7 @@ def get_top_customers(
 def get_loyalty_overview(
     start_date: Optional[date] = Query(None),
     end_date: Optional[date] = Query(None),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     today = datetime.utcnow().date()
     if not start_date or not end_date:
@@ -339,7 +345,7 @@ def get_user_details(
     end_date: Optional[date] = Query(None),
     tier: Optional[str] = Query(None, description="User role filter"),
     campaign: Optional[str] = Query(None, description="Payment source filter"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     # date range defaults to last 7 days
     today = datetime.utcnow().date()
@@ -409,7 +415,7 @@ def get_transaction_details(
     end_date: Optional[date] = Query(None),
     tier: Optional[str] = Query(None, description="User role filter"),
     campaign: Optional[str] = Query(None, description="Payment source filter"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     # date range defaults to last 7 days
     today = datetime.utcnow().date()
@@ -495,7 +501,7 @@ def get_points_details(
      end_date: Optional[date] = Query(None),
      tier: Optional[str] = Query(None, description="User role filter"),
      campaign: Optional[str] = Query(None, description="Payment source filter (not applied)"),
-     db: Session = Depends(get_db)
+     db: Session = Depends(get_read_db)
  ):
     # date range defaults to last 7 days
     today = datetime.utcnow().date()
@@ -624,7 +630,7 @@ def get_redemptions_details(
     end_date: Optional[date] = Query(None),
     tier: Optional[str] = Query(None, description="User role filter"),
     campaign: Optional[str] = Query(None, description="Payment source filter (not applied)"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     # date range defaults to last 7 days
     today = datetime.utcnow().date()
@@ -661,7 +667,7 @@ def get_redemptions_details(
 def get_visits_details(
     start_date: Optional[date] = Query(None),
     end_date: Optional[date] = Query(None),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     # date range defaults to last 7 days
     today = datetime.utcnow().date()
@@ -711,7 +717,7 @@ def get_visits_details(
     summary="Get loyalty tier metrics like progression rates and avg time in tier"
 )
 def get_loyalty_details(
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     # compute current tier distribution
     tiers = db.query(User.role, func.count(User.id)).group_by(User.role).all()
@@ -740,7 +746,7 @@ def get_top_clients(
     limit: int = Query(5, ge=1, le=50),  # clamp between 1 and 50
     start_date: Optional[date] = Query(None, description="Start date (YYYY-MM-DD)"),
     end_date: Optional[date] = Query(None, description="End date (YYYY-MM-DD)"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     # aggregate transaction counts and values per user in one query
     # apply date range default: last 7 days if not provided
@@ -820,7 +826,7 @@ def get_top_clients(
     summary="Get engagement metrics like banner clicks and feature usage"
 )
 def get_engagement_details(
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     # engagement events not tracked—return zeros
     return {
@@ -835,7 +841,7 @@ def get_engagement_details(
 def get_financial_details(
     start_date: Optional[date] = Query(None),
     end_date: Optional[date] = Query(None),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     # date range defaults to last 7 days
     today = datetime.utcnow().date()
@@ -881,7 +887,7 @@ def get_insights(
     campaign: Optional[str] = Query(None, description="Payment source filter"),
     device: Optional[str] = Query(None, description="Device type filter"),
     current_user: User = Depends(require_admin),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     # Determine date range
     today = datetime.utcnow().date()
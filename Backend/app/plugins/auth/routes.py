@@ -9,17 +9,15 @@ from jose import JWTError, jwt
 from passlib.context import CryptContext
 from pydantic import BaseModel, EmailStr
 from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail
 from sqlalchemy import or_
 from uuid import uuid4
 from datetime import datetime
 from app.models import InviteToken, Tenant
 from config import settings
 from app.core.database import get_db
-from app.models import User, VisitCount, Vehicle
+from app.models import User, Vehicle
 from app.services.tenant_settings import TenantSettingsService, get_tenant_settings
-from utils.firebase_admin import admin_auth
+from app.services.visit_counter import increment_visits
 from app.plugins.loyalty.constants import REWARD_INTERVAL
 
 # ─── CONFIG ────────────────────────────────────────────────────────────────
@@ -312,8 +310,10 @@ class SocialLoginRequest(BaseModel):
 @router.post("/social-login", response_model=LoginResponse)
 def social_login(req: SocialLoginRequest, db: Session = Depends(get_db)):
     decoded = None
-    # First try with Firebase Admin SDK (preferred)
+    # First try with Firebase Admin SDK (preferred); imported on first use
+    # because initialising the SDK is the slowest part of app startup
     try:
+        from utils.firebase_admin import admin_auth
         decoded = admin_auth.verify_id_token(req.id_token)
     except Exception as e:
         # Log safe diagnostics to investigate production failures without leaking tokens
@@ -570,6 +570,8 @@ def reset_password(req: PasswordResetRequest, db: Session = Depends(get_db)):
 def request_password_reset(req: PasswordResetEmailRequest, db: Session = Depends(get_db)):
     user = db.query(User).filter_by(email=req.email).first()
     if user:
+        from sendgrid import SendGridAPIClient
+        from sendgrid.helpers.mail import Mail
         token, tenant_settings = _issue_reset_token(user, db)
         if tenant_settings:
             email_settings = tenant_settings.email
@@ -730,32 +732,14 @@ def log_manual_visit(
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
-    visit_count = (
-        db.query(VisitCount)
-        .filter_by(user_id=user.id, tenant_id=user.tenant_id)
-        .first()
-    )
-
-    now = datetime.utcnow()
-    if visit_count:
-        visit_count.count += 1
-        visit_count.updated_at = now
-    else:
-        visit_count = VisitCount(
-            user_id=user.id,
-            tenant_id=user.tenant_id,
-            count=1,
-            updated_at=now,
-        )
-        db.add(visit_count)
-
     try:
+        count = increment_visits(db, user.tenant_id, user.id)
         db.commit()
     except Exception:
         db.rollback()
         raise HTTPException(status_code=500, detail="Could not log visit")
 
-    next_milestone = ((visit_count.count // REWARD_INTERVAL) + 1) * REWARD_INTERVAL
+    next_milestone = ((count // REWARD_INTERVAL) + 1) * REWARD_INTERVAL
     full_name = " ".join(filter(None, [user.first_name, user.last_name])).strip()
     display_name = full_name or user.phone
 
@@ -763,7 +747,7 @@ def log_manual_visit(
         message=f"Visit logged for {display_name} ({user.phone})",
         phone=user.phone,
         name=display_name,
-        count=visit_count.count,
+        count=count,
         nextMilestone=next_milestone,
     )
 
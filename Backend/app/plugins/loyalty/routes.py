@@ -10,9 +10,13 @@ from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 
+from app.core import catalog_cache, jobs, redemption_expiry
+from app.core.conditional import conditional_get
 from app.core.database import get_db
+from app.core.redemption_expiry import EXPIRY_DAYS
 from app.core.tenant_context import get_tenant_context, TenantContext
-from app.models import Tenant, User, VisitCount, Reward, Redemption, Order, Service, Extra, OrderItem
+from app.models import Tenant, User, VisitCount, Reward, Redemption, Order, OrderItem
+from app.services.visit_counter import increment_visits
 from app.utils.qr import generate_qr_code
 from app.plugins.auth.routes import get_current_user
 from .constants import REWARD_INTERVAL
@@ -20,7 +24,6 @@ from .constants import REWARD_INTERVAL
 SECRET_KEY = settings.loyalty_secret
 DEFAULT_TENANT = settings.default_tenant
 
-EXPIRY_DAYS = 10     # days until voucher expiry
 
 router = APIRouter(prefix="", dependencies=[Depends(get_current_user)], tags=["loyalty"])
 
@@ -108,19 +111,6 @@ def ensure_pending_redemption(db: Session, user: User, milestone: int, base_rewa
         ).first()
 
 
-def expire_old_redemptions(db: Session) -> None:
-    cutoff = datetime.datetime.utcnow() - datetime.timedelta(days=EXPIRY_DAYS)
-    old = (
-        db.query(Redemption)
-          .filter(Redemption.status == "pending", Redemption.created_at < cutoff)
-          .all()
-    )
-    for r in old:
-        r.status = "expired"
-    if old:
-        db.commit()
-
-
 def is_full_wash(db: Session, order_items: List[OrderItem]) -> bool:
     if not order_items:
         return False
@@ -129,21 +119,20 @@ def is_full_wash(db: Session, order_items: List[OrderItem]) -> bool:
 
 
 def calculate_extras_total(db: Session, order_items: List[OrderItem]) -> int:
+    catalog = catalog_cache.get_catalog(db)
     total = 0
     for item in order_items:
         # extras JSON contains list of {id, quantity}
         for ex in item.extras or []:
-            extra = db.query(Extra).filter_by(id=ex.get("id")).first()
-            if extra:
-                price_map = extra.price_map or {}
-                price = price_map.get(ex.get("category"), 0)
-                total += price * ex.get("quantity", 1)
+            total += catalog.extra_price(ex.get("id"), ex.get("category")) * ex.get("quantity", 1)
     return total
 
 # ─── Endpoints ──────────────────────────────────────────────────────────────────
+# 5-minute bucket: rewards carry 10-minute QR tokens, so a cached body must not outlive them
 @router.get(
     "/me",
-    summary="Get loyalty status and unlocked/upcoming rewards for current user"
+    summary="Get loyalty status and unlocked/upcoming rewards for current user",
+    dependencies=[Depends(conditional_get("visits", "redemptions", "rewards", "profile", bucket_seconds=300))],
 )
 def loyalty_me(
     current_user: User = Depends(get_current_user),
@@ -271,16 +260,9 @@ def log_visit(
     )
     if not usr:
         raise HTTPException(status_code=404, detail="User not found")
-    vc = db.query(VisitCount).filter_by(
-        user_id=usr.id, tenant_id=usr.tenant_id
-    ).first()
-    if not vc:
-        vc = VisitCount(user_id=usr.id, tenant_id=usr.tenant_id, count=0)
-        db.add(vc)
-    vc.count += 1
+    visits = increment_visits(db, usr.tenant_id, usr.id)
     db.commit()
 
-    visits = vc.count
     base = get_base_reward(db, usr.tenant_id)
     if not base:
         return {"message": "Visit logged", "total_visits": visits, "reward_issued": None}
@@ -372,11 +354,11 @@ def redeem(
     "/expire-redemptions",
     include_in_schema=False
 )
-def expire_redemptions_endpoint(
-    db: Session = Depends(get_db)
-):
-    expire_old_redemptions(db)
-    return {"expired": True}
+def expire_redemptions_endpoint(background_tasks: BackgroundTasks):
+    # Off the request path: the set-based sweep runs as a job after the response
+    rec = jobs.enqueue(redemption_expiry.JOB_NAME, {})
+    background_tasks.add_task(jobs.run_job_id, rec.id)
+    return {"queued": True, "job_id": rec.id}
 
 
 @router.get("/rewards", summary="List rewards for current tenant")
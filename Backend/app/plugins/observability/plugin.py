@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, Query, Request, HTTPException
+from fastapi import APIRouter, Depends, Query, Request, HTTPException, Response
 from sqlalchemy.orm import Session
 from datetime import datetime
 from typing import Optional
@@ -7,15 +7,21 @@ from collections import deque
 
 from app.core.database import get_db
 from app.models import AuditLog, User
-from app.core.authz import tenant_admin_only
+from app.core.authz import UserRole, require_roles, tenant_admin_only
 from app.core.tenant_context import tenant_cache_state
 from app.core.rate_limit import bucket_snapshot
+from app.core.db_telemetry import pool_snapshot
+from app.core import slow_queries as _slow_queries
 from app.core import jobs as _jobs
+from app.core.pagination import decode_cursor, keyset_after, keyset_order, next_cursor_for
 from config import settings
 from app.plugins.auth.routes import get_current_user
 
 router = APIRouter(prefix="/api/obs", tags=["observability"], dependencies=[Depends(tenant_admin_only)])
 
+# Process-wide telemetry (shared across tenants) is limited to platform roles.
+_platform_only = require_roles(UserRole.superadmin, UserRole.developer)
+
 # --- Simple in-memory request metrics & error ring buffer ---
 _REQ_METRICS = {"count": 0, "total_ms": 0.0}
 _ERRORS = deque(maxlen=50)
@@ -45,6 +51,7 @@ def _audit_base_query(db: Session, current: User):
 
 @router.get("/audit", response_model=list[dict], include_in_schema=False)
 def list_audit_logs(
+    response: Response,
     db: Session = Depends(get_db),
     current: User = Depends(get_current_user),
     tenant_id: Optional[str] = Query(None),
@@ -53,7 +60,9 @@ def list_audit_logs(
     since: Optional[datetime] = Query(None),
     limit: int = Query(50, ge=1, le=500),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="Keyset cursor from X-Next-Cursor (overrides offset)"),
 ):
+    """Newest-first audit entries; the next-page cursor is sent as X-Next-Cursor."""
     q = _audit_base_query(db, current)
     if tenant_id:
         q = q.filter(AuditLog.tenant_id == tenant_id)
@@ -64,8 +73,16 @@ def list_audit_logs(
         q = q.filter(AuditLog.action.like(like))
     if since:
         q = q.filter(AuditLog.created_at >= since)
-    q = q.order_by(AuditLog.created_at.desc()).limit(limit).offset(offset)
-    rows = q.all()
+    q = q.order_by(*keyset_order(AuditLog.created_at, AuditLog.id, descending=True))
+    if cursor:
+        last_created, last_id = decode_cursor(cursor, "created_at", True)
+        q = q.filter(keyset_after(AuditLog.created_at, AuditLog.id, last_created, last_id, descending=True))
+    else:
+        q = q.offset(offset)
+    rows = q.limit(limit).all()
+    next_cursor = next_cursor_for(rows, limit, "created_at", True, lambda r: (r.created_at, r.id))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return [
         {
             'id': r.id,
@@ -131,6 +148,25 @@ def rate_limits_summary():
         'overrides': list(snap.get('overrides', {}).keys()),
     }
 
+@router.get("/db-pool", include_in_schema=False, dependencies=[Depends(_platform_only)])
+def db_pool():
+    """Connection-pool gauges, checkout-wait histogram and long-held connections."""
+    return pool_snapshot()
+
+@router.get("/slow-queries", include_in_schema=False, dependencies=[Depends(_platform_only)])
+def slow_queries(
+    limit: int = Query(50, ge=1, le=500),
+    sort: str = Query("total", pattern="^(total|max|p95|count|slow)$"),
+    only_slow: bool = Query(False, description="Only fingerprints with executions above the threshold"),
+):
+    """Statement fingerprints with count / total / p95 / max time and slow samples."""
+    return _slow_queries.report(limit=limit, sort=sort, only_slow=only_slow)
+
+@router.delete("/slow-queries", include_in_schema=False, dependencies=[Depends(_platform_only)])
+def reset_slow_queries():
+    _slow_queries.reset()
+    return {"status": "reset"}
+
 @router.get("/jobs", include_in_schema=False)
 def jobs_state():
     # Debug: log snapshot details to help diagnose test expectations
@@ -162,6 +198,12 @@ if settings.enable_metrics_endpoint:
         for k, v in jm.items():
             lines.append(f"job_queue_{k} {v}")
         lines.append(f"dead_letter_jobs {len(_jobs.dead_letter_snapshot())}")
+        for name, p in pool_snapshot().items():
+            for k in ("in_use", "checked_out", "overflow", "timeouts", "long_held_count"):
+                if p[k] is not None:
+                    lines.append(f"db_pool_{k}{{engine=\"{name}\"}} {p[k]}")
+            for le, c in p["wait_ms"]["buckets"].items():
+                lines.append(f"db_pool_wait_ms_bucket{{engine=\"{name}\",le=\"{le[3:]}\"}} {c}")
         return "\n".join(lines) + "\n"
 
 @router.get("/force-error", include_in_schema=False)
@@ -5,8 +5,11 @@ from fastapi import APIRouter, Depends, HTTPException  # type: ignore
 from sqlalchemy.orm import Session  # type: ignore
 from sqlalchemy.exc import IntegrityError  # type: ignore
 
-from datetime import datetime
+from app.core import catalog_cache
 from app.core.database import get_db
+from app.services.order_batch import ingest_orders
+from app.services.visit_counter import increment_visits
+from app.core.vehicle_stats import COUNTED_ORDER_STATUSES, record_order_washes
 from app.plugins.auth.routes import get_current_user
 from app.models import (
     Order,
@@ -14,8 +17,6 @@ from app.models import (
     Payment,
     Vehicle,
     OrderVehicle,
-    Service,
-    Extra,
     VisitCount,
     User,
 )
@@ -23,6 +24,8 @@ from app.plugins.orders.schemas import (
     OrderCreate,
     OrderCreateRequest,
     OrderCreateResponse,
+    OrderBatchRequest,
+    OrderBatchResponse,
     OrderResponse,
     OrderDetailResponse,
     AssignVehicleRequest,
@@ -99,14 +102,14 @@ def create_order(
     - Retry payment pin generation on race-condition unique collisions
     - Return clearer 500 only for unexpected errors
     """
+    catalog = catalog_cache.get_catalog(db, getattr(user, "tenant_id", None))
     # 1. Validate service
-    svc = db.query(Service).filter(Service.id == req.service_id).first()
-    if not svc:
+    if catalog.service(req.service_id) is None:
         raise HTTPException(status_code=404, detail="Service not found")
 
     # 2. Validate extras
     for e in req.extras:
-        if not db.query(Extra).filter(Extra.id == e.id).first():
+        if catalog.extra(e.id) is None:
             raise HTTPException(status_code=400, detail=f"Invalid extra id {e.id}")
 
     extras_list = [{"id": e.id, "quantity": e.quantity} for e in req.extras]
@@ -161,6 +164,24 @@ def create_order(
         detail += f": {last_error}"
     raise HTTPException(status_code=500, detail=detail)
 
+@router.post(
+    "/batch",
+    response_model=OrderBatchResponse,
+    summary="Create a batch of orders (POS / offline replay) with per-item idempotency keys",
+)
+def create_orders_batch(
+    req: OrderBatchRequest,
+    db: Session = Depends(get_db),
+    user=Depends(get_current_user),
+):
+    """Bulk variant of ``/create`` for bay devices replaying queued orders.
+
+    Each item carries a ``client_key``; items already stored under that key
+    come back as ``duplicate`` with the original order. Invalid items are
+    reported per item and do not fail the batch.
+    """
+    return OrderBatchResponse(results=ingest_orders(db, user, req.orders))
+
 @router.get("", response_model=List[OrderResponse], summary="List all orders, optional status filter")
 def list_orders(
     status: Optional[str] = None,
@@ -197,8 +218,7 @@ def create_order_legacy(payload: dict, db: Session = Depends(get_db), user=Depen
     extras = payload.get("extras", [])
     if svc_id is None:
         raise HTTPException(status_code=400, detail="service_id is required")
-    svc = db.query(Service).filter_by(id=svc_id).first()
-    if not svc:
+    if catalog_cache.get_catalog(db, getattr(user, "tenant_id", None)).service(svc_id) is None:
         raise HTTPException(status_code=404, detail=f"Service {svc_id} not found")
     # Let DB autogenerate integer PK; still return as string in response model
     order = Order(service_id=svc_id, quantity=qty, extras=extras, user_id=user.id, tenant_id=getattr(user, 'tenant_id', None))
@@ -227,6 +247,7 @@ def my_past_orders(user: User = Depends(get_current_user), db: Session = Depends
           .order_by(Order.created_at.desc())
           .all()
     )
+    catalog = catalog_cache.get_catalog(db, user.tenant_id)
     results = []
     for order in orders:
         payment = (
@@ -238,11 +259,10 @@ def my_past_orders(user: User = Depends(get_current_user), db: Session = Depends
         amount = payment.amount if payment else getattr(order, "amount", 0)
         extras = []
         for ex in order.extras or []:
-            extra_obj = db.query(Extra).filter_by(id=ex["id"]).first()
             extras.append({
                 "id": ex["id"],
                 "quantity": ex.get("quantity", 1),
-                "name": extra_obj.name if extra_obj else None
+                "name": catalog.extra_name(ex["id"]),
             })
         data = OrderResponse.from_orm(order).dict()
         # Normalize id/orderId to string
@@ -259,16 +279,17 @@ def get_order(order_id: str, db: Session = Depends(get_db), user=Depends(get_cur
     order = db.query(Order).filter_by(id=order_id, user_id=user.id).first()
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
-    svc = db.query(Service).filter_by(id=order.service_id).first()
-    service_name = svc.name if svc else "Service"
-    loyalty_eligible = svc.loyalty_eligible if svc else False
+    catalog = catalog_cache.get_catalog(db, user.tenant_id)
+    svc = catalog.service(order.service_id)
+    service_name = svc["name"] if svc else "Service"
+    loyalty_eligible = svc["loyalty_eligible"] if svc else False
     category = order.items[0].category if order.items else None
     extras_names = []
     if order.extras:
         for e in order.extras:
-            extra = db.query(Extra).filter_by(id=e["id"]).first()
-            if extra:
-                extras_names.append(extra.name)
+            name = catalog.extra_name(e["id"])
+            if name is not None:
+                extras_names.append(name)
     payment = (
         db.query(Payment)
           .filter_by(order_id=order.id, status="success")
@@ -352,6 +373,8 @@ def assign_vehicle(order_id: str, req: AssignVehicleRequest, db: Session = Depen
         vehicle = Vehicle(user_id=order.user_id, plate=req.plate, make=req.make, model=req.model)
         db.add(vehicle); db.flush()
     db.add(OrderVehicle(order_id=order.id, vehicle_id=vehicle.id))
+    if order.status in COUNTED_ORDER_STATUSES:
+        record_order_washes(db, order)
     db.commit(); db.refresh(order)
     # return standardized order detail response
     return _build_order_response(order)
@@ -375,13 +398,9 @@ def complete_wash(order_id: str, db: Session = Depends(get_db)):
     was_paid = order.status == "paid"
     order.status = "completed"
     if not was_paid:
-        vc = db.query(VisitCount).filter_by(user_id=order.user_id, tenant_id=order.user.tenant_id).first()
-        if not vc:
-            vc = VisitCount(user_id=order.user_id, tenant_id=order.user.tenant_id, count=0,
-                            updated_at=datetime.utcnow())
-            db.add(vc)
-        vc.count += sum(item.qty for item in order.items) or 1  # fallback 1 if no items
-        vc.updated_at = datetime.utcnow()
+        increment_visits(db, order.user.tenant_id, order.user_id,
+                         sum(item.qty for item in order.items) or 1)  # fallback 1 if no items
+    record_order_washes(db, order)
     db.commit()
     db.refresh(order)
     # build nextActionUrl for front-end to redeem wash for loyalty points
@@ -397,6 +416,7 @@ def redeem_order(order_id: str, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Order not found")
     order.redeemed = True
     order.status = "paid"
+    record_order_washes(db, order)
     db.commit()
     db.refresh(order)
     # return standardized order detail response
@@ -29,6 +29,25 @@ class OrderCreateResponse(BaseModel):
     # ID of the user's default vehicle, if auto-assigned
     default_vehicle_id: Optional[int] = None
 
+class OrderBatchItem(OrderCreateRequest):
+    # Device-generated idempotency key; replays return the stored order
+    client_key: str = Field(min_length=1, max_length=64)
+
+class OrderBatchRequest(BaseModel):
+    orders: List[OrderBatchItem] = Field(min_length=1, max_length=500)
+
+class OrderBatchItemResult(BaseModel):
+    client_key: str
+    # created | duplicate | invalid
+    status: str
+    order_id: Optional[str] = None
+    payment_pin: Optional[str] = None
+    default_vehicle_id: Optional[int] = None
+    error: Optional[str] = None
+
+class OrderBatchResponse(BaseModel):
+    results: List[OrderBatchItemResult]
+
 class OrderBase(BaseModel):
     id: Union[str, int] = Field(alias="orderId")
     service_id: int = Field(alias="serviceId")
@@ -3,20 +3,24 @@ import os
 import hmac
 import hashlib
 import json
-import requests
 import jwt
 from datetime import datetime, timedelta
 import time
 from config import settings
 from fastapi import APIRouter, Depends, HTTPException, Request, Header, Body, Query, Response
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from typing import Optional
 from sqlalchemy.orm import Session, joinedload, subqueryload
 from sqlalchemy import case, distinct, and_
-from slowapi import Limiter
-from slowapi.util import get_remote_address
 
-from app.core.database import get_db
+from app.core import invalidation, wash_board
+from app.core.conditional import conditional_get
+from app.core.database import get_db, get_read_db
+from app.core.lazy import lazy_import
+from app.core.db_telemetry import statement_timeout
+from app.core.tenant_context import TenantContext, current_tenant_id, get_tenant_context
 from app.models import (
     Order,
     OrderVehicle,
@@ -28,12 +32,18 @@ from app.models import (
     OrderItem,
     Redemption,
     Reward,
-    VisitCount,
 )
+from app.services.visit_counter import increment_visits
 from app.utils.qr import generate_qr_code
+from app.core.duration_sketch import duration_summary
+from app.core.first_visits import first_visit_since
+from app.core.vehicle_stats import record_order_washes, wash_stats_fields, with_wash_stats
+from app.core.pagination import cached_total, decode_cursor, keyset_after, keyset_order, next_cursor_for
 from app.plugins.loyalty.routes import _create_jwt, SECRET_KEY
 from app.services.tenant_settings import TenantSettingsService, get_tenant_settings
 
+requests = lazy_import("requests")  # only needed for outbound payment calls
+
 # --- Visit logging helper --------------------------------------------------
 def _log_visit_for_paid_order(db: Session, order: Order):
     """Ensure a visit is logged for a successfully paid order.
@@ -55,20 +65,15 @@ def _log_visit_for_paid_order(db: Session, order: Order):
         return
     # Prevent double increment if another success payment already handled within this txn.
     # (Caller ensures we only invoke when status flips to success.)
-    # Fetch / create VisitCount
+    # Atomic upsert of the VisitCount row
     if not order.user:  # ensure relationship loaded
         order = db.query(Order).filter_by(id=order.id).first()
     user = order.user
     if not user:
         return
-    vc = db.query(VisitCount).filter_by(user_id=order.user_id, tenant_id=user.tenant_id).first()
-    if not vc:
-        vc = VisitCount(user_id=order.user_id, tenant_id=user.tenant_id, count=0, updated_at=datetime.utcnow())
-        db.add(vc)
     # Increment by 1 visit per paid order (can be refined later using quantity / items)
-    vc.count += 1
-    vc.updated_at = datetime.utcnow()
-from app.plugins.auth.routes import get_current_user
+    increment_visits(db, user.tenant_id, order.user_id)
+from app.plugins.auth.routes import get_current_user, require_staff
 
 
 def _get_tenant_settings_by_id(tenant_id: Optional[str], db: Session) -> Optional[TenantSettingsService]:
@@ -110,8 +115,6 @@ def optional_current_user(authorization: Optional[str] = Header(default=None, al
     except Exception:
         return None
 
-limiter = Limiter(key_func=get_remote_address)
-
 router = APIRouter(
     prefix="", 
     dependencies=[Depends(optional_current_user)],
@@ -195,7 +198,9 @@ def charge_yoco(
     order.status = "paid"
     # Log visit immediately upon first successful payment
     _log_visit_for_paid_order(db, order)
+    record_order_washes(db, order)
     db.commit()
+    wash_board.publish_order(db, order.id, "payment_succeeded")
     return {"message": "Payment successful", "order_id": orderId, "payment_id": payment.id}
 
 @router.post("/webhook/yoco")
@@ -228,8 +233,10 @@ async def yoco_webhook(
         raise HTTPException(status_code=401, detail="Invalid webhook signature")
     if not payment:
         return {"status": "ignored"}
+    succeeded = False
     if status_ == "successful":
         already_success = payment.status == "success"
+        succeeded = not already_success
         payment.status = "success"
         if not payment.qr_code_base64:
             payment.qr_code_base64 = generate_qr_code(payment.reference)["qr_code_base64"]
@@ -237,10 +244,13 @@ async def yoco_webhook(
             order.status = "paid"
             if not already_success:  # only log on transition to success
                 _log_visit_for_paid_order(db, order)
+            record_order_washes(db, order)
     elif status_ == "failed":
         payment.status = "failed"
     payment.raw_response = payload
     db.commit()
+    if succeeded:
+        wash_board.publish_order(db, payment.order_id, "payment_succeeded")
     return {"status": "ok"}
 
 @router.get("/qr/{order_id}")
@@ -372,10 +382,23 @@ def verify_payment(
         or ""
     )
 
+    # Vehicle details + wash counters in one joined query: the linked vehicle,
+    # or the user's vehicles so staff can associate one
+    vehicle_rows = []
+    if vehicle_obj:
+        vehicle_rows = with_wash_stats(db.query(Vehicle), Vehicle.id).filter(Vehicle.id == vehicle_obj.id).all()
+    elif order.user_id:
+        vehicle_rows = with_wash_stats(db.query(Vehicle), Vehicle.id).filter(Vehicle.user_id == order.user_id).all()
+    vehicle_dicts = [
+        {"id": v.id, "reg": v.plate, "make": v.make, "model": v.model, **wash_stats_fields(*stats)}
+        for v, *stats in vehicle_rows
+    ]
+
     already = bool(order.order_redeemed_at)
     if not already:
         order.order_redeemed_at = datetime.utcnow()
         db.commit()
+        wash_board.publish_order(db, order.id, "payment_verified")
 
     resp = {
         "status": "already_redeemed" if already else "ok",
@@ -388,22 +411,9 @@ def verify_payment(
             "last_name": order.user.last_name,
             "phone": order.user.phone,
         } if order.user else None,
-        "vehicle": {
-            "id": vehicle_obj.id,
-            "reg": vehicle_obj.plate,
-            "make": vehicle_obj.make,
-            "model": vehicle_obj.model,
-        } if vehicle_obj else None,
+        "vehicle": vehicle_dicts[0] if vehicle_obj and vehicle_dicts else None,
         # Provide list of existing vehicles for user if none attached so staff can associate
-        "available_vehicles": None if vehicle_obj else [
-            {
-                "id": v.id,
-                "reg": v.plate,
-                "make": v.make,
-                "model": v.model,
-            }
-            for v in (db.query(Vehicle).filter_by(user_id=order.user_id).all() if order.user_id else [])
-        ],
+        "available_vehicles": None if vehicle_obj else vehicle_dicts,
     "amount_cents": amount_val,
     "amount": (amount_val or 0)/100,
         "payment_method": method_val,
@@ -490,7 +500,9 @@ def verify_pos(
     if order.status != 'paid':
         order.status = 'paid'
         _log_visit_for_paid_order(db, order)
+    record_order_washes(db, order)
     db.commit()
+    wash_board.publish_order(db, order.id, "payment_verified")
     return {"status": "ok", "type": "pos", "order_id": order.id}
 
 @router.get("/recent-verifications")
@@ -502,63 +514,10 @@ def recent_verifications(
 
     Provides lightweight info for staff sidebar/history. Includes whether
     a wash has been started or completed to allow contextual navigation.
+    Payments for all listed orders are read in one query. Live dashboards
+    should prefer ``/wash-board/stream``.
     """
-    orders = (
-        db.query(Order)
-        .options(joinedload(Order.user), subqueryload(Order.vehicles).joinedload(OrderVehicle.vehicle))
-        .filter(Order.order_redeemed_at != None)
-        .order_by(Order.order_redeemed_at.desc())
-        .limit(limit)
-        .all()
-    )
-
-    results = []
-    for order in orders:
-        vehicle = order.vehicles[0].vehicle if order.vehicles else None
-        payment = (
-            db.query(Payment)
-            .filter_by(order_id=order.id, status="success")
-            .order_by(Payment.created_at.desc())
-            .first()
-        )
-        amount_cents = (payment.amount if payment and payment.amount is not None else order.amount) or 0
-        redeemed_at = order.order_redeemed_at or order.created_at
-
-        results.append(
-            {
-                "order_id": order.id,
-                "timestamp": redeemed_at.isoformat() if redeemed_at else None,
-                "status": "success",
-                "tenant_id": getattr(order, "tenant_id", None),
-                "user": (
-                    {
-                        "first_name": order.user.first_name,
-                        "last_name": order.user.last_name,
-                        "phone": order.user.phone,
-                    }
-                    if order.user
-                    else None
-                ),
-                "vehicle": (
-                    {
-                        "id": vehicle.id,
-                        "make": vehicle.make,
-                        "model": vehicle.model,
-                        "reg": vehicle.plate,
-                    }
-                    if vehicle
-                    else None
-                ),
-                "payment_method": (payment.method or payment.source) if payment else None,
-                "payment_reference": (payment.reference or payment.transaction_id) if payment else None,
-                "amount_cents": amount_cents,
-                "amount": amount_cents / 100,
-                "started": bool(order.started_at),
-                "completed": bool(order.ended_at),
-            }
-        )
-
-    return results
+    return wash_board.recent_verifications(db, limit)
 
 from app.core.wash_lifecycle import start_wash as _start_wash_shared, end_wash as _end_wash_shared
 
@@ -606,47 +565,45 @@ def get_order_user(order_id: str, db: Session = Depends(get_db)):
     if not order:
         raise HTTPException(404, "Order not found")
     user = db.query(User).filter_by(id=order.user_id).first()
-    vehicles = db.query(Vehicle).filter_by(user_id=user.id).all()
+    vehicles = with_wash_stats(db.query(Vehicle), Vehicle.id).filter(Vehicle.user_id == user.id).all()
     return {"user": {"id": user.id, "first_name": user.first_name, "last_name": user.last_name, "phone": user.phone},
-            "vehicles": [{"id": v.id, "reg": v.plate, "make": v.make, "model": v.model} for v in vehicles]}
+            "vehicles": [{"id": v.id, "reg": v.plate, "make": v.make, "model": v.model, **wash_stats_fields(*stats)}
+                         for v, *stats in vehicles]}
 
 @router.get("/active-washes")
 def active_washes(db: Session = Depends(get_db)):
-    today = datetime.utcnow().date()
-    tomorrow = today + timedelta(days=1)
-    orders = (
-        db.query(Order)
-          .options(joinedload(Order.user), subqueryload(Order.vehicles).joinedload(OrderVehicle.vehicle))
-          .filter(
-              Order.started_at != None,
-              Order.started_at >= today,
-              Order.started_at < tomorrow,
-          )
-          .all()
+    return wash_board.active_washes(db)
+
+@router.get("/wash-board/stream")
+async def wash_board_stream(
+    request: Request,
+    ctx: TenantContext = Depends(get_tenant_context),
+    current_user: User = Depends(require_staff),
+    db: Session = Depends(get_db),
+):
+    """Server-sent events for the tenant's live wash board (staff of that tenant only).
+
+    Sends a ``snapshot`` (today's washes + recent verifications), then
+    ``wash_started`` / ``wash_ended`` / ``payment_verified`` /
+    ``payment_succeeded`` deltas. Replaces polling ``/active-washes`` and
+    ``/recent-verifications``.
+    """
+    if current_user.tenant_id != ctx.id:
+        db.close()
+        raise HTTPException(status_code=403, detail="Tenant mismatch")
+    stream = wash_board.open_stream(ctx.id)
+    try:
+        initial = await run_in_threadpool(wash_board.snapshot, db, ctx.id)
+    except Exception:
+        wash_board.close_stream(ctx.id, stream)
+        raise
+    finally:
+        db.close()  # release the connection; the stream itself needs no DB
+    return StreamingResponse(
+        wash_board.event_stream(ctx.id, stream, initial, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
-    result = []
-    for order in orders:
-        vehicle = order.vehicles[0].vehicle if order.vehicles else None
-        result.append({
-            "order_id": order.id,
-            "user": {
-                "first_name": order.user.first_name if order.user else None,
-                "last_name": order.user.last_name if order.user else None,
-                "phone": order.user.phone if order.user else None,
-            } if order.user else None,
-            "vehicle": {
-                "make": vehicle.make,
-                "model": vehicle.model,
-                "reg": vehicle.plate,
-            } if vehicle else None,
-            "payment_pin": order.payment_pin,
-            "started_at": order.started_at,
-            "ended_at": order.ended_at,
-            "status": "ended" if order.ended_at else "started",
-            "tenant_id": getattr(order, 'tenant_id', None),
-            "duration_seconds": int((order.ended_at - order.started_at).total_seconds()) if order.started_at and order.ended_at else None,
-        })
-    return result
 
 @router.get("/wash-history")
 def wash_history(date: str, db: Session = Depends(get_db)):
@@ -689,26 +646,18 @@ def wash_history(date: str, db: Session = Depends(get_db)):
         })
     return result
 
-# New richer history endpoint expected by frontend hooks
-@router.get("/history")
-def history(
-    start_date: Optional[str] = Query(None, description="Start date YYYY-MM-DD (defaults to today if none provided)"),
-    end_date: Optional[str] = Query(None, description="End date YYYY-MM-DD (inclusive)"),
-    status: Optional[str] = Query(None, description="Filter by status: started|ended"),
-    paymentType: Optional[str] = Query(None, description="Filter by payment type: paid|loyalty (maps to Payment heuristics)"),
-    service_type: Optional[str] = Query(None, description="Substring match on service name / category (first item)"),
-    customer: Optional[str] = Query(None, description="Substring match on user first/last name or phone"),
-    page: int = Query(1, ge=1),
-    limit: int = Query(100, ge=1, le=500),
-    db: Session = Depends(get_db)
+def history_query(
+    db: Session,
+    *,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    status: Optional[str] = None,
+    paymentType: Optional[str] = None,
+    customer: Optional[str] = None,
 ):
-    """Return wash/order history between optional dates with lightweight filtering.
+    """Return ``(query, start, end)`` of orders matching the history filters.
 
-    Notes:
-    - Falls back to today's date range if none supplied.
-    - Status is derived from presence of ended_at.
-    - paymentType 'loyalty' filters orders that have a zero-amount successful loyalty Payment OR amount==0.
-    - Pagination is naive (offset/limit) for now.
+    Shared by ``/history`` and the wash-history export.
     """
     today = datetime.utcnow().date()
     try:
@@ -762,14 +711,52 @@ def history(
             )
         )
 
-    total = q.count()
-    items = (
-        q.options(joinedload(Order.user), subqueryload(Order.vehicles).joinedload(OrderVehicle.vehicle))
-         .order_by(Order.started_at.desc())
-         .offset((page - 1) * limit)
-         .limit(limit)
-         .all()
+    return q, start, end
+
+
+# New richer history endpoint expected by frontend hooks
+@router.get("/history")
+def history(
+    start_date: Optional[str] = Query(None, description="Start date YYYY-MM-DD (defaults to today if none provided)"),
+    end_date: Optional[str] = Query(None, description="End date YYYY-MM-DD (inclusive)"),
+    status: Optional[str] = Query(None, description="Filter by status: started|ended"),
+    paymentType: Optional[str] = Query(None, description="Filter by payment type: paid|loyalty (maps to Payment heuristics)"),
+    service_type: Optional[str] = Query(None, description="Substring match on service name / category (first item)"),
+    customer: Optional[str] = Query(None, description="Substring match on user first/last name or phone"),
+    page: int = Query(1, ge=1),
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = Query(None, description="Opaque keyset cursor from a previous response (overrides page)"),
+    db: Session = Depends(get_db)
+):
+    """Return wash/order history between optional dates with lightweight filtering.
+
+    Notes:
+    - Falls back to today's date range if none supplied.
+    - Status is derived from presence of ended_at.
+    - paymentType 'loyalty' filters orders that have a zero-amount successful loyalty Payment OR amount==0.
+    - Pagination: page/limit (offset) remains supported; responses also carry
+      ``next_cursor`` for keyset paging over (started_at, id). Cursor requests
+      reuse a cached total instead of re-counting.
+    """
+    q, start, end = history_query(
+        db, start_date=start_date, end_date=end_date, status=status,
+        paymentType=paymentType, customer=customer,
     )
+
+    page_q = q.options(joinedload(Order.user), subqueryload(Order.vehicles).joinedload(OrderVehicle.vehicle)) \
+              .order_by(*keyset_order(Order.started_at, Order.id, descending=True))
+    if cursor:
+        last_started, last_id = decode_cursor(cursor, "started_at", True)
+        total = cached_total(
+            ("history", current_tenant_id.get(None), start, end, status, paymentType, customer),
+            q.count,
+        )
+        page_q = page_q.filter(keyset_after(Order.started_at, Order.id, last_started, last_id, descending=True))
+    else:
+        total = q.count()
+        page_q = page_q.offset((page - 1) * limit)
+    items = page_q.limit(limit).all()
+    next_cursor = next_cursor_for(items, limit, "started_at", True, lambda o: (o.started_at, o.id))
     result = []
     for order in items:
         vehicle = order.vehicles[0].vehicle if order.vehicles else None
@@ -818,7 +805,7 @@ def history(
             "tenant_id": getattr(order, 'tenant_id', None),
             "duration_seconds": int((order.ended_at - order.started_at).total_seconds()) if order.started_at and order.ended_at else None,
         })
-    return {"total": total, "items": result, "page": page, "limit": limit}
+    return {"total": total, "items": result, "page": page, "limit": limit, "next_cursor": next_cursor}
 
 from collections import OrderedDict
 _ANALYTICS_CACHE: "OrderedDict[str, tuple[float, dict]]" = OrderedDict()
@@ -840,10 +827,15 @@ def _analytics_percentile(pct: float):
     k = max(0, min(k, len(data) - 1))
     return data[k]
 
-def _invalidate_analytics_cache():
-    """Clear analytics cache (Phase 5)."""
+def _clear_analytics_cache(key=None, data=None):
     _ANALYTICS_CACHE.clear()
 
+invalidation.subscribe("analytics", _clear_analytics_cache)
+
+def _invalidate_analytics_cache():
+    """Clear analytics cache in every worker (Phase 5)."""
+    invalidation.publish("analytics")
+
 @router.get("/dashboard-analytics/meta")
 def dashboard_analytics_meta():
     hit_rate = 0.0
@@ -864,11 +856,11 @@ def dashboard_analytics_meta():
         },
     }
 
-@router.get("/dashboard-analytics")
+@router.get("/dashboard-analytics", dependencies=[Depends(statement_timeout(settings.reporting_statement_timeout_ms))])
 def dashboard_analytics(
     start_date: Optional[str] = Query(None, description="Start date YYYY-MM-DD"),
     end_date: Optional[str] = Query(None, description="End date YYYY-MM-DD"),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Basic analytics for staff dashboard without admin restrictions.
 
@@ -956,24 +948,8 @@ def dashboard_analytics(
     if prev_revenue:
         period_vs_prev_pct = round(((revenue - prev_revenue) / prev_revenue) * 100, 1)
 
-    # Duration stats for washes completed in period
-    duration_rows = db.query(Order.started_at, Order.ended_at).filter(
-        completed_cond
-    ).all()
-    durations = [int((r.ended_at - r.started_at).total_seconds()) for r in duration_rows if r.started_at and r.ended_at]
-    avg_duration = sum(durations) / len(durations) if durations else None
-    median_duration = None
-    p95_duration = None
-    if durations:
-        sorted_d = sorted(durations)
-        mid = len(sorted_d) // 2
-        if len(sorted_d) % 2:
-            median_duration = sorted_d[mid]
-        else:
-            median_duration = (sorted_d[mid - 1] + sorted_d[mid]) / 2
-        idx95 = int(round(0.95 * len(sorted_d) + 1e-9)) - 1
-        idx95 = max(0, min(idx95, len(sorted_d) - 1))
-        p95_duration = sorted_d[idx95]
+    # Duration stats for washes completed in period (merged daily sketches)
+    duration = duration_summary(db, start, end, tenant_id=current_tenant_id.get(None))
 
     # Daily wash counts – single grouped query
     daily_rows = db.query(
@@ -989,7 +965,6 @@ def dashboard_analytics(
 
     elapsed_ms = round((time.perf_counter() - t0) * 1000, 2)
     _ANALYTICS_METRICS["latencies_ms"].append(elapsed_ms)
-    from app.core.tenant_context import current_tenant_id
     payload = {
         "total_washes": int(stats_row.total_washes),
         "completed_washes": int(stats_row.completed_washes),
@@ -1008,10 +983,10 @@ def dashboard_analytics(
             "end_date": end.strftime('%Y-%m-%d')
         },
         "wash_duration_seconds": {
-            "average": avg_duration,
-            "median": median_duration,
-            "p95": p95_duration,
-            "sample_size": len(durations),
+            "average": duration["average"],
+            "median": duration["median"],
+            "p95": duration["p95"],
+            "sample_size": duration["sample_size"],
         },
         "tenant_id": current_tenant_id.get(None),
         "meta": {
@@ -1028,13 +1003,17 @@ def dashboard_analytics(
 
 
 # Phase 1 & 2 consolidated business analytics endpoint
-@router.get("/business-analytics", summary="Phase 1 & 2 business metrics for staff dashboard")
+@router.get(
+    "/business-analytics",
+    summary="Phase 1 & 2 business metrics for staff dashboard",
+    dependencies=[Depends(statement_timeout(settings.reporting_statement_timeout_ms))],
+)
 def business_analytics(
     request: Request,
     response: Response,
     range_days: int = Query(30, ge=1, le=90, description="Lookback window for trend metrics"),
     recent_days: int = Query(7, ge=1, le=30, description="Short window for deltas (e.g. last 7 days)"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     """Public analytics endpoint (no auth required).
 
@@ -1111,38 +1090,23 @@ def business_analytics(
     completed_prev = db.query(func.count(Order.id)).filter(Order.ended_at != None, Order.started_at >= prev_start, Order.started_at < prev_end).scalar() or 0
     avg_ticket_prev = (total_revenue_prev_cents / 100 / completed_prev) if completed_prev else 0
 
-    # Duration stats (completed in range)
-    dur_rows = db.query(Order.started_at, Order.ended_at).filter(Order.ended_at != None, Order.started_at >= start_range).all()
-    durations = [int((r.ended_at - r.started_at).total_seconds()) for r in dur_rows if r.started_at and r.ended_at]
-    if durations:
-        sorted_d = sorted(durations)
-        avg_duration = sum(durations) / len(durations)
-        mid = len(sorted_d)//2
-        median_duration = sorted_d[mid] if len(sorted_d)%2 else (sorted_d[mid-1]+sorted_d[mid])/2
-        idx95 = max(0, min(int(round(0.95*len(sorted_d))) - 1, len(sorted_d)-1))
-        p95_duration = sorted_d[idx95]
-        slow_wash_threshold = 30*60  # 30 minutes
-        slow_wash_count = sum(1 for d in durations if d > slow_wash_threshold)
-    else:
-        avg_duration = median_duration = p95_duration = slow_wash_count = None
+    # Duration stats (washes ended in range, from daily sketches)
+    slow_wash_threshold = 30*60  # 30 minutes
+    duration = duration_summary(
+        db, start_range.date(), now.date(),
+        tenant_id=current_tenant_id.get(None), slow_threshold=slow_wash_threshold,
+    )
+    avg_duration, median_duration, p95_duration, slow_wash_count = (
+        duration["average"], duration["median"], duration["p95"], duration["slow_count"]
+    )
 
     # First vs Returning (recent window)
     recent_users = db.query(Order.user_id).filter(Order.started_at != None, Order.started_at >= start_recent).distinct().all()
     user_ids_recent = {u.user_id for u in recent_users}
-    first_visit_rows = db.query(Order.user_id, func.min(func.date(Order.started_at))).group_by(Order.user_id).all()
-    first_visit_map = {}
-    for uid, first_day in first_visit_rows:
-        if not first_day:
-            continue
-        # SQLite returns str, Postgres returns date; normalize to date object
-        if hasattr(first_day, 'isoformat'):
-            first_visit_map[uid] = first_day
-        else:
-            # parse 'YYYY-MM-DD'
-            from datetime import datetime as _dt
-            first_visit_map[uid] = _dt.strptime(first_day, '%Y-%m-%d').date()
-    start_recent_date = start_recent.date()
-    new_count = sum(1 for uid in user_ids_recent if (d := first_visit_map.get(uid)) and d >= start_recent_date)
+    # First visits come from the materialised index (range scan, no GROUP BY over orders)
+    start_recent_day = datetime.combine(start_recent.date(), datetime.min.time())
+    new_users = {uid for (uid,) in first_visit_since(db, start_recent_day, tenant_id=current_tenant_id.get(None)).all()}
+    new_count = len(user_ids_recent & new_users)
     returning_count = len(user_ids_recent) - new_count
 
     # Loyalty share (amount==0 or type=='loyalty')
@@ -1224,13 +1188,9 @@ def business_analytics(
     upsell_rate_prev = (upsell_prev_numer / orders_in_prev_range) if orders_in_prev_range else 0
 
     # Previous period duration stats for p95 delta
-    dur_prev_rows = db.query(Order.started_at, Order.ended_at).filter(Order.ended_at != None, Order.started_at >= prev_start, Order.started_at < prev_end).all()
-    prev_durations = [int((r.ended_at - r.started_at).total_seconds()) for r in dur_prev_rows if r.started_at and r.ended_at]
-    p95_prev = None
-    if prev_durations:
-        s_prev = sorted(prev_durations)
-        idx_prev = max(0, min(int(round(0.95 * len(s_prev))) - 1, len(s_prev) - 1))
-        p95_prev = s_prev[idx_prev]
+    p95_prev = duration_summary(
+        db, prev_start.date(), prev_end.date() - timedelta(days=1), tenant_id=current_tenant_id.get(None)
+    )["p95"]
 
     def pct_delta(current: float, previous: float) -> Optional[float]:
         if previous == 0:
@@ -1248,7 +1208,6 @@ def business_analytics(
         "upsell_rate_pct": pct_delta(upsell_rate, upsell_rate_prev),
     }
 
-    from app.core.tenant_context import current_tenant_id
     payload = {
         "range_days": range_days,
         "recent_days": recent_days,
@@ -1288,7 +1247,8 @@ def business_analytics(
 
     return payload
 
-@router.get("/user-wash-status")
+# Day bucket: only today's washes are considered
+@router.get("/user-wash-status", dependencies=[Depends(conditional_get("orders", bucket_seconds=86400))])
 def user_wash_status(db: Session = Depends(get_db), user=Depends(get_current_user)):
     today = datetime.utcnow().date()
     tomorrow = today + timedelta(days=1)
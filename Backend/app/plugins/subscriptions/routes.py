@@ -3,12 +3,12 @@ from typing import Optional, List, Dict, Any
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 from datetime import datetime, timedelta
-from sqlalchemy import func
 import hmac
 import hashlib
 
+from app.core import module_usage
 from app.core.database import get_db
-from app.models import Tenant, Order, Redemption, Payment, SubscriptionPlan
+from app.models import Tenant, SubscriptionPlan
 from app.plugins.auth.routes import require_admin
 from app.services.subscription_billing import billing_service
 from config import settings
@@ -343,57 +343,29 @@ def get_usage(
     tenant_id: Optional[str] = Header(default=None, alias="X-Tenant-ID"),
     db: Session = Depends(get_db),
 ):
-    """Compute module usage from real data.
+    """Module usage over a rolling 7d / 30d window.
 
-    - core: number of orders created in window
-    - loyalty: number of redemptions created/redeemed in window
-    - billing: number of successful payments in window
-    - analytics: number of distinct active users in window (via orders)
+    - core: orders created
+    - loyalty: redemptions created
+    - billing: successful payments
+    - analytics: distinct customers with a paid order
     - inventory: placeholder (0) unless you later add inventory events
+
+    Read from the daily counters in ``app.core.module_usage`` (at most 30
+    rows per module) rather than counting the source tables.
     """
     days = 30 if window.endswith("30d") else 7
-    start = datetime.utcnow() - timedelta(days=days)
     tid = tenant_id or "default"
 
     # Fetch limits from current plan assignment
     t = _get_tenant(db, tid)
-    sub = _ensure_subscription_struct(t)
-    plan = DEFAULT_PLANS.get(sub.get("plan_id") or 1) or DEFAULT_PLANS[1]
-    limits = (sub.get("module_limits") or plan.get("limits") or {})
-
-    # Orders
-    orders_q = db.query(func.count(Order.id)).filter(Order.created_at >= start)
-    orders_q = orders_q.filter((Order.tenant_id == tid) | (Order.tenant_id.is_(None)))  # include legacy rows without tenant
-    core_count = orders_q.scalar() or 0
-
-    # Redemptions (loyalty)
-    red_q = db.query(func.count(Redemption.id)).filter(Redemption.created_at >= start)
-    # Attempt tenant scoping; if model lacks tenant_id in some rows, include them
-    red_q = red_q.filter(Redemption.tenant_id == tid)
-    loyalty_count = red_q.scalar() or 0
-
-    # Payments (billing)
-    pay_q = db.query(func.count(Payment.id)).filter(Payment.created_at >= start, Payment.status == "success")
-    # Join to orders to scope by tenant when available
-    # Note: For SQLite simplicity, filter by order_id IN recent orders for this tenant
-    tenant_order_ids = db.query(Order.id).filter((Order.tenant_id == tid) | (Order.tenant_id.is_(None))).subquery()
-    pay_q = pay_q.filter(Payment.order_id.in_(tenant_order_ids))
-    billing_count = pay_q.scalar() or 0
-
-    # Analytics: distinct active users in window (via orders)
-    users_q = db.query(func.count(func.distinct(Order.user_id))).filter(Order.created_at >= start)
-    users_q = users_q.filter((Order.tenant_id == tid) | (Order.tenant_id.is_(None)))
-    analytics_count = users_q.scalar() or 0
-
-    # Inventory: placeholder (no concrete model yet)
-    inventory_count = 0
+    _ensure_subscription_struct(t)
+    limits = module_usage.tenant_limits(t)
+    usage = module_usage.usage_window(db, tid, days)
 
     return [
-        {"module": "core", "count": core_count, "limit": limits.get("core")},
-        {"module": "loyalty", "count": loyalty_count, "limit": limits.get("loyalty")},
-        {"module": "billing", "count": billing_count, "limit": limits.get("billing")},
-        {"module": "analytics", "count": analytics_count, "limit": limits.get("analytics")},
-        {"module": "inventory", "count": inventory_count, "limit": limits.get("inventory")},
+        {"module": module, "count": usage.get(module, 0), "limit": limits.get(module)}
+        for module in ("core", "loyalty", "billing", "analytics", "inventory")
     ]
 
 
@@ -7,16 +7,14 @@ from app.plugins.auth.routes import require_admin, get_current_user
 from app.services.tenant_settings import get_tenant_settings
 from pydantic import BaseModel
 from typing import List, Optional
-import os, pathlib, shutil, io, hashlib
-from PIL import Image
-from app.core import jobs
+import os, pathlib, shutil, hashlib
+from app.core import tenant_documents
+from app.services import branding_assets
 from time import time
 from uuid import uuid4
 from datetime import datetime, timedelta
 from pydantic import EmailStr
 from config import settings
-from sendgrid import SendGridAPIClient
-from sendgrid.helpers.mail import Mail
 
 from app.models import InviteToken
 from app.core.audit import record, flush
@@ -93,8 +91,9 @@ class BrandingAssetUploadOut(BaseModel):
     url: str
     size: int
     content_type: Optional[str]
-    variants: Optional[dict] = None  # size label -> url
+    variants: Optional[dict] = None  # size label -> {format: url}; empty until processed
     etag: Optional[str] = None
+    job_id: Optional[str] = None  # background variant job (None if already processed)
 
 # CRUD Endpoints
 @router.post("", response_model=TenantOut, status_code=status.HTTP_201_CREATED)
@@ -166,6 +165,7 @@ def update_branding(tenant_id: str, payload: BrandingUpdate, db: Session = Depen
     for k,v in data.items():
         setattr(b, k, v)
     db.commit(); db.refresh(b)
+    tenant_documents.rebuild(db, tenant_id)
     record('tenant.branding.create' if created else 'tenant.branding.update', tenant_id=tenant_id, user_id=current.id, details={'fields': list(data.keys())})
     flush(db)
     return BrandingOut(
@@ -271,61 +271,16 @@ def upload_branding_asset(tenant_id: str, field: str, file: UploadFile = File(..
         'image/svg+xml': '.svg',
         'image/x-icon': '.ico'
     }.get(file.content_type, '')
-    # Deterministic filename for cache busting using content hash
+    # Deterministic filename for cache busting using content hash; identical
+    # re-uploads reuse the stored original and its already-built variants
     digest = hashlib.sha256(raw).hexdigest()[:16]
-    dest_dir = _branding_asset_dir(tenant_id)
     base_name = f"{field}-{digest}"
-    primary_fname = f"{base_name}{ext}"
-    dest_path = dest_dir / primary_fname
-    with open(dest_path, 'wb') as out:
-        out.write(raw)
-
-    variants = {}
-    def _process_variants(payload):  # executed in job queue
-        try:
-            img = Image.open(io.BytesIO(raw))
-            for size in [64, 128, 256, 512]:
-                try:
-                    resized = img.copy()
-                    resized.thumbnail((size, size))
-                    variant_name = f"{base_name}-{size}{ext}"
-                    variant_path = dest_dir / variant_name
-                    resized.save(variant_path)
-                except Exception:
-                    continue
-        except Exception:
-            return {'ok': False}
-        return {'ok': True}
-
-    # For large files (>100KB) offload variant generation; else inline
-    if file.content_type in {'image/png', 'image/jpeg'} and field in {'logo_light','logo_dark','app_icon'}:
-        if len(raw) > 100 * 1024:
-            try:
-                jobs.register_job(f"branding_variants_{field}", _process_variants)
-            except Exception:
-                pass
-            jobs.enqueue(f"branding_variants_{field}")
-        else:
-            _process_variants(None)
-        # Populate variant URLs regardless (may exist shortly after)
-    for size in [64,128,256,512]:
-            variant_name = f"{base_name}-{size}{ext}"
-            variants[str(size)] = f"/static/branding/{tenant_id}/{variant_name}"
-
-    # Favicon conversions (derive .ico if uploading png larger than 32x32 and field favicon or app_icon)
-    if field in {'favicon','app_icon'} and file.content_type in {'image/png','image/jpeg'}:
-        try:
-            img = Image.open(io.BytesIO(raw))
-            favicon_sizes = [(16,16),(32,32),(48,48)]
-            ico_name = f"{base_name}.ico"
-            ico_path = dest_dir / ico_name
-            img.save(ico_path, sizes=favicon_sizes)
-            variants['ico'] = f"/static/branding/{tenant_id}/{ico_name}"
-        except Exception:
-            pass
-
-    rel_url = f"/static/branding/{tenant_id}/{primary_fname}"
+    rel_url = branding_assets.store_original(tenant_id, base_name, ext, raw)
     etag = digest
+    # Variants (sizes, WebP/AVIF, .ico, precompressed SVG) are built by a background job
+    job_id = branding_assets.schedule(tenant_id, field, base_name, ext, file.content_type)
+    processed = branding_assets.read_manifest(tenant_id).get(base_name) or {}
+    variants = {**processed.get('variants', {}), **processed.get('encodings', {})}
     # Upsert branding record + set appropriate URL field
     b = db.query(TenantBranding).filter_by(tenant_id=tenant_id).first()
     created = False
@@ -335,10 +290,11 @@ def upload_branding_asset(tenant_id: str, field: str, file: UploadFile = File(..
         created = True
     setattr(b, ALLOWED_BRANDING_FIELDS[field], rel_url)
     db.commit(); db.refresh(b)
+    tenant_documents.rebuild(db, tenant_id)
     _UPLOAD_QUOTA[tenant_id] = count + 1
     record('tenant.branding.asset_upload', tenant_id=tenant_id, user_id=current.id, details={'field': field, 'size': len(raw), 'created': created, 'variants': list(variants.keys())})
     flush(db)
-    return BrandingAssetUploadOut(field=field, url=rel_url, size=len(raw), content_type=file.content_type, variants=variants or None, etag=etag)
+    return BrandingAssetUploadOut(field=field, url=rel_url, size=len(raw), content_type=file.content_type, variants=variants or None, etag=etag, job_id=job_id)
 
 @router.get('/{tenant_id}/branding/assets')
 def list_branding_assets(tenant_id: str, db: Session = Depends(get_db), current: User = Depends(get_current_user)):
@@ -529,6 +485,8 @@ def invite_tenant_admin(tenant_id: str, payload: TenantInvite, db: Session = Dep
     # send invitation email
     # Send invitation email if configured
     if email_settings.provider == "sendgrid" and email_settings.sendgrid_api_key:
+        from sendgrid import SendGridAPIClient
+        from sendgrid.helpers.mail import Mail
         client = SendGridAPIClient(email_settings.sendgrid_api_key)
         link = tenant_settings.build_frontend_url(f"onboarding/invite?token={token}")
         mail = Mail(
@@ -2,9 +2,13 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import or_
 
+from app.core import search as search_index
 from app.core.database import get_db
-from app.models import User, Vehicle, Order, OrderVehicle
-from app.plugins.auth.routes import require_staff
+from app.core.vehicle_stats import wash_stats_fields, with_wash_stats
+from app.core.pagination import cached_total, decode_cursor, keyset_after, keyset_order, next_cursor_for
+from app.core.tenant_context import current_tenant_id
+from app.models import User, Vehicle
+from app.plugins.auth.routes import get_current_user, require_staff
 from pydantic import BaseModel, EmailStr
 from typing import Optional
 from datetime import datetime
@@ -26,6 +30,7 @@ router = APIRouter(prefix="", tags=["users"], dependencies=[Depends(require_staf
 class PaginatedUsers(BaseModel):
     items: list[UserOut]
     total: int
+    next_cursor: Optional[str] = None
 
 # Schemas
 class VehicleIn(BaseModel):
@@ -69,57 +74,55 @@ def delete_vehicle(user_id: int, vehicle_id: int, db: Session = Depends(get_db))
     db.commit()
     return {"message": "Vehicle deleted"}
 
+def _search_scope(user: User) -> Optional[str]:
+    """Tenant the caller may search; superadmins search every tenant."""
+    return None if user.role == "superadmin" else user.tenant_id
+
 @router.get("/search")
-def search_users(query: str = Query(..., min_length=1), db: Session = Depends(get_db)):
-    norm_q = "+27" + query[1:] if query.startswith("0") and len(query) == 10 else query
-    users = db.query(User).filter(
-        or_(
-            User.first_name.ilike(f"%{query}%"),
-            User.last_name.ilike(f"%{query}%"),
-            User.phone.ilike(f"%{query}%"),
-            User.phone.ilike(f"%{norm_q}%"),
-        )
-    ).all()
+def search_users(
+    query: str = Query(..., min_length=1),
+    limit: int = Query(50, ge=1, le=200),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    """Ranked user search by name, email or phone (``0…`` and ``+27…`` forms match)."""
+    hits = search_index.search(db, query, entity_types=("user",), tenant_id=_search_scope(current_user), limit=limit)
+    by_id = {u.id: u for u in db.query(User).filter(User.id.in_([h.entity_id for h in hits])).all()} if hits else {}
     return [
         {"id": u.id, "first_name": u.first_name, "last_name": u.last_name,
          "phone": u.phone, "email": u.email, "role": u.role}
-        for u in users
+        for u in (by_id.get(h.entity_id) for h in hits) if u is not None
     ]
 
 @router.get("/vehicles/search")
-def search_vehicles(q: str = Query(..., min_length=1), db: Session = Depends(get_db)):
+def search_vehicles(
+    q: str = Query(..., min_length=1),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
     """Search vehicles by plate/make/model or owner name/phone; include total washes & last wash date.
     This supports the staff vehicle manager UI."""
-    pattern = f"%{q}%"
-    # Join user for owner filtering
-    vehs = (
-        db.query(Vehicle, User)
-          .join(User, Vehicle.user_id == User.id)
-          .filter(
-              or_(
-                  Vehicle.plate.ilike(pattern),
-                  Vehicle.make.ilike(pattern),
-                  Vehicle.model.ilike(pattern),
-                  User.first_name.ilike(pattern),
-                  User.last_name.ilike(pattern),
-                  User.phone.ilike(pattern),
-              )
-          )
-          .limit(50)
-          .all()
-    )
+    limit = 50
+    hits = search_index.search(db, q, tenant_id=_search_scope(current_user), limit=limit)
+    vehicle_ids = [h.entity_id for h in hits if h.entity_type == "vehicle"]
+    owner_ids = [h.entity_id for h in hits if h.entity_type == "user"]
+    # Direct vehicle hits rank first, then vehicles of matching owners
+    rank = {("vehicle", vid): i for i, vid in enumerate(vehicle_ids)}
+    rank.update({("user", uid): len(vehicle_ids) + i for i, uid in enumerate(owner_ids)})
+    vehs = []
+    if hits:
+        rows = with_wash_stats(
+            db.query(Vehicle, User)
+              .join(User, Vehicle.user_id == User.id)
+              .filter(or_(Vehicle.id.in_(vehicle_ids), Vehicle.user_id.in_(owner_ids))),
+            Vehicle.id,
+        ).all()
+        vehs = sorted(
+            rows,
+            key=lambda vu: min(rank.get(("vehicle", vu[0].id), len(rank)), rank.get(("user", vu[0].user_id), len(rank))),
+        )[:limit]
     results = []
-    for v, u in vehs:
-        # Compute total washes and last wash timestamp via orders join
-        ov_q = (
-            db.query(Order)
-              .join(OrderVehicle, OrderVehicle.order_id == Order.id)
-              .filter(OrderVehicle.vehicle_id == v.id, Order.status.in_(["paid", "completed"]))
-              .order_by(Order.created_at.desc())
-        )
-        orders = ov_q.all()
-        total_washes = len(orders)
-        last_wash = orders[0].created_at.isoformat() if orders else None
+    for v, u, total_washes, last_wash_at, last_service in vehs:
         results.append({
             "id": v.id,
             "plate": v.plate,
@@ -131,8 +134,7 @@ def search_vehicles(q: str = Query(..., min_length=1), db: Session = Depends(get
                 "last_name": u.last_name,
                 "phone": u.phone,
             },
-            "total_washes": total_washes,
-            "last_wash": last_wash,
+            **wash_stats_fields(total_washes, last_wash_at, last_service),
         })
     return results
  
@@ -143,9 +145,14 @@ def list_users(
     search: Optional[str] = None,
     sort_by: Optional[str] = Query(None, regex="^(first_name|last_name|email|phone|role)$"),
     sort_order: str = Query('asc', regex="^(asc|desc)$"),
+    cursor: Optional[str] = Query(None, description="Opaque keyset cursor from a previous response (overrides page)"),
     db: Session = Depends(get_db)
 ):
-    """List users (admin only) with pagination, optional search and sorting"""
+    """List users (admin only) with pagination, optional search and sorting.
+
+    Unsorted listings page by id. ``next_cursor`` enables keyset paging; cursor
+    requests reuse a cached total.
+    """
     query = db.query(User)
     if search:
         q = f"%{search}%"
@@ -155,13 +162,19 @@ def list_users(
             User.email.ilike(q),
             User.phone.ilike(q),
         ))
-    total = query.count()
-    if sort_by:
-        col = getattr(User, sort_by)
-        if sort_order == 'desc':
-            col = col.desc()
-        query = query.order_by(col)
-    users = query.offset((page - 1) * per_page).limit(per_page).all()
+    sort_key = sort_by or "id"
+    descending = sort_order == 'desc'
+    sort_col = getattr(User, sort_key)
+    ordered = query.order_by(*keyset_order(sort_col, User.id, descending))
+    if cursor:
+        last_value, last_id = decode_cursor(cursor, sort_key, descending)
+        ordered = ordered.filter(keyset_after(sort_col, User.id, last_value, last_id, descending))
+        total = cached_total(("users", current_tenant_id.get(None), search), query.count)
+    else:
+        total = query.count()
+        ordered = ordered.offset((page - 1) * per_page)
+    users = ordered.limit(per_page).all()
+    next_cursor = next_cursor_for(users, per_page, sort_key, descending, lambda u: (getattr(u, sort_key), u.id))
     items = [UserOut(
         id=u.id,
         first_name=u.first_name,
@@ -170,7 +183,7 @@ def list_users(
         phone=u.phone,
         role=u.role,
     ) for u in users]
-    return PaginatedUsers(items=items, total=total)
+    return PaginatedUsers(items=items, total=total, next_cursor=next_cursor)
 
 class UserUpdate(BaseModel):
     first_name: Optional[str]
@@ -5,12 +5,15 @@ from typing import Dict, List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Query
 from pydantic import BaseModel, Field
-from sqlalchemy import func, or_
+from sqlalchemy import and_, func
 from sqlalchemy.orm import Session
 
+from app.core import search as search_index
 from app.core.database import get_db
-from app.models import (Order, PointBalance, Redemption, Service, User,
-                        Vehicle)
+from app.core.pagination import (cached_total, decode_cursor, keyset_after,
+                                 keyset_order, next_cursor_for)
+from app.models import (CustomerAggregate, Order, PointBalance, Redemption,
+                        Service, User, Vehicle)
 from app.plugins.auth.routes import get_current_user
 
 router = APIRouter()
@@ -36,6 +39,7 @@ class CustomerListResponse(BaseModel):
     page: int
     limit: int
     total_pages: int
+    next_cursor: Optional[str] = None
 
 
 class CustomerVehicle(BaseModel):
@@ -81,42 +85,19 @@ def _require_admin_or_staff(user: User) -> None:
         raise HTTPException(status_code=403, detail="Not authorized")
 
 
-@router.get("/", response_model=CustomerListResponse)
-async def list_customers(
-    page: int = Query(1, ge=1),
-    limit: int = Query(20, ge=1, le=100),
-    search: Optional[str] = Query(None, description="Search by name, email, or phone"),
-    sort_by: str = Query("created_at"),
-    sort_order: str = Query("desc", regex="^(asc|desc)$"),
-    role: Optional[str] = Query(None, description="Filter by role (user/staff/admin)"),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
-) -> CustomerListResponse:
-    """Return paginated customer records with aggregate metrics."""
-
-    _require_admin_or_staff(current_user)
-
-    orders_subq = (
-        db.query(
-            Order.user_id.label("user_id"),
-            func.count(Order.id).label("order_count"),
-            func.coalesce(func.sum(Order.amount), 0).label("total_spent_cents"),
-            func.max(Order.created_at).label("last_order_date"),
-        )
-        .filter(Order.tenant_id == current_user.tenant_id)
-        .group_by(Order.user_id)
-        .subquery()
-    )
-
-    balances_subq = (
-        db.query(
-            PointBalance.user_id.label("user_id"),
-            func.coalesce(PointBalance.points, 0).label("points"),
-        )
-        .filter(PointBalance.tenant_id == current_user.tenant_id)
-        .subquery()
-    )
+def customer_rows_query(
+    db: Session,
+    tenant_id: str,
+    *,
+    search: Optional[str] = None,
+    role: Optional[str] = None,
+):
+    """Return the customer listing query with aggregate columns.
 
+    Aggregates come from the write-time ``customer_aggregates`` table and the
+    ``point_balances`` row, so no per-request GROUP BY over orders. Shared by
+    the list endpoint and the customers export.
+    """
     query = (
         db.query(
             User.id,
@@ -126,52 +107,89 @@ async def list_customers(
             User.phone,
             User.role,
             User.created_at,
-            func.coalesce(orders_subq.c.order_count, 0).label("order_count"),
-            func.coalesce(orders_subq.c.total_spent_cents, 0).label("total_spent_cents"),
-            orders_subq.c.last_order_date.label("last_order_date"),
-            func.coalesce(balances_subq.c.points, 0).label("loyalty_points"),
+            func.coalesce(CustomerAggregate.order_count, 0).label("order_count"),
+            func.coalesce(CustomerAggregate.total_spent_cents, 0).label("total_spent_cents"),
+            CustomerAggregate.last_order_date.label("last_order_date"),
+            func.coalesce(PointBalance.points, 0).label("loyalty_points"),
+        )
+        .outerjoin(
+            CustomerAggregate,
+            and_(CustomerAggregate.user_id == User.id, CustomerAggregate.tenant_id == tenant_id),
         )
-        .outerjoin(orders_subq, orders_subq.c.user_id == User.id)
-        .outerjoin(balances_subq, balances_subq.c.user_id == User.id)
-        .filter(User.tenant_id == current_user.tenant_id)
+        .outerjoin(
+            PointBalance,
+            and_(PointBalance.user_id == User.id, PointBalance.tenant_id == tenant_id),
+        )
+        .filter(User.tenant_id == tenant_id)
     )
 
     if role:
         query = query.filter(User.role == role)
 
     if search:
-        term = f"%{search.strip()}%"
-        query = query.filter(
-            or_(
-                User.first_name.ilike(term),
-                User.last_name.ilike(term),
-                User.email.ilike(term),
-                User.phone.ilike(term),
-            )
-        )
+        query = query.filter(User.id.in_(search_index.match_ids(search, "user", tenant_id)))
+
+    return query
+
+
+@router.get("/", response_model=CustomerListResponse)
+async def list_customers(
+    page: int = Query(1, ge=1),
+    limit: int = Query(20, ge=1, le=100),
+    search: Optional[str] = Query(None, description="Search by name, email, or phone"),
+    sort_by: str = Query("created_at"),
+    sort_order: str = Query("desc", regex="^(asc|desc)$"),
+    role: Optional[str] = Query(None, description="Filter by role (user/staff/admin)"),
+    cursor: Optional[str] = Query(None, description="Opaque keyset cursor from a previous response (overrides page)"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+) -> CustomerListResponse:
+    """Return paginated customer records with aggregate metrics.
+
+    Supports legacy page/limit paging and keyset paging via ``cursor``
+    (returned as ``next_cursor``); cursor pages reuse a cached total.
+    """
+
+    _require_admin_or_staff(current_user)
+
+    query = customer_rows_query(db, current_user.tenant_id, search=search, role=role)
 
     sort_map: Dict[str, object] = {
         "created_at": User.created_at,
         "first_name": User.first_name,
         "last_name": User.last_name,
         "email": User.email,
-        "order_count": orders_subq.c.order_count,
-        "total_spent": orders_subq.c.total_spent_cents,
-        "loyalty_points": balances_subq.c.points,
-        "last_order_date": orders_subq.c.last_order_date,
+        # Coalesced so the sort key matches the value echoed back in cursors
+        "order_count": func.coalesce(CustomerAggregate.order_count, 0),
+        "total_spent": func.coalesce(CustomerAggregate.total_spent_cents, 0),
+        "loyalty_points": func.coalesce(PointBalance.points, 0),
+        "last_order_date": CustomerAggregate.last_order_date,
     }
 
-    sort_column = sort_map.get(sort_by, User.created_at)
-    ordered_query = (
-        query.order_by(sort_column.desc().nullslast())
-        if sort_order == "desc"
-        else query.order_by(sort_column.asc().nullsfirst())
-    )
+    if sort_by not in sort_map:
+        sort_by = "created_at"
+    sort_column = sort_map[sort_by]
+    descending = sort_order == "desc"
+    ordered_query = query.order_by(*keyset_order(sort_column, User.id, descending))
+
+    def _count() -> int:
+        total_query = query.order_by(None).with_entities(func.count(func.distinct(User.id)))
+        return int(total_query.scalar() or 0)
 
-    total_query = query.order_by(None).with_entities(func.count(func.distinct(User.id)))
-    total = int(total_query.scalar() or 0)
-    offset = (page - 1) * limit
-    rows = ordered_query.offset(offset).limit(limit).all()
+    if cursor:
+        last_value, last_id = decode_cursor(cursor, sort_by, descending)
+        ordered_query = ordered_query.filter(
+            keyset_after(sort_column, User.id, last_value, last_id, descending)
+        )
+        total = cached_total(("customers", current_user.tenant_id, search, role), _count)
+    else:
+        total = _count()
+        ordered_query = ordered_query.offset((page - 1) * limit)
+    rows = ordered_query.limit(limit).all()
+    cursor_attr = "total_spent_cents" if sort_by == "total_spent" else sort_by
+    next_cursor = next_cursor_for(
+        rows, limit, sort_by, descending, lambda row: (getattr(row, cursor_attr), row.id)
+    )
 
     customers = [
         CustomerListItem(
@@ -198,6 +216,7 @@ async def list_customers(
         page=page,
         limit=limit,
         total_pages=total_pages,
+        next_cursor=next_cursor,
     )
 
 
@@ -228,15 +247,7 @@ async def get_customer(
     if not user:
         raise HTTPException(status_code=404, detail="Customer not found")
 
-    orders_agg = (
-        db.query(
-            func.count(Order.id).label("order_count"),
-            func.coalesce(func.sum(Order.amount), 0).label("total_spent_cents"),
-            func.max(Order.created_at).label("last_order_date"),
-        )
-        .filter(Order.user_id == customer_id, Order.tenant_id == current_user.tenant_id)
-        .one()
-    )
+    orders_agg = db.get(CustomerAggregate, (current_user.tenant_id, customer_id))
 
     balance = (
         db.query(PointBalance)
@@ -324,10 +335,10 @@ async def get_customer(
         phone=user.phone or None,
         role=user.role,
         created_at=user.created_at,
-        order_count=int(orders_agg.order_count or 0),
-        total_spent=float(orders_agg.total_spent_cents or 0) / 100.0,
+        order_count=int(orders_agg.order_count or 0) if orders_agg else 0,
+        total_spent=float(orders_agg.total_spent_cents or 0) / 100.0 if orders_agg else 0.0,
         loyalty_points=loyalty_points,
-        last_order_date=orders_agg.last_order_date,
+        last_order_date=orders_agg.last_order_date if orders_agg else None,
         vehicles=vehicles_payload,
         recent_orders=recent_orders_payload,
         loyalty_summary=loyalty_summary,
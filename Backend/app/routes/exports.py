@@ -0,0 +1,320 @@
+"""Streaming data exports (CSV / NDJSON) for admin spreadsheets.
+
+Each export honours the same filters as its list endpoint by reusing that
+endpoint's query builder:
+    /api/exports/transactions  -> /api/admin/transactions
+    /api/exports/customers     -> /api/customers
+    /api/exports/wash-history  -> /api/payments/history (scoped to the caller's tenant)
+
+Rows are streamed through a server-side cursor and serialized incrementally.
+Passing ``background=true`` queues an ``export`` job instead; it writes the
+file under ``settings.export_dir`` and the result is fetched from
+``/api/exports/jobs/{job_id}/download``.
+"""
+from __future__ import annotations
+
+import os
+import tempfile
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
+from fastapi.responses import FileResponse, JSONResponse
+from sqlalchemy.orm import Session, joinedload, selectinload
+
+from app.core import jobs
+from app.core.exports import iter_query, streaming_export_response, validate_format, write_export_file
+from app.models import Order, OrderVehicle, Payment, User
+from app.plugins.admin.routes import transaction_filters, transaction_rows_query
+from app.plugins.auth.routes import require_capability
+from app.plugins.payments.routes import history_query
+from app.routes.customers import customer_rows_query
+from config import settings
+
+router = APIRouter(prefix="/exports", tags=["exports"])
+
+TRANSACTION_COLUMNS = (
+    "payment_id", "created_at", "status", "method", "source", "amount_cents", "reference",
+    "transaction_id", "card_brand", "order_id", "order_status", "order_created_at", "tenant_id",
+    "customer_id", "customer_email", "customer_first_name", "customer_last_name", "customer_phone",
+    "service_name", "service_category",
+)
+CUSTOMER_COLUMNS = (
+    "id", "email", "first_name", "last_name", "phone", "role", "created_at",
+    "order_count", "total_spent_cents", "last_order_date", "loyalty_points",
+)
+WASH_HISTORY_COLUMNS = (
+    "order_id", "started_at", "ended_at", "status", "duration_seconds", "customer_first_name",
+    "customer_last_name", "customer_phone", "vehicle_reg", "service_name", "amount_cents",
+    "payment_pin", "tenant_id",
+)
+
+# A source turns JSON-safe params into (query builder, columns, row serializer, file base name).
+ExportSource = Tuple[Callable[[Session], Any], Tuple[str, ...], Callable[[Any], dict], str]
+
+
+def _transactions_source(params: Dict[str, Any]) -> ExportSource:
+    params = dict(params)
+    _, filters = transaction_filters(params.pop("tenant_scope", None), **params)
+
+    def build(session: Session):
+        return transaction_rows_query(session, filters).order_by(Payment.created_at.desc(), Payment.id.desc())
+
+    def serialize(row) -> dict:
+        payment, order, user, service = row
+        return {
+            "payment_id": payment.id,
+            "created_at": payment.created_at,
+            "status": payment.status,
+            "method": payment.method,
+            "source": payment.source,
+            "amount_cents": payment.amount,
+            "reference": payment.reference,
+            "transaction_id": payment.transaction_id,
+            "card_brand": payment.card_brand,
+            "order_id": order.id if order else None,
+            "order_status": order.status if order else None,
+            "order_created_at": order.created_at if order else None,
+            "tenant_id": order.tenant_id if order else None,
+            "customer_id": user.id if user else None,
+            "customer_email": user.email if user else None,
+            "customer_first_name": user.first_name if user else None,
+            "customer_last_name": user.last_name if user else None,
+            "customer_phone": user.phone if user else None,
+            "service_name": service.name if service else None,
+            "service_category": service.category if service else None,
+        }
+
+    return build, TRANSACTION_COLUMNS, serialize, "transactions"
+
+
+def _customers_source(params: Dict[str, Any]) -> ExportSource:
+    tenant_id = params["tenant_id"]
+
+    def build(session: Session):
+        query = customer_rows_query(session, tenant_id, search=params.get("search"), role=params.get("role"))
+        return query.order_by(User.id.asc())
+
+    def serialize(row) -> dict:
+        return {col: getattr(row, col) for col in CUSTOMER_COLUMNS}
+
+    return build, CUSTOMER_COLUMNS, serialize, "customers"
+
+
+def _wash_history_source(params: Dict[str, Any]) -> ExportSource:
+    params = dict(params)
+    tenant_id = params.pop("tenant_id")
+
+    def build(session: Session):
+        q, _, _ = history_query(session, **params)
+        return (
+            q.filter(Order.tenant_id == tenant_id)
+            .options(
+                joinedload(Order.user),
+                joinedload(Order.service),
+                selectinload(Order.vehicles).joinedload(OrderVehicle.vehicle),
+            )
+            .order_by(Order.started_at.desc(), Order.id.desc())
+        )
+
+    def serialize(order: Order) -> dict:
+        user = order.user
+        vehicle = order.vehicles[0].vehicle if order.vehicles else None
+        duration = None
+        if order.started_at and order.ended_at:
+            duration = int((order.ended_at - order.started_at).total_seconds())
+        return {
+            "order_id": order.id,
+            "started_at": order.started_at,
+            "ended_at": order.ended_at,
+            "status": "ended" if order.ended_at else "started",
+            "duration_seconds": duration,
+            "customer_first_name": user.first_name if user else None,
+            "customer_last_name": user.last_name if user else None,
+            "customer_phone": user.phone if user else None,
+            "vehicle_reg": vehicle.plate if vehicle else None,
+            "service_name": order.service.name if order.service else None,
+            "amount_cents": order.amount,
+            "payment_pin": order.payment_pin,
+            "tenant_id": order.tenant_id,
+        }
+
+    return build, WASH_HISTORY_COLUMNS, serialize, "wash-history"
+
+
+_SOURCES: Dict[str, Callable[[Dict[str, Any]], ExportSource]] = {
+    "transactions": _transactions_source,
+    "customers": _customers_source,
+    "wash-history": _wash_history_source,
+}
+
+
+def _export_dir() -> str:
+    return settings.export_dir or os.path.join(tempfile.gettempdir(), "smb-exports")
+
+
+def _job_export(payload: Optional[dict]):
+    """Background job: write an export file and return its metadata."""
+    payload = payload or {}
+    build, columns, serialize, base_name = _SOURCES[payload["kind"]](payload.get("params") or {})
+    records = (serialize(row) for row in iter_query(build))
+    result = write_export_file(
+        records,
+        columns,
+        payload.get("format", "csv"),
+        bool(payload.get("gzip")),
+        os.path.join(_export_dir(), payload.get("tenant_id") or "_global"),
+        base_name,
+    )
+    result["tenant_id"] = payload.get("tenant_id")
+    return result
+
+
+try:
+    jobs.register_job("export", _job_export)
+except jobs.JobAlreadyRegistered:  # module re-import (tests / reload)
+    pass
+
+
+def _run_export(
+    kind: str,
+    params: Dict[str, Any],
+    fmt: str,
+    gzip: bool,
+    background: bool,
+    current_user: User,
+    background_tasks: BackgroundTasks,
+):
+    fmt = validate_format(fmt)
+    # Build eagerly so invalid filters surface as 400 before streaming / queueing
+    build, columns, serialize, base_name = _SOURCES[kind](params)
+    if background:
+        rec = jobs.enqueue("export", {
+            "kind": kind,
+            "params": params,
+            "format": fmt,
+            "gzip": gzip,
+            "tenant_id": current_user.tenant_id,
+            "requested_by": current_user.id,
+        })
+        background_tasks.add_task(jobs.run_job_id, rec.id)
+        return JSONResponse(status_code=202, content={
+            "job_id": rec.id,
+            "status": rec.status,
+            "status_url": f"/api/exports/jobs/{rec.id}",
+            "download_url": f"/api/exports/jobs/{rec.id}/download",
+        })
+    records = (serialize(row) for row in iter_query(build))
+    return streaming_export_response(records, columns, fmt, gzip, base_name)
+
+
+@router.get("/transactions")
+def export_transactions(
+    background_tasks: BackgroundTasks,
+    format: str = Query("csv", description="csv or ndjson"),
+    gzip: bool = Query(False, description="gzip-compress the output"),
+    background: bool = Query(False, description="Generate as a background job and return 202"),
+    status: Optional[str] = Query(None),
+    method: Optional[str] = Query(None),
+    source: Optional[str] = Query(None),
+    search: Optional[str] = Query(None),
+    start_date: Optional[str] = Query(None),
+    end_date: Optional[str] = Query(None),
+    min_amount: Optional[int] = Query(None),
+    max_amount: Optional[int] = Query(None),
+    order_id: Optional[int] = Query(None),
+    tenant_id: Optional[str] = Query(None, description="Tenant scope override (superadmin only)"),
+    current_user: User = Depends(require_capability("exports.generate")),
+):
+    """Export payments using the /api/admin/transactions filters."""
+    tenant_scope = current_user.tenant_id
+    if tenant_id and current_user.role in ("superadmin", "developer"):
+        tenant_scope = tenant_id
+    params = {
+        "tenant_scope": tenant_scope,
+        "status": status,
+        "method": method,
+        "source": source,
+        "search": search,
+        "start_date": start_date,
+        "end_date": end_date,
+        "min_amount": min_amount,
+        "max_amount": max_amount,
+        "order_id": order_id,
+    }
+    return _run_export("transactions", params, format, gzip, background, current_user, background_tasks)
+
+
+@router.get("/customers")
+def export_customers(
+    background_tasks: BackgroundTasks,
+    format: str = Query("csv", description="csv or ndjson"),
+    gzip: bool = Query(False, description="gzip-compress the output"),
+    background: bool = Query(False, description="Generate as a background job and return 202"),
+    search: Optional[str] = Query(None),
+    role: Optional[str] = Query(None),
+    current_user: User = Depends(require_capability("exports.generate")),
+):
+    """Export customers with aggregates using the /api/customers filters."""
+    params = {"tenant_id": current_user.tenant_id, "search": search, "role": role}
+    return _run_export("customers", params, format, gzip, background, current_user, background_tasks)
+
+
+@router.get("/wash-history")
+def export_wash_history(
+    background_tasks: BackgroundTasks,
+    format: str = Query("csv", description="csv or ndjson"),
+    gzip: bool = Query(False, description="gzip-compress the output"),
+    background: bool = Query(False, description="Generate as a background job and return 202"),
+    start_date: Optional[str] = Query(None, description="YYYY-MM-DD (defaults to today)"),
+    end_date: Optional[str] = Query(None, description="YYYY-MM-DD inclusive"),
+    status: Optional[str] = Query(None, description="started|ended"),
+    paymentType: Optional[str] = Query(None, description="paid|loyalty"),
+    customer: Optional[str] = Query(None),
+    current_user: User = Depends(require_capability("exports.generate")),
+):
+    """Export wash history using the /api/payments/history filters."""
+    params = {
+        "tenant_id": current_user.tenant_id,
+        "start_date": start_date,
+        "end_date": end_date,
+        "status": status,
+        "paymentType": paymentType,
+        "customer": customer,
+    }
+    return _run_export("wash-history", params, format, gzip, background, current_user, background_tasks)
+
+
+def _owned_export_job(job_id: str, current_user: User) -> jobs.JobRecord:
+    rec = jobs.get_job(job_id)
+    if not rec or rec.name != "export":
+        raise HTTPException(status_code=404, detail="Export job not found")
+    owner_tenant = (rec.payload or {}).get("tenant_id")
+    if owner_tenant != current_user.tenant_id and current_user.role != "superadmin":
+        raise HTTPException(status_code=404, detail="Export job not found")
+    return rec
+
+
+@router.get("/jobs/{job_id}")
+def export_job_status(job_id: str, current_user: User = Depends(require_capability("exports.generate"))):
+    rec = _owned_export_job(job_id, current_user)
+    result = rec.result if isinstance(rec.result, dict) else {}
+    return {
+        "job_id": rec.id,
+        "status": rec.status,
+        "kind": (rec.payload or {}).get("kind"),
+        "rows": result.get("rows"),
+        "bytes": result.get("bytes"),
+        "filename": result.get("filename"),
+        "error": rec.error,
+    }
+
+
+@router.get("/jobs/{job_id}/download")
+def export_job_download(job_id: str, current_user: User = Depends(require_capability("exports.generate"))):
+    rec = _owned_export_job(job_id, current_user)
+    if rec.status != "success" or not isinstance(rec.result, dict):
+        raise HTTPException(status_code=409, detail=f"Export not ready (status={rec.status})")
+    path = rec.result.get("path")
+    if not path or not os.path.exists(path):
+        raise HTTPException(status_code=410, detail="Export file no longer available")
+    return FileResponse(path, media_type=rec.result.get("media_type"), filename=rec.result.get("filename"))
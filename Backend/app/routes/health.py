@@ -14,6 +14,26 @@ from config import settings
 from typing import Optional
 
 PROCESS_START = datetime.utcnow()
+# Set when DEFER_ROUTERS is on and the background router import fails; readiness
+# then reports 503 instead of a healthy process whose API routes all 404.
+_router_load_error: Optional[str] = None
+
+
+def mark_router_load_failed(error: Optional[str]) -> None:
+    global _router_load_error
+    _router_load_error = error
+
+
+def router_load_error() -> Optional[str]:
+    return _router_load_error
+
+
+def _require_routers_loaded() -> None:
+    if _router_load_error:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Service not ready: router load failed: {_router_load_error}",
+        )
 
 router = APIRouter(prefix="/health", tags=["health"])
 
@@ -153,7 +173,9 @@ async def readiness_check_lite() -> Dict[str, Any]:
     Returns 200 immediately – suitable for container platform readiness/liveness
     probes to avoid cascading startup failures if the DB is momentarily
     unavailable (the fuller /health/ready will still check deeper dependencies).
+    Returns 503 if deferred routers failed to load.
     """
+    _require_routers_loaded()
     return {
         "status": "ready",
         "mode": "lite",
@@ -176,9 +198,11 @@ async def readiness_check(
       HEALTH_READY_CACHE_TTL=seconds (default 5) -> Cache successful deep result briefly to reduce load.
 
     Recommended: platform probes use /health/ready-lite; this endpoint is for diagnostics.
-    Returns 503 if a hard dependency is down (unless skip flag set).
+    Returns 503 if a hard dependency is down (unless skip flag set) or if
+    deferred routers failed to load.
     """
     global _READY_CACHE, _READY_CACHE_EXP
+    _require_routers_loaded()
     now = datetime.utcnow()
     cache_ttl = int(os.getenv("HEALTH_READY_CACHE_TTL", "5") or 5)
     skip_deep = os.getenv("HEALTH_READY_SKIP_DEEP", "0") == "1"
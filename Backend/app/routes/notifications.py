@@ -1,12 +1,14 @@
 """
 Notification system API endpoints.
 """
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Body, Query
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Body, Query, Response
 from sqlalchemy.orm import Session
 from sqlalchemy import func, case
 from typing import List, Optional, Dict, Any
 from app.plugins.auth.routes import get_current_user
+from app.core.conditional import conditional_get
 from app.core.database import get_db
+from app.core.pagination import decode_cursor, keyset_after, keyset_order, next_cursor_for
 from app.models import User, Tenant, Notification
 from pydantic import BaseModel
 from datetime import datetime, timedelta
@@ -179,7 +181,7 @@ async def mark_all_notifications_read(
     
     return {"status": "success"}
 
-@router.get("/unread-count")
+@router.get("/unread-count", dependencies=[Depends(conditional_get("notifications"))])
 async def get_unread_count(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
@@ -241,16 +243,20 @@ async def delete_notification(
 # Admin endpoints for managing notifications
 @router.get("/admin")
 async def get_admin_notifications(
+    response: Response,
     limit: int = Query(100, ge=1, le=500),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None),
     notification_type: Optional[str] = None,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """Backward-compatible alias returning all notifications for the tenant."""
     return await get_all_notifications(
+        response=response,
         limit=limit,
         offset=offset,
+        cursor=cursor,
         notification_type=notification_type,
         current_user=current_user,
         db=db,
@@ -259,13 +265,18 @@ async def get_admin_notifications(
 
 @router.get("/admin/all")
 async def get_all_notifications(
+    response: Response,
     limit: int = Query(100, ge=1, le=500),
     offset: int = Query(0, ge=0),
+    cursor: Optional[str] = Query(None, description="Keyset cursor from X-Next-Cursor (overrides offset)"),
     notification_type: Optional[str] = None,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    """Get all notifications for the tenant (admin only)"""
+    """Get all notifications for the tenant (admin only).
+
+    Newest first; the next-page cursor is returned in the X-Next-Cursor header.
+    """
     if current_user.role != "admin":
         raise HTTPException(status_code=403, detail="Admin access required")
     
@@ -276,7 +287,18 @@ async def get_all_notifications(
     if notification_type:
         query = query.filter(Notification.type == notification_type)
     
-    notifications = query.order_by(Notification.created_at.desc()).offset(offset).limit(limit).all()
+    query = query.order_by(*keyset_order(Notification.created_at, Notification.id, descending=True))
+    if cursor:
+        last_created, last_id = decode_cursor(cursor, "created_at", True)
+        query = query.filter(
+            keyset_after(Notification.created_at, Notification.id, last_created, last_id, descending=True)
+        )
+    else:
+        query = query.offset(offset)
+    notifications = query.limit(limit).all()
+    next_cursor = next_cursor_for(notifications, limit, "created_at", True, lambda n: (n.created_at, n.id))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     
     # Include user information
     result = []
@@ -5,6 +5,7 @@ from fastapi import APIRouter, Depends, HTTPException, Body, UploadFile, File, Q
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from app.plugins.auth.routes import get_current_user
+from app.core.conditional import conditional_get
 from app.core.database import get_db
 from app.models import User, Vehicle, PointBalance, VisitCount, Order, Redemption
 from pydantic import BaseModel, EmailStr
@@ -343,7 +344,11 @@ async def get_my_redemptions(
         "redemptions": redemption_list
     }
 
-@router.get("/me/loyalty-summary")
+# Day bucket: the body includes a rolling 30-day window
+@router.get(
+    "/me/loyalty-summary",
+    dependencies=[Depends(conditional_get("points", "visits", "orders", "redemptions", "rewards", bucket_seconds=86400))],
+)
 async def get_my_loyalty_summary(
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
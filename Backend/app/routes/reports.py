@@ -5,7 +5,10 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from typing import Dict, Any, List
 from app.plugins.auth.routes import get_current_user
-from app.core.database import get_db
+from app.core.database import get_read_db
+from app.core.db_telemetry import statement_timeout
+from app.core.first_visits import first_visit_since
+from app.analytics import report_cache, segmentation
 from app.models import (User, Order, Payment, Redemption, Tenant, Service,
                         Reward, PointBalance)
 from sqlalchemy import func, desc, and_, text
@@ -13,7 +16,7 @@ from datetime import date, datetime, timedelta
 import calendar
 from config import settings
 
-router = APIRouter()
+router = APIRouter(dependencies=[Depends(statement_timeout(settings.reporting_statement_timeout_ms))])
 
 ALLOWED_ROLES = {"admin", "staff", "superadmin", "developer"}
 
@@ -74,19 +77,28 @@ def resolve_date_range(days: int | None = None, period: str | None = None):
 
     return get_date_range(period or "30d")
 
+
 @router.get("/summary")
 @router.get("/business-summary")
 async def get_business_summary(
     days: int = Query(30, ge=1, le=365),
     tenant_id: str | None = Query(None, description="Tenant scope override (superadmin/developer only)"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
-    """Return consolidated business metrics for admin dashboards."""
+    """Return consolidated business metrics for admin dashboards.
+
+    Standard windows (7/30/90/365 days) are served from the report cache.
+    """
 
     _ensure_reporting_access(current_user)
 
     tenant_scope = _resolve_tenant_scope(current_user, tenant_id)
+    return report_cache.get_or_build(db, tenant_scope, "business_summary", days)
+
+
+@report_cache.register("business_summary")
+def _business_summary(db: Session, tenant_scope: str, days: int) -> Dict[str, Any]:
     start_date, end_date = resolve_date_range(days=days)
 
     revenue_results = (
@@ -162,6 +174,12 @@ async def get_business_summary(
     total_revenue_cents = int(revenue_results.total_revenue or 0)
     total_orders = int(revenue_results.order_count or 0)
     active_customers = int(revenue_results.active_customers or 0)
+    new_customers = (
+        first_visit_since(db, start_date, end_date, tenant_id=tenant_scope)
+        .with_entities(func.count())
+        .scalar()
+        or 0
+    )
     total_revenue = total_revenue_cents / 100.0
     avg_order_value = (total_revenue / total_orders) if total_orders else 0
 
@@ -170,6 +188,7 @@ async def get_business_summary(
         "total_orders": total_orders,
         "total_customers": total_customers,
         "active_customers": active_customers,
+        "new_customers": int(new_customers),
         "avg_order_value": round(avg_order_value, 2),
         "loyalty_points_issued": int(points_issued),
         "loyalty_points_redeemed": int(loyalty_results.points_redeemed or 0),
@@ -181,19 +200,25 @@ async def get_business_summary(
         else None,
     }
 
+
 @router.get("/revenue-chart")
 async def get_revenue_chart(
     days: int = Query(30, ge=1, le=365),
     group_by: str = Query("day", regex="^(day|week|month)$"),
     tenant_id: str | None = Query(None, description="Tenant scope override (superadmin/developer only)"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     """Get revenue data for charts grouped by time period."""
 
     _ensure_reporting_access(current_user)
 
     tenant_scope = _resolve_tenant_scope(current_user, tenant_id)
+    return report_cache.get_or_build(db, tenant_scope, "revenue_chart", days, group_by=group_by)
+
+
+@report_cache.register("revenue_chart", group_by="day")
+def _revenue_chart(db: Session, tenant_scope: str, days: int, group_by: str = "day") -> List[Dict[str, Any]]:
     start_date, end_date = resolve_date_range(days=days)
 
     # SQL date format and grouping based on group_by parameter
@@ -247,19 +272,25 @@ async def get_revenue_chart(
 
     return chart_data
 
+
 @router.get("/top-services")
 async def get_top_services(
     days: int = Query(30, ge=1, le=365),
     limit: int = Query(10, ge=1, le=50),
     tenant_id: str | None = Query(None, description="Tenant scope override (superadmin/developer only)"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     """Return top performing services within the requested window."""
 
     _ensure_reporting_access(current_user)
 
     tenant_scope = _resolve_tenant_scope(current_user, tenant_id)
+    return report_cache.get_or_build(db, tenant_scope, "top_services", days, limit=limit)
+
+
+@report_cache.register("top_services", limit=10)
+def _top_services(db: Session, tenant_scope: str, days: int, limit: int = 10) -> List[Dict[str, Any]]:
     start_date, end_date = resolve_date_range(days=days)
 
     top_services = (
@@ -291,18 +322,24 @@ async def get_top_services(
         for service in top_services
     ]
 
+
 @router.get("/loyalty-stats")
 async def get_loyalty_stats(
     days: int = Query(30, ge=1, le=365),
     tenant_id: str | None = Query(None, description="Tenant scope override (superadmin/developer only)"),
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
 ):
     """Return loyalty program KPIs for the dashboard."""
 
     _ensure_reporting_access(current_user)
 
     tenant_scope = _resolve_tenant_scope(current_user, tenant_id)
+    return report_cache.get_or_build(db, tenant_scope, "loyalty_stats", days)
+
+
+@report_cache.register("loyalty_stats")
+def _loyalty_stats(db: Session, tenant_scope: str, days: int) -> Dict[str, Any]:
     start_date, end_date = resolve_date_range(days=days)
 
     tenant = db.query(Tenant).filter(Tenant.id == tenant_scope).first()
@@ -384,22 +421,8 @@ async def get_loyalty_stats(
         "redemption_rate": round(redemption_rate, 4),
     }
 
-@router.get("/customer-segmentation")
-@router.get("/customer-segments")
-async def get_customer_segments(
-    days: int = Query(180, ge=1, le=365),
-    tenant_id: str | None = Query(None, description="Tenant scope override (superadmin/developer only)"),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
-):
-    """Return customer segmentation buckets for the dashboard."""
-
-    _ensure_reporting_access(current_user)
-
-    tenant_scope = _resolve_tenant_scope(current_user, tenant_id)
-    start_date, end_date = resolve_date_range(days=days)
-
-    segments = db.execute(
+def _live_customer_segments(db: Session, tenant_scope: str, start_date, end_date):
+    return db.execute(
         text(
             """
         WITH customer_stats AS (
@@ -440,6 +463,31 @@ async def get_customer_segments(
         },
     ).fetchall()
 
+
+@router.get("/customer-segmentation")
+@router.get("/customer-segments")
+async def get_customer_segments(
+    days: int = Query(180, ge=1, le=365),
+    tenant_id: str | None = Query(None, description="Tenant scope override (superadmin/developer only)"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_read_db),
+):
+    """Return customer segmentation buckets for the dashboard.
+
+    The default window is served from the buckets stored by the segmentation
+    refresh (``app.analytics.segmentation``); other windows, or a missing /
+    stale snapshot, run the live query.
+    """
+
+    _ensure_reporting_access(current_user)
+
+    tenant_scope = _resolve_tenant_scope(current_user, tenant_id)
+    start_date, end_date = resolve_date_range(days=days)
+
+    segments = segmentation.stored_value_segments(db, tenant_scope, days)
+    if segments is None:
+        segments = _live_customer_segments(db, tenant_scope, start_date, end_date)
+
     total_customers = sum(row[1] for row in segments)
 
     response: List[Dict[str, Any]] = []
@@ -0,0 +1,64 @@
+"""Unified staff search across users and vehicles.
+
+GET /api/search?q=...&types=user,vehicle returns ranked hits backed by the
+search index in ``app.core.search``. Results are scoped to the caller's
+tenant; superadmins may pass ``tenant_id`` (or omit it to search globally).
+"""
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app.core import search as search_index
+from app.core.database import get_db
+from app.models import User, Vehicle
+from app.plugins.auth.routes import get_current_user, require_staff
+
+router = APIRouter(prefix="/search", tags=["search"], dependencies=[Depends(require_staff)])
+
+
+def _user_summary(u: User) -> dict:
+    return {"id": u.id, "first_name": u.first_name, "last_name": u.last_name, "phone": u.phone, "email": u.email}
+
+
+@router.get("")
+def unified_search(
+    q: str = Query(..., min_length=1, max_length=100),
+    types: str = Query("user,vehicle", description="Comma separated entity types: user, vehicle"),
+    limit: int = Query(20, ge=1, le=100),
+    tenant_id: Optional[str] = Query(None, description="Tenant override (superadmin only)"),
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    entity_types = tuple(t.strip() for t in types.split(",") if t.strip())
+    unknown = [t for t in entity_types if t not in search_index.ENTITY_TYPES]
+    if not entity_types or unknown:
+        raise HTTPException(status_code=400, detail=f"Unsupported search types: {', '.join(unknown) or types}")
+    scope = current_user.tenant_id
+    if current_user.role == "superadmin":
+        scope = tenant_id
+
+    hits = search_index.search(db, q, entity_types=entity_types, tenant_id=scope, limit=limit)
+    user_ids = [h.entity_id for h in hits if h.entity_type == "user"]
+    vehicle_ids = [h.entity_id for h in hits if h.entity_type == "vehicle"]
+    vehicles = {v.id: v for v in db.query(Vehicle).filter(Vehicle.id.in_(vehicle_ids)).all()} if vehicle_ids else {}
+    owner_ids = set(user_ids) | {v.user_id for v in vehicles.values()}
+    users = {u.id: u for u in db.query(User).filter(User.id.in_(owner_ids)).all()} if owner_ids else {}
+
+    results = []
+    for h in hits:
+        if h.entity_type == "user" and h.entity_id in users:
+            results.append({"type": "user", "score": round(h.score, 4), **_user_summary(users[h.entity_id])})
+        elif h.entity_type == "vehicle" and h.entity_id in vehicles:
+            v = vehicles[h.entity_id]
+            owner = users.get(v.user_id)
+            results.append({
+                "type": "vehicle",
+                "score": round(h.score, 4),
+                "id": v.id,
+                "plate": v.plate,
+                "make": v.make,
+                "model": v.model,
+                "user": _user_summary(owner) if owner else None,
+            })
+    return {"query": q, "results": results}
@@ -0,0 +1,211 @@
+"""Background processing of uploaded branding assets.
+
+``upload_branding_asset`` only validates and stores the original (named by
+content hash, so re-uploading the same file is a no-op write) and enqueues
+the ``branding_asset_variants`` job, which runs on a background thread and:
+
+- resizes raster logos / app icons to ``VARIANT_SIZES`` in the original
+  format plus WebP and AVIF (when Pillow was built with AVIF support),
+- derives a multi-size ``.ico`` for favicons / app icons,
+- writes ``.svg.gz`` (and ``.svg.br`` when ``brotli`` is installed) next to
+  SVG uploads for precompressed serving,
+
+then records what it produced in ``assets.json`` in the tenant's branding
+directory. The public tenant manifest reads icon sizes from that file instead
+of scanning the directory.
+"""
+from __future__ import annotations
+
+import gzip
+import io
+import json
+import logging
+import os
+import pathlib
+import threading
+from typing import Optional
+
+from app.core import jobs
+from config import settings
+
+logger = logging.getLogger("api")
+
+VARIANT_SIZES = (64, 128, 256, 512)
+RESIZED_FIELDS = {"logo_light", "logo_dark", "app_icon"}
+ICO_FIELDS = {"favicon", "app_icon"}
+ICO_SIZES = [(16, 16), (32, 32), (48, 48)]
+MANIFEST_NAME = "assets.json"
+JOB_NAME = "branding_asset_variants"
+
+_manifest_lock = threading.Lock()
+
+
+def asset_dir(tenant_id: str) -> pathlib.Path:
+    return pathlib.Path(settings.static_dir or "static") / "branding" / tenant_id
+
+
+def asset_url(tenant_id: str, name: str) -> str:
+    return f"/static/branding/{tenant_id}/{name}"
+
+
+def read_manifest(tenant_id: str) -> dict:
+    """Processed assets keyed by base name (``{field}-{digest}``); {} if none yet."""
+    try:
+        with open(asset_dir(tenant_id) / MANIFEST_NAME) as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return {}
+
+
+def _record(d: pathlib.Path, base_name: str, entry: dict) -> None:
+    path = d / MANIFEST_NAME
+    with _manifest_lock:
+        try:
+            manifest = json.loads(path.read_text())
+        except (OSError, ValueError):
+            manifest = {}
+        manifest[base_name] = entry
+        tmp = path.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(manifest, sort_keys=True))
+        os.replace(tmp, path)
+
+
+def store_original(tenant_id: str, base_name: str, ext: str, raw: bytes) -> str:
+    """Write the uploaded bytes unless an identical file is already stored."""
+    d = asset_dir(tenant_id)
+    d.mkdir(parents=True, exist_ok=True)
+    name = f"{base_name}{ext}"
+    if not (d / name).exists():
+        tmp = d / f".{name}.tmp"
+        tmp.write_bytes(raw)
+        os.replace(tmp, d / name)
+    return asset_url(tenant_id, name)
+
+
+def _avif_supported() -> bool:
+    try:
+        from PIL import features
+        return bool(features.check("avif"))
+    except Exception:
+        return False
+
+
+def _raster_variants(d: pathlib.Path, tenant_id: str, field: str, base_name: str, ext: str, raw: bytes) -> dict:
+    from PIL import Image
+
+    try:
+        img = Image.open(io.BytesIO(raw))
+        img.load()
+    except Exception:
+        # Passed the magic-byte check but does not decode; keep the original only
+        logger.warning("branding asset not decodable", extra={"tenant_id": tenant_id, "asset": base_name})
+        return {}
+    formats = [(ext.lstrip("."), None), ("webp", "WEBP")]
+    if _avif_supported():
+        formats.append(("avif", "AVIF"))
+    out: dict = {}
+    if field in RESIZED_FIELDS:
+        for size in VARIANT_SIZES:
+            resized = img.copy()
+            resized.thumbnail((size, size))
+            urls = {}
+            for suffix, fmt in formats:
+                name = f"{base_name}-{size}.{suffix}"
+                try:
+                    resized.save(d / name, format=fmt)
+                except Exception:
+                    continue
+                urls[suffix] = asset_url(tenant_id, name)
+            out[str(size)] = urls
+        for suffix, fmt in formats[1:]:  # full-size modern encodings
+            name = f"{base_name}.{suffix}"
+            try:
+                img.save(d / name, format=fmt)
+                out[suffix] = asset_url(tenant_id, name)
+            except Exception:
+                continue
+    if field in ICO_FIELDS:
+        name = f"{base_name}.ico"
+        try:
+            img.save(d / name, sizes=ICO_SIZES)
+            out["ico"] = asset_url(tenant_id, name)
+        except Exception:
+            pass
+    return out
+
+
+def _svg_encodings(d: pathlib.Path, tenant_id: str, base_name: str, raw: bytes) -> dict:
+    out = {}
+    (d / f"{base_name}.svg.gz").write_bytes(gzip.compress(raw, compresslevel=9, mtime=0))
+    out["gzip"] = asset_url(tenant_id, f"{base_name}.svg.gz")
+    try:
+        import brotli  # optional
+    except ImportError:
+        return out
+    (d / f"{base_name}.svg.br").write_bytes(brotli.compress(raw))
+    out["br"] = asset_url(tenant_id, f"{base_name}.svg.br")
+    return out
+
+
+def process_asset(payload: Optional[dict]) -> dict:
+    """Job body: build variants for one stored original and record them."""
+    tenant_id, field = payload["tenant_id"], payload["field"]
+    base_name, ext, content_type = payload["base_name"], payload["ext"], payload["content_type"]
+    # Directory resolved at upload time so a later STATIC_DIR change cannot split an asset
+    d = pathlib.Path(payload["directory"])
+    raw = (d / f"{base_name}{ext}").read_bytes()
+    entry = {
+        "field": field,
+        "content_type": content_type,
+        "original": asset_url(tenant_id, f"{base_name}{ext}"),
+        "variants": {},
+        "encodings": {},
+    }
+    if content_type in {"image/png", "image/jpeg"}:
+        entry["variants"] = _raster_variants(d, tenant_id, field, base_name, ext, raw)
+    elif content_type == "image/svg+xml":
+        entry["encodings"] = _svg_encodings(d, tenant_id, base_name, raw)
+    _record(d, base_name, entry)
+    # New sizes change the public manifest's icon list
+    from app.core import tenant_documents  # tenant_documents imports this module
+    tenant_documents.invalidate(tenant_id)
+    return {"ok": True, "asset": base_name, "variants": sorted(entry["variants"]), "encodings": sorted(entry["encodings"])}
+
+
+def schedule(tenant_id: str, field: str, base_name: str, ext: str, content_type: str) -> Optional[str]:
+    """Enqueue variant generation and run it off the request thread; returns the job id.
+
+    Returns None when this asset was already processed (deduplicated upload).
+    """
+    if base_name in read_manifest(tenant_id):
+        return None
+    rec = jobs.enqueue(JOB_NAME, {
+        "tenant_id": tenant_id, "field": field, "base_name": base_name, "ext": ext, "content_type": content_type,
+        "directory": str(asset_dir(tenant_id)),
+    })
+    threading.Thread(target=jobs.run_job_id, args=(rec.id,), name=f"branding-{base_name}", daemon=True).start()
+    return rec.id
+
+
+def manifest_icons(tenant_id: str, branding, sizes=VARIANT_SIZES, fields=("logo_light", "app_icon")) -> list[dict]:
+    """Web-manifest icon entries for the tenant's current logo / app icon."""
+    manifest = read_manifest(tenant_id)
+    icons = []
+    for size in sizes:
+        for field in fields:
+            url = getattr(branding, f"{field}_url", None) if branding is not None else None
+            base_name = os.path.splitext(url.rsplit("/", 1)[-1])[0] if url else None
+            urls = (manifest.get(base_name) or {}).get("variants", {}).get(str(size)) if base_name else None
+            if not urls:
+                continue
+            for suffix, mime in (("png", "image/png"), ("jpg", "image/jpeg"), ("webp", "image/webp"), ("avif", "image/avif")):
+                if suffix in urls:
+                    icons.append({"src": urls[suffix], "sizes": f"{size}x{size}", "type": mime})
+            break  # prefer the first field with this size
+    return icons
+
+
+try:
+    jobs.register_job(JOB_NAME, process_asset)
+except Exception:
+    pass
@@ -0,0 +1,151 @@
+"""Batch order ingestion for POS and offline bay devices.
+
+Bay tablets replay orders queued while offline; ``/api/orders/create`` costs
+each of them a service query, a query per extra, a ``generate_payment_pin``
+loop, two commits and a vehicle lookup. ``ingest_orders`` takes the whole
+batch instead:
+
+- items are validated against the catalog snapshot (``catalog_cache``);
+- a device-supplied ``client_key`` per item makes replays idempotent: keys
+  already stored for the tenant (``uq_orders_tenant_client_key``) return the
+  existing order as ``duplicate``, repeated keys inside a batch collapse onto
+  the first occurrence;
+- payment PINs are drawn in one go from the free 4-digit space (one query
+  for the PINs in use);
+- orders and their default ``OrderVehicle`` links are inserted in one flush
+  and one commit. A unique violation (a concurrent replay or PIN race)
+  rolls back and retries the batch.
+
+Results come back per item, in request order; invalid items do not fail the
+batch.
+"""
+from __future__ import annotations
+
+import random
+from typing import Optional, Sequence
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, selectinload
+
+from app.core import catalog_cache
+from app.models import Order, OrderVehicle, User, Vehicle
+
+MAX_ATTEMPTS = 3
+PIN_SPACE = tuple(str(n) for n in range(1000, 10000))
+
+
+def allocate_pins(db: Session, count: int) -> list[str]:
+    """Up to ``count`` distinct unused payment PINs (fewer when the space runs out)."""
+    used = {pin for (pin,) in db.query(Order.payment_pin).filter(Order.payment_pin.isnot(None))}
+    free = [pin for pin in PIN_SPACE if pin not in used]
+    return random.sample(free, min(count, len(free)))
+
+
+def _validate(catalog: catalog_cache.CatalogSnapshot, item) -> Optional[str]:
+    if catalog.service(item.service_id) is None:
+        return f"Service {item.service_id} not found"
+    for e in item.extras:
+        if catalog.extra(e.id) is None:
+            return f"Invalid extra id {e.id}"
+    return None
+
+
+def _result(
+    client_key: str,
+    status: str,
+    order: Optional[Order] = None,
+    vehicle_id: Optional[int] = None,
+    error: Optional[str] = None,
+) -> dict:
+    return {
+        "client_key": client_key,
+        "status": status,
+        "order_id": str(order.id) if order is not None else None,
+        "payment_pin": order.payment_pin if order is not None else None,
+        "default_vehicle_id": vehicle_id,
+        "error": error,
+    }
+
+
+def _insert(db: Session, user: User, pending: dict) -> dict[str, dict]:
+    """Insert the not-yet-stored items of ``pending`` (client_key -> item)."""
+    out: dict[str, dict] = {}
+    existing = (
+        db.query(Order)
+        .options(selectinload(Order.vehicles))
+        .filter(Order.tenant_id == user.tenant_id, Order.client_key.in_(list(pending)))
+        .all()
+    )
+    for order in existing:
+        if order.user_id == user.id:
+            vehicle_id = order.vehicles[0].vehicle_id if order.vehicles else None
+            out[order.client_key] = _result(order.client_key, "duplicate", order, vehicle_id)
+        else:
+            out[order.client_key] = _result(order.client_key, "invalid", error="client_key already used")
+
+    new_keys = [key for key in pending if key not in out]
+    if not new_keys:
+        return out
+    pins = allocate_pins(db, len(new_keys))
+    vehicle_ids = [v for (v,) in db.query(Vehicle.id).filter_by(user_id=user.id).limit(2)]
+    # Same rule as create_order: auto-assign only when the user has exactly one vehicle
+    default_vehicle_id = vehicle_ids[0] if len(vehicle_ids) == 1 else None
+
+    created = []
+    for key, pin in zip(new_keys, pins):
+        item = pending[key]
+        order = Order(
+            service_id=item.service_id,
+            quantity=item.quantity,
+            extras=[{"id": e.id, "quantity": e.quantity} for e in item.extras],
+            payment_pin=pin,
+            user_id=user.id,
+            tenant_id=user.tenant_id,
+            client_key=key,
+        )
+        if default_vehicle_id is not None:
+            order.vehicles.append(OrderVehicle(vehicle_id=default_vehicle_id))
+        created.append(order)
+    db.add_all(created)
+    db.flush()  # ids via RETURNING; results are read before commit expires the rows
+    for order in created:
+        out[order.client_key] = _result(order.client_key, "created", order, default_vehicle_id)
+    db.commit()
+    for key in new_keys[len(pins):]:
+        out[key] = _result(key, "invalid", error="No free payment pin")
+    return out
+
+
+def ingest_orders(db: Session, user: User, items: Sequence) -> list[dict]:
+    """Create ``items`` (``OrderBatchItem``) for ``user``; one result per item."""
+    catalog = catalog_cache.get_catalog(db, user.tenant_id)
+    results: list[Optional[dict]] = [None] * len(items)
+    pending: dict = {}
+    for i, item in enumerate(items):
+        error = _validate(catalog, item)
+        if error is not None:
+            results[i] = _result(item.client_key, "invalid", error=error)
+        elif item.client_key not in pending:
+            pending[item.client_key] = item
+
+    stored: dict[str, dict] = {}
+    if pending:
+        for attempt in range(MAX_ATTEMPTS):
+            try:
+                stored = _insert(db, user, pending)
+                break
+            except IntegrityError:
+                db.rollback()
+                if attempt == MAX_ATTEMPTS - 1:
+                    raise
+
+    first_seen: set[str] = set()
+    for i, item in enumerate(items):
+        if results[i] is not None:
+            continue
+        result = dict(stored[item.client_key])
+        if item.client_key in first_seen and result["status"] == "created":
+            result["status"] = "duplicate"  # repeated inside this batch
+        first_seen.add(item.client_key)
+        results[i] = result
+    return results
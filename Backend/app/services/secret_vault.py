@@ -3,13 +3,28 @@
 The implementation is intentionally defensive: Azure SDK imports are optional so
 that local development (and CI) can run without cloud credentials. Secrets may
 also be provided via environment variables prefixed with ``TENANT_SECRET_``.
+
+Key Vault reads are cached per (name, version) for ``SECRET_CACHE_TTL_SECONDS``.
+A hit past ``SECRET_CACHE_REFRESH_RATIO`` of the TTL is served from cache while
+a background refresh runs, so hot secrets never block on Key Vault. Pinned
+versions are immutable and cached until invalidated. When Key Vault errors, an
+expired value is served for up to ``SECRET_CACHE_MAX_STALE_SECONDS``.
+``invalidate`` bumps a generation counter so refreshes already in flight cannot
+write back a value fetched before the invalidation; rotations are broadcast to
+other workers on the ``secrets`` invalidation namespace.
 """
 from __future__ import annotations
 
 import logging
 import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 from dataclasses import dataclass
-from typing import Optional
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from app.core import invalidation
+from config import settings
 
 try:  # pragma: no cover - optional dependency
     from azure.keyvault.secrets import SecretClient  # type: ignore
@@ -20,6 +35,8 @@ except Exception:  # pragma: no cover - optional dependency
 
 _LOG = logging.getLogger("secret_vault")
 
+_CacheKey = Tuple[str, str]
+
 
 @dataclass
 class SecretDescriptor:
@@ -30,19 +47,44 @@ class SecretDescriptor:
     fallback: Optional[str] = None
 
 
+@dataclass(frozen=True)
+class _CacheEntry:
+    value: Optional[str]
+    fetched_at: float
+
+
 class SecretVaultClient:
     """Resolve secrets from Azure Key Vault with environment fallbacks."""
 
-    def __init__(self, vault_url: Optional[str] = None) -> None:
+    def __init__(
+        self,
+        vault_url: Optional[str] = None,
+        *,
+        client: Any = None,
+        ttl_seconds: float = 300.0,
+        refresh_ratio: float = 0.8,
+        max_stale_seconds: float = 86400.0,
+        max_workers: int = 4,
+    ) -> None:
         self._vault_url = vault_url or os.getenv("AZURE_KEY_VAULT_URL") or os.getenv("KEY_VAULT_URL")
-        self._client: Optional[SecretClient] = None
-        if self._vault_url and SecretClient and DefaultAzureCredential:  # pragma: no branch - depends on SDK
+        self._client: Optional[SecretClient] = client
+        if self._client is None and self._vault_url and SecretClient and DefaultAzureCredential:  # pragma: no branch - depends on SDK
             try:
                 credential = DefaultAzureCredential()
                 self._client = SecretClient(vault_url=self._vault_url, credential=credential)
             except Exception as exc:  # pragma: no cover - network / azure unavailable in tests
                 _LOG.warning("Key Vault client initialisation failed: %s", exc)
                 self._client = None
+        self._ttl = ttl_seconds
+        self._refresh_after = ttl_seconds * refresh_ratio
+        self._max_stale = max_stale_seconds
+        self._max_workers = max_workers
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._cache: Dict[_CacheKey, _CacheEntry] = {}
+        self._refreshing: Dict[_CacheKey, Future] = {}
+        self._generation = 0
+        self.stats = {"hits": 0, "misses": 0, "refreshes": 0, "stale_served": 0, "errors": 0, "prefetched": 0}
 
     def _env_override(self, descriptor: SecretDescriptor) -> Optional[str]:
         if not descriptor.vault_name:
@@ -61,15 +103,102 @@ class SecretVaultClient:
             return env_override
 
         if descriptor.vault_name and self._client:
-            try:
-                secret = self._client.get_secret(descriptor.vault_name, version=descriptor.version)
-                if secret and secret.value:
-                    return secret.value
-            except Exception as exc:  # pragma: no cover - azure not available in CI
-                _LOG.warning("Key Vault get_secret failed for %s: %s", descriptor.vault_name, exc)
+            value = self._cached(descriptor.vault_name, descriptor.version)
+            if value:
+                return value
 
         return descriptor.fallback
 
+    def prefetch(self, descriptors: Iterable[SecretDescriptor]) -> int:
+        """Load every uncached Key Vault secret in ``descriptors`` concurrently.
+
+        Returns the number of secrets fetched; env overrides and fresh entries
+        are skipped.
+        """
+
+        if not self._client:
+            return 0
+        now = time.monotonic()
+        keys = set()
+        with self._lock:
+            for descriptor in descriptors:
+                if not descriptor.vault_name or self._env_override(descriptor):
+                    continue
+                key = (descriptor.vault_name, descriptor.version or "")
+                entry = self._cache.get(key)
+                if entry is None or not self._fresh(key, entry, now):
+                    keys.add(key)
+            generation = self._generation
+        if not keys:
+            return 0
+        futures = [self._pool().submit(self._load, key, generation) for key in keys]
+        wait(futures)
+        with self._lock:
+            self.stats["prefetched"] += len(keys)
+        return len(keys)
+
+    def invalidate(self, vault_name: Optional[str] = None) -> None:
+        """Drop cached values (all, or every version of ``vault_name``)."""
+
+        with self._lock:
+            self._generation += 1
+            if vault_name is None:
+                self._cache.clear()
+            else:
+                for key in [k for k in self._cache if k[0] == vault_name]:
+                    del self._cache[key]
+
+    def _fresh(self, key: _CacheKey, entry: _CacheEntry, now: float) -> bool:
+        return bool(key[1]) or now - entry.fetched_at < self._ttl
+
+    def _cached(self, name: str, version: Optional[str]) -> Optional[str]:
+        key = (name, version or "")
+        now = time.monotonic()
+        with self._lock:
+            entry = self._cache.get(key)
+            generation = self._generation
+            if entry is not None and self._fresh(key, entry, now):
+                self.stats["hits"] += 1
+                if not key[1] and now - entry.fetched_at >= self._refresh_after and key not in self._refreshing:
+                    self.stats["refreshes"] += 1
+                    self._refreshing[key] = self._pool().submit(self._refresh, key, generation)
+                return entry.value
+            self.stats["misses"] += 1
+        try:
+            return self._load(key, generation)
+        except Exception as exc:
+            _LOG.warning("Key Vault get_secret failed for %s: %s", name, exc)
+            with self._lock:
+                self.stats["errors"] += 1
+                if entry is not None and now - entry.fetched_at < self._ttl + self._max_stale:
+                    self.stats["stale_served"] += 1
+                    return entry.value
+            return None
+
+    def _load(self, key: _CacheKey, generation: int) -> Optional[str]:
+        secret = self._client.get_secret(key[0], version=key[1] or None)
+        value = secret.value if secret and secret.value else None
+        with self._lock:
+            if generation == self._generation:
+                self._cache[key] = _CacheEntry(value, time.monotonic())
+        return value
+
+    def _refresh(self, key: _CacheKey, generation: int) -> None:
+        try:
+            self._load(key, generation)
+        except Exception as exc:  # keep serving the cached value until it goes stale
+            _LOG.warning("Key Vault refresh failed for %s: %s", key[0], exc)
+            with self._lock:
+                self.stats["errors"] += 1
+        finally:
+            with self._lock:
+                self._refreshing.pop(key, None)
+
+    def _pool(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix="secret-vault")
+        return self._executor
+
     def set_secret(self, descriptor: SecretDescriptor, value: str) -> None:
         """Persist a new secret value when Key Vault is available.
 
@@ -79,6 +208,7 @@ class SecretVaultClient:
         if descriptor.vault_name and self._client:
             try:  # pragma: no cover - not executed in CI
                 self._client.set_secret(descriptor.vault_name, value)
+                invalidation.publish("secrets", descriptor.vault_name)  # drops the local entry too
                 return
             except Exception as exc:
                 _LOG.warning("Key Vault set_secret failed for %s: %s", descriptor.vault_name, exc)
@@ -95,7 +225,12 @@ def build_descriptor(entry: dict, key: str) -> SecretDescriptor:
 
 
 def build_vault_client() -> SecretVaultClient:
-    return SecretVaultClient()
+    return SecretVaultClient(
+        ttl_seconds=settings.secret_cache_ttl_seconds,
+        refresh_ratio=settings.secret_cache_refresh_ratio,
+        max_stale_seconds=settings.secret_cache_max_stale_seconds,
+    )
 
 
 secret_vault = build_vault_client()
+invalidation.subscribe("secrets", lambda vault_name, data: secret_vault.invalidate(vault_name))
@@ -4,14 +4,16 @@ Subscription billing service for handling recurring payments.
 import asyncio
 from datetime import datetime, timedelta
 from typing import Dict, Any, Optional, List
-import requests
 from sqlalchemy.orm import Session
 from sqlalchemy import and_
 
 from app.core.database import get_db
+from app.core.lazy import lazy_import
 from app.models import Tenant, SubscriptionPlan, Payment, AuditLog
 from config import settings
 
+requests = lazy_import("requests")
+
 
 class SubscriptionBillingService:
     """Service for handling subscription billing operations."""
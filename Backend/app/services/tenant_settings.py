@@ -10,11 +10,11 @@ from __future__ import annotations
 import json
 from dataclasses import dataclass, asdict
 from functools import cached_property
-from typing import Any, Dict, Iterable, Mapping, Optional, Tuple
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
 
 from app.models import Tenant, TenantIntegration
 from config import settings
-from app.services.secret_vault import build_descriptor, secret_vault
+from app.services.secret_vault import SecretDescriptor, build_descriptor, secret_vault
 
 
 def _drilldown(mapping: Mapping[str, Any], path: Iterable[str], default: Any = None) -> Any:
@@ -82,6 +82,8 @@ class TenantSettingsService:
             provider = (integration.provider or "").lower()
             if category:
                 self._integrations[(category, provider)] = integration
+        # Resolve every Key Vault secret the integrations reference in one concurrent round
+        secret_vault.prefetch(self._secret_descriptors())
 
     @property
     def tenant(self) -> Tenant:
@@ -237,6 +239,15 @@ class TenantSettingsService:
             return matches[0] if matches else None
         return next((integ for (cat, _), integ in self._integrations.items() if cat == category_key), None)
 
+    def _secret_descriptors(self) -> List[SecretDescriptor]:
+        descriptors = []
+        for integration in self._integrations.values():
+            secrets = self._coerce_mapping(integration.secrets)
+            for key, entry in secrets.items():
+                if isinstance(entry, Mapping) and entry.get("vault_name"):
+                    descriptors.append(build_descriptor(secrets, key))
+        return descriptors
+
     def _resolve_secret(self, secrets: Mapping[str, Any], key: str, fallback: Optional[str]) -> Optional[str]:
         if not secrets:
             return fallback
@@ -0,0 +1,40 @@
+"""
+Atomic visit counter.
+
+Visits are incremented with a single upsert:
+
+    INSERT INTO visit_counts (tenant_id, user_id, count, updated_at) VALUES (...)
+    ON CONFLICT (tenant_id, user_id) DO UPDATE
+        SET count = visit_counts.count + excluded.count, updated_at = excluded.updated_at
+    RETURNING count
+
+so concurrent payments for the same customer cannot lose increments and the
+caller gets the new total back for milestone checks without a second query.
+Relies on the ``uq_visit_counts_tenant_user`` unique constraint. Postgres and
+SQLite (3.35+) share the same statement shape via their dialect inserts.
+"""
+from datetime import datetime
+
+from sqlalchemy.orm import Session
+
+from app.core.database import dialect_insert
+from app.core.resource_versions import bump, user_scope
+from app.models import VisitCount
+
+
+def increment_visits(db: Session, tenant_id: str, user_id: int, by: int = 1) -> int:
+    """Add ``by`` visits for (tenant, user) and return the new total.
+
+    Runs inside the caller's transaction; the caller commits.
+    """
+    insert = dialect_insert(db.get_bind())
+    now = datetime.utcnow()
+    stmt = insert(VisitCount).values(tenant_id=tenant_id, user_id=user_id, count=by, updated_at=now)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[VisitCount.tenant_id, VisitCount.user_id],
+        set_={"count": VisitCount.count + stmt.excluded.count, "updated_at": stmt.excluded.updated_at},
+    ).returning(VisitCount.count)
+    total = int(db.execute(stmt).scalar_one())
+    # Core upsert: not seen by the ORM flush hook, so bump the conditional-GET counter here
+    bump(db.connection(), [(tenant_id, user_scope(user_id), "visits")])
+    return total
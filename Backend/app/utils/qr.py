@@ -1,8 +1,9 @@
 import base64
 from io import BytesIO
-import qrcode
 
 def generate_qr_code(data: str) -> dict:
+    import qrcode  # deferred: pulls in Pillow, only needed when a QR is rendered
+
     qr = qrcode.QRCode(version=1, box_size=6, border=2)
     qr.add_data(data)
     qr.make(fit=True)
@@ -20,6 +20,44 @@ class Settings(BaseSettings):
 
     # Additional configuration
     database_url: str = Field("sqlite:///./dev.db", alias="DATABASE_URL")
+    # Connection pool (non-SQLite engines)
+    db_pool_size: int = Field(20, alias="DB_POOL_SIZE")
+    db_max_overflow: int = Field(10, alias="DB_MAX_OVERFLOW")
+    db_pool_timeout: float = Field(30, alias="DB_POOL_TIMEOUT")
+    # Connections held longer than this are reported on /api/obs/db-pool
+    db_long_held_seconds: float = Field(5.0, alias="DB_LONG_HELD_SECONDS")
+    # Postgres statement_timeout for analytics / reporting routes (0 disables)
+    reporting_statement_timeout_ms: int = Field(15000, alias="REPORTING_STATEMENT_TIMEOUT_MS")
+    # Slow-query recorder (app.core.slow_queries, /api/obs/slow-queries)
+    slow_query_log: bool = Field(True, alias="SLOW_QUERY_LOG")
+    slow_query_threshold_ms: float = Field(200.0, alias="SLOW_QUERY_THRESHOLD_MS")
+    slow_query_max_fingerprints: int = Field(500, alias="SLOW_QUERY_MAX_FINGERPRINTS")
+    # Optional read replica for analytics / reporting reads (see app.core.database.get_read_db)
+    database_replica_url: Optional[str] = Field(None, alias="DATABASE_REPLICA_URL")
+    # Route reads to the primary when replica lag exceeds this many seconds
+    replica_max_lag_seconds: float = Field(5.0, alias="REPLICA_MAX_LAG_SECONDS")
+    # After a client writes, keep its reads on the primary for this long (read-your-writes)
+    replica_sticky_seconds: float = Field(10.0, alias="REPLICA_STICKY_SECONDS")
+    # Public tenant meta/theme/manifest documents older than this are rebuilt in the background
+    public_tenant_doc_ttl_seconds: float = Field(300.0, alias="PUBLIC_TENANT_DOC_TTL_SECONDS")
+    # Conditional-GET ETags roll over at least this often (catches writes that bypass the counters)
+    conditional_get_max_age_seconds: int = Field(3600, alias="CONDITIONAL_GET_MAX_AGE_SECONDS")
+    # Catalog snapshot re-reads its version counter at most this often (picks up other workers' writes)
+    catalog_cache_check_seconds: float = Field(5.0, alias="CATALOG_CACHE_CHECK_SECONDS")
+    # Key Vault secrets are cached this long; refreshed in the background once past the refresh ratio
+    secret_cache_ttl_seconds: float = Field(300.0, alias="SECRET_CACHE_TTL_SECONDS")
+    secret_cache_refresh_ratio: float = Field(0.8, alias="SECRET_CACHE_REFRESH_RATIO")
+    # Serve an expired secret this long when Key Vault errors (0 = never serve stale)
+    secret_cache_max_stale_seconds: float = Field(86400.0, alias="SECRET_CACHE_MAX_STALE_SECONDS")
+    # Cross-worker cache invalidation (redis:// or postgresql://; unset = process-local only)
+    invalidation_bus_url: Optional[str] = Field(None, alias="INVALIDATION_BUS_URL")
+    invalidation_channel: str = Field("cache_invalidation", alias="INVALIDATION_CHANNEL")
+    # Live wash board (SSE): keep-alive comment interval for idle streams
+    wash_board_heartbeat_seconds: float = Field(15.0, alias="WASH_BOARD_HEARTBEAT_SECONDS")
+    # Import plugin routers in a background thread after startup; /health answers immediately
+    defer_routers: bool = Field(False, alias="DEFER_ROUTERS")
+    # How long a request waits for deferred routers before getting a 503
+    defer_routers_wait_seconds: float = Field(10.0, alias="DEFER_ROUTERS_WAIT_SECONDS")
     allowed_origins: Optional[str] = None  # comma-separated list (e.g., https://a.com,https://b.com)
     # Optional regex alternative to static list. When provided, CORS may be configured via allow_origin_regex.
     allowed_origin_regex: Optional[str] = Field(None, alias="ALLOWED_ORIGIN_REGEX")
@@ -41,6 +79,8 @@ class Settings(BaseSettings):
     google_oauth_client_id: Optional[str] = Field(None, alias="GOOGLE_OAUTH_CLIENT_ID")
     # Directory for serving static assets (branding uploads, compiled frontend)
     static_dir: str = Field("static", alias="STATIC_DIR")
+    # Dynamic gzip level for API responses (static bundles are precompressed at build time)
+    gzip_level: int = Field(6, alias="GZIP_LEVEL")
 
     # --- Rate limiting / jobs / observability (prod-oriented) ---
     rate_limit_public_meta_capacity: int = Field(60, alias="RATE_LIMIT_PUBLIC_META_CAPACITY")
@@ -52,6 +92,14 @@ class Settings(BaseSettings):
     enable_rate_limit_overrides: bool = Field(True, alias="ENABLE_RATE_LIMIT_OVERRIDES")  # disable in prod to lock config
     enable_rate_limit_penalties: bool = Field(True, alias="ENABLE_RATE_LIMIT_PENALTIES")
     enable_job_queue: bool = Field(False, alias="ENABLE_JOB_QUEUE")  # in-process queue generally off in prod
+    # Recurring redemption expiry sweep, scheduled at startup when ENABLE_JOB_QUEUE is on (0 disables)
+    redemption_expiry_interval_seconds: float = Field(3600.0, alias="REDEMPTION_EXPIRY_INTERVAL_SECONDS")
+    # RFM / customer segment refresh, scheduled like the expiry sweep; stored segments older than
+    # twice the interval are ignored by /reports/customer-segments (0 disables the schedule)
+    customer_segments_refresh_interval_seconds: float = Field(3600.0, alias="CUSTOMER_SEGMENTS_REFRESH_INTERVAL_SECONDS")
+    # Dashboard report cache: warm-up job interval (0 disables the schedule) and in-process entry bound
+    report_cache_warm_interval_seconds: float = Field(900.0, alias="REPORT_CACHE_WARM_INTERVAL_SECONDS")
+    report_cache_max_entries: int = Field(5000, alias="REPORT_CACHE_MAX_ENTRIES")
     enable_metrics_endpoint: bool = Field(True, alias="ENABLE_METRICS")
     # Enable loading CORS allowed origins from DB table when env variables are absent
     enable_db_cors_allowlist: bool = Field(False, alias="ENABLE_DB_CORS_ALLOWLIST")
@@ -63,6 +111,9 @@ class Settings(BaseSettings):
     enable_dev_rate_limits: bool = Field(True, alias="ENABLE_DEV_RATE_LIMITS")
     enable_dev_audit_view: bool = Field(True, alias="ENABLE_DEV_AUDIT_VIEW")
 
+    # Directory for background export files (CSV/NDJSON); defaults to <tmp>/smb-exports
+    export_dir: Optional[str] = Field(None, alias="EXPORT_DIR")
+
     # Observability external services
     sentry_dsn: Optional[str] = Field(None, alias="SENTRY_DSN")
     # Optional Content Security Policy (string). Example minimal default provided for guidance.
@@ -89,6 +140,7 @@ class Settings(BaseSettings):
         or SECRET_KEY surrounded by quotes causing strength validation to fail.
         """
         self.database_url = self._strip_wrapping_quotes(self.database_url)
+        self.database_replica_url = self._strip_wrapping_quotes(self.database_replica_url)
         if self.allowed_origins:
             cleaned = [self._strip_wrapping_quotes(p).strip() for p in self.allowed_origins.split(',') if p.strip()]
             self.allowed_origins = ",".join(dict.fromkeys(cleaned)) if cleaned else None
@@ -0,0 +1,71 @@
+"""Static asset throughput: precompressed siblings vs on-the-fly gzip.
+
+Serves the SPA bundle in ``static/assets`` through the real ``/static`` mount
+(PrecompressedStaticFiles + SelectiveGZipMiddleware) in-process, first
+without siblings (every response gzipped per request) and then after
+``precompress_static`` has written them, and reports requests/second and
+bytes on the wire.
+
+Usage (from Backend/):
+  DATABASE_URL=sqlite:///:memory: SQLALCHEMY_ECHO=false python loadtests/static_assets_bench.py [--requests 500]
+
+For an over-the-wire run against uvicorn, point k6 at /static/assets/* with
+``Accept-Encoding: br, gzip`` (see basic_traffic.js for the k6 layout).
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from scripts.precompress_static import precompress  # noqa: E402
+
+
+def _bench(client, paths, n, accept):
+    total_bytes = 0
+    start = time.perf_counter()
+    for i in range(n):
+        r = client.get(paths[i % len(paths)], headers={"Accept-Encoding": accept})
+        assert r.status_code == 200, r.status_code
+        total_bytes += r.num_bytes_downloaded  # encoded size, as sent
+    elapsed = time.perf_counter() - start
+    return n / elapsed, total_bytes / n
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args(argv)
+
+    src = Path(__file__).resolve().parents[1] / "static"
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp) / "static"
+        shutil.copytree(src / "assets", root / "assets")
+        os.environ["STATIC_DIR"] = str(root)
+        from fastapi.testclient import TestClient
+        import main as app_main
+
+        client = TestClient(app_main.app)
+        paths = [f"/static/assets/{p.name}" for p in sorted((root / "assets").iterdir()) if p.suffix in (".js", ".css")]
+        if not paths:
+            print("no .js/.css files in static/assets", file=sys.stderr)
+            return 1
+
+        dynamic_rps, dynamic_bytes = _bench(client, paths, args.requests, "gzip")
+        precompress(root, min_size=0, force=True)
+        pre_rps, pre_bytes = _bench(client, paths, args.requests, "br, gzip")
+
+    print(f"{'mode':<24}{'req/s':>10}{'bytes/req':>12}")
+    print(f"{'dynamic gzip':<24}{dynamic_rps:>10.0f}{dynamic_bytes:>12.0f}")
+    print(f"{'precompressed sibling':<24}{pre_rps:>10.0f}{pre_bytes:>12.0f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,43 +1,24 @@
 # backend/main.py
 
 from config import settings
-from fastapi import FastAPI, Request, Depends, HTTPException
+from fastapi import APIRouter, FastAPI, Request, Depends, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.middleware.gzip import GZipMiddleware
 from starlette.middleware.trustedhost import TrustedHostMiddleware
 from starlette.middleware.httpsredirect import HTTPSRedirectMiddleware
 from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
-from fastapi.staticfiles import StaticFiles
 from starlette.responses import Response
 from fastapi.encoders import jsonable_encoder
 from typing import Optional
-import time, hashlib, json
+import asyncio, threading, time
+from importlib import import_module
 from starlette.middleware.base import BaseHTTPMiddleware
 
-# Explicitly import each router
-from app.plugins.auth.routes    import router as auth_router
-from app.plugins.users.routes   import router as users_router
-from app.plugins.catalog.routes import router as catalog_router
-from app.plugins.loyalty.routes import router as loyalty_router
-from app.plugins.orders.routes  import router as orders_router
-from app.plugins.payments.routes import router as payments_router
-from app.plugins.tenants.routes import router as tenants_router
-from app.plugins.subscriptions import router as subscriptions_router
-from app.plugins.dev            import router as dev_router
-from app.plugins.analytics.routes import router as analytics_router
-from app.plugins.admin.routes import router as admin_router
-from app.plugins.inventory.routes import router as inventory_router
-from app.routes.onboarding import router as onboarding_router
-from app.routes.health import router as health_router
-from app.routes.customers import router as customers_router
-from app.routes.reports import router as reports_router
-from app.routes.notifications import router as notifications_router
-from app.routes.profile import router as profile_router
-from app.routes.secure import router as secure_router
-from app.routes.ops import router as ops_router
-from app.core.tenant_context import get_tenant_context, tenant_meta_dict, TenantContext
+from app.routes.health import mark_router_load_failed, router as health_router, router_load_error
+from app.core.tenant_context import get_tenant_context, TenantContext
+from app.core import tenant_documents
+from app.core.static_files import PrecompressedStaticFiles, SelectiveGZipMiddleware
 from app.core.rate_limit import check_rate, compute_retry_after, build_429_payload
 from app.core.rate_limit import bucket_snapshot  # used elsewhere optionally
 from app.core.rate_limit import set_limit  # future use
@@ -47,9 +28,9 @@ import logging
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import ProgrammingError, OperationalError, DatabaseError
 from fastapi.responses import JSONResponse
+from app.core import database as db_routing
 from app.core.database import get_db
 from models import Tenant as _Tenant
-from app.models import TenantBranding
 import os
 import tempfile
 
@@ -172,8 +153,9 @@ def _validate_environment():
         logger.info("Environment validation passed")
 
 # ─── Core Security & Performance Middleware (added) ──────────────────────────
-# GZip responses for text/JSON to reduce bandwidth; level defaults good for API
-app.add_middleware(GZipMiddleware, minimum_size=500)
+# GZip responses for text/JSON to reduce bandwidth; already-compressed media
+# and precompressed static siblings pass through untouched
+app.add_middleware(SelectiveGZipMiddleware, minimum_size=500, compresslevel=settings.gzip_level)
 
 # Honor X-Forwarded-Proto / Forwarded headers from Azure front-end to prevent
 # spurious self 307 redirects (redirect loop) when request already arrived via HTTPS.
@@ -254,15 +236,8 @@ if settings.environment == 'production':
     app.add_middleware(ConditionalHTTPSRedirectMiddleware)
 
 # Mount static directory (branding assets & SPA build output) early
-class BrandingStaticFiles(StaticFiles):
-    async def get_response(self, path, scope):  # override to inject cache headers
-        resp: Response = await super().get_response(path, scope)
-        # Long cache for branding hashed assets
-        if path.startswith('branding/'):
-            resp.headers.setdefault('Cache-Control', 'public, max-age=31536000, immutable')
-        return resp
-
-app.mount("/static", BrandingStaticFiles(directory=settings.static_dir or "static"), name="static")
+# Precompressed .br/.gz siblings, immutable caching for hashed/branding assets
+app.mount("/static", PrecompressedStaticFiles(directory=settings.static_dir or "static"), name="static")
 
 # Middleware to add request timing header
 class TimingMiddleware(BaseHTTPMiddleware):
@@ -420,6 +395,21 @@ class AccessLogMiddleware(BaseHTTPMiddleware):
 
 app.add_middleware(AccessLogMiddleware)
 
+# ─── Read-your-writes marker for replica routing ───────────────────────────
+class ReplicaStickinessMiddleware(BaseHTTPMiddleware):
+    """Record successful mutating requests so get_read_db keeps that client's
+    reads on the primary for REPLICA_STICKY_SECONDS."""
+    WRITE_METHODS = {"POST", "PUT", "PATCH", "DELETE"}
+
+    async def dispatch(self, request: Request, call_next):
+        response = await call_next(request)
+        if request.method in self.WRITE_METHODS and response.status_code < 400:
+            if db_routing.ReadSessionLocal is not None:
+                db_routing.note_write(db_routing.client_key(request))
+        return response
+
+app.add_middleware(ReplicaStickinessMiddleware)
+
 # ─── Client IP Normalization (X-Forwarded-For) ─────────────────────────────
 class ClientIPMiddleware(BaseHTTPMiddleware):
     """Derive the canonical client IP (best-effort) honoring X-Forwarded-For.
@@ -483,35 +473,95 @@ app.add_middleware(GlobalAPIRateLimitMiddleware)
 
 # ─── Global Generic Rate Limiter (simple per-IP) ───────────────────────────
 
-# Mount plugin routers under /api
-router_mounts = [
-    ("/api/auth",      auth_router),
-    ("/api/users",     users_router),
-    ("/api/catalog",   catalog_router),
-    ("/api/loyalty",   loyalty_router),
-    ("/api/orders",    orders_router),
-    ("/api/payments",  payments_router),
-    ("/api/tenants",   tenants_router),
-    ("/api/inventory", inventory_router),
-    ("/api/subscriptions", subscriptions_router),
-    ("/api/billing",   subscriptions_router),  # billing endpoints live in same router
-    ("/api",           analytics_router),  # analytics_router already has internal prefix
-    ("/api",           admin_router),
-    ("/api",           onboarding_router),
-    ("",               health_router),  # Health checks at root level
-    ("/api/customers", customers_router),
-    ("/api/reports",   reports_router),
-    ("/api/notifications", notifications_router),
-    ("/api/profile",   profile_router),
-    ("/api",           secure_router),
-    ("/api",           ops_router),
+# Mount plugin routers under /api. Modules are named rather than imported so
+# DEFER_ROUTERS=true can load them off the startup path (see _load_deferred_routers).
+ROUTER_MODULES = [
+    ("/api/auth",      "app.plugins.auth.routes"),
+    ("/api/users",     "app.plugins.users.routes"),
+    ("/api/catalog",   "app.plugins.catalog.routes"),
+    ("/api/loyalty",   "app.plugins.loyalty.routes"),
+    ("/api/orders",    "app.plugins.orders.routes"),
+    ("/api/payments",  "app.plugins.payments.routes"),
+    ("/api/tenants",   "app.plugins.tenants.routes"),
+    ("/api/inventory", "app.plugins.inventory.routes"),
+    ("/api/subscriptions", "app.plugins.subscriptions"),
+    ("/api/billing",   "app.plugins.subscriptions"),  # billing endpoints live in same router
+    ("/api",           "app.plugins.analytics.routes"),  # analytics_router already has internal prefix
+    ("/api",           "app.plugins.admin.routes"),
+    ("/api",           "app.routes.onboarding"),
+    ("",               "app.routes.health"),  # Health checks at root level
+    ("/api/customers", "app.routes.customers"),
+    ("/api/reports",   "app.routes.reports"),
+    ("/api/notifications", "app.routes.notifications"),
+    ("/api/profile",   "app.routes.profile"),
+    ("/api",           "app.routes.secure"),
+    ("/api",           "app.routes.ops"),
+    ("/api",           "app.routes.exports"),
+    ("/api",           "app.routes.search"),
 ]
 # Conditionally include dev router outside production
 if settings.environment != 'production':
-    router_mounts.append(("/api/dev", dev_router))
+    ROUTER_MODULES.append(("/api/dev", "app.plugins.dev"))
+
+
+def _import_router(module_path: str):
+    return import_module(module_path).router
+
+
+routers_ready = threading.Event()
 
-for prefix, router in router_mounts:
-    app.include_router(router, prefix=prefix)
+
+def _load_deferred_routers(insert_at: int) -> None:
+    """Import the plugin routers and splice their routes in at ``insert_at``.
+
+    Routes are staged on a scratch router first so the app's route list is
+    swapped in one step and keeps the same order as an eager start.
+    """
+    staging = APIRouter()
+    try:
+        for prefix, module_path in ROUTER_MODULES:
+            if module_path == "app.routes.health":
+                continue
+            staging.include_router(_import_router(module_path), prefix=prefix)
+        app.router.routes[insert_at:insert_at] = staging.routes
+        app.openapi_schema = None
+        logger.info("Deferred routers loaded (%d routes)", len(staging.routes))
+    except Exception as exc:
+        # Readiness and the gate report 503 rather than serving 404s as "healthy"
+        mark_router_load_failed(f"{type(exc).__name__}: {exc}")
+        logger.exception("Failed to load deferred routers")
+    finally:
+        routers_ready.set()
+
+
+class DeferredRouterGate(BaseHTTPMiddleware):
+    """Hold non-health requests until deferred routers are mounted (503 on timeout or load failure)."""
+
+    async def dispatch(self, request: Request, call_next):
+        if request.url.path.startswith("/health"):
+            return await call_next(request)
+        if not routers_ready.is_set():
+            await asyncio.to_thread(routers_ready.wait, settings.defer_routers_wait_seconds)
+            if not routers_ready.is_set():
+                return JSONResponse({"detail": "Service starting"}, status_code=503, headers={"Retry-After": "1"})
+        if router_load_error():
+            return JSONResponse({"detail": "Service unavailable: routers failed to load"}, status_code=503)
+        return await call_next(request)
+
+
+if settings.defer_routers:
+    app.include_router(health_router)
+    app.add_middleware(DeferredRouterGate)
+    threading.Thread(
+        target=_load_deferred_routers,
+        args=(len(app.router.routes),),
+        name="deferred-routers",
+        daemon=True,
+    ).start()
+else:
+    for prefix, module_path in ROUTER_MODULES:
+        app.include_router(_import_router(module_path), prefix=prefix)
+    routers_ready.set()
 
 # ─── Root Landing Page (simple HTML) ────────────────────────────────────────
 # Provides a human-friendly page instead of a generic 400/404 when visiting
@@ -540,10 +590,6 @@ async def root_landing():
 
 # ─── Public Tenant Metadata Endpoint ───
 
-def _etag_for(data: dict) -> str:
-    dumped = json.dumps(data, sort_keys=True, separators=(",", ":")).encode()
-    return hashlib.sha256(dumped).hexdigest()[:16]
-
 def _ip_key(request: Request) -> str:
     return get_client_ip(request)
 
@@ -668,13 +714,32 @@ def _resolve_public_tenant(request: Request, db: Session) -> Optional[TenantCont
 
     return None  # No tenant found, let caller handle gracefully
 
+PUBLIC_DOC_CACHE_CONTROL = "public, max-age=60, stale-while-revalidate=300"
+
+
+def _tenant_document_response(request: Request, db: Session, ctx: TenantContext, kind: str) -> Response:
+    """Serve a precomputed tenant document with a strong ETag (304 on match)."""
+    doc = tenant_documents.get_document(db, ctx.id, kind)
+    if doc is None:
+        return JSONResponse(
+            status_code=404,
+            content={"error": "tenant_not_found", "detail": "No tenant available for this request"},
+        )
+    body, etag = doc
+    headers = {"ETag": etag, "Cache-Control": PUBLIC_DOC_CACHE_CONTROL, "Vary": "Host, X-Tenant-ID"}
+    if tenant_documents.etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
 @app.get("/api/public/tenant-meta")
 def public_tenant_meta(request: Request, db: Session = Depends(get_db)):
     """Public discovery endpoint for frontend.
 
     Returns lightweight tenant metadata (vertical, features, branding) resolved
-    from Host header or X-Tenant-ID. Includes ETag + 60s public cache and a
-    simple IP-based rate limit (capacity/window via settings).
+    from Host header or X-Tenant-ID. Served from the precomputed tenant
+    document (strong ETag, 304, stale-while-revalidate) behind a simple
+    IP-based rate limit (capacity/window via settings).
     """
     from config import settings as _settings  # local import to avoid circulars
     # Resolve tenant context with production fallback to avoid 500s
@@ -700,19 +765,7 @@ def public_tenant_meta(request: Request, db: Session = Depends(get_db)):
         return resp
     # Expose tenant id to logging middleware (if present there)
     request.state.tenant_id = ctx.id
-    data = tenant_meta_dict(ctx)
-    etag = _etag_for(data)
-    inm = request.headers.get('if-none-match')
-    if inm == etag:
-        from fastapi import Response
-        resp = Response(status_code=304)
-        resp.headers['ETag'] = etag
-        resp.headers['Cache-Control'] = 'public, max-age=60'
-        return resp
-    resp = JSONResponse(content=data)
-    resp.headers['Cache-Control'] = 'public, max-age=60'
-    resp.headers['ETag'] = etag
-    return resp
+    return _tenant_document_response(request, db, ctx, "meta")
 
 @app.get('/api/public/tenant-theme')
 def public_tenant_theme(request: Request, db: Session = Depends(get_db)):
@@ -728,36 +781,7 @@ def public_tenant_theme(request: Request, db: Session = Depends(get_db)):
             status_code=404,
             content={"error": "tenant_not_found", "detail": "No tenant available for this request"},
         )
-    try:
-        branding = db.query(TenantBranding).filter_by(tenant_id=ctx.id).first()
-    except (ProgrammingError, OperationalError, DatabaseError) as exc:
-        logger.warning("tenant branding lookup failed", extra={"tenant_id": ctx.id}, exc_info=exc)
-        try:
-            db.rollback()
-        except Exception:
-            pass
-        branding = None
-    try:
-        tenant = db.query(_Tenant).filter_by(id=ctx.id).first()
-    except (ProgrammingError, OperationalError, DatabaseError) as exc:
-        logger.warning("tenant lookup failed", extra={"tenant_id": ctx.id}, exc_info=exc)
-        try:
-            db.rollback()
-        except Exception:
-            pass
-        tenant = None
-    data = {
-        'tenant_id': ctx.id,
-        'public_name': (branding.public_name if branding else None) or (tenant.name if tenant else None),
-        'short_name': branding.short_name if branding else None,
-        'primary_color': (branding.primary_color if branding else None) or (tenant.theme_color if tenant else None),
-        'secondary_color': branding.secondary_color if branding else None,
-        'accent_color': branding.accent_color if branding else None,
-        'logo_light_url': branding.logo_light_url if branding else None,
-        'logo_dark_url': branding.logo_dark_url if branding else None,
-        'favicon_url': branding.favicon_url if branding else None,
-    }
-    return data
+    return _tenant_document_response(request, db, ctx, "theme")
 
 @app.get('/api/public/tenant-manifest')
 def public_tenant_manifest(request: Request, db: Session = Depends(get_db)):
@@ -768,55 +792,7 @@ def public_tenant_manifest(request: Request, db: Session = Depends(get_db)):
             status_code=404,
             content={"error": "tenant_not_found", "detail": "No tenant available for this request"},
         )
-    try:
-        branding = db.query(TenantBranding).filter_by(tenant_id=ctx.id).first()
-    except (ProgrammingError, OperationalError, DatabaseError) as exc:
-        logger.warning("tenant branding lookup failed", extra={"tenant_id": ctx.id}, exc_info=exc)
-        try:
-            db.rollback()
-        except Exception:
-            pass
-        branding = None
-
-    icons: list[dict[str, str]] = []
-    branding_base = f"/static/branding/{ctx.id}"
-    dir_path = os.path.join(settings.static_dir or 'static', 'branding', ctx.id)
-
-    if os.path.isdir(dir_path):
-        available_files = set(os.listdir(dir_path))
-        for size in [64, 128, 256, 512]:
-            for field in ['logo_light', 'app_icon']:
-                prefix = f"{field}-"
-                match = next(
-                    (
-                        fname
-                        for fname in available_files
-                        if fname.startswith(prefix) and f"-{size}" in fname
-                    ),
-                    None,
-                )
-                if match:
-                    icons.append(
-                        {
-                            'src': f"{branding_base}/{match}",
-                            'sizes': f"{size}x{size}",
-                            'type': 'image/png',
-                        }
-                    )
-                    break  # prefer the first matching asset per size
-
-    manifest = {
-        'name': (branding.public_name if branding else ctx.id) or ctx.id,
-        'short_name': (branding.short_name if branding else ctx.id) or ctx.id,
-        'theme_color': (branding.primary_color if branding else None) or '#3366ff',
-        'background_color': '#ffffff',
-        'display': 'standalone',
-        'icons': icons,
-        'id': ctx.id,
-        'start_url': '/',
-    }
-
-    return manifest
+    return _tenant_document_response(request, db, ctx, "manifest")
 
 @app.get('/api/debug/seed-default-tenant')
 def debug_seed_default_tenant():
@@ -865,6 +841,26 @@ def on_startup():
         except Exception:  # pragma: no cover - defensive guard
             logger.warning("Failed to ensure default tenant exists", exc_info=True)
 
+    # Cross-worker cache invalidation (process-local unless INVALIDATION_BUS_URL is set)
+    if _settings.invalidation_bus_url:
+        from app.core import invalidation as _invalidation
+        try:
+            _invalidation.start(_settings.invalidation_bus_url)
+        except Exception:  # pragma: no cover - broker unreachable; caches fall back to TTLs
+            logger.warning("Invalidation bus failed to start", exc_info=True)
+
+    # Recurring in-process jobs (the worker thread only runs when the queue is enabled)
+    if _settings.enable_job_queue:
+        from app.core import jobs as _jobs, redemption_expiry
+        from app.analytics import report_cache, segmentation
+        if _settings.redemption_expiry_interval_seconds > 0:
+            redemption_expiry.schedule(_settings.redemption_expiry_interval_seconds)
+        if _settings.customer_segments_refresh_interval_seconds > 0:
+            segmentation.schedule(_settings.customer_segments_refresh_interval_seconds)
+        if _settings.report_cache_warm_interval_seconds > 0:
+            report_cache.schedule(_settings.report_cache_warm_interval_seconds)
+        _jobs.start_worker()
+
     # Firebase credentials materialization logic ---------------------------------
     try:
         if not os.environ.get('GOOGLE_APPLICATION_CREDENTIALS'):
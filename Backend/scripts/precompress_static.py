@@ -0,0 +1,78 @@
+"""Write .gz (and .br when ``brotli`` is installed) siblings for static text assets.
+
+Run after copying the SPA build into the static dir; PrecompressedStaticFiles
+serves the siblings so the API never compresses bundles per request.
+
+Usage (from Backend/):
+  python scripts/precompress_static.py [static_dir] [--min-size 1024] [--force]
+"""
+from __future__ import annotations
+
+import argparse
+import gzip
+import os
+import sys
+from pathlib import Path
+
+COMPRESSIBLE_SUFFIXES = {".js", ".mjs", ".css", ".html", ".svg", ".json", ".map", ".txt", ".xml", ".wasm", ".ico", ".webmanifest"}
+
+try:
+    import brotli  # optional; gzip-only without it
+except ImportError:  # pragma: no cover - depends on environment
+    brotli = None
+
+
+def _write_if_smaller(target: Path, data: bytes, original_size: int, source_mtime: float) -> bool:
+    if len(data) >= original_size:
+        target.unlink(missing_ok=True)  # not worth it; serve the original
+        return False
+    tmp = target.with_name(f".{target.name}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, target)
+    os.utime(target, (source_mtime, source_mtime))  # same Last-Modified as the original
+    return True
+
+
+def precompress(root: Path, min_size: int = 1024, force: bool = False) -> dict:
+    stats = {"files": 0, "gzip": 0, "br": 0, "skipped": 0}
+    for path in sorted(root.rglob("*")):
+        if not path.is_file() or path.suffix.lower() not in COMPRESSIBLE_SUFFIXES:
+            continue
+        st = path.stat()
+        if st.st_size < min_size:
+            stats["skipped"] += 1
+            continue
+        stats["files"] += 1
+        raw = None
+        for suffix, key in ((".gz", "gzip"), (".br", "br")):
+            if key == "br" and brotli is None:
+                continue
+            target = path.with_name(path.name + suffix)
+            if not force and target.exists() and target.stat().st_mtime >= st.st_mtime:
+                continue
+            raw = raw if raw is not None else path.read_bytes()
+            data = gzip.compress(raw, compresslevel=9, mtime=0) if key == "gzip" else brotli.compress(raw, quality=11)
+            if _write_if_smaller(target, data, st.st_size, st.st_mtime):
+                stats[key] += 1
+    return stats
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("static_dir", nargs="?", default=os.environ.get("STATIC_DIR", "static"))
+    parser.add_argument("--min-size", type=int, default=1024, help="skip files smaller than this (bytes)")
+    parser.add_argument("--force", action="store_true", help="rewrite siblings even if up to date")
+    args = parser.parse_args(argv)
+    root = Path(args.static_dir)
+    if not root.is_dir():
+        print(f"static dir not found: {root}", file=sys.stderr)
+        return 1
+    stats = precompress(root, args.min_size, args.force)
+    print(f"{stats['files']} files: {stats['gzip']} .gz, {stats['br']} .br written ({stats['skipped']} below min size)")
+    if brotli is None:
+        print("brotli not installed; only .gz siblings were written", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -31,18 +31,22 @@ def initialize_db():
     # Seed default tenant and a default user for tests
     from app.models import Tenant, User
     # Also import loyalty-related tables to ensure a clean slate per test
-    from app.models import VisitCount, Reward, Redemption, Vehicle, OrderVehicle
+    from app.models import VisitCount, Reward, Redemption, Vehicle, OrderVehicle, VehicleWashStats, CustomerFirstVisit, WashDurationBucket, ModuleUsageDaily
     from config import settings
     from datetime import datetime
     session = TestingSessionLocal()
     # Clean loyalty-related tables to avoid cross-test contamination
     try:
         session.query(VisitCount).delete()
+        session.query(CustomerFirstVisit).delete()
+        session.query(WashDurationBucket).delete()
+        session.query(ModuleUsageDaily).delete()
         session.query(Redemption).delete()
         session.query(Reward).delete()
         # Clean vehicle-related tables to avoid cross-test contamination
         # Delete child rows first to satisfy FK constraints
         session.query(OrderVehicle).delete()
+        session.query(VehicleWashStats).delete()
         session.query(Vehicle).delete()
     except Exception:
         # Best effort; if tables don't exist yet they will be created below
@@ -71,6 +75,17 @@ def initialize_db():
     session.commit()
     session.close()
     yield
+    # Orders (and rows hanging off them) are per-test data; drop them so order
+    # counts, aggregates and reports in the next test start from empty
+    from app.models import Order, Payment
+    session = TestingSessionLocal()
+    try:
+        session.query(Payment).delete()
+        session.query(OrderVehicle).delete()
+        session.query(Order).delete()
+        session.commit()
+    finally:
+        session.close()
 
 @pytest.fixture(scope="session", autouse=True)
 def create_all_once():
@@ -177,3 +192,55 @@ def client(db_session, monkeypatch):
     app.dependency_overrides[get_current_user] = override_get_current_user
     # Do NOT override developer_only so authz role tests validate actual logic
     return TestClient(app)
+
+
+@pytest.fixture
+def make_customer(db_session):
+    """Factory: ``make_customer(email, **fields)`` returns a default-tenant
+    customer, creating it on first use."""
+    from datetime import datetime
+    from app.models import User
+    from config import settings
+
+    def make(email, **fields):
+        user = db_session.query(User).filter_by(email=email).first()
+        if not user:
+            user = User(email=email, tenant_id=settings.default_tenant, role="user",
+                        created_at=datetime.utcnow(), **fields)
+            db_session.add(user)
+            db_session.commit()
+        return user
+    return make
+
+@pytest.fixture
+def wash_service(db_session):
+    """A committed wash ``Service`` for order factories, removed (with its
+    orders) after the test so catalog tests still see an empty catalog."""
+    from app.models import Order, Service
+
+    service = Service(category="wash", name="Test Wash", base_price=1000)
+    db_session.add(service)
+    db_session.commit()
+    yield service
+    db_session.rollback()
+    db_session.query(Order).filter_by(service_id=service.id).delete()
+    db_session.delete(service)
+    db_session.commit()
+
+@pytest.fixture
+def make_order(db_session):
+    """Factory: ``make_order(user, service=None, **fields)`` commits a
+    default-tenant order for ``user``; orders are removed after each test."""
+    from app.models import Order
+    from config import settings
+
+    def make(user, service=None, **fields):
+        fields.setdefault("tenant_id", settings.default_tenant)
+        fields.setdefault("extras", [])
+        if service is not None:
+            fields["service_id"] = service.id
+        order = Order(user_id=user.id, **fields)
+        db_session.add(order)
+        db_session.commit()
+        return order
+    return make
@@ -0,0 +1,91 @@
+import gzip
+import io
+import time
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+from PIL import Image
+
+from app.core import jobs
+from app.core.database import SessionLocal
+from app.main import app
+from app.models import Tenant, User
+from app.plugins.auth.routes import create_access_token
+from app.plugins.tenants import routes as tenant_routes
+from app.services import branding_assets
+from config import settings
+
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def assets_tenant(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "static_dir", str(tmp_path))
+    tenant_routes._UPLOAD_QUOTA.pop("assets", None)
+    tenant_routes._RATE_BUCKET.pop("assets", None)
+    with SessionLocal() as db:
+        if not db.query(Tenant).filter_by(id="assets").first():
+            db.add(Tenant(id="assets", name="Assets", loyalty_type="standard", vertical_type="carwash",
+                          created_at=datetime.utcnow(), config={}))
+        if not db.query(User).filter_by(email="assets-admin@example.com").first():
+            db.add(User(email="assets-admin@example.com", tenant_id="assets", role="admin"))
+        db.commit()
+
+
+def _png(size=600):
+    buf = io.BytesIO()
+    Image.new("RGB", (size, size), (200, 10, 10)).save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def _upload(field, name, raw, content_type):
+    return client.post(
+        f"/api/tenants/assets/branding/assets/{field}",
+        files={"file": (name, raw, content_type)},
+        headers={"Authorization": f"Bearer {create_access_token('assets-admin@example.com')}"},
+    )
+
+
+def _wait(job_id):
+    deadline = time.time() + 10
+    while jobs.get_job(job_id).status in ("queued", "running") and time.time() < deadline:
+        time.sleep(0.02)
+    return jobs.get_job(job_id)
+
+
+def test_upload_stores_original_and_processes_in_background(tmp_path):
+    raw = _png()
+    r = _upload("app_icon", "icon.png", raw, "image/png")
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert body["job_id"]
+    stored = tmp_path / "branding" / "assets" / body["url"].rsplit("/", 1)[-1]
+    assert stored.read_bytes() == raw
+
+    assert _wait(body["job_id"]).status == "success"
+    entry = branding_assets.read_manifest("assets")[stored.stem]
+    assert set(entry["variants"]["128"]) >= {"png", "webp"}
+    assert "ico" in entry["variants"]
+    with Image.open(tmp_path / "branding" / "assets" / f"{stored.stem}-128.webp") as img:
+        assert max(img.size) == 128
+
+    icons = client.get("/api/public/tenant-manifest", headers={"X-Tenant-ID": "assets"}).json()["icons"]
+    assert {"src": entry["variants"]["128"]["webp"], "sizes": "128x128", "type": "image/webp"} in icons
+
+    # Same bytes again: deduplicated, no new job, variants returned directly
+    again = _upload("app_icon", "icon-copy.png", raw, "image/png").json()
+    assert again["job_id"] is None
+    assert again["url"] == body["url"]
+    assert again["variants"]["128"]["png"] == entry["variants"]["128"]["png"]
+
+
+def test_svg_is_precompressed():
+    svg = b'<svg xmlns="http://www.w3.org/2000/svg" width="10" height="10"><rect width="10" height="10"/></svg>'
+    r = _upload("logo_dark", "logo.svg", svg, "image/svg+xml")
+    assert r.status_code == 200, r.text
+    _wait(r.json()["job_id"])
+    base = r.json()["url"].rsplit("/", 1)[-1][:-len(".svg")]
+    encodings = branding_assets.read_manifest("assets")[base]["encodings"]
+    gz_path = branding_assets.asset_dir("assets") / encodings["gzip"].rsplit("/", 1)[-1]
+    assert gzip.decompress(gz_path.read_bytes()) == svg
@@ -1,4 +1,5 @@
-import os, sys, io
+import os, sys, io, time
+import pytest
 from fastapi.testclient import TestClient
 
 ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
@@ -14,6 +15,12 @@ from datetime import datetime  # noqa: E402
 client = TestClient(app)
 
 
+@pytest.fixture(autouse=True)
+def _isolated_static(tmp_path, monkeypatch):
+    from config import settings
+    monkeypatch.setattr(settings, 'static_dir', str(tmp_path))
+
+
 def _admin_token():
     db = SessionLocal()
     # ensure tenant and admin user
@@ -75,7 +82,13 @@ def test_asset_list_and_512_variant():
     except Exception:
         # Fallback to simple header if Pillow import fails for some reason
         png_bytes = b"\x89PNG\r\n\x1a\n" + b"3"*500
-    client.post('/api/tenants/default/branding/assets/logo_light', files={'file': ('light.png', png_bytes, 'image/png')}, headers={'Authorization': f'Bearer {token}'})
+    up = client.post('/api/tenants/default/branding/assets/logo_light', files={'file': ('light.png', png_bytes, 'image/png')}, headers={'Authorization': f'Bearer {token}'})
+    # Variants are generated by a background job; wait for it before listing
+    from app.core import jobs
+    job_id = up.json().get('job_id')
+    deadline = time.time() + 10
+    while job_id and jobs.get_job(job_id).status in ('queued', 'running') and time.time() < deadline:
+        time.sleep(0.02)
     resp = client.get('/api/tenants/default/branding/assets', headers={'Authorization': f'Bearer {token}'})
     assert resp.status_code == 200
     assets = resp.json()['assets']
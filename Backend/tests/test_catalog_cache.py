@@ -0,0 +1,98 @@
+import pytest
+from sqlalchemy import event, insert
+
+from app.core import catalog_cache
+from app.core.database import engine
+from app.core.resource_versions import GLOBAL, bump
+from app.models import Extra, Order, OrderItem, Service, User
+from app.plugins.loyalty.routes import calculate_extras_total
+from config import settings
+
+
+@pytest.fixture(autouse=True)
+def clean_catalog(db_session):
+    catalog_cache.invalidate()
+    yield
+    db_session.query(Order).delete()
+    db_session.query(Service).delete()
+    db_session.query(Extra).delete()
+    db_session.commit()
+    catalog_cache.invalidate()
+
+
+@pytest.fixture
+def admin_user(db_session):
+    user = db_session.query(User).first()
+    user.role = "admin"
+    db_session.commit()
+    yield user
+    user.role = "user"
+    db_session.commit()
+
+
+def _catalog_queries(fn):
+    statements = []
+    listener = lambda conn, cursor, stmt, *a: statements.append(stmt)  # noqa: E731
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        result = fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    return result, [s for s in statements if "FROM services" in s or "FROM extras" in s]
+
+
+def test_order_paths_use_snapshot_lookups(client, db_session):
+    svc = Service(category="wash", name="Cached Wash", base_price=100, loyalty_eligible=True)
+    wax = Extra(name="Cached Wax", price_map={"suv": 40})
+    polish = Extra(name="Cached Polish", price_map={"suv": 60})
+    db_session.add_all([svc, wax, polish])
+    db_session.commit()
+    client.get("/api/catalog/services")  # build
+
+    payload = {"service_id": svc.id, "quantity": 1, "extras": [{"id": wax.id, "quantity": 1}, {"id": polish.id, "quantity": 2}]}
+    r, queries = _catalog_queries(lambda: client.post("/api/orders/create", json=payload))
+    assert r.status_code == 201, r.text
+    assert queries == []
+
+    detail, queries = _catalog_queries(lambda: client.get(f"/api/orders/{r.json()['order_id']}"))
+    assert detail.json()["extras"] == ["Cached Wax", "Cached Polish"]
+    assert queries == []
+
+    bad = client.post("/api/orders/create", json={**payload, "extras": [{"id": 987654, "quantity": 1}]})
+    assert bad.status_code == 400
+
+    items = [OrderItem(extras=[{"id": wax.id, "category": "suv", "quantity": 1},
+                               {"id": polish.id, "category": "suv", "quantity": 2},
+                               {"id": 987654, "category": "suv", "quantity": 1}])]
+    assert calculate_extras_total(db_session, items) == 160
+
+
+def test_inventory_write_invalidates_snapshot(client, db_session, admin_user):
+    assert client.get("/api/catalog/extras").json() == []
+    r = client.post("/api/inventory/extras", json={"name": "Fresh Wax", "price_map": {"sedan": 30}})
+    assert r.status_code == 201, r.text
+    assert [e["name"] for e in client.get("/api/catalog/extras").json()] == ["Fresh Wax"]
+
+    client.put(f"/api/inventory/extras/{r.json()['id']}", json={"price_map": {"sedan": 35}})
+    assert client.get("/api/catalog/extras").json()[0]["price_map"] == {"sedan": 35}
+
+
+def test_other_process_writes_picked_up_via_version_counter(db_session, monkeypatch):
+    first = catalog_cache.get_catalog(db_session, settings.default_tenant)
+    assert first.services == {}
+    # Another worker (or update_prices.py): Core insert plus a version bump,
+    # no ORM events in this process
+    with engine.begin() as conn:
+        conn.execute(insert(Service).values(category="wash", name="Remote Wash", base_price=90))
+        bump(conn, [(GLOBAL, GLOBAL, catalog_cache.CATALOG_RESOURCE)])
+
+    monkeypatch.setattr(settings, "catalog_cache_check_seconds", 3600.0)
+    assert catalog_cache.get_catalog(db_session) is first  # within the check interval
+
+    monkeypatch.setattr(settings, "catalog_cache_check_seconds", 0.0)
+    refreshed = catalog_cache.get_catalog(db_session)
+    assert refreshed.version == first.version + 1
+    assert [s["name"] for s in refreshed.services_by_category["wash"]] == ["Remote Wash"]
+    # Unchanged version: only the counter is re-read
+    _, queries = _catalog_queries(lambda: catalog_cache.get_catalog(db_session))
+    assert queries == []
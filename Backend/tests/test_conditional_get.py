@@ -0,0 +1,91 @@
+from datetime import datetime
+
+from sqlalchemy import event
+
+from app.core.database import engine
+from app.core.resource_versions import GLOBAL, current_versions
+from app.models import Notification, Service, User, VisitCount
+from app.services.visit_counter import increment_visits
+
+
+def _count_statements(fn, needle):
+    statements = []
+    listener = lambda conn, cursor, stmt, *a: statements.append(stmt)  # noqa: E731
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        result = fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    return result, [s for s in statements if needle in s]
+
+
+def test_unread_count_304_skips_body_and_write_invalidates(client, db_session):
+    user = db_session.query(User).filter_by(email="testuser@example.com").first()
+    r1 = client.get("/api/notifications/unread-count")
+    assert r1.status_code == 200
+    etag = r1.headers["ETag"]
+    assert r1.headers["Cache-Control"] == "private, no-cache"
+
+    r2, body_queries = _count_statements(
+        lambda: client.get("/api/notifications/unread-count", headers={"If-None-Match": etag}),
+        "FROM notifications",
+    )
+    assert r2.status_code == 304 and r2.headers["ETag"] == etag
+    assert body_queries == []
+
+    db_session.add(Notification(tenant_id=user.tenant_id, user_id=user.id, title="t", message="m", type="system"))
+    db_session.commit()
+    r3 = client.get("/api/notifications/unread-count", headers={"If-None-Match": etag})
+    assert r3.status_code == 200
+    assert r3.headers["ETag"] != etag
+    assert r3.json()["unread_count"] >= 1
+
+
+def test_bulk_update_bumps_global_counter(db_session):
+    before = current_versions(db_session, "default", None, ["notifications"])
+    db_session.query(Notification).filter(Notification.id < 0).update({"read_at": datetime.utcnow()})
+    db_session.commit()
+    after = current_versions(db_session, "default", None, ["notifications"])
+    assert [v for v in after if v[0] == GLOBAL] != [v for v in before if v[0] == GLOBAL]
+
+
+def test_core_visit_upsert_bumps_user_counter(db_session):
+    user = db_session.query(User).filter_by(email="testuser@example.com").first()
+    before = current_versions(db_session, user.tenant_id, user.id, ["visits"])
+    increment_visits(db_session, user.tenant_id, user.id)
+    db_session.commit()
+    assert current_versions(db_session, user.tenant_id, user.id, ["visits"]) != before
+    db_session.query(VisitCount).delete()
+    db_session.commit()
+
+
+def test_public_catalog_revalidates_without_auth(client, db_session):
+    r1 = client.get("/api/catalog/services")
+    etag = r1.headers["ETag"]
+    assert client.get("/api/catalog/services", headers={"If-None-Match": etag}).status_code == 304
+
+    svc = Service(category="cond", name="Conditional Wash", base_price=100)
+    db_session.add(svc)
+    db_session.commit()
+    try:
+        r2 = client.get("/api/catalog/services", headers={"If-None-Match": etag})
+        assert r2.status_code == 200
+        assert "cond" in r2.json()
+    finally:
+        db_session.delete(svc)
+        db_session.commit()
+
+
+def test_etag_differs_per_user(client, db_session):
+    from app.plugins.auth.routes import create_access_token
+
+    if not db_session.query(User).filter_by(email="cond-other@example.com").first():
+        db_session.add(User(email="cond-other@example.com", tenant_id="default", role="user"))
+        db_session.commit()
+    mine = client.get("/api/notifications/unread-count").headers["ETag"]
+    theirs = client.get(
+        "/api/notifications/unread-count",
+        headers={"Authorization": f"Bearer {create_access_token('cond-other@example.com')}", "If-None-Match": mine},
+    )
+    assert theirs.status_code == 200
+    assert theirs.headers["ETag"] != mine
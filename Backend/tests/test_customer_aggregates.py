@@ -0,0 +1,95 @@
+from datetime import datetime, timedelta
+
+from app.core.customer_aggregates import reconcile_customer_aggregates
+from app.models import CustomerAggregate, Order, User
+from config import settings
+
+
+def _agg(db_session, user):
+    db_session.expire_all()
+    return db_session.get(CustomerAggregate, (settings.default_tenant, user.id))
+
+
+def test_aggregate_counts_order_once_when_paid(db_session, make_customer, make_order, wash_service):
+    user = make_customer("agg-once@example.com", first_name="Agg")
+    order = make_order(user, wash_service, status="pending", amount=5000)
+    assert _agg(db_session, user) is None
+
+    order.status = "paid"
+    db_session.commit()
+    order.status = "in_progress"
+    db_session.commit()
+    order.status = "completed"
+    db_session.commit()
+
+    agg = _agg(db_session, user)
+    assert (agg.order_count, agg.total_spent_cents) == (1, 5000)
+    assert agg.last_order_date == order.created_at
+
+    make_order(user, wash_service, status="completed", amount=2500,
+               created_at=datetime.utcnow() - timedelta(days=10))
+    agg = _agg(db_session, user)
+    assert (agg.order_count, agg.total_spent_cents) == (2, 7500)
+    assert agg.last_order_date == order.created_at
+
+
+def test_list_reads_aggregates_and_reconcile_repairs_drift(client, db_session, make_customer, make_order,
+                                                           wash_service):
+    from app.plugins.auth.routes import create_access_token
+
+    user = make_customer("agg-drift@example.com", first_name="Agg")
+    make_order(user, wash_service, status="paid", amount=1200)
+    # Bulk edits bypass the flush hook
+    db_session.query(Order).filter(Order.user_id == user.id).update({Order.amount: 3000})
+    db_session.commit()
+
+    admin = db_session.query(User).filter_by(email="agg-admin@example.com").first()
+    if not admin:
+        admin = User(email="agg-admin@example.com", tenant_id=settings.default_tenant, role="admin")
+        db_session.add(admin)
+        db_session.commit()
+    headers = {"Authorization": f"Bearer {create_access_token(admin.email)}"}
+
+    def listed_total():
+        data = client.get("/api/customers?limit=100&search=agg-drift", headers=headers).json()
+        return next(c["total_spent"] for c in data["customers"] if c["id"] == user.id)
+
+    assert listed_total() == 12.0
+    result = reconcile_customer_aggregates(db_session, settings.default_tenant)
+    assert result["repaired"] >= 1
+    assert listed_total() == 30.0
+    detail = client.get(f"/api/customers/{user.id}", headers=headers).json()
+    assert detail["order_count"] == 1 and detail["total_spent"] == 30.0
+
+
+def test_write_hooks_registered_by_importing_models():
+    # Jobs and scripts import only models/SessionLocal; the hooks must not depend on route imports
+    import subprocess
+    import sys
+    from pathlib import Path
+
+    code = (
+        "import app.models, sys\n"
+        "from sqlalchemy import event\n"
+        "from sqlalchemy.orm import Session, configure_mappers\n"
+        "configure_mappers()\n"  # what the first query / model instantiation does
+        "from app.analytics import report_cache\n"
+        "from app.core import (catalog_cache, customer_aggregates, first_visits, module_usage,\n"
+        "                      resource_versions, search, tenant_documents)\n"
+        "assert event.contains(Session, 'before_flush', customer_aggregates._count_paid_orders)\n"
+        "assert event.contains(Session, 'before_flush', first_visits._index_started_orders)\n"
+        "assert event.contains(Session, 'before_flush', module_usage._count_module_usage)\n"
+        "assert event.contains(Session, 'before_flush', resource_versions._bump_changed_resources)\n"
+        "assert event.contains(Session, 'before_flush', catalog_cache._collect_catalog_writes)\n"
+        "assert event.contains(Session, 'before_flush', tenant_documents._collect_changed_tenants)\n"
+        "assert event.contains(Session, 'before_flush', report_cache._collect_report_writes)\n"
+        "assert event.contains(Session, 'after_flush', search._sync_search_documents)\n"
+        "import main\n"  # route modules must not load a second copy (double-counting listener)
+        "hooks = ('catalog_cache', 'customer_aggregates', 'first_visits', 'module_usage',\n"
+        "         'resource_versions', 'search', 'tenant_documents')\n"
+        "dupes = [h for h in hooks if f'app.core.{h}' in sys.modules and f'Backend.app.core.{h}' in sys.modules]\n"
+        "assert not dupes, dupes\n"
+    )
+    proc = subprocess.run([sys.executable, "-c", code], cwd=Path(__file__).resolve().parents[1],
+                          capture_output=True, text=True, timeout=120)
+    assert proc.returncode == 0, proc.stderr[-2000:]
@@ -0,0 +1,73 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.duration_sketch import (
+    RELATIVE_ACCURACY,
+    DurationSketch,
+    duration_summary,
+    rebuild_duration_sketches,
+)
+from app.models import WashDurationBucket
+from config import settings
+
+
+def _exact(values, q):
+    s = sorted(values)
+    return s[int(q * (len(s) - 1))]
+
+
+def test_sketch_quantiles_within_accuracy_and_merge():
+    rng = random.Random(7)
+    values = [rng.randint(120, 5400) for _ in range(5000)]
+    days = [DurationSketch() for _ in range(7)]
+    for i, v in enumerate(values):
+        days[i % 7].add(v)
+    merged = DurationSketch()
+    for d in days:
+        merged.merge(d)
+
+    assert merged.count == len(values)
+    assert merged.total_seconds == sum(values)
+    for q in (0.5, 0.95):
+        exact = _exact(values, q)
+        assert abs(merged.quantile(q) - exact) <= exact * RELATIVE_ACCURACY + 1
+
+
+def test_end_wash_updates_daily_sketch(client, db_session, make_customer, make_order, wash_service):
+    user = make_customer("testuser@example.com")
+    for minutes in (10, 20, 40):
+        order = make_order(user, wash_service, status="in_progress",
+                           started_at=datetime.utcnow() - timedelta(minutes=minutes))
+        assert client.post(f"/api/payments/end-wash/{order.id}").status_code == 200
+        # Idempotent: a second end does not add another sample
+        client.post(f"/api/payments/end-wash/{order.id}")
+
+    today = datetime.utcnow().date()
+    summary = duration_summary(db_session, today, today, tenant_id=settings.default_tenant, slow_threshold=30 * 60)
+    assert summary["sample_size"] == 3
+    assert summary["average"] == pytest.approx(70 * 60 / 3, abs=2)
+    assert abs(summary["median"] - 20 * 60) <= 20 * 60 * RELATIVE_ACCURACY + 1
+    assert summary["slow_count"] == 1
+
+    from app.plugins.payments.routes import _invalidate_analytics_cache
+    _invalidate_analytics_cache()
+    dur = client.get("/api/payments/dashboard-analytics").json()["wash_duration_seconds"]
+    assert dur["sample_size"] == 3 and dur["p95"] >= dur["median"]
+
+
+def test_rebuild_matches_incremental(client, db_session, make_customer, make_order, wash_service):
+    user = make_customer("testuser@example.com")
+    for minutes in (5, 15):
+        order = make_order(user, wash_service, status="in_progress",
+                           started_at=datetime.utcnow() - timedelta(minutes=minutes))
+        client.post(f"/api/payments/end-wash/{order.id}")
+
+    def snapshot():
+        db_session.expire_all()
+        return sorted((b.day, b.bucket, b.count, b.total_seconds) for b in db_session.query(WashDurationBucket))
+
+    incremental = snapshot()
+    assert rebuild_duration_sketches(db_session) == len(incremental)
+    assert snapshot() == incremental
@@ -0,0 +1,99 @@
+import csv
+import gzip
+import io
+import json
+from datetime import datetime
+
+from app.models import Order, Payment, Service, User
+from app.plugins.auth.routes import create_access_token
+from config import settings
+
+
+def _admin_headers(db_session):
+    admin = db_session.query(User).filter_by(email="export-admin@example.com").first()
+    if not admin:
+        admin = User(email="export-admin@example.com", tenant_id=settings.default_tenant, role="admin")
+        db_session.add(admin)
+        db_session.commit()
+    return {"Authorization": f"Bearer {create_access_token(admin.email)}"}
+
+
+def _seed_payments(db_session, n: int = 5):
+    user = db_session.query(User).filter_by(email="testuser@example.com").first()
+    service = Service(category="wash", name="Export Wash", base_price=1500)
+    db_session.add(service)
+    db_session.flush()
+    now = datetime.utcnow()
+    for i in range(n):
+        order = Order(user_id=user.id, service_id=service.id, extras=[], status="completed",
+                      tenant_id=settings.default_tenant, amount=1000 + i, started_at=now)
+        db_session.add(order)
+        db_session.flush()
+        db_session.add(Payment(order_id=order.id, amount=1000 + i, status="success" if i % 2 == 0 else "failed",
+                               method="card", source="pos", created_at=now))
+    db_session.commit()
+
+
+def test_transactions_csv_matches_filters(client, db_session):
+    _seed_payments(db_session)
+    headers = _admin_headers(db_session)
+    resp = client.get("/api/exports/transactions?status=success", headers=headers)
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/csv")
+    assert "attachment" in resp.headers["content-disposition"]
+    rows = list(csv.DictReader(io.StringIO(resp.text)))
+    assert len(rows) == 3
+    assert {r["status"] for r in rows} == {"success"}
+    assert rows[0]["service_name"] == "Export Wash"
+
+
+def test_transactions_ndjson_gzip(client, db_session):
+    _seed_payments(db_session)
+    headers = _admin_headers(db_session)
+    resp = client.get("/api/exports/transactions?format=ndjson&gzip=true", headers=headers)
+    assert resp.status_code == 200
+    assert resp.headers["content-encoding"] == "gzip"
+    # httpx transparently decodes Content-Encoding
+    lines = [json.loads(line) for line in resp.text.splitlines()]
+    assert len(lines) == 5
+    assert all("amount_cents" in line for line in lines)
+
+
+def test_export_rejects_unknown_format_and_bad_dates(client, db_session):
+    headers = _admin_headers(db_session)
+    assert client.get("/api/exports/customers?format=xlsx", headers=headers).status_code == 400
+    assert client.get("/api/exports/transactions?start_date=nope", headers=headers).status_code == 400
+
+
+def test_customers_and_wash_history_exports(client, db_session):
+    _seed_payments(db_session, n=2)
+    headers = _admin_headers(db_session)
+    customers = list(csv.DictReader(io.StringIO(client.get("/api/exports/customers", headers=headers).text)))
+    assert any(r["email"] == "testuser@example.com" for r in customers)
+
+    day = datetime.utcnow().strftime("%Y-%m-%d")
+    resp = client.get(f"/api/exports/wash-history?format=ndjson&start_date={day}&end_date={day}", headers=headers)
+    assert resp.status_code == 200
+    items = [json.loads(line) for line in resp.text.splitlines()]
+    assert len(items) == 2
+    assert {i["service_name"] for i in items} == {"Export Wash"}
+
+
+def test_background_export_job_download(client, db_session, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "export_dir", str(tmp_path))
+    _seed_payments(db_session)
+    headers = _admin_headers(db_session)
+    resp = client.get("/api/exports/transactions?background=true&gzip=true", headers=headers)
+    assert resp.status_code == 202
+    job_id = resp.json()["job_id"]
+
+    status = client.get(f"/api/exports/jobs/{job_id}", headers=headers).json()
+    assert status["status"] == "success"
+    assert status["rows"] == 5
+
+    dl = client.get(f"/api/exports/jobs/{job_id}/download", headers=headers)
+    assert dl.status_code == 200
+    rows = list(csv.DictReader(io.StringIO(gzip.decompress(dl.content).decode())))
+    assert len(rows) == 5
+
+    assert client.get("/api/exports/jobs/missing", headers=headers).status_code == 404
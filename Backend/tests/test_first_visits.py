@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.first_visits import rebuild_first_visits
+from app.models import CustomerFirstVisit, User, Vehicle
+from app.plugins.auth.routes import create_access_token
+from config import settings
+
+
+@pytest.fixture
+def paid_order(make_order, wash_service):
+    return lambda user, started_at=None: make_order(user, wash_service, status="paid", started_at=started_at)
+
+
+def _first_visit(db_session, user):
+    db_session.expire_all()
+    row = db_session.get(CustomerFirstVisit, (settings.default_tenant, user.id))
+    return row.first_visit_at if row else None
+
+
+def test_start_wash_records_first_visit_once(client, db_session, make_customer, paid_order):
+    user = make_customer("first-start@example.com", first_name="First")
+    order = paid_order(user)
+    assert _first_visit(db_session, user) is None
+
+    vehicle = Vehicle(user_id=user.id, plate="FV 1", make="VW", model="Polo")
+    db_session.add(vehicle)
+    db_session.commit()
+    assert client.post(f"/api/payments/start-wash/{order.id}", json={"vehicle_id": vehicle.id}).status_code == 200
+    db_session.refresh(order)
+    first = _first_visit(db_session, user)
+    assert first == order.started_at
+
+    # A later start keeps the original date; a backdated one moves it earlier
+    paid_order(user, started_at=first + timedelta(days=1))
+    assert _first_visit(db_session, user) == first
+    backdated = first - timedelta(days=10)
+    paid_order(user, started_at=backdated)
+    assert _first_visit(db_session, user) == backdated
+
+
+def test_new_vs_returning_and_report_use_index(client, db_session, make_customer, paid_order):
+    now = datetime.utcnow()
+    new_user = make_customer("first-new@example.com", first_name="First")
+    old_user = make_customer("first-old@example.com", first_name="First")
+    paid_order(new_user, started_at=now - timedelta(hours=2))
+    paid_order(old_user, started_at=now - timedelta(days=60))
+    paid_order(old_user, started_at=now - timedelta(hours=1))
+
+    from app.plugins.payments.routes import _invalidate_analytics_cache
+    _invalidate_analytics_cache()
+    data = client.get("/api/payments/business-analytics", params={"recent_days": 7}).json()
+    assert data["first_vs_returning"] == {"new": 1, "returning": 1}
+
+    admin = User(email="first-admin@example.com", tenant_id=settings.default_tenant, role="admin")
+    db_session.add(admin)
+    db_session.commit()
+    headers = {"Authorization": f"Bearer {create_access_token(admin.email)}"}
+    summary = client.get("/api/reports/summary", params={"days": 30}, headers=headers).json()
+    assert summary["new_customers"] == 1
+
+
+def test_rebuild_matches_hook(db_session, make_customer, paid_order):
+    user = make_customer("first-rebuild@example.com", first_name="First")
+    earliest = datetime.utcnow() - timedelta(days=5)
+    paid_order(user, started_at=earliest + timedelta(days=2))
+    paid_order(user, started_at=earliest)
+    paid_order(user)  # never started
+    hooked = _first_visit(db_session, user)
+
+    assert rebuild_first_visits(db_session) >= 1
+    assert _first_visit(db_session, user) == hooked == earliest
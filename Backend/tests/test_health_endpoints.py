@@ -58,3 +58,23 @@ def test_startup_endpoint():
     d2 = r2.json()
     # After grace it should be started/steady
     assert d2["status"] == "started"
+
+
+def test_ready_reports_failed_deferred_router_load(monkeypatch):
+    import threading
+    import main
+    from app.routes import health
+
+    def _boom(module_path):
+        raise ImportError(f"cannot import {module_path}")
+
+    monkeypatch.setattr(main, "_import_router", _boom)
+    monkeypatch.setattr(main, "routers_ready", threading.Event())
+    monkeypatch.setattr(health, "_router_load_error", None)
+    main._load_deferred_routers(len(app.router.routes))
+
+    assert main.routers_ready.is_set()
+    for path in ("/health/ready-lite", "/health/ready"):
+        r = client.get(path, headers=COMMON_HEADERS)
+        assert r.status_code == 503 and "router load failed" in r.json()["detail"]
+    assert client.get("/health/live", headers=COMMON_HEADERS).status_code == 200
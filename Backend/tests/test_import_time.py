@@ -0,0 +1,49 @@
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parents[1]
+# Generous default so slow CI boxes pass; tighten locally with IMPORT_TIME_BUDGET_MS
+BUDGET_MS = float(os.environ.get("IMPORT_TIME_BUDGET_MS", "6000"))
+# Only needed by specific endpoints; importing them at startup is a regression
+HEAVY_MODULES = ("qrcode", "sendgrid", "firebase_admin", "slowapi", "PIL.Image", "requests")
+
+_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def _importtime(code: str, **env_overrides) -> dict:
+    env = {**os.environ, "DATABASE_URL": "sqlite:///:memory:", "SQLALCHEMY_ECHO": "false", **env_overrides}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=BACKEND, env=env, capture_output=True, text=True, timeout=120,
+    )
+    assert proc.returncode == 0, proc.stderr[-2000:]
+    cumulative = {}
+    for m in _LINE.finditer(proc.stderr):
+        cumulative.setdefault(m.group(4), int(m.group(2)) / 1000)
+    return {"cumulative_ms": cumulative, "stdout": proc.stdout}
+
+
+def test_main_import_within_budget_and_skips_heavy_optional_deps():
+    result = _importtime("import main")["cumulative_ms"]
+    assert result["main"] < BUDGET_MS, f"import main took {result['main']:.0f}ms (budget {BUDGET_MS:.0f}ms)"
+    loaded = [m for m in HEAVY_MODULES if m in result]
+    assert not loaded, f"imported at startup: {loaded}"
+
+
+def test_deferred_routers_serve_health_first_then_plugins():
+    code = (
+        "import main\n"
+        "from fastapi.testclient import TestClient\n"
+        "c = TestClient(main.app)\n"
+        "print('RESULT', c.get('/health/live').status_code)\n"
+        "assert main.routers_ready.wait(60)\n"
+        "paths = [getattr(r, 'path', '') for r in main.app.router.routes]\n"
+        "print('RESULT', any(p.startswith('/api/catalog') for p in paths))\n"
+        "print('RESULT', c.get('/api/openapi.json').status_code)\n"
+    )
+    stdout = _importtime(code, DEFER_ROUTERS="true")["stdout"]  # access logs share stdout
+    out = [line.split()[1] for line in stdout.splitlines() if line.startswith("RESULT ")]
+    assert out == ["200", "True", "200"]
@@ -0,0 +1,73 @@
+import pytest
+
+from app.core import invalidation, rate_limit, tenant_context, tenant_documents
+from app.core.invalidation import Bus, MemoryTransport
+from app.models import Tenant
+from config import settings
+
+
+@pytest.fixture
+def peer():
+    """A second "worker" sharing a broker with this process's bus."""
+    transport = MemoryTransport()
+    invalidation.bus.start(transport)
+    other = Bus()
+    other.start(transport)
+    received = []
+    for ns in ("tenant", "rate_limit", "catalog"):
+        other.subscribe(ns, lambda key, data, ns=ns: received.append((ns, key, data)))
+    yield other, received
+    invalidation.stop()
+    other.stop()
+
+
+def test_publish_runs_locally_once_and_on_peers():
+    transport = MemoryTransport()
+    a, b = Bus(), Bus()
+    a.start(transport)
+    b.start(transport)
+    seen_a, seen_b = [], []
+    a.subscribe("catalog", lambda key, data: seen_a.append(key))
+    b.subscribe("catalog", lambda key, data: seen_b.append(key))
+    b.subscribe("catalog", lambda key, data: 1 / 0)  # a failing handler does not stop others
+
+    a.publish("catalog", "t1")
+    assert seen_a == ["t1"] and seen_b == ["t1"]
+    assert b.metrics["received"] == 1 and b.metrics["handler_errors"] == 1
+    b._resync()
+    assert seen_b == ["t1", None]
+
+
+def test_rate_limit_overrides_propagate(peer):
+    other, received = peer
+    rate_limit.set_limit("bus_scope", 7, 30)
+    assert rate_limit.get_limit("bus_scope", 1, 1) == (7, 30.0)
+    assert ("rate_limit", "bus_scope", {"capacity": 7, "per": 30}) in received
+
+    # Another worker handles DELETE /api/admin/rate-limits/bus_scope
+    other.publish("rate_limit", "bus_scope", {"deleted": True})
+    assert rate_limit.get_limit("bus_scope", 1, 1) == (1, 1)
+    assert rate_limit.delete_limit("bus_scope") is False
+
+
+def test_tenant_writes_invalidate_peer_caches(db_session, peer):
+    other, received = peer
+    tid = settings.default_tenant
+    tenant_context._cache_set("bus.example.com", tid)
+    tenant_context._cache_set("sub:other", "someone-else")
+
+    # Committed tenant change made in another worker
+    other.publish("tenant", tid)
+    assert "bus.example.com" not in tenant_context._TENANT_CACHE
+    assert "sub:other" in tenant_context._TENANT_CACHE
+
+    # Committed tenant change made here reaches the peer
+    before = tenant_documents.METRICS["invalidations"]
+    tenant = db_session.get(Tenant, tid)
+    previous, tenant.theme_color = tenant.theme_color, "#123456"
+    db_session.commit()
+    assert ("tenant", tid, None) in received
+    assert tenant_documents.METRICS["invalidations"] == before + 1
+    tenant.theme_color = previous
+    db_session.commit()
+    tenant_context._invalidate_tenant_hosts(None)
@@ -0,0 +1,124 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.pagination import clear_totals_cache, decode_cursor, encode_cursor
+from app.models import AuditLog, Order, Service, User
+from config import settings
+
+
+def _seed_history(db_session, n: int = 7):
+    user = db_session.query(User).first()
+    service = Service(category="wash", name="Cursor Wash", base_price=1000)
+    db_session.add(service)
+    db_session.flush()
+    base = datetime.utcnow().replace(hour=12, minute=0, second=0, microsecond=0)
+    # Two orders share a started_at to exercise the id tie-break
+    for i in range(n):
+        db_session.add(Order(
+            user_id=user.id,
+            service_id=service.id,
+            extras=[],
+            status="in_progress",
+            started_at=base - timedelta(minutes=i if i != 1 else 0),
+        ))
+    db_session.commit()
+    return base
+
+
+def test_cursor_round_trip_rejects_mismatched_sort():
+    ts = datetime(2025, 1, 2, 3, 4, 5)
+    cur = encode_cursor("created_at", True, ts, 42)
+    assert decode_cursor(cur, "created_at", True) == (ts, 42)
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor(cur, "created_at", False)
+    assert exc.value.status_code == 400
+    with pytest.raises(HTTPException):
+        decode_cursor("not-a-cursor", "created_at", True)
+
+
+def test_history_cursor_pages_cover_all_rows(client, db_session):
+    db_session.query(Order).delete()
+    db_session.commit()
+    clear_totals_cache()
+    base = _seed_history(db_session)
+    day = base.strftime("%Y-%m-%d")
+
+    first = client.get(f"/api/payments/history?start_date={day}&end_date={day}&limit=3").json()
+    assert first["total"] == 7
+    seen = [i["order_id"] for i in first["items"]]
+    cursor = first["next_cursor"]
+    while cursor:
+        page = client.get(f"/api/payments/history?start_date={day}&end_date={day}&limit=3&cursor={cursor}").json()
+        assert page["total"] == 7
+        seen.extend(i["order_id"] for i in page["items"])
+        cursor = page["next_cursor"]
+
+    assert len(seen) == 7 and len(set(seen)) == 7
+    # Same ordering as offset pagination
+    offset_ids = [i["order_id"] for i in client.get(
+        f"/api/payments/history?start_date={day}&end_date={day}&limit=10").json()["items"]]
+    assert seen == offset_ids
+
+
+def test_cursor_totals_are_cached_per_tenant(client, db_session, monkeypatch):
+    from types import SimpleNamespace
+    from app.plugins.payments import routes as payments_routes
+    from app.plugins.users import routes as users_routes
+
+    keys = []
+    for module in (payments_routes, users_routes):
+        monkeypatch.setattr(module, "current_tenant_id", SimpleNamespace(get=lambda default: "tenant-a"))
+        monkeypatch.setattr(module, "cached_total", lambda key, compute: keys.append(key) or compute())
+    day = _seed_history(db_session, 3).strftime("%Y-%m-%d")
+    cursor = client.get(f"/api/payments/history?start_date={day}&end_date={day}&limit=1").json()["next_cursor"]
+    client.get(f"/api/payments/history?start_date={day}&end_date={day}&limit=1&cursor={cursor}")
+    cursor = client.get("/api/users?per_page=1").json()["next_cursor"]
+    client.get(f"/api/users?per_page=1&cursor={cursor}")
+    assert [k[:2] for k in keys] == [("history", "tenant-a"), ("users", "tenant-a")]
+
+
+def test_history_invalid_cursor_returns_400(client):
+    resp = client.get("/api/payments/history?cursor=bogus")
+    assert resp.status_code == 400
+
+
+def test_users_cursor_matches_offset_order(client, db_session):
+    for i in range(5):
+        email = f"cursor-user{i}@example.com"
+        if not db_session.query(User).filter_by(email=email).first():
+            db_session.add(User(email=email, first_name=f"Cur{i % 2}", tenant_id=settings.default_tenant, role="user"))
+    db_session.commit()
+
+    params = "per_page=2&sort_by=first_name&sort_order=desc"
+    expected = [u["id"] for u in client.get(f"/api/users?{params}&per_page=500").json()["items"]]
+    page = client.get(f"/api/users?{params}").json()
+    collected = [u["id"] for u in page["items"]]
+    while page["next_cursor"]:
+        page = client.get(f"/api/users?{params}&cursor={page['next_cursor']}").json()
+        collected.extend(u["id"] for u in page["items"])
+    assert collected == expected
+
+
+def test_obs_audit_cursor_header(client, db_session):
+    from app.plugins.auth.routes import create_access_token
+
+    admin = db_session.query(User).filter_by(email="cursor-audit@example.com").first()
+    if not admin:
+        admin = User(email="cursor-audit@example.com", tenant_id=settings.default_tenant, role="developer")
+        db_session.add(admin)
+    now = datetime.utcnow()
+    for i in range(4):
+        db_session.add(AuditLog(tenant_id=settings.default_tenant, action="cursor.test", created_at=now))
+    db_session.commit()
+    headers = {"Authorization": f"Bearer {create_access_token(admin.email)}"}
+
+    resp = client.get("/api/obs/audit?action_prefix=cursor.&limit=3", headers=headers)
+    assert resp.status_code == 200
+    ids = [r["id"] for r in resp.json()]
+    nxt = resp.headers.get("X-Next-Cursor")
+    assert nxt
+    resp2 = client.get(f"/api/obs/audit?action_prefix=cursor.&limit=3&cursor={nxt}", headers=headers)
+    ids.extend(r["id"] for r in resp2.json())
+    assert len(ids) == len(set(ids)) >= 4
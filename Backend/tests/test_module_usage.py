@@ -0,0 +1,88 @@
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import event
+from sqlalchemy.orm.attributes import flag_modified
+
+from app.core import module_usage
+from app.core.authz import require_quota
+from app.core.database import engine
+from app.models import ModuleUsageDaily, Payment, Redemption, Reward, Tenant, User
+from config import settings
+
+TID = settings.default_tenant
+
+
+@pytest.fixture
+def user(db_session):
+    user = db_session.query(User).filter_by(email="testuser@example.com").first()
+    yield user
+    db_session.rollback()
+    db_session.query(ModuleUsageDaily).delete()
+    tenant = db_session.get(Tenant, TID)
+    (tenant.config or {}).pop("subscription", None)
+    flag_modified(tenant, "config")
+    user.role = "user"
+    db_session.commit()
+
+
+def test_writes_bump_daily_counters(db_session, user, make_order):
+    orders = [make_order(user) for _ in range(3)]
+    make_order(user, created_at=datetime.utcnow() - timedelta(days=10))
+    reward = Reward(tenant_id=TID, title="Free", type="milestone", milestone=5)
+    db_session.add(reward)
+    db_session.flush()
+    db_session.add(Redemption(tenant_id=TID, user_id=user.id, reward_id=reward.id, milestone=5))
+    payment = Payment(order_id=orders[0].id, amount=100, status="pending", reference="usage-1")
+    db_session.add(payment)
+    db_session.commit()
+    assert module_usage.usage_window(db_session, TID, 30, modules=["billing"]) == {"billing": 0}
+
+    payment.status = "success"
+    db_session.commit()
+    payment.status = "success"  # unchanged: not counted twice
+    db_session.commit()
+    db_session.add(Payment(order_id=orders[1].id, amount=100, status="success", reference="usage-2"))
+    db_session.commit()
+
+    statements = []
+    listener = lambda conn, cursor, stmt, *a: statements.append(stmt)  # noqa: E731
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        week = module_usage.usage_window(db_session, TID, 7)
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    assert {k: week[k] for k in ("core", "loyalty", "billing")} == {"core": 3, "loyalty": 1, "billing": 2}
+    assert module_usage.usage_window(db_session, TID, 30)["core"] == 4
+    assert not any("FROM orders" in s or "FROM payments" in s for s in statements)
+
+    # The rebuild job recomputes the same numbers from the source tables
+    db_session.query(ModuleUsageDaily).delete()
+    db_session.commit()
+    module_usage.rebuild_usage(db_session, TID)
+    assert module_usage.usage_window(db_session, TID, 30, modules=["core", "loyalty", "billing"]) == {
+        "core": 4, "loyalty": 1, "billing": 2,
+    }
+
+
+def test_usage_endpoint_and_quota_dependency(client, db_session, user, make_order):
+    tenant = db_session.get(Tenant, TID)
+    tenant.config = {**(tenant.config or {}), "subscription": {"module_limits": {"core": 2, "loyalty": None}}}
+    user.role = "admin"
+    db_session.commit()
+
+    guard = require_quota("core")
+    make_order(user)
+    assert guard(user=user, db=db_session) is user
+    make_order(user)
+    with pytest.raises(HTTPException) as exc:
+        guard(user=user, db=db_session)
+    assert exc.value.status_code == 402
+    assert exc.value.detail["used"] == 2 and exc.value.detail["limit"] == 2
+    assert module_usage.check_quota(db_session, TID, "loyalty").allowed
+
+    r = client.get("/api/subscriptions/usage?window=7d", headers={"X-Tenant-ID": TID})
+    assert r.status_code == 200, r.text
+    core = next(row for row in r.json() if row["module"] == "core")
+    assert core == {"module": "core", "count": 2, "limit": 2}
@@ -0,0 +1,92 @@
+import pytest
+from sqlalchemy import event
+
+from app.core.database import engine
+from app.models import Extra, Order, OrderVehicle, Service, User, Vehicle
+from app.services import order_batch
+
+
+@pytest.fixture
+def catalog(db_session):
+    svc = Service(category="wash", name="Batch Wash", base_price=100)
+    wax = Extra(name="Batch Wax", price_map={"sedan": 20})
+    db_session.add_all([svc, wax])
+    db_session.commit()
+    yield svc, wax
+    db_session.query(OrderVehicle).delete()
+    db_session.query(Order).delete()
+    db_session.query(Service).delete()
+    db_session.query(Extra).delete()
+    db_session.commit()
+
+
+def _item(key, svc, extras=()):
+    return {"client_key": key, "service_id": svc.id, "quantity": 1,
+            "extras": [{"id": e, "quantity": 1} for e in extras]}
+
+
+def test_batch_creates_orders_in_one_transaction(client, db_session, catalog):
+    svc, wax = catalog
+    user = db_session.query(User).filter_by(email="testuser@example.com").first()
+    vehicle = Vehicle(user_id=user.id, plate="BATCH-1", make="VW", model="Polo")
+    db_session.add(vehicle)
+    db_session.commit()
+
+    items = [_item(f"bay1-{i}", svc, [wax.id]) for i in range(50)]
+    client.get("/api/catalog/extras")  # warm the catalog snapshot
+    statements = []
+    listener = lambda conn, cursor, stmt, *a: statements.append(stmt)  # noqa: E731
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        r = client.post("/api/orders/batch", json={"orders": items})
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    assert r.status_code == 200, r.text
+    results = r.json()["results"]
+    assert [x["status"] for x in results] == ["created"] * 50
+    assert len({x["payment_pin"] for x in results}) == 50
+    assert all(x["default_vehicle_id"] == vehicle.id for x in results)
+    # Reads do not grow with the batch: no per-item validation, PIN loops or vehicle lookups
+    # (the INSERTs are one insertmanyvalues batch on Postgres; SQLite runs them row by row)
+    selects = [s for s in statements if s.lstrip().upper().startswith("SELECT")]
+    assert not any("FROM extras" in s or "FROM services" in s for s in selects)
+    assert sum("FROM orders" in s for s in selects) == 2  # stored client keys, PINs in use
+    assert sum("FROM vehicles" in s for s in selects) == 1
+
+    stored = db_session.query(Order).filter(Order.client_key.like("bay1-%")).all()
+    assert len(stored) == 50
+    assert all(o.tenant_id == user.tenant_id and len(o.vehicles) == 1 for o in stored)
+
+
+def test_replay_is_idempotent_and_invalid_items_reported(client, db_session, catalog):
+    svc, wax = catalog
+    first = client.post("/api/orders/batch", json={"orders": [_item("k1", svc), _item("k2", svc)]}).json()["results"]
+
+    replay = client.post("/api/orders/batch", json={"orders": [
+        _item("k1", svc),
+        _item("k3", svc, [999999]),
+        {**_item("k4", svc), "service_id": 999999},
+        _item("k5", svc),
+        _item("k5", svc),
+    ]}).json()["results"]
+    assert [x["status"] for x in replay] == ["duplicate", "invalid", "invalid", "created", "duplicate"]
+    assert replay[0]["order_id"] == first[0]["order_id"]
+    assert replay[0]["payment_pin"] == first[0]["payment_pin"]
+    assert replay[1]["error"] == "Invalid extra id 999999"
+    assert replay[3]["order_id"] == replay[4]["order_id"]
+    assert db_session.query(Order).filter(Order.client_key.isnot(None)).count() == 3
+
+
+def test_pin_allocation_skips_used_pins(db_session, catalog, monkeypatch):
+    svc, _ = catalog
+    monkeypatch.setattr(order_batch, "PIN_SPACE", ("1000", "1001", "1002"))
+    user = db_session.query(User).filter_by(email="testuser@example.com").first()
+    db_session.add(Order(service_id=svc.id, user_id=user.id, tenant_id=user.tenant_id, payment_pin="1001", extras=[]))
+    db_session.commit()
+
+    from app.plugins.orders.schemas import OrderBatchItem
+    items = [OrderBatchItem(**_item(k, svc)) for k in ("a", "b", "c")]
+    results = order_batch.ingest_orders(db_session, user, items)
+    assert sorted(x["payment_pin"] for x in results[:2] if x["payment_pin"]) == ["1000", "1002"]
+    assert [x["status"] for x in results].count("invalid") == 1
+    assert "No free payment pin" in [x["error"] for x in results]
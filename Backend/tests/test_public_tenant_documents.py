@@ -0,0 +1,105 @@
+import json
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event
+from fastapi.testclient import TestClient
+
+from app.core import tenant_documents
+from app.core.database import SessionLocal, engine
+from app.main import app
+from app.models import Tenant, TenantBranding, User
+from app.plugins.auth.routes import create_access_token
+from config import settings
+
+client = TestClient(app)
+HOST = {"Host": "docs.example.test"}
+
+
+@pytest.fixture(autouse=True)
+def docs_tenant(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "static_dir", str(tmp_path))
+    with SessionLocal() as db:
+        if not db.query(Tenant).filter_by(id="docs").first():
+            db.add(Tenant(id="docs", name="Docs Wash", loyalty_type="standard", vertical_type="carwash",
+                          primary_domain="docs.example.test", created_at=datetime.utcnow(), config={}))
+        if not db.query(User).filter_by(email="docs-admin@example.com").first():
+            db.add(User(email="docs-admin@example.com", tenant_id="docs", role="admin"))
+        db.query(TenantBranding).filter_by(tenant_id="docs").delete()
+        db.commit()
+    tenant_documents.invalidate()
+    yield
+    tenant_documents.invalidate()
+
+
+def _auth():
+    return {"Authorization": f"Bearer {create_access_token('docs-admin@example.com')}"}
+
+
+def test_theme_strong_etag_and_304():
+    r1 = client.get("/api/public/tenant-theme", headers=HOST)
+    assert r1.status_code == 200
+    assert r1.json()["public_name"] == "Docs Wash"
+    etag = r1.headers["ETag"]
+    assert etag.startswith('"') and not etag.startswith("W/")
+    assert "stale-while-revalidate" in r1.headers["Cache-Control"]
+
+    r2 = client.get("/api/public/tenant-theme", headers={**HOST, "If-None-Match": f'"other", {etag}'})
+    assert r2.status_code == 304
+    assert r2.headers["ETag"] == etag
+
+
+def test_cached_documents_skip_branding_queries():
+    client.get("/api/public/tenant-manifest", headers=HOST)
+    statements = []
+    listener = lambda conn, cursor, stmt, *a: statements.append(stmt)  # noqa: E731
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        for path in ("/api/public/tenant-meta", "/api/public/tenant-theme", "/api/public/tenant-manifest"):
+            assert client.get(path, headers=HOST).status_code == 200
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    assert not [s for s in statements if "tenant_branding" in s]
+
+
+def test_branding_update_rebuilds_theme_and_manifest(tmp_path):
+    before = client.get("/api/public/tenant-theme", headers=HOST).headers["ETag"]
+    assert client.get("/api/public/tenant-manifest", headers=HOST).json()["icons"] == []
+
+    icon_dir = tmp_path / "branding" / "docs"
+    icon_dir.mkdir(parents=True)
+    (icon_dir / "assets.json").write_text(json.dumps(
+        {"app_icon-abc": {"variants": {"128": {"png": "/static/branding/docs/app_icon-abc-128.png"}}}}
+    ))
+    r = client.put("/api/tenants/docs/branding", json={"primary_color": "#112233",
+                                                       "app_icon_url": "/static/branding/docs/app_icon-abc.png"},
+                   headers=_auth())
+    assert r.status_code == 200, r.text
+
+    theme = client.get("/api/public/tenant-theme", headers={**HOST, "If-None-Match": before})
+    assert theme.status_code == 200
+    assert theme.json()["primary_color"] == "#112233"
+    manifest = client.get("/api/public/tenant-manifest", headers=HOST).json()
+    assert manifest["theme_color"] == "#112233"
+    assert manifest["icons"] == [{"src": "/static/branding/docs/app_icon-abc-128.png", "sizes": "128x128", "type": "image/png"}]
+
+
+def test_tenant_commit_invalidates_meta():
+    first = client.get("/api/public/tenant-meta", headers=HOST).json()
+    with SessionLocal() as db:
+        t = db.query(Tenant).filter_by(id="docs").first()
+        t.name = "Renamed Wash"
+        db.commit()
+    try:
+        assert client.get("/api/public/tenant-meta", headers=HOST).json()["name"] == "Renamed Wash"
+    finally:
+        with SessionLocal() as db:
+            db.query(Tenant).filter_by(id="docs").first().name = first["name"]
+            db.commit()
+
+
+def test_etag_matches():
+    assert tenant_documents.etag_matches('W/"abc"', '"abc"')
+    assert tenant_documents.etag_matches("*", '"abc"')
+    assert not tenant_documents.etag_matches('"abd"', '"abc"')
+    assert not tenant_documents.etag_matches(None, '"abc"')
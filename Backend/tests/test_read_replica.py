@@ -0,0 +1,101 @@
+import pytest
+from starlette.requests import Request
+
+from app.core import database
+from app.core.database import Base, get_read_db
+
+
+@pytest.fixture
+def replica(tmp_path):
+    database.configure_replica(f"sqlite:///{tmp_path / 'replica.db'}")
+    Base.metadata.create_all(bind=database.read_engine)
+    database._recent_writers.clear()
+    yield database.read_engine
+    database.configure_replica(None)
+    database._recent_writers.clear()
+
+
+def _request(token=None):
+    headers = [(b"authorization", f"Bearer {token}".encode())] if token else []
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers, "client": ("1.2.3.4", 1)})
+
+
+def _bind_for(request):
+    gen = get_read_db(request)
+    db = next(gen)
+    try:
+        return db.get_bind()
+    finally:
+        gen.close()
+
+
+def test_without_replica_reads_use_primary():
+    assert database.ReadSessionLocal is None
+    assert _bind_for(_request()) is database.engine
+
+
+def test_reads_go_to_replica_unless_lagging(replica, monkeypatch):
+    assert _bind_for(_request("a")) is replica
+
+    monkeypatch.setattr(database, "_probe_replica_lag", lambda: 60.0)
+    database._lag_cache.update(value=None, at=0.0)
+    assert _bind_for(_request("a")) is database.engine
+
+
+def test_client_reads_its_own_writes_from_primary(replica, client):
+    assert client.post("/api/analytics/customers/refresh", headers={"Authorization": "Bearer writer"}).status_code == 200
+
+    assert _bind_for(_request("writer")) is database.engine
+    assert _bind_for(_request("someone-else")) is replica
+
+
+def test_reporting_routes_read_from_replica(replica, client):
+    # Replica has no tenant row yet: a 404 proves the query ran there
+    from app.models import User
+    from app.plugins.auth.routes import create_access_token
+    from config import settings
+
+    with database.SessionLocal() as db:
+        admin = db.query(User).filter_by(email="replica-admin@example.com").first()
+        if not admin:
+            db.add(User(email="replica-admin@example.com", tenant_id=settings.default_tenant, role="admin"))
+            db.commit()
+    headers = {"Authorization": f"Bearer {create_access_token('replica-admin@example.com')}"}
+    assert client.get("/api/reports/summary?days=29", headers=headers).status_code == 404
+
+
+def test_cached_report_windows_are_built_on_the_primary(replica, client):
+    # Replica has no tenant row: only a build on the primary can succeed and be cached
+    from app.analytics import report_cache
+    from app.models import User
+    from app.plugins.auth.routes import create_access_token
+    from config import settings
+
+    with database.SessionLocal() as db:
+        if not db.query(User).filter_by(email="replica-admin@example.com").first():
+            db.add(User(email="replica-admin@example.com", tenant_id=settings.default_tenant, role="admin"))
+            db.commit()
+    headers = {"Authorization": f"Bearer {create_access_token('replica-admin@example.com')}"}
+    report_cache.invalidate()
+    try:
+        assert client.get("/api/reports/summary?days=30", headers=headers).status_code == 200
+        assert report_cache.stats()["entries"] == 1
+    finally:
+        report_cache.invalidate()
+
+
+def test_replica_sessions_set_the_tenant_guc(replica):
+    from types import SimpleNamespace
+    from app.core.tenant_context import current_tenant_id
+
+    executed = []
+    pg_conn = SimpleNamespace(dialect=SimpleNamespace(name="postgresql"),
+                              execute=lambda stmt, params: executed.append((str(stmt), params)))
+    token = current_tenant_id.set("replica-tenant")
+    try:
+        with database.ReadSessionLocal() as db:
+            for listener in db.dispatch.after_begin:
+                listener(db, None, pg_conn)
+    finally:
+        current_tenant_id.reset(token)
+    assert executed == [("SELECT set_config('app.tenant_id', :tid, false)", {"tid": "replica-tenant"})]
@@ -0,0 +1,74 @@
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import event
+
+from app.core import jobs, redemption_expiry
+from app.core.database import engine
+from app.models import Redemption, Reward, Tenant, User
+from config import settings
+
+NOW = datetime.utcnow()
+OLD = NOW - timedelta(days=redemption_expiry.EXPIRY_DAYS + 1)
+
+
+@pytest.fixture
+def seeded(db_session):
+    if not db_session.query(Tenant).filter_by(id="expiry-b").first():
+        db_session.add(Tenant(id="expiry-b", name="Expiry B", loyalty_type="standard", created_at=NOW))
+    user = db_session.query(User).filter_by(email="testuser@example.com").first()
+    reward = Reward(tenant_id=settings.default_tenant, title="Free wash", type="milestone", milestone=5)
+    db_session.add(reward)
+    db_session.flush()
+
+    def add(tenant_id, milestone, created_at, status="pending"):
+        db_session.add(Redemption(tenant_id=tenant_id, user_id=user.id, reward_id=reward.id,
+                                  milestone=milestone, created_at=created_at, status=status))
+
+    for m in range(1, 6):
+        add(settings.default_tenant, m, OLD)
+    add(settings.default_tenant, 6, NOW - timedelta(days=1))  # still valid
+    add(settings.default_tenant, 7, OLD - timedelta(days=30), status="expired")
+    add(settings.default_tenant, 7, OLD)  # re-issued voucher for an already-expired milestone
+    add("expiry-b", 100, OLD)
+    db_session.commit()
+    return user
+
+
+def test_sweep_expires_in_chunks_per_tenant(db_session, seeded):
+    statements = []
+    listener = lambda conn, cursor, stmt, *a: statements.append(stmt)  # noqa: E731
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        stats = redemption_expiry.expire_redemptions(db_session, now=NOW, batch_size=2)
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+
+    assert stats["expired"] == 6
+    assert stats["tenants"] == {settings.default_tenant: 5, "expiry-b": 1}
+    assert stats["batches"] == 3 + 1  # 2 + 2 + 1 for default, 1 for expiry-b
+    assert stats["conflicts"] == 1
+    assert stats["duration_ms"] >= 0
+    # Set-based: no per-row SELECT of redemptions into Python
+    assert sum(s.lstrip().upper().startswith("UPDATE REDEMPTIONS") for s in statements) == 4
+
+    by_milestone = {(r.tenant_id, r.milestone, r.status) for r in db_session.query(Redemption).all()}
+    assert (settings.default_tenant, 6, "pending") in by_milestone
+    assert (settings.default_tenant, 7, "pending") in by_milestone
+    assert all((settings.default_tenant, m, "expired") in by_milestone for m in range(1, 6))
+    assert ("expiry-b", 100, "expired") in by_milestone
+
+    assert redemption_expiry.expire_redemptions(db_session, now=NOW)["expired"] == 0
+
+
+def test_expire_endpoint_runs_job_off_request_path(client, db_session, seeded):
+    r = client.post("/api/loyalty/expire-redemptions")
+    assert r.status_code == 200
+    job_id = r.json()["job_id"]
+    deadline = time.time() + 5
+    while jobs.get_job(job_id).status in ("queued", "running") and time.time() < deadline:
+        time.sleep(0.02)
+    rec = jobs.get_job(job_id)
+    assert rec.status == "success", rec.error
+    assert rec.result["expired"] == 6 and rec.result["conflicts"] == 1
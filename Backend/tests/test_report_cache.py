@@ -0,0 +1,103 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event
+
+from app.analytics import report_cache
+from app.core.database import engine
+from app.models import Order, Service, User
+from app.plugins.auth.routes import create_access_token
+from config import settings
+
+TID = settings.default_tenant
+
+
+@pytest.fixture
+def admin_headers(db_session):
+    report_cache.invalidate()
+    admin = User(email="cache-admin@example.com", tenant_id=TID, role="admin")
+    svc = Service(category="wash", name="Cache Wash", base_price=1000)
+    db_session.add_all([admin, svc])
+    db_session.flush()
+    db_session.add(Order(user_id=admin.id, service_id=svc.id, tenant_id=TID, extras=[], status="completed",
+                         amount=2500, created_at=datetime.utcnow()))
+    db_session.commit()
+    yield {"Authorization": f"Bearer {create_access_token(admin.email)}"}
+    db_session.query(Order).delete()
+    db_session.query(Service).delete()
+    db_session.query(User).filter_by(email=admin.email).delete()
+    db_session.commit()
+    report_cache.invalidate()
+
+
+class _Statements(list):
+    def __enter__(self):
+        event.listen(engine, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(engine, "before_cursor_execute", self._record)
+
+    def _record(self, conn, cursor, stmt, *args):
+        self.append(stmt)
+
+    def orders(self):
+        return sum("FROM orders" in s or "JOIN orders" in s for s in self)
+
+
+def test_standard_window_cached_until_orders_change(client, db_session, admin_headers):
+    first = client.get("/api/reports/business-summary?days=30", headers=admin_headers).json()
+    assert first["total_revenue"] == 25.0
+    with _Statements() as statements:
+        assert client.get("/api/reports/business-summary?days=30", headers=admin_headers).json() == first
+    assert statements.orders() == 0
+
+    # A wash starting does not touch report columns
+    order = db_session.query(Order).first()
+    order.started_at = datetime.utcnow()
+    db_session.commit()
+    with _Statements() as statements:
+        client.get("/api/reports/business-summary?days=30", headers=admin_headers)
+    assert statements.orders() == 0
+
+    db_session.add(Order(user_id=order.user_id, service_id=order.service_id, tenant_id=TID, extras=[],
+                         status="completed", amount=1500, created_at=datetime.utcnow()))
+    db_session.commit()
+    assert client.get("/api/reports/business-summary?days=30", headers=admin_headers).json()["total_revenue"] == 40.0
+
+
+def test_adhoc_window_runs_live(client, admin_headers):
+    live = report_cache.METRICS["live"]
+    for _ in range(2):
+        with _Statements() as statements:
+            r = client.get("/api/reports/top-services?days=12", headers=admin_headers)
+        assert r.json()[0]["service_name"] == "Cache Wash"
+        assert statements.orders() == 1
+    assert report_cache.METRICS["live"] == live + 2
+    assert report_cache.stats()["entries"] == 0
+
+
+def test_warm_builds_standard_windows_once(client, db_session, admin_headers):
+    stats = report_cache.warm(db_session)
+    assert stats["tenants"] == 1 and stats["failed"] == 0
+    assert stats["built"] == len(report_cache.STANDARD_WINDOWS) * 4
+    assert report_cache.warm(db_session)["built"] == 0
+
+    with _Statements() as statements:
+        for path in ("business-summary", "revenue-chart", "top-services", "loyalty-stats"):
+            assert client.get(f"/api/reports/{path}?days=90", headers=admin_headers).status_code == 200
+    assert statements.orders() == 0
+
+
+def test_build_overlapping_invalidation_is_not_stored(db_session, admin_headers, monkeypatch):
+    builder = report_cache._builders["loyalty_stats"]
+
+    def racing(db, tenant_id, days):
+        value = builder(db, tenant_id, days)
+        report_cache.invalidate(tenant_id)  # a write committed mid-build
+        return value
+
+    monkeypatch.setitem(report_cache._builders, "loyalty_stats", racing)
+    value = report_cache.get_or_build(db_session, TID, "loyalty_stats", 7)
+    assert value["active_members"] == 1
+    assert report_cache.stats()["entries"] == 0
@@ -0,0 +1,89 @@
+from datetime import datetime
+
+from app.core import search as search_index
+from app.models import SearchDocument, User, Vehicle
+from config import settings
+
+
+def _user(db_session, email, **kw):
+    u = db_session.query(User).filter_by(email=email).first()
+    if not u:
+        u = User(email=email, tenant_id=settings.default_tenant, role="user", created_at=datetime.utcnow(), **kw)
+        db_session.add(u)
+        db_session.commit()
+    return u
+
+
+def test_normalisation_helpers():
+    assert search_index.normalize_phone("+27 82 123 4567") == ["27821234567", "0821234567"]
+    assert search_index.normalize_phone("082-123-4567") == ["0821234567", "27821234567"]
+    assert search_index.normalize_plate("CA 123-456") == "ca123456"
+    assert search_index.query_terms("CA 123") == [["ca", "123"], ["ca123"]]
+    assert search_index.query_terms("+27 82 1") == [["27821"]]
+
+
+def test_documents_follow_orm_changes(db_session):
+    u = _user(db_session, "search-sync@example.com", first_name="Zanele", phone="0825550001")
+    doc = db_session.query(SearchDocument).filter_by(entity_type="user", entity_id=u.id).one()
+    assert "zanele" in doc.content and "27825550001" in doc.content
+
+    u.first_name = "Thandi"
+    db_session.commit()
+    db_session.refresh(doc)
+    assert "thandi" in doc.content and "zanele" not in doc.content
+
+    v = Vehicle(user_id=u.id, plate="GP 77-88", make="Toyota", model="Hilux")
+    db_session.add(v)
+    db_session.commit()
+    vdoc = db_session.query(SearchDocument).filter_by(entity_type="vehicle", entity_id=v.id).one()
+    assert vdoc.owner_user_id == u.id and vdoc.tenant_id == settings.default_tenant
+    assert "gp7788" in vdoc.content
+
+    db_session.delete(v)
+    db_session.commit()
+    assert db_session.query(SearchDocument).filter_by(entity_type="vehicle", entity_id=v.id).count() == 0
+
+
+def test_user_search_phone_forms_and_ranking(client, db_session):
+    _user(db_session, "search-phone@example.com", first_name="Sipho", last_name="Ndlovu", phone="+27831112222")
+    for q in ("0831112222", "+27 83 111 2222", "831112", "sipho ndlovu", "ndl"):
+        resp = client.get("/api/users/search", params={"query": q})
+        assert resp.status_code == 200
+        assert [r["email"] for r in resp.json()] == ["search-phone@example.com"], q
+
+
+def test_unified_search_vehicles_by_plate_and_owner(client, db_session):
+    owner = _user(db_session, "search-owner@example.com", first_name="Lerato", phone="0723334444")
+    db_session.add(Vehicle(user_id=owner.id, plate="CA 123-456", make="VW", model="Polo"))
+    db_session.commit()
+
+    data = client.get("/api/search", params={"q": "ca123456"}).json()
+    assert [r["type"] for r in data["results"]] == ["vehicle"]
+    assert data["results"][0]["user"]["email"] == "search-owner@example.com"
+
+    vehicles = client.get("/api/users/vehicles/search", params={"q": "lerato"}).json()
+    assert [v["plate"] for v in vehicles] == ["CA 123-456"]
+
+    assert client.get("/api/search", params={"q": "x", "types": "orders"}).status_code == 400
+
+
+def test_rebuild_index(db_session):
+    _user(db_session, "search-rebuild@example.com", first_name="Rebuild")
+    db_session.query(SearchDocument).delete()
+    db_session.commit()
+    counts = search_index.rebuild_search_index(db_session)
+    assert counts["user"] == db_session.query(User).count()
+    hits = search_index.search(db_session, "rebuild", entity_types=("user",))
+    assert len(hits) == 1
+
+
+def test_users_routes_search_only_the_callers_tenant(client, db_session):
+    u = _user(db_session, "search-other-tenant@example.com", first_name="Nomvula", phone="0846667777")
+    v = db_session.query(Vehicle).filter_by(user_id=u.id).first()
+    if not v:
+        db_session.add(Vehicle(user_id=u.id, plate="ND 55-66", make="Kia", model="Rio"))
+    u.tenant_id = "search-other"
+    db_session.commit()
+
+    assert client.get("/api/users/search", params={"query": "nomvula"}).json() == []
+    assert client.get("/api/users/vehicles/search", params={"q": "nd5566"}).json() == []
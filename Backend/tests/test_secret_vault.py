@@ -0,0 +1,116 @@
+from concurrent.futures import wait
+from types import SimpleNamespace
+
+import pytest
+
+from app.models import Tenant, TenantIntegration
+from app.services import secret_vault as sv
+from app.services.secret_vault import SecretDescriptor, SecretVaultClient
+from app.services.tenant_settings import TenantSettingsService
+
+
+class StubSecretClient:
+    """In-memory stand-in for ``azure.keyvault.secrets.SecretClient``."""
+
+    def __init__(self, values):
+        self.values = dict(values)
+        self.calls = []
+        self.fail = False
+
+    def get_secret(self, name, version=None):
+        self.calls.append((name, version))
+        if self.fail:
+            raise RuntimeError("vault unavailable")
+        return SimpleNamespace(value=self.values.get(name))
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(sv, "time", SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+def _vault(stub, **kw):
+    return SecretVaultClient(client=stub, **{"ttl_seconds": 60, "refresh_ratio": 0.5, **kw})
+
+
+def test_repeated_reads_hit_cache(clock):
+    stub = StubSecretClient({"yoco-key": "sk_1"})
+    vault = _vault(stub)
+    descriptor = SecretDescriptor(vault_name="yoco-key", fallback="fb")
+    assert [vault.get_secret(descriptor) for _ in range(100)] == ["sk_1"] * 100
+    assert len(stub.calls) == 1
+    assert vault.stats["hits"] == 99 and vault.stats["misses"] == 1
+    # Missing secrets use the fallback without re-querying the vault
+    missing = SecretDescriptor(vault_name="absent", fallback="fb")
+    assert vault.get_secret(missing) == vault.get_secret(missing) == "fb"
+    assert len(stub.calls) == 2
+
+
+def test_refresh_ahead_and_stale_on_error(clock):
+    stub = StubSecretClient({"yoco-key": "sk_1"})
+    vault = _vault(stub, max_stale_seconds=120)
+    descriptor = SecretDescriptor(vault_name="yoco-key")
+    assert vault.get_secret(descriptor) == "sk_1"
+
+    stub.values["yoco-key"] = "sk_2"
+    clock[0] += 40  # past the refresh point, within the TTL
+    assert vault.get_secret(descriptor) == "sk_1"  # served from cache while refreshing
+    wait(list(vault._refreshing.values()))
+    assert vault.get_secret(descriptor) == "sk_2"
+    assert vault.stats["refreshes"] == 1
+
+    stub.fail = True
+    clock[0] += 100  # expired; the vault errors, so the last value is served
+    assert vault.get_secret(descriptor) == "sk_2"
+    assert vault.stats["stale_served"] == 1 and vault.stats["errors"] == 1
+    clock[0] += 200  # beyond max staleness: fall back
+    assert vault.get_secret(descriptor) is None
+
+
+def test_invalidation_discards_in_flight_loads(clock):
+    stub = StubSecretClient({"jwt": "old"})
+    vault = _vault(stub)
+    descriptor = SecretDescriptor(vault_name="jwt")
+    generation = vault._generation
+    vault.invalidate("jwt")
+    vault._load(("jwt", ""), generation)  # fetched before the invalidation
+    assert vault._cache == {}
+
+    assert vault.get_secret(descriptor) == "old"
+    stub.values["jwt"] = "new"
+    vault.invalidate("jwt")
+    assert vault.get_secret(descriptor) == "new"
+    # Pinned versions never expire
+    pinned = SecretDescriptor(vault_name="jwt", version="v1")
+    vault.get_secret(pinned)
+    clock[0] += 10_000
+    calls = len(stub.calls)
+    vault.get_secret(pinned)
+    assert len(stub.calls) == calls
+
+
+def test_settings_load_prefetches_integration_secrets(db_session, clock, monkeypatch):
+    stub = StubSecretClient({"t-yoco-secret": "sk_vault", "t-yoco-hook": "wh_vault"})
+    vault = _vault(stub)
+    monkeypatch.setattr("app.services.tenant_settings.secret_vault", vault)
+    tenant = Tenant(id="vault-tenant", name="Vault Tenant", loyalty_type="standard")
+    db_session.add(tenant)
+    db_session.add(TenantIntegration(
+        tenant_id=tenant.id, category="payments", provider="yoco", config={},
+        secrets={"secret_key": {"vault_name": "t-yoco-secret"}, "webhook_secret": {"vault_name": "t-yoco-hook"}},
+    ))
+    db_session.commit()
+    db_session.refresh(tenant)
+    try:
+        service = TenantSettingsService(tenant)
+        assert sorted(stub.calls) == [("t-yoco-hook", None), ("t-yoco-secret", None)]
+        assert service.payment.secret_key == "sk_vault" and service.payment.webhook_secret == "wh_vault"
+        TenantSettingsService(tenant).payment  # noqa: B018
+        assert len(stub.calls) == 2
+        assert vault.stats["prefetched"] == 2 and vault.stats["hits"] == 4
+    finally:
+        db_session.query(TenantIntegration).filter_by(tenant_id=tenant.id).delete()
+        db_session.query(Tenant).filter_by(id=tenant.id).delete()
+        db_session.commit()
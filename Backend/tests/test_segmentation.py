@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from sqlalchemy import event
+
+from app.analytics import segmentation
+from app.analytics.refresh_customers import refresh_customer_metrics
+from app.core.database import engine
+from app.models import AggregatedCustomerMetrics, CustomerSegmentSummary, Order, Tenant, User
+from app.plugins.auth.routes import create_access_token
+from config import settings
+
+NOW = datetime.utcnow()
+TENANTS = (settings.default_tenant, "seg-b")
+
+
+@pytest.fixture
+def customers(db_session):
+    if not db_session.get(Tenant, "seg-b"):
+        db_session.add(Tenant(id="seg-b", name="Seg B", loyalty_type="standard"))
+    admin = User(email="seg-admin@example.com", tenant_id=settings.default_tenant, role="admin")
+    db_session.add(admin)
+    users = {}
+    # Same shape in both tenants; tenant B spends 100x more
+    for tenant, scale in zip(TENANTS, (1, 100)):
+        for i in range(10):
+            user = User(email=f"seg-{tenant}-{i}@example.com", tenant_id=tenant, role="user")
+            db_session.add(user)
+            db_session.flush()
+            users[(tenant, i)] = user
+            for n in range(i + 1):
+                db_session.add(Order(user_id=user.id, tenant_id=tenant, extras=[], status="started",
+                                     amount=(i + 1) * 1000 * scale, started_at=NOW - timedelta(days=(9 - i) * 7 + n)))
+            for n in range(i):
+                db_session.add(Order(user_id=user.id, tenant_id=tenant, extras=[], status="completed",
+                                     amount=5000, created_at=NOW - timedelta(days=n)))
+    db_session.commit()
+    yield admin, users
+    ids = [u.id for u in users.values()] + [admin.id]
+    db_session.query(CustomerSegmentSummary).delete()
+    db_session.query(AggregatedCustomerMetrics).delete()
+    db_session.query(Order).filter(Order.user_id.in_(ids)).delete(synchronize_session=False)
+    db_session.query(User).filter(User.id.in_(ids)).delete(synchronize_session=False)
+    db_session.query(Tenant).filter_by(id="seg-b").delete()
+    db_session.commit()
+
+
+def test_scores_are_partitioned_by_tenant(db_session, customers):
+    _, users = customers
+    assert refresh_customer_metrics(db_session) == 20
+
+    rows = {m.user_id: m for m in db_session.query(AggregatedCustomerMetrics).all()}
+    for tenant in TENANTS:
+        scored = [rows[users[(tenant, i)].id] for i in range(10)]
+        assert all(m.tenant_id == tenant for m in scored)
+        # Identical shape per tenant -> identical scores despite the 100x spend gap
+        assert [m.m_score for m in scored] == [1, 1, 1, 2, 2, 3, 3, 4, 4, 5]
+        assert [m.r_score for m in scored] == [1, 2, 2, 3, 3, 4, 4, 5, 5, 5]
+        assert scored[9].segment == "power_user" and scored[0].segment is None
+        assert scored[9].lifetime_washes == 10 and scored[9].washes_30d == 10
+    assert rows[users[("seg-b", 9)].id].lifetime_revenue == 100 * rows[users[(TENANTS[0], 9)].id].lifetime_revenue
+
+
+def test_vectorised_bounds_match_sorted_lists():
+    rng = np.random.default_rng(7)
+    codes = rng.integers(0, 3, size=500)
+    values = rng.integers(0, 50, size=500)
+    bounds = segmentation.tenant_quantile_bounds(values, codes, 3)
+    for g in range(3):
+        lst = sorted(values[codes == g].tolist())
+        assert bounds[g].tolist() == [lst[int(len(lst) * q)] for q in (0.2, 0.4, 0.6, 0.8)]
+
+
+def test_segment_endpoint_serves_stored_buckets(client, db_session, customers):
+    admin, _ = customers
+    headers = {"Authorization": f"Bearer {create_access_token(admin.email)}"}
+    live = client.get("/api/reports/customer-segments", headers=headers).json()
+    assert [row["segment"] for row in live] == ["Regular", "Occasional", "New"]
+
+    segmentation.refresh_segments(db_session)
+    statements = []
+    listener = lambda conn, cursor, stmt, *a: statements.append(stmt)  # noqa: E731
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        stored = client.get("/api/reports/customer-segments", headers=headers).json()
+        other_window = client.get("/api/reports/customer-segments?days=3", headers=headers).json()
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    assert stored == live
+    assert sum("customer_stats" in s for s in statements) == 1  # only the 3-day window ran live
+    assert sum(row["count"] for row in other_window) == sum(row["count"] for row in live)
+
+    # Stale buckets fall back to the live query
+    db_session.query(CustomerSegmentSummary).update({"computed_at": NOW - timedelta(days=1)})
+    db_session.commit()
+    assert segmentation.stored_value_segments(db_session, settings.default_tenant, 180) is None
@@ -0,0 +1,65 @@
+from datetime import datetime
+
+from sqlalchemy import text
+
+from app.core import slow_queries
+from app.core.database import engine
+from app.models import Tenant, User
+from app.plugins.auth.routes import create_access_token
+from config import settings
+
+
+def test_fingerprint_normalises_literals_and_in_lists():
+    a = slow_queries.fingerprint("SELECT * FROM users WHERE id IN (?, ?, ?) AND email = 'a@b.c' LIMIT 10")
+    b = slow_queries.fingerprint("SELECT *  FROM users\nWHERE id IN (?, ?) AND email = 'x' LIMIT 50")
+    assert a == b == "SELECT * FROM users WHERE id IN (...) AND email = ? LIMIT ?"
+    pg = "SELECT * FROM orders WHERE id IN (%(id_1_1)s, %(id_1_2)s, %(id_1_3)s)"
+    assert slow_queries.fingerprint(pg) == "SELECT * FROM orders WHERE id IN (...)"
+
+
+def test_records_timings_and_samples_only_slow(monkeypatch):
+    slow_queries.reset()
+    with engine.connect() as conn:
+        for i in range(3):
+            conn.execute(text("SELECT :v + 1"), {"v": i})
+    item = next(r for r in slow_queries.report()["items"] if r["fingerprint"] == "SELECT ? + ?")
+    assert item["count"] == 3 and item["slow_count"] == 0 and item["samples"] == []
+    assert item["max_ms"] >= item["p95_ms"] >= 0
+
+    monkeypatch.setattr(settings, "slow_query_threshold_ms", 0.0)
+    with engine.connect() as conn:
+        conn.execute(text("SELECT :v + 2"), {"v": 41})
+    slow = slow_queries.report(only_slow=True)["items"]
+    assert [r["fingerprint"] for r in slow] == ["SELECT ? + ?"]
+    params = slow[0]["samples"][0]["parameters"]
+    assert "41" not in params and "int" in params
+
+
+def test_table_is_bounded(monkeypatch):
+    slow_queries.reset()
+    monkeypatch.setattr(settings, "slow_query_max_fingerprints", 5)
+    for i in range(20):
+        slow_queries.record(f"SELECT * FROM t{'x' * i}", 1.0)
+    assert slow_queries.report()["fingerprints"] == 5
+
+
+def test_slow_queries_endpoint(client, db_session):
+    if not db_session.query(Tenant).filter_by(id="sqobs").first():
+        db_session.add(Tenant(id="sqobs", name="SQ", loyalty_type="standard", vertical_type="carwash",
+                              created_at=datetime.utcnow(), config={}))
+    if not db_session.query(User).filter_by(email="sqobs@example.com").first():
+        db_session.add(User(email="sqobs@example.com", tenant_id="sqobs", role="admin"))
+    if not db_session.query(User).filter_by(email="sqobs-root@example.com").first():
+        db_session.add(User(email="sqobs-root@example.com", tenant_id="sqobs", role="superadmin"))
+    db_session.commit()
+    admin = {"Authorization": f"Bearer {create_access_token('sqobs@example.com')}"}
+    assert client.get("/api/obs/slow-queries", headers=admin).status_code == 403
+    assert client.delete("/api/obs/slow-queries", headers=admin).status_code == 403
+
+    headers = {"Authorization": f"Bearer {create_access_token('sqobs-root@example.com')}"}
+    r = client.get("/api/obs/slow-queries", params={"sort": "count", "limit": 5}, headers=headers)
+    assert r.status_code == 200
+    body = r.json()
+    assert body["threshold_ms"] == settings.slow_query_threshold_ms
+    counts = [i["count"] for i in body["items"]]
+    assert counts == sorted(counts, reverse=True) and len(counts) <= 5
@@ -0,0 +1,99 @@
+import gzip
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from starlette.responses import Response, StreamingResponse
+
+from app.core.static_files import (
+    IMMUTABLE,
+    REVALIDATE,
+    PrecompressedStaticFiles,
+    SelectiveGZipMiddleware,
+    accepted_encodings,
+    cache_control_for,
+)
+from scripts.precompress_static import precompress
+
+BUNDLE = b"console.log('hello');\n" * 400
+
+
+@pytest.fixture
+def static_client(tmp_path):
+    (tmp_path / "assets").mkdir()
+    (tmp_path / "assets" / "index-DgHJooKT.js").write_bytes(BUNDLE)
+    (tmp_path / "index.html").write_bytes(b"<html></html>")
+    precompress(tmp_path, min_size=0)
+    app = FastAPI()
+    app.add_middleware(SelectiveGZipMiddleware, minimum_size=10)
+    app.mount("/static", PrecompressedStaticFiles(directory=tmp_path), name="static")
+
+    @app.get("/png")
+    def _png():
+        return Response(b"\x89PNG" + b"\0" * 2000, media_type="image/png")
+
+    @app.get("/text")
+    def _text(size: int = 2000, stream: bool = False):
+        if stream:
+            return StreamingResponse(iter([b"a" * size, b"b" * size]), media_type="text/plain")
+        return Response(b"a" * size, media_type="text/plain")
+
+    return TestClient(app)
+
+
+def test_serves_gzip_sibling_with_original_type_and_immutable_cache(static_client):
+    r = static_client.get("/static/assets/index-DgHJooKT.js", headers={"Accept-Encoding": "gzip"})
+    assert r.status_code == 200
+    assert r.headers["content-encoding"] == "gzip"
+    assert r.headers["content-type"].startswith(("text/javascript", "application/javascript"))
+    assert r.headers["cache-control"] == IMMUTABLE
+    assert "Accept-Encoding" in r.headers["vary"]
+    assert r.content == BUNDLE  # client transparently decodes
+
+    etag = r.headers["etag"]
+    r304 = static_client.get("/static/assets/index-DgHJooKT.js",
+                             headers={"Accept-Encoding": "gzip", "If-None-Match": etag})
+    assert r304.status_code == 304
+
+
+def test_identity_when_encoding_not_accepted(static_client):
+    r = static_client.get("/static/assets/index-DgHJooKT.js", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in r.headers
+    assert r.content == BUNDLE
+    html = static_client.get("/static/index.html", headers={"Accept-Encoding": "identity"})
+    assert html.headers["cache-control"] != IMMUTABLE
+
+
+def test_dynamic_gzip_skips_compressed_media(static_client):
+    r = static_client.get("/png", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in r.headers
+
+
+def test_dynamic_gzip_compresses_text(static_client):
+    r = static_client.get("/text", headers={"Accept-Encoding": "gzip"})
+    assert r.headers["content-encoding"] == "gzip" and r.content == b"a" * 2000
+    assert int(r.headers["content-length"]) < 2000
+    streamed = static_client.get("/text?stream=true", headers={"Accept-Encoding": "gzip"})
+    assert streamed.headers["content-encoding"] == "gzip" and streamed.content == b"a" * 2000 + b"b" * 2000
+    small = static_client.get("/text?size=5", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers and small.content == b"aaaaa"
+
+
+def test_helpers():
+    assert accepted_encodings("br;q=0, gzip;q=0.8, *") == {"gzip", "*"}
+    assert cache_control_for("assets/vendor-a1b2c3d4.js") == IMMUTABLE
+    assert cache_control_for("assets/some-component.js") != IMMUTABLE
+    assert cache_control_for("branding/t1/logo_light-0123456789abcdef.png") == IMMUTABLE
+    assert cache_control_for("branding/t1/app_icon-0123456789abcdef-256.webp") == IMMUTABLE
+    assert cache_control_for("branding/t1/favicon-0123456789abcdef.svg.gz") == IMMUTABLE
+    assert cache_control_for("branding/t1/assets.json") == REVALIDATE
+    assert cache_control_for("branding/t1/logo.png") == REVALIDATE
+
+
+def test_precompress_skips_small_and_incompressible(tmp_path):
+    (tmp_path / "tiny.js").write_bytes(b"x")
+    (tmp_path / "big.css").write_bytes(b"a{color:red}" * 200)
+    stats = precompress(tmp_path, min_size=100)
+    assert stats["skipped"] == 1 and stats["gzip"] == 1
+    assert gzip.decompress((tmp_path / "big.css.gz").read_bytes()) == b"a{color:red}" * 200
+    assert not (tmp_path / "tiny.js.gz").exists()
@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.vehicle_stats import rebuild_vehicle_wash_stats, record_order_washes
+from app.models import OrderVehicle, Vehicle, VehicleWashStats
+
+
+@pytest.fixture
+def user(make_customer):
+    return make_customer("wash-stats@example.com", first_name="Stat", phone="0845550000")
+
+
+@pytest.fixture
+def vehicle(db_session, user):
+    vehicle = Vehicle(user_id=user.id, plate="WS 100", make="Ford", model="Ranger")
+    db_session.add(vehicle)
+    db_session.commit()
+    return vehicle
+
+
+def test_lifecycle_counts_each_order_once(client, db_session, user, vehicle, make_order, wash_service):
+    order = make_order(user, wash_service, status="paid")
+
+    # Vehicle linked after payment -> counted at start
+    assert client.post(f"/api/payments/start-wash/{order.id}", json={"vehicle_id": vehicle.id}).status_code == 200
+    # Ending the wash must not double count
+    assert client.post(f"/api/payments/end-wash/{order.id}").status_code == 200
+    client.post(f"/api/payments/end-wash/{order.id}")
+
+    stats = db_session.get(VehicleWashStats, vehicle.id)
+    db_session.refresh(stats)
+    assert stats.total_washes == 1
+    assert stats.last_order_id == order.id and stats.last_service_id == wash_service.id
+
+    # Unpaid order started then completed counts at end_wash
+    second = make_order(user, wash_service, status="pending")
+    client.post(f"/api/payments/start-wash/{second.id}", json={"vehicle_id": vehicle.id})
+    db_session.refresh(stats)
+    assert stats.total_washes == 1
+    client.post(f"/api/payments/end-wash/{second.id}")
+    db_session.refresh(stats)
+    assert stats.total_washes == 2 and stats.last_order_id == second.id
+
+
+def test_vehicle_search_and_order_user_use_counters(client, db_session, user, vehicle, make_order, wash_service):
+    old = make_order(user, wash_service, status="completed", created_at=datetime.utcnow() - timedelta(days=3))
+    new = make_order(user, wash_service, status="paid")
+    for o in (new, old):  # out of order on purpose: last wash must stay the newest
+        db_session.add(OrderVehicle(order_id=o.id, vehicle_id=vehicle.id))
+        db_session.flush()
+        record_order_washes(db_session, o)
+    db_session.commit()
+
+    found = client.get("/api/users/vehicles/search", params={"q": "ws 100"}).json()
+    assert found[0]["total_washes"] == 2
+    assert found[0]["last_wash"] == new.created_at.isoformat()
+    assert found[0]["last_service"] == wash_service.name
+
+    data = client.get(f"/api/payments/order-user/{new.id}").json()
+    assert data["vehicles"][0]["total_washes"] == 2
+
+
+def test_rebuild_matches_incremental(db_session, user, vehicle, make_order, wash_service):
+    for status in ("paid", "completed", "pending"):
+        o = make_order(user, wash_service, status=status)
+        db_session.add(OrderVehicle(order_id=o.id, vehicle_id=vehicle.id))
+    db_session.commit()
+
+    assert rebuild_vehicle_wash_stats(db_session) == 1
+    stats = db_session.get(VehicleWashStats, vehicle.id)
+    assert stats.total_washes == 2
+    assert db_session.query(OrderVehicle).filter_by(wash_counted=True).count() == 2
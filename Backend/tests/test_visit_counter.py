@@ -0,0 +1,52 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base
+from app.models import ResourceVersion, SearchDocument, Tenant, User, VisitCount
+from app.services.visit_counter import increment_visits
+from config import settings
+
+
+def test_increment_returns_new_count(db_session):
+    user = db_session.query(User).first()
+    db_session.query(VisitCount).delete()
+    db_session.commit()
+    assert increment_visits(db_session, user.tenant_id, user.id) == 1
+    assert increment_visits(db_session, user.tenant_id, user.id, by=3) == 4
+    db_session.commit()
+    rows = db_session.query(VisitCount).filter_by(user_id=user.id, tenant_id=user.tenant_id).all()
+    assert len(rows) == 1 and rows[0].count == 4
+
+
+def test_parallel_visits_are_not_lost(tmp_path):
+    # File-backed database so each worker gets its own connection / transaction
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'visits.db'}", connect_args={"check_same_thread": False, "timeout": 30}
+    )
+    tables = [Tenant.__table__, User.__table__, VisitCount.__table__, SearchDocument.__table__, ResourceVersion.__table__]
+    Base.metadata.create_all(engine, tables=tables)
+    Session = sessionmaker(bind=engine)
+    with Session() as s:
+        s.add(Tenant(id=settings.default_tenant, name="T", loyalty_type="standard", created_at=datetime.utcnow()))
+        user = User(email="parallel@example.com", tenant_id=settings.default_tenant)
+        s.add(user)
+        s.commit()
+        user_id = user.id
+
+    def visit(_):
+        with Session() as s:
+            count = increment_visits(s, settings.default_tenant, user_id)
+            s.commit()
+            return count
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        counts = list(pool.map(visit, range(100)))
+
+    # Every increment observed a distinct total and none were lost
+    assert sorted(counts) == list(range(1, 101))
+    with Session() as s:
+        assert s.query(VisitCount).filter_by(user_id=user_id).one().count == 100
+    engine.dispose()
@@ -0,0 +1,158 @@
+import asyncio
+import json
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import event
+
+from app.core import wash_board
+from app.core.database import engine
+from app.models import Order, OrderVehicle, Payment, Service, User, Vehicle
+from config import settings
+
+TID = settings.default_tenant
+
+
+@pytest.fixture
+def orders(db_session):
+    user = db_session.query(User).filter_by(email="testuser@example.com").first()
+    svc = Service(category="wash", name="Board Wash", base_price=1000)
+    db_session.add(svc)
+    db_session.flush()
+    created = []
+    for i in range(3):
+        order = Order(service_id=svc.id, quantity=1, extras=[], user_id=user.id, status="paid",
+                      tenant_id=TID, payment_pin=f"77{i:02d}")
+        db_session.add(order)
+        db_session.flush()
+        vehicle = Vehicle(user_id=user.id, plate=f"BRD{i}", make="VW", model="Golf")
+        db_session.add(vehicle)
+        db_session.flush()
+        db_session.add(OrderVehicle(order_id=order.id, vehicle_id=vehicle.id))
+        db_session.add(Payment(order_id=order.id, amount=1000 + i, status="success", method="yoco",
+                               reference=f"board-{i}", created_at=datetime.utcnow()))
+        created.append(order)
+    db_session.commit()
+    yield created
+    db_session.query(Payment).delete()
+    db_session.query(OrderVehicle).delete()
+    db_session.query(Order).delete()
+    db_session.query(Service).delete()
+    db_session.commit()
+
+
+def test_recent_verifications_reads_payments_once(client, db_session, orders):
+    for order in orders:
+        order.order_redeemed_at = datetime.utcnow()
+    db_session.commit()
+
+    statements = []
+    listener = lambda conn, cursor, stmt, *a: statements.append(stmt)  # noqa: E731
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        r = client.get("/api/payments/recent-verifications")
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    assert r.status_code == 200
+    rows = r.json()
+    assert {row["order_id"] for row in rows} == {o.id for o in orders}
+    assert {row["amount_cents"] for row in rows} == {1000, 1001, 1002}
+    assert all(row["vehicle"]["make"] == "VW" for row in rows)
+    assert sum("FROM payments" in s for s in statements) == 1
+
+
+def _events(chunks):
+    out = []
+    for chunk in chunks:
+        if chunk.startswith(":"):
+            continue
+        fields = dict(line.split(": ", 1) for line in chunk.strip().splitlines() if not line.startswith("retry"))
+        out.append((fields["event"], json.loads(fields["data"])))
+    return out
+
+
+def test_stream_sends_snapshot_then_lifecycle_deltas(client, db_session, orders, monkeypatch):
+    monkeypatch.setattr(settings, "wash_board_heartbeat_seconds", 0.05)
+    first, second, _ = orders
+    client.post(f"/api/payments/start-wash/{first.id}", json={"vehicle_id": first.vehicles[0].vehicle_id})
+
+    async def scenario():
+        stream = wash_board.open_stream(TID)
+        initial = wash_board.snapshot(db_session, TID)
+        disconnected = asyncio.Event()
+
+        async def is_disconnected():
+            return disconnected.is_set()
+
+        gen = wash_board.event_stream(TID, stream, initial, is_disconnected)
+        chunks = [await gen.__anext__()]
+        # Writers run in worker threads, as sync endpoints do
+        await asyncio.to_thread(client.post, f"/api/payments/start-wash/{second.id}",
+                                json={"vehicle_id": second.vehicles[0].vehicle_id})
+        await asyncio.to_thread(client.post, f"/api/payments/end-wash/{first.id}")
+        await asyncio.to_thread(client.get, "/api/payments/verify-payment", params={"pin": second.payment_pin})
+        for _ in range(3):
+            chunks.append(await gen.__anext__())
+        assert (await gen.__anext__()).startswith(": keep-alive")
+        disconnected.set()
+        with pytest.raises(StopAsyncIteration):
+            await gen.__anext__()
+        return chunks
+
+    events = _events(asyncio.run(scenario()))
+    assert [name for name, _ in events] == ["snapshot", "wash_started", "wash_ended", "payment_verified"]
+    snap = events[0][1]
+    assert [row["order_id"] for row in snap["active"]] == [first.id]
+    assert events[1][1]["wash"]["order_id"] == second.id and events[1][1]["wash"]["status"] == "started"
+    assert events[2][1]["wash"]["status"] == "ended" and events[2][1]["wash"]["duration_seconds"] is not None
+    verified = events[3][1]
+    assert verified["order_id"] == second.id and verified["verification"]["amount_cents"] == 1001
+    assert wash_board._streams == {}  # closed streams unregister
+
+
+def test_publish_skipped_without_listeners(db_session, orders, monkeypatch):
+    calls = []
+    monkeypatch.setattr(wash_board, "_orders", lambda db: calls.append(1))
+    wash_board.publish_order(db_session, orders[0].id, "wash_started")
+    assert calls == []
+
+
+def test_endpoint_streams_snapshot(db_session, orders):
+    # TestClient buffers whole responses, so drive the endpoint's body iterator directly
+    from app.plugins.payments.routes import wash_board_stream
+
+    class _Request:
+        async def is_disconnected(self):
+            return True
+
+    async def first_chunk():
+        ctx = SimpleNamespace(id=TID)
+        staff = SimpleNamespace(tenant_id=TID, role="staff")
+        resp = await wash_board_stream(_Request(), ctx=ctx, current_user=staff, db=db_session)
+        assert resp.media_type == "text/event-stream" and resp.headers["cache-control"] == "no-cache"
+        chunk = await resp.body_iterator.__anext__()
+        await resp.body_iterator.aclose()
+        return chunk
+
+    name, data = _events([asyncio.run(first_chunk())])[0]
+    assert name == "snapshot" and data["active"] == [] and data["recent"] == []
+    assert wash_board._streams == {}
+
+
+def test_endpoint_requires_staff_of_the_tenant(db_session, monkeypatch):
+    from fastapi import HTTPException
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.plugins.payments.routes import wash_board_stream
+
+    monkeypatch.setattr(app, "dependency_overrides", {})  # other tests' client fixture bypasses require_staff
+    assert TestClient(app).get("/api/payments/wash-board/stream", headers={"X-Tenant-ID": TID}).status_code in (401, 403)
+
+    async def open_as(user):
+        return await wash_board_stream(SimpleNamespace(), ctx=SimpleNamespace(id=TID), current_user=user, db=db_session)
+
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(open_as(SimpleNamespace(tenant_id="other-tenant", role="staff")))
+    assert exc.value.status_code == 403
+    assert wash_board._streams == {}